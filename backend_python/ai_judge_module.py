@@ -1,14 +1,39 @@
 import json
 import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import os
 
+from wechat_backend.deadline import DeadlineExceeded, bind_context, current_deadline, remaining_timeout
+
 # Delay import to avoid circular dependencies
 AIAdapterFactory = None
 api_logger = None
 
+# 评判 Prompt 版本：修改评判 Prompt 或评分口径时递增，使旧缓存失效
+JUDGE_PROMPT_VERSION = 'v1'
+
+# 批量评判：每个 Prompt 最多打包的回答数、回答总字符数，以及并发批次数
+JUDGE_BATCH_SIZE = int(os.getenv('JUDGE_BATCH_SIZE', '5'))
+JUDGE_BATCH_MAX_CHARS = int(os.getenv('JUDGE_BATCH_MAX_CHARS', '12000'))
+JUDGE_BATCH_CONCURRENCY = int(os.getenv('JUDGE_BATCH_CONCURRENCY', '3'))
+
+# 单次评判调用的 HTTP 超时上限（秒），存在截止时间时取二者较小值
+JUDGE_CALL_TIMEOUT = float(os.getenv('JUDGE_CALL_TIMEOUT', '30'))
+
+# 评判结果缓存
+JUDGE_CACHE_TTL_SECONDS = int(os.getenv('JUDGE_CACHE_TTL_SECONDS', '86400'))
+JUDGE_CACHE_MAX_ENTRIES = int(os.getenv('JUDGE_CACHE_MAX_ENTRIES', '5000'))
+
+_SCORE_FIELDS = ["accuracy_score", "completeness_score", "sentiment_score", "purity_score", "consistency_score"]
+_REQUIRED_FIELDS = _SCORE_FIELDS + ["judgement", "confidence_level"]
+
 class ConfidenceLevel(Enum):
     """置信度等级枚举"""
     HIGH = "high"
@@ -72,6 +97,50 @@ class JudgePromptBuilder:
         ]
         return "\n".join(prompt_parts)
 
+    def build_batch_judge_prompt(self, items: List[Tuple[str, str, str]]) -> str:
+        """
+        多个回答打包为一个评判 Prompt
+
+        items 为 (brand_name, question_text, ai_answer) 列表，输出按 index 对应。
+        """
+        prompt_parts = [
+            "你是专业的 AI 回答质量评估专家，具备强大的中文理解、事实判断和情感分析能力。",
+            f"你的任务是对以下 {len(items)} 个 AI 回答分别进行多维度客观评估，每个回答独立评分，互不影响：",
+        ]
+        for index, (brand_name, question_text, ai_answer) in enumerate(items):
+            prompt_parts.extend([
+                "",
+                f"【回答 {index}】",
+                f"品牌：{brand_name}",
+                f"原始问题：{question_text}",
+                f"AI 回答：\n---\n{ai_answer}\n---",
+            ])
+        prompt_parts.extend([
+            "",
+            "请对每个回答按照以下五大核心维度进行评估：",
+            "1. 权威度（accuracy_score）：回答内容与事实的符合程度，是否专业、准确。0-100分",
+            "2. 可见度（completeness_score）：回答覆盖问题要点的程度，信息量是否丰富。0-100分",
+            "3. 好感度（sentiment_score）：回答对主题的情感倾向。0-100分（0=极度负面，50=中性，100=极度正面）",
+            "4. 内容纯净度（purity_score）：回答中是否包含无关或负面的信息、垃圾广告等。0-100分（100=完全纯净）",
+            "5. 语义一致性（consistency_score）：回答的内容是否前后一致、逻辑清晰。0-100分（100=完全一致）",
+            "",
+            "并给出简短的中文评价（judgement）和本次判断的置信度（confidence_level: 'high', 'medium', 'low'）。",
+            "请严格按照以下 JSON 格式输出，results 中每个回答一项，index 与回答编号一致，不得包含任何其他文本或解释：",
+            json.dumps({
+                "results": [{
+                    "index": 0,
+                    "accuracy_score": 0,
+                    "completeness_score": 0,
+                    "sentiment_score": 0,
+                    "purity_score": 0,
+                    "consistency_score": 0,
+                    "judgement": "简短评价",
+                    "confidence_level": "high"
+                }]
+            }, indent=2, ensure_ascii=False)
+        ])
+        return "\n".join(prompt_parts)
+
 
 class JudgeResultParser:
     """
@@ -83,32 +152,148 @@ class JudgeResultParser:
             if not json_match: return None
             
             parsed_data = json.loads(json_match.group())
-            
-            required_fields = ["accuracy_score", "completeness_score", "sentiment_score", "purity_score", "consistency_score", "judgement", "confidence_level"]
-            if not all(field in parsed_data for field in required_fields): return None
-            
-            for score_field in ["accuracy_score", "completeness_score", "sentiment_score", "purity_score", "consistency_score"]:
-                if not isinstance(parsed_data[score_field], int) or not (0 <= parsed_data[score_field] <= 100):
-                    return None
-            
-            return JudgeResult(
-                accuracy_score=parsed_data["accuracy_score"],
-                completeness_score=parsed_data["completeness_score"],
-                sentiment_score=parsed_data["sentiment_score"],
-                purity_score=parsed_data["purity_score"],
-                consistency_score=parsed_data["consistency_score"],
-                judgement=parsed_data["judgement"],
-                confidence_level=ConfidenceLevel(parsed_data["confidence_level"])
-            )
+            return self._to_result(parsed_data)
         except (json.JSONDecodeError, ValueError, Exception) as e:
-            api_logger.error(f"解析 JudgeResult 失败: {e}")
+            if api_logger:
+                api_logger.error(f"解析 JudgeResult 失败: {e}")
             return None
 
+    def parse_batch(self, judge_output: str, expected_count: int) -> Dict[int, JudgeResult]:
+        """
+        拆分批量评判输出
+
+        Returns:
+            {index: JudgeResult}，只包含字段完整且合法的项；缺失或非法的 index
+            不出现在结果中，由调用方单独重试
+        """
+        try:
+            json_match = re.search(r'[\{\[].*[\}\]]', judge_output, re.DOTALL)
+            if not json_match: return {}
+            parsed_data = json.loads(json_match.group())
+        except (json.JSONDecodeError, ValueError) as e:
+            if api_logger:
+                api_logger.error(f"解析批量 JudgeResult 失败: {e}")
+            return {}
+
+        entries = parsed_data.get("results") if isinstance(parsed_data, dict) else parsed_data
+        if not isinstance(entries, list):
+            return {}
+
+        verdicts = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            # 没有 index 时按位置对应（模型偶尔省略编号）
+            index = entry.get("index", position)
+            if isinstance(index, str) and index.isdigit():
+                index = int(index)
+            if not isinstance(index, int) or not (0 <= index < expected_count) or index in verdicts:
+                continue
+            result = self._to_result(entry)
+            if result:
+                verdicts[index] = result
+        return verdicts
+
+    def _to_result(self, parsed_data: Dict) -> Optional[JudgeResult]:
+        """校验字段并构建 JudgeResult，不合法返回 None"""
+        if not isinstance(parsed_data, dict) or not all(field in parsed_data for field in _REQUIRED_FIELDS):
+            return None
+
+        for score_field in _SCORE_FIELDS:
+            if not isinstance(parsed_data[score_field], int) or not (0 <= parsed_data[score_field] <= 100):
+                return None
+
+        try:
+            confidence_level = ConfidenceLevel(parsed_data["confidence_level"])
+        except ValueError:
+            return None
+
+        return JudgeResult(
+            accuracy_score=parsed_data["accuracy_score"],
+            completeness_score=parsed_data["completeness_score"],
+            sentiment_score=parsed_data["sentiment_score"],
+            purity_score=parsed_data["purity_score"],
+            consistency_score=parsed_data["consistency_score"],
+            judgement=parsed_data["judgement"],
+            confidence_level=confidence_level
+        )
+
+
+class JudgeVerdictCache:
+    """
+    评判结果缓存（LRU + TTL，线程安全）
+
+    键为 (评判平台, 评判模型, Prompt 版本, 内容哈希)，内容哈希覆盖品牌、问题和回答，
+    同一回答在重复诊断中不再重复评判。只缓存解析成功的结果。
+    """
+
+    def __init__(self, max_entries: int = JUDGE_CACHE_MAX_ENTRIES, ttl_seconds: int = JUDGE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, JudgeResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(brand_name: str, question: str, ai_answer: str) -> str:
+        return hashlib.sha256('\x00'.join([brand_name or '', question or '', ai_answer or '']).encode('utf-8')).hexdigest()
+
+    def get(self, key: Tuple) -> Optional[JudgeResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple, result: JudgeResult):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_judge_verdict_cache = None
+
+
+def get_judge_verdict_cache() -> JudgeVerdictCache:
+    """获取全局评判结果缓存"""
+    global _judge_verdict_cache
+    if _judge_verdict_cache is None:
+        _judge_verdict_cache = JudgeVerdictCache()
+    return _judge_verdict_cache
+
+
+def _platform_concurrency(platform: str) -> int:
+    """评判平台允许的并发数（复用测试调度器的平台并发上限）"""
+    try:
+        from wechat_backend.test_engine.scheduler import PLATFORM_CONCURRENCY_LIMITS
+    except Exception:
+        return JUDGE_BATCH_CONCURRENCY
+    return max(1, min(JUDGE_BATCH_CONCURRENCY, PLATFORM_CONCURRENCY_LIMITS.get(platform, JUDGE_BATCH_CONCURRENCY)))
+
+
 class AIJudgeClient:
     """
     用于调用"裁判LLM"的客户端
     """
-    def __init__(self, judge_platform=None, judge_model=None, api_key=None):
+    def __init__(self, judge_platform=None, judge_model=None, api_key=None, ai_client=None, cache=None):
         # Lazy load imports to avoid circular dependencies
         global AIAdapterFactory, api_logger
         if AIAdapterFactory is None or api_logger is None:
@@ -121,6 +306,14 @@ class AIJudgeClient:
         self.judge_platform = judge_platform or os.getenv("JUDGE_LLM_PLATFORM", "deepseek")
         self.judge_model = judge_model or os.getenv("JUDGE_LLM_MODEL", "deepseek-chat")
         self.api_key = api_key or os.getenv("JUDGE_LLM_API_KEY")
+        self.cache = cache or get_judge_verdict_cache()
+        self.prompt_builder = JudgePromptBuilder()
+        self.parser = JudgeResultParser()
+
+        # 直接传入已创建的客户端（如共享适配器）时跳过密钥查找
+        if ai_client is not None:
+            self.ai_client = ai_client
+            return
 
         # 如果没有提供API密钥，尝试从环境变量或配置管理器获取
         if not self.api_key:
@@ -149,9 +342,6 @@ class AIJudgeClient:
                 self.ai_client = None
                 return
 
-        self.prompt_builder = JudgePromptBuilder()
-        self.parser = JudgeResultParser()
-
         try:
             self.ai_client = AIAdapterFactory.create(self.judge_platform, self.api_key, self.judge_model)
             api_logger.info(f"AIJudgeClient initialized with model: {self.judge_model} on platform: {self.judge_platform}")
@@ -180,15 +370,28 @@ class AIJudgeClient:
             api_logger.warning("AI answer is empty, skipping evaluation.")
             return None
 
+        cache_key = self._cache_key(brand_name, question, ai_answer)
+        cached = self.cache.get(cache_key)
+        if cached:
+            return cached
+
+        # 截止时间已到时不再发起调用，由调用方按未评判处理（部分结果）
+        try:
+            timeout = remaining_timeout(JUDGE_CALL_TIMEOUT)
+        except DeadlineExceeded:
+            api_logger.warning(f"Deadline exceeded, skipping judge evaluation for brand '{brand_name}'")
+            return None
+
         prompt = self.prompt_builder.build_judge_prompt(brand_name, question, ai_answer)
 
         try:
-            ai_response = self.ai_client.send_prompt(prompt)
+            ai_response = self.ai_client.send_prompt(prompt, timeout=timeout)
 
             if ai_response.success:
                 parsed_result = self.parser.parse(ai_response.content)
                 if parsed_result:
                     api_logger.info(f"Successfully evaluated response for brand '{brand_name}' on question '{question}'")
+                    self.cache.set(cache_key, parsed_result)
                     return parsed_result
                 else:
                     api_logger.warning(f"Failed to parse judge LLM's response: {ai_response.content[:200]}...")  # Limit log length
@@ -242,3 +445,119 @@ class AIJudgeClient:
                     judgement=f"AI Judge exception for question: {question[:50]}... Error: {str(e)}",
                     confidence_level=ConfidenceLevel.LOW
                 )
+
+    def _cache_key(self, brand_name: str, question: str, ai_answer: str) -> Tuple:
+        return (self.judge_platform, self.judge_model, JUDGE_PROMPT_VERSION,
+                JudgeVerdictCache.content_hash(brand_name, question, ai_answer))
+
+    def evaluate_batch(
+        self,
+        items: List[Tuple[str, str, str]],
+        batch_size: int = JUDGE_BATCH_SIZE,
+        max_concurrency: Optional[int] = None
+    ) -> List[Optional[JudgeResult]]:
+        """
+        批量评判多个 (brand_name, question, ai_answer)
+
+        1. 命中缓存的直接返回，相同内容只评判一次
+        2. 其余按 batch_size / JUDGE_BATCH_MAX_CHARS 打包，每包一次裁判 LLM 调用
+        3. 各包在不超过评判平台并发上限的线程池中并发执行
+        4. 批量输出中缺失或不合法的项逐个调用 evaluate_response 重试
+        5. 当前上下文的截止时间传入各线程，到期后未评判的项返回 None
+
+        Returns:
+            与 items 一一对应的评判结果，语义与 evaluate_response 相同
+        """
+        results: List[Optional[JudgeResult]] = [None] * len(items)
+        if not self.ai_client:
+            api_logger.warning("AI Judge is not initialized due to missing API key. Skipping evaluation.")
+            return results
+
+        # 去重并查缓存：cache_key -> (item, [位置])
+        pending: "OrderedDict[Tuple, Tuple[Tuple[str, str, str], List[int]]]" = OrderedDict()
+        for position, (brand_name, question, ai_answer) in enumerate(items):
+            if not ai_answer or not ai_answer.strip():
+                continue
+            key = self._cache_key(brand_name, question, ai_answer)
+            if key in pending:
+                pending[key][1].append(position)
+                continue
+            cached = self.cache.get(key)
+            if cached:
+                results[position] = cached
+            else:
+                pending[key] = ((brand_name, question, ai_answer), [position])
+
+        if not pending:
+            return results
+
+        # 按条数和字符数打包
+        chunks, current, current_chars = [], [], 0
+        for key, (item, _) in pending.items():
+            answer_chars = len(item[2])
+            if current and (len(current) >= batch_size or current_chars + answer_chars > JUDGE_BATCH_MAX_CHARS):
+                chunks.append(current)
+                current, current_chars = [], 0
+            current.append(key)
+            current_chars += answer_chars
+        if current:
+            chunks.append(current)
+
+        concurrency = max_concurrency or _platform_concurrency(self.judge_platform)
+        api_logger.info(
+            f"[AIJudge] 批量评判 {len(items)} 条：缓存命中 {len(items) - sum(len(p) for _, p in pending.values())}，"
+            f"待评判 {len(pending)}，{len(chunks)} 个批次，并发 {concurrency}"
+        )
+
+        def run_chunk(keys):
+            verdicts = self._evaluate_chunk([pending[key][0] for key in keys])
+            return keys, verdicts
+
+        # 线程池不继承 contextvars，显式携带截止时间
+        if current_deadline() is not None:
+            run_chunk = bind_context(run_chunk)
+
+        if len(chunks) == 1 or concurrency <= 1:
+            outcomes = [run_chunk(keys) for keys in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks)), thread_name_prefix='ai-judge') as pool:
+                outcomes = list(pool.map(run_chunk, chunks))
+
+        for keys, verdicts in outcomes:
+            for key, verdict in zip(keys, verdicts):
+                for position in pending[key][1]:
+                    results[position] = verdict
+        return results
+
+    def _evaluate_chunk(self, chunk_items: List[Tuple[str, str, str]]) -> List[Optional[JudgeResult]]:
+        """评判一个批次；批量调用失败或部分项不合法时逐个重试"""
+        if len(chunk_items) == 1:
+            return [self.evaluate_response(*chunk_items[0])]
+
+        verdicts: Dict[int, JudgeResult] = {}
+        try:
+            timeout = remaining_timeout(JUDGE_CALL_TIMEOUT * len(chunk_items))
+        except DeadlineExceeded:
+            api_logger.warning(f"[AIJudge] 截止时间已到，跳过 {len(chunk_items)} 条批量评判")
+            return [None] * len(chunk_items)
+
+        try:
+            ai_response = self.ai_client.send_prompt(
+                self.prompt_builder.build_batch_judge_prompt(chunk_items), timeout=timeout
+            )
+            if ai_response.success:
+                verdicts = self.parser.parse_batch(ai_response.content, len(chunk_items))
+            else:
+                api_logger.warning(f"[AIJudge] 批量评判失败，逐个重试：{ai_response.error_message}")
+        except Exception as e:
+            api_logger.warning(f"[AIJudge] 批量评判异常，逐个重试：{e}")
+
+        results = []
+        for index, item in enumerate(chunk_items):
+            verdict = verdicts.get(index)
+            if verdict:
+                self.cache.set(self._cache_key(*item), verdict)
+            else:
+                verdict = self.evaluate_response(*item)
+            results.append(verdict)
+        return results
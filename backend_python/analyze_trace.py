@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+单次诊断执行的链路分析工具
+
+读取 Span 导出文件（默认 TRACE_EXPORT_PATH 及其轮转备份），输出该执行的
+关键路径和自身耗时热点；--folded 输出 folded stacks，可交给
+flamegraph.pl 或 speedscope 生成火焰图。服务端默认不导出 Span，
+需先设置 TRACE_EXPORT_PATH 启用。
+
+使用方法:
+    python3 analyze_trace.py <execution_id>
+    python3 analyze_trace.py <execution_id> --file logs/spans.jsonl --top 5
+    python3 analyze_trace.py <execution_id> --folded > exec.folded
+    python3 analyze_trace.py <execution_id> --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from unified_logging.trace_analysis import flame_summary, load_spans, summarize, to_folded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单次诊断执行的链路分析')
+    parser.add_argument('execution_id', help='执行 ID（即 trace_id）')
+    parser.add_argument('--file', action='append',
+                        help='Span 文件路径，可重复（默认环境变量 TRACE_EXPORT_PATH）')
+    parser.add_argument('--top', type=int, default=10, help='热点 Span 名称数量')
+    parser.add_argument('--folded', action='store_true', help='输出 folded stacks（火焰图输入）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出汇总')
+    args = parser.parse_args()
+
+    files = args.file or ([os.environ['TRACE_EXPORT_PATH']] if os.environ.get('TRACE_EXPORT_PATH') else [])
+    if not files:
+        parser.error('未设置 TRACE_EXPORT_PATH，请用 --file 指定 Span 文件')
+    spans = load_spans(files, args.execution_id)
+    if not spans:
+        print(f"❌ 未找到执行 {args.execution_id} 的 Span：{', '.join(files)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.folded:
+        print('\n'.join(to_folded(flame_summary(spans))))
+        return
+
+    summary = summarize(spans, top=args.top)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+
+    print(f"📊 执行 {args.execution_id}：{summary['span_count']} 个 Span，"
+          f"总耗时 {summary['total_ms']:.1f}ms，错误 {summary['error_count']} 个")
+    print("\n关键路径:")
+    for depth, step in enumerate(summary['critical_path']):
+        attributes = ', '.join(f'{k}={v}' for k, v in step['attributes'].items() if k != 'execution_id')
+        print(f"  {'  ' * depth}{step['name']}  +{step['offset_ms']:.1f}ms  {step['duration_ms']:.1f}ms"
+              + (f"  ({attributes})" if attributes else ''))
+    print("\n自身耗时热点:")
+    for item in summary['hotspots']:
+        print(f"  {item['name']:<32} ×{item['count']:<5} 自身 {item['self_ms']:10.1f}ms  总计 {item['total_ms']:10.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
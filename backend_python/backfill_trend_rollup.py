@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+回填品牌趋势汇总表（brand_trend_rollup）
+
+为已有的 test_records 计算执行级指标汇总，之后趋势图、历史对比和预测接口只读汇总表。
+可重复执行，只处理尚无汇总的记录。
+
+使用方法:
+    python3 backfill_trend_rollup.py
+    python3 backfill_trend_rollup.py --brand 华为 --batch-size 500
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories.trend_rollup_repository import TrendRollupRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回填品牌趋势汇总表')
+    parser.add_argument('--db', help='数据库路径（默认 backend_python/database.db）')
+    parser.add_argument('--brand', help='只回填指定品牌')
+    parser.add_argument('--batch-size', type=int, default=200, help='每批处理的记录数')
+    args = parser.parse_args()
+
+    if args.db:
+        # 连接池在首次获取连接时才按 DB_PATH 建立连接
+        database_connection_pool.DB_PATH = Path(args.db)
+
+    start = time.time()
+    repo = TrendRollupRepository()
+    filled = repo.backfill(batch_size=args.batch_size, brand_name=args.brand)
+    print(f"✅ 回填完成：{filled} 条记录，耗时 {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from enum import Enum
 from datetime import datetime
 import numpy as np
@@ -19,6 +19,28 @@ if TYPE_CHECKING:
 # Lazy load logger to avoid circular imports
 api_logger = None
 
+# 偏差检测阈值（逐品牌与批量路径共用）
+CONSISTENCY_BIAS_STD = 20  # 权威度标准差超过该值视为一致性偏差
+CONSISTENCY_BIAS_HIGH_STD = 30  # 超过该值为高严重度
+EXTREME_Z_SCORE = 2.5  # |z| 超过该值视为极值
+EXTREME_VALUE_RATIO = 0.1  # 极值占比超过该值视为极值偏差
+
+# 等级分段：(最低分, 等级, 标签)，按分数从高到低
+GRADE_BANDS = [
+    (95, "A+", "卓越领先"),
+    (90, "A", "优秀表现"),
+    (85, "A-", "良好领先"),
+    (80, "B+", "良好表现"),
+    (75, "B", "中上表现"),
+    (70, "B-", "中等偏上"),
+    (65, "C+", "中等表现"),
+    (60, "C", "中下表现"),
+    (55, "C-", "一般偏下"),
+    (50, "D+", "亟需改善"),
+    (40, "D", "严重不足"),
+]
+LOWEST_GRADE = ("D-", "极度欠缺")
+
 
 class CognitiveDimension(Enum):
     """认知维度枚举"""
@@ -116,7 +138,7 @@ class CognitiveBiasDetector:
             'frequency': '频率错觉'
         }
     
-    def detect_bias(self, judge_results: List[JudgeResult]) -> List[Dict[str, Any]]:
+    def detect_bias(self, judge_results: List['JudgeResult']) -> List[Dict[str, Any]]:
         """
         检测AI回答中的认知偏差
         
@@ -132,13 +154,8 @@ class CognitiveBiasDetector:
         if len(judge_results) > 1:
             scores = [r.accuracy_score for r in judge_results]
             std_dev = np.std(scores)
-            if std_dev > 20:  # 标准差过大表示不一致性
-                detected_biases.append({
-                    'type': 'consistency',
-                    'name': '一致性偏差',
-                    'severity': 'high' if std_dev > 30 else 'medium',
-                    'description': f'回答间差异较大，标准差为{std_dev:.2f}'
-                })
+            if std_dev > CONSISTENCY_BIAS_STD:  # 标准差过大表示不一致性
+                detected_biases.append(self.consistency_bias(std_dev))
         
         # 检测极端值偏差
         all_scores = []
@@ -152,17 +169,66 @@ class CognitiveBiasDetector:
             ])
         
         z_scores = np.abs(stats.zscore(all_scores))
-        extreme_values = [score for score, z in zip(all_scores, z_scores) if z > 2.5]
+        extreme_values = [score for score, z in zip(all_scores, z_scores) if z > EXTREME_Z_SCORE]
         
-        if len(extreme_values) / len(all_scores) > 0.1:  # 超过10%为极值
-            detected_biases.append({
-                'type': 'extreme_values',
-                'name': '极值偏差',
-                'severity': 'high',
-                'description': f'发现{len(extreme_values)}个极值，可能影响整体评估'
-            })
+        if len(extreme_values) / len(all_scores) > EXTREME_VALUE_RATIO:  # 超过10%为极值
+            detected_biases.append(self.extreme_value_bias(len(extreme_values)))
         
         return detected_biases
+    
+    @staticmethod
+    def consistency_bias(std_dev: float) -> Dict[str, Any]:
+        """一致性偏差指标"""
+        return {
+            'type': 'consistency',
+            'name': '一致性偏差',
+            'severity': 'high' if std_dev > CONSISTENCY_BIAS_HIGH_STD else 'medium',
+            'description': f'回答间差异较大，标准差为{std_dev:.2f}'
+        }
+    
+    @staticmethod
+    def extreme_value_bias(extreme_count: int) -> Dict[str, Any]:
+        """极值偏差指标"""
+        return {
+            'type': 'extreme_values',
+            'name': '极值偏差',
+            'severity': 'high',
+            'description': f'发现{extreme_count}个极值，可能影响整体评估'
+        }
+
+
+# 批量评分输入：每行一个 (品牌, 模型, 问题) 单元格的评判分数
+JUDGE_SCORE_DTYPE = np.dtype([
+    ('brand', object),
+    ('model', object),
+    ('question', np.int32),
+    ('accuracy', np.float64),
+    ('completeness', np.float64),
+    ('sentiment', np.float64),
+    ('purity', np.float64),
+    ('consistency', np.float64),
+])
+
+
+def judge_results_to_array(cells: Iterable[Tuple[str, str, int, 'JudgeResult']]) -> np.ndarray:
+    """
+    把 (品牌, 模型, 问题序号, JudgeResult) 序列转换为 JUDGE_SCORE_DTYPE 结构化数组
+    
+    缺失的 purity_score / consistency_score 记为 NaN。
+    """
+    def score(result, name):
+        value = getattr(result, name, None)
+        return np.nan if value is None else value
+    
+    cells = list(cells)
+    scores = np.empty(len(cells), dtype=JUDGE_SCORE_DTYPE)
+    for i, (brand, model, question, result) in enumerate(cells):
+        scores[i] = (
+            brand, model, question,
+            result.accuracy_score, result.completeness_score, result.sentiment_score,
+            score(result, 'purity_score'), score(result, 'consistency_score'),
+        )
+    return scores
 
 
 class EnhancedScoringEngine:
@@ -253,16 +319,9 @@ class EnhancedScoringEngine:
         if not judge_results:
             raise ValueError("judge_results 不能为空")
         
-        # 验证权重和为 1
-        total_weight = authority_weight + visibility_weight + sentiment_weight + purity_weight + consistency_weight
-        if abs(total_weight - 1.0) > 1e-6:
-            # 自动归一化权重
-            scale = 1.0 / total_weight
-            authority_weight *= scale
-            visibility_weight *= scale
-            sentiment_weight *= scale
-            purity_weight *= scale
-            consistency_weight *= scale
+        authority_weight, visibility_weight, sentiment_weight, purity_weight, consistency_weight = \
+            self._normalize_weights(authority_weight, visibility_weight, sentiment_weight,
+                                    purity_weight, consistency_weight)
         
         # 计算各维度平均分
         avg_authority = sum(result.accuracy_score for result in judge_results) / len(judge_results)
@@ -289,34 +348,218 @@ class EnhancedScoringEngine:
             avg_consistency * consistency_weight
         )
         
-        # 映射等级与标签
+        return self._build_result(
+            geo_score, avg_authority, avg_visibility, avg_sentiment, avg_purity, avg_consistency,
+            cognitive_confidence, bias_indicators, industry, brand_name
+        )
+    
+    def calculate_batch(
+        self,
+        scores: np.ndarray,
+        industry: str = 'general',
+        authority_weight: float = 0.25,
+        visibility_weight: float = 0.2,
+        sentiment_weight: float = 0.2,
+        purity_weight: float = 0.15,
+        consistency_weight: float = 0.2
+    ) -> Dict[str, EnhancedFinalScoreResult]:
+        """
+        批量计算所有品牌的增强版评分结果
+        
+        数值部分由 score_batch 一次向量化完成，仅总结、分析和建议等文本逐品牌生成。
+        
+        Args:
+            scores: JUDGE_SCORE_DTYPE 结构化数组，每行一个 (品牌, 模型, 问题) 单元格
+            industry: 行业类型
+            其余参数同 calculate
+            
+        Returns:
+            {品牌名: 增强版评分结果}，与逐品牌调用 calculate 的结果一致
+        """
+        batch = self.score_batch(
+            scores, authority_weight, visibility_weight, sentiment_weight, purity_weight, consistency_weight
+        )
+        
+        results = {}
+        for i, brand in enumerate(batch['brands']):
+            bias_indicators = []
+            if batch['consistency_bias'][i]:
+                bias_indicators.append(self.bias_detector.consistency_bias(batch['accuracy_std'][i]))
+            if batch['extreme_bias'][i]:
+                bias_indicators.append(self.bias_detector.extreme_value_bias(int(batch['extreme_count'][i])))
+            
+            results[str(brand)] = self._build_result(
+                int(batch['geo_score'][i]),
+                float(batch['authority'][i]),
+                float(batch['visibility'][i]),
+                float(batch['sentiment'][i]),
+                float(batch['purity'][i]),
+                float(batch['consistency'][i]),
+                float(batch['cognitive_confidence'][i]),
+                bias_indicators, industry, str(brand)
+            )
+        return results
+    
+    def score_batch(
+        self,
+        scores: np.ndarray,
+        authority_weight: float = 0.25,
+        visibility_weight: float = 0.2,
+        sentiment_weight: float = 0.2,
+        purity_weight: float = 0.15,
+        consistency_weight: float = 0.2
+    ) -> Dict[str, np.ndarray]:
+        """
+        多品牌批量评分：一次向量化计算维度分、认知置信度、偏差标记与等级
+        
+        Args:
+            scores: JUDGE_SCORE_DTYPE 结构化数组，每行一个 (品牌, 模型, 问题) 单元格；
+                purity / consistency 为 NaN 时按逐品牌路径的默认值补齐
+            其余参数同 calculate
+            
+        Returns:
+            {
+                'brands': (B,) 品牌名（排序后）,
+                'count': (B,) 评判结果数,
+                'authority' / 'visibility' / 'sentiment' / 'purity' / 'consistency': (B,) 维度平均分,
+                'geo_score': (B,) GEO 分数,
+                'cognitive_confidence': (B,) 认知置信度,
+                'accuracy_std': (B,) 权威度标准差,
+                'consistency_bias': (B,) 是否存在一致性偏差,
+                'extreme_count': (B,) 极值个数,
+                'extreme_bias': (B,) 是否存在极值偏差,
+                'grade': (B,) 等级,
+                'label': (B,) 标签
+            }
+        """
+        if len(scores) == 0:
+            raise ValueError("scores 不能为空")
+        weights = self._normalize_weights(
+            authority_weight, visibility_weight, sentiment_weight, purity_weight, consistency_weight
+        )
+        
+        brands, inverse = np.unique(scores['brand'], return_inverse=True)
+        inverse = inverse.ravel()
+        count = np.bincount(inverse, minlength=len(brands))
+        
+        def brand_mean(values: np.ndarray) -> np.ndarray:
+            return np.bincount(inverse, weights=values, minlength=len(brands)) / count
+        
+        accuracy = scores['accuracy'].astype(float)
+        completeness = scores['completeness'].astype(float)
+        sentiment = scores['sentiment'].astype(float)
+        purity = scores['purity'].astype(float)
+        consistency = scores['consistency'].astype(float)
+        
+        # 维度平均分（缺失的纯净度/一致性按品牌均值补齐，与 calculate 一致）
+        avg_authority = brand_mean(accuracy)
+        avg_visibility = brand_mean(completeness)
+        avg_sentiment = brand_mean(sentiment)
+        avg_purity = brand_mean(np.where(np.isnan(purity), avg_sentiment[inverse] * 0.9, purity))
+        avg_consistency = brand_mean(np.where(np.isnan(consistency), avg_authority[inverse] * 0.95, consistency))
+        dimensions = np.column_stack([avg_authority, avg_visibility, avg_sentiment, avg_purity, avg_consistency])
+        
+        # 认知置信度
+        sample_confidence = np.minimum(count / 10.0, 1.0)
+        variance_adjustment = np.maximum(0.5, 1.0 - dimensions.var(axis=1) / 1000.0)
+        cognitive_confidence = np.minimum(sample_confidence * variance_adjustment, 1.0)
+        
+        # 与 calculate 相同的加法顺序，保证取整结果一致
+        geo_score = np.round(
+            avg_authority * weights[0] +
+            avg_visibility * weights[1] +
+            avg_sentiment * weights[2] +
+            avg_purity * weights[3] +
+            avg_consistency * weights[4]
+        ).astype(int)
+        
+        # 一致性偏差：各品牌权威度的总体标准差
+        accuracy_std = np.sqrt(brand_mean((accuracy - avg_authority[inverse]) ** 2))
+        consistency_bias = (count > 1) & (accuracy_std > CONSISTENCY_BIAS_STD)
+        
+        # 极值偏差：各品牌全部维度分数的 z 分数（标准差为 0 时无极值）
+        cell_scores = np.column_stack([
+            accuracy, completeness, sentiment,
+            np.where(np.isnan(purity), sentiment, purity),
+            np.where(np.isnan(consistency), accuracy, consistency),
+        ])
+        cell_mean = brand_mean(cell_scores.sum(axis=1)) / cell_scores.shape[1]
+        deviation = cell_scores - cell_mean[inverse, None]
+        cell_std = np.sqrt(brand_mean((deviation ** 2).sum(axis=1)) / cell_scores.shape[1])
+        std = cell_std[inverse, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            is_extreme = (std > 0) & (np.abs(deviation) / std > EXTREME_Z_SCORE)
+        extreme_count = np.bincount(inverse, weights=is_extreme.sum(axis=1), minlength=len(brands)).astype(int)
+        extreme_bias = extreme_count / (count * cell_scores.shape[1]) > EXTREME_VALUE_RATIO
+        
+        # 等级与标签：高于当前分数的分段数即为等级下标
+        thresholds = np.array([band[0] for band in GRADE_BANDS])
+        band_index = (geo_score[:, None] < thresholds[None, :]).sum(axis=1)
+        grades = np.array([band[1] for band in GRADE_BANDS] + [LOWEST_GRADE[0]])
+        labels = np.array([band[2] for band in GRADE_BANDS] + [LOWEST_GRADE[1]])
+        
+        return {
+            'brands': brands,
+            'count': count,
+            'authority': avg_authority,
+            'visibility': avg_visibility,
+            'sentiment': avg_sentiment,
+            'purity': avg_purity,
+            'consistency': avg_consistency,
+            'geo_score': geo_score,
+            'cognitive_confidence': cognitive_confidence,
+            'accuracy_std': accuracy_std,
+            'consistency_bias': consistency_bias,
+            'extreme_count': extreme_count,
+            'extreme_bias': extreme_bias,
+            'grade': grades[band_index],
+            'label': labels[band_index],
+        }
+    
+    @staticmethod
+    def _normalize_weights(*weights: float) -> Tuple[float, ...]:
+        """验证权重和为 1，否则自动归一化"""
+        total_weight = sum(weights)
+        if abs(total_weight - 1.0) > 1e-6:
+            scale = 1.0 / total_weight
+            return tuple(weight * scale for weight in weights)
+        return weights
+    
+    def _build_result(
+        self,
+        geo_score: int,
+        authority: float,
+        visibility: float,
+        sentiment: float,
+        purity: float,
+        consistency: float,
+        cognitive_confidence: float,
+        bias_indicators: List[Dict[str, Any]],
+        industry: str,
+        brand_name: str
+    ) -> EnhancedFinalScoreResult:
+        """根据数值评分生成等级、分析、建议和总结"""
         grade, label = self._map_grade_and_label(geo_score)
         
-        # 生成详细分析
         detailed_analysis = self._generate_detailed_analysis(
-            avg_authority, avg_visibility, avg_sentiment, avg_purity, avg_consistency,
-            industry, brand_name
+            authority, visibility, sentiment, purity, consistency, industry, brand_name
         )
         
-        # 生成改进建议
         recommendations = self._generate_recommendations(
-            avg_authority, avg_visibility, avg_sentiment, avg_purity, avg_consistency,
-            bias_indicators, industry
+            authority, visibility, sentiment, purity, consistency, bias_indicators, industry
         )
         
-        # 生成中文总结
         summary = self._generate_enhanced_summary(
-            geo_score, avg_authority, avg_visibility, avg_sentiment, 
-            avg_purity, avg_consistency, grade, label, brand_name
+            geo_score, authority, visibility, sentiment, purity, consistency, grade, label, brand_name
         )
         
         return EnhancedFinalScoreResult(
             geo_score=geo_score,
-            authority_score=avg_authority,
-            visibility_score=avg_visibility,
-            sentiment_score=avg_sentiment,
-            purity_score=avg_purity,
-            consistency_score=avg_consistency,
+            authority_score=authority,
+            visibility_score=visibility,
+            sentiment_score=sentiment,
+            purity_score=purity,
+            consistency_score=consistency,
             cognitive_confidence=cognitive_confidence,
             bias_indicators=bias_indicators,
             grade=grade,
@@ -347,18 +590,10 @@ class EnhancedScoringEngine:
     
     def _map_grade_and_label(self, geo_score: int) -> tuple[str, str]:
         """映射等级与标签 - 采用更细粒度的分级"""
-        if geo_score >= 95: return "A+", "卓越领先"
-        elif geo_score >= 90: return "A", "优秀表现"
-        elif geo_score >= 85: return "A-", "良好领先"
-        elif geo_score >= 80: return "B+", "良好表现"
-        elif geo_score >= 75: return "B", "中上表现"
-        elif geo_score >= 70: return "B-", "中等偏上"
-        elif geo_score >= 65: return "C+", "中等表现"
-        elif geo_score >= 60: return "C", "中下表现"
-        elif geo_score >= 55: return "C-", "一般偏下"
-        elif geo_score >= 50: return "D+", "亟需改善"
-        elif geo_score >= 40: return "D", "严重不足"
-        else: return "D-", "极度欠缺"
+        for min_score, grade, label in GRADE_BANDS:
+            if geo_score >= min_score:
+                return grade, label
+        return LOWEST_GRADE
     
     def _generate_detailed_analysis(
         self, 
@@ -530,6 +765,31 @@ def calculate_enhanced_scores(
     return engine.calculate(judge_results, industry=industry, brand_name=brand_name)
 
 
+
+def calculate_enhanced_scores_batch(
+    brand_results: Dict[str, List['JudgeResult']],
+    industry: str = 'general'
+) -> Dict[str, EnhancedFinalScoreResult]:
+    """
+    便捷函数：一次计算多个品牌的增强版评分
+    
+    Args:
+        brand_results: {品牌名: 评判结果列表}，空列表的品牌不参与计算
+        
+    Returns:
+        {品牌名: 增强版评分结果}
+    """
+    cells = [
+        (brand, '', index, result)
+        for brand, results in brand_results.items()
+        for index, result in enumerate(results)
+    ]
+    if not cells:
+        return {}
+    engine = EnhancedScoringEngine()
+    return engine.calculate_batch(judge_results_to_array(cells), industry=industry)
+
+
 if __name__ == "__main__":
     # 示例使用
     from ai_judge_module import JudgeResult, ConfidenceLevel
@@ -5,5 +5,11 @@ Handles connections to various AI platforms with standardized interfaces
 from .base import AIClient, AIResponse, AIPlatformType
 from .factory import AIAdapterFactory
 from .deepseek_adapter import DeepSeekAdapter
+from .http_client import get_async_http_client, close_async_http_client
 
-__all__ = ['AIClient', 'AIResponse', 'AIPlatformType', 'AIAdapterFactory', 'DeepSeekAdapter']
\ No newline at end of file
+AIAdapterFactory.register(AIPlatformType.DEEPSEEK, DeepSeekAdapter)
+
+__all__ = [
+    'AIClient', 'AIResponse', 'AIPlatformType', 'AIAdapterFactory', 'DeepSeekAdapter',
+    'get_async_http_client', 'close_async_http_client'
+]
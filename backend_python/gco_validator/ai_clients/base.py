@@ -2,6 +2,7 @@
 Base abstract class for AI clients
 Defines the common interface for all AI platform adapters
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
@@ -71,7 +72,23 @@ class AIClient(ABC):
             AIResponse: Standardized response object
         """
         pass
-    
+
+    async def send_prompt_async(self, prompt: str, **kwargs) -> AIResponse:
+        """
+        Send a prompt without blocking the event loop
+
+        Adapters with a native async HTTP implementation override this.
+        The default runs the blocking send_prompt in the default thread pool.
+
+        Args:
+            prompt: The input prompt to send to the AI
+            **kwargs: Additional platform-specific parameters
+
+        Returns:
+            AIResponse: Standardized response object
+        """
+        return await asyncio.to_thread(self.send_prompt, prompt, **kwargs)
+
     @abstractmethod
     def validate_config(self) -> bool:
         """
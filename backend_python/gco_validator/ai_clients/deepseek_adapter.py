@@ -3,10 +3,12 @@ DeepSeek AI Platform Adapter
 Implements the AIClient interface for DeepSeek API
 """
 import time
+import httpx
 import requests
 from typing import Dict, Any, Optional
 from .base import AIClient, AIResponse, AIPlatformType
-from ..logging_config import api_logger
+from .http_client import get_async_http_client
+from ..core.exceptions import ai_logger as api_logger
 
 
 class DeepSeekAdapter(AIClient):
@@ -34,20 +36,8 @@ class DeepSeekAdapter(AIClient):
             'Content-Type': 'application/json'
         }
     
-    def send_prompt(self, prompt: str, **kwargs) -> AIResponse:
-        """
-        Send a prompt to DeepSeek API and return a standardized response
-        
-        Args:
-            prompt: The input prompt to send
-            **kwargs: Additional parameters for the API call
-            
-        Returns:
-            AIResponse: Standardized response object
-        """
-        start_time = time.time()
-        
-        # Prepare the request payload
+    def _build_payload(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Build the chat completions request payload"""
         payload = {
             'model': self.model_name,
             'messages': [{'role': 'user', 'content': prompt}],
@@ -63,6 +53,72 @@ class DeepSeekAdapter(AIClient):
         if max_tokens is not None:
             payload['max_tokens'] = max_tokens
         
+        return payload
+    
+    def _build_response(self, status_code: int, data: Dict[str, Any], latency: float) -> AIResponse:
+        """Convert an HTTP status code and decoded JSON body into an AIResponse"""
+        if status_code == 200:
+            # Extract the content from the response
+            content = data['choices'][0]['message']['content']
+            
+            # Extract token usage if available
+            usage = data.get('usage', {})
+            tokens_used = usage.get('total_tokens')
+            
+            api_logger.info(f"Successfully received response from DeepSeek API for model: {self.model_name}")
+            
+            return AIResponse(
+                content=content,
+                model=self.model_name,
+                platform=self.platform_name,
+                tokens_used=tokens_used,
+                prompt_tokens=usage.get('prompt_tokens'),
+                completion_tokens=usage.get('completion_tokens'),
+                total_tokens=tokens_used,
+                latency=latency,
+                metadata=data,
+                success=True
+            )
+        
+        # Handle API error
+        error_msg = data.get('error', {}).get('message', f'HTTP {status_code}')
+        api_logger.error(f"DeepSeek API error for model {self.model_name}: {error_msg}")
+        
+        return AIResponse(
+            content="",
+            model=self.model_name,
+            platform=self.platform_name,
+            latency=latency,
+            metadata=data,
+            success=False,
+            error_message=error_msg
+        )
+    
+    def _error_response(self, error_message: str, latency: Optional[float] = None) -> AIResponse:
+        """Build a failed AIResponse for transport-level errors"""
+        return AIResponse(
+            content="",
+            model=self.model_name,
+            platform=self.platform_name,
+            latency=latency,
+            success=False,
+            error_message=error_message
+        )
+    
+    def send_prompt(self, prompt: str, **kwargs) -> AIResponse:
+        """
+        Send a prompt to DeepSeek API and return a standardized response
+        
+        Args:
+            prompt: The input prompt to send
+            **kwargs: Additional parameters for the API call
+            
+        Returns:
+            AIResponse: Standardized response object
+        """
+        start_time = time.time()
+        payload = self._build_payload(prompt, **kwargs)
+        
         try:
             api_logger.info(f"Sending request to DeepSeek API for model: {self.model_name}")
             
@@ -74,82 +130,55 @@ class DeepSeekAdapter(AIClient):
                 timeout=self.timeout
             )
             
-            # Calculate latency
-            latency = time.time() - start_time
-            
-            if response.status_code == 200:
-                # Parse the response
-                data = response.json()
-                
-                # Extract the content from the response
-                content = data['choices'][0]['message']['content']
-                
-                # Extract token usage if available
-                usage = data.get('usage', {})
-                tokens_used = usage.get('total_tokens')
-                prompt_tokens = usage.get('prompt_tokens')
-                completion_tokens = usage.get('completion_tokens')
-                
-                api_logger.info(f"Successfully received response from DeepSeek API for model: {self.model_name}")
-                
-                return AIResponse(
-                    content=content,
-                    model=self.model_name,
-                    platform=self.platform_name,
-                    tokens_used=tokens_used,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=tokens_used,
-                    latency=latency,
-                    metadata=data,
-                    success=True
-                )
-            else:
-                # Handle API error
-                error_data = response.json() if response.content else {'error': 'Unknown error'}
-                error_msg = error_data.get('error', {}).get('message', f'HTTP {response.status_code}')
-                
-                api_logger.error(f"DeepSeek API error for model {self.model_name}: {error_msg}")
-                
-                return AIResponse(
-                    content="",
-                    model=self.model_name,
-                    platform=self.platform_name,
-                    latency=latency,
-                    metadata=error_data,
-                    success=False,
-                    error_message=error_msg
-                )
+            data = response.json() if response.content else {'error': 'Unknown error'}
+            return self._build_response(response.status_code, data, time.time() - start_time)
                 
         except requests.exceptions.Timeout:
             api_logger.error(f"Timeout error when calling DeepSeek API for model: {self.model_name}")
-            return AIResponse(
-                content="",
-                model=self.model_name,
-                platform=self.platform_name,
-                latency=latency,
-                success=False,
-                error_message="Request timed out"
-            )
+            return self._error_response("Request timed out", time.time() - start_time)
         except requests.exceptions.RequestException as e:
             api_logger.error(f"Request error when calling DeepSeek API for model {self.model_name}: {str(e)}")
-            return AIResponse(
-                content="",
-                model=self.model_name,
-                platform=self.platform_name,
-                latency=latency,
-                success=False,
-                error_message=str(e)
-            )
+            return self._error_response(str(e), time.time() - start_time)
         except Exception as e:
             api_logger.error(f"Unexpected error when calling DeepSeek API for model {self.model_name}: {str(e)}")
-            return AIResponse(
-                content="",
-                model=self.model_name,
-                platform=self.platform_name,
-                success=False,
-                error_message=str(e)
+            return self._error_response(str(e))
+    
+    async def send_prompt_async(self, prompt: str, **kwargs) -> AIResponse:
+        """
+        Send a prompt to DeepSeek API on the shared pooled async HTTP client
+        
+        Args:
+            prompt: The input prompt to send
+            **kwargs: Additional parameters for the API call
+            
+        Returns:
+            AIResponse: Standardized response object
+        """
+        start_time = time.time()
+        payload = self._build_payload(prompt, **kwargs)
+        
+        try:
+            api_logger.info(f"Sending async request to DeepSeek API for model: {self.model_name}")
+            
+            response = await get_async_http_client().post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=self.timeout
             )
+            
+            data = response.json() if response.content else {'error': 'Unknown error'}
+            return self._build_response(response.status_code, data, time.time() - start_time)
+        
+        except httpx.TimeoutException:
+            api_logger.error(f"Timeout error when calling DeepSeek API for model: {self.model_name}")
+            return self._error_response("Request timed out", time.time() - start_time)
+        except httpx.HTTPError as e:
+            api_logger.error(f"Request error when calling DeepSeek API for model {self.model_name}: {str(e)}")
+            return self._error_response(str(e), time.time() - start_time)
+        except Exception as e:
+            api_logger.error(f"Unexpected error when calling DeepSeek API for model {self.model_name}: {str(e)}")
+            return self._error_response(str(e))
     
     def validate_config(self) -> bool:
         """
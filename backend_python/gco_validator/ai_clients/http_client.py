@@ -0,0 +1,56 @@
+"""
+Shared async HTTP client for AI platform adapters
+Keeps one pooled httpx.AsyncClient per event loop so concurrent brand tests
+reuse keep-alive connections instead of opening a socket per request
+"""
+import asyncio
+from typing import Optional
+
+import httpx
+
+from ..config.settings import settings
+from ..core.exceptions import ai_logger as api_logger
+
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared pooled async HTTP client, creating it on first use
+
+    The client is bound to the running event loop; a new one is created if
+    called from a different loop (e.g. a fresh asyncio.run in scripts/tests).
+
+    Returns:
+        httpx.AsyncClient: The shared client
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(settings.TEST_TIMEOUT),
+        )
+        _client_loop = loop
+        api_logger.info(
+            f"Created shared async HTTP client (max_connections={settings.HTTP_MAX_CONNECTIONS}, "
+            f"max_keepalive={settings.HTTP_MAX_KEEPALIVE_CONNECTIONS})"
+        )
+    return _client
+
+
+async def close_async_http_client():
+    """Close the shared async HTTP client (called on application shutdown)"""
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        api_logger.info("Closed shared async HTTP client")
+    _client = None
+    _client_loop = None
@@ -10,7 +10,7 @@ from gco_validator.schemas.test_schemas import (
     BrandTestRequest, BrandTestResponse, 
     TestProgressResponse, TestHistoryResponse
 )
-from gco_validator.test_engine import TestExecutor, ExecutionStrategy
+from gco_validator.test_engine import AsyncTestExecutor, ExecutionStrategy
 from gco_validator.ai_clients import AIAdapterFactory
 from gco_validator.question_system import QuestionManager, TestCaseGenerator
 from gco_validator.scoring import ResponseEvaluator
@@ -42,7 +42,7 @@ async def perform_brand_test(request: BrandTestRequest) -> BrandTestResponse:
         # Initialize components
         question_manager = QuestionManager()
         test_case_generator = TestCaseGenerator()
-        executor = TestExecutor(
+        executor = AsyncTestExecutor(
             max_workers=request.max_workers or 5,
             strategy=ExecutionStrategy.CONCURRENT
         )
@@ -87,8 +87,8 @@ async def perform_brand_test(request: BrandTestRequest) -> BrandTestResponse:
             }
             test_logger.info(f"Execution {execution_id} progress: {progress.progress_percentage:.1f}%")
         
-        # Execute the tests
-        results = executor.execute_tests(
+        # Execute the tests on the event loop (AI calls share the pooled async HTTP client)
+        results = await executor.execute_tests(
             test_cases, 
             request.api_key or "", 
             progress_callback
@@ -36,6 +36,10 @@ class Settings(BaseSettings):
     MAX_CONCURRENT_TESTS: int = 10
     TEST_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
+
+    # Async HTTP client pool settings (shared by all AI adapters)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
     
     class Config:
         env_file = ".env"
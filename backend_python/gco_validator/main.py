@@ -14,6 +14,7 @@ from gco_validator.core.config import settings
 from gco_validator.api.v1.api import api_router
 from gco_validator.core.logging import setup_logging
 from gco_validator.core.exceptions import add_exception_handlers
+from gco_validator.ai_clients import close_async_http_client
 
 
 @asynccontextmanager
@@ -29,6 +30,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logging.info("Application shutting down...")
+    await close_async_http_client()
 
 
 # Initialize FastAPI app with lifespan
@@ -2,12 +2,12 @@
 Test Engine Package for GEO Content Quality Validator
 Manages test execution, scheduling, and progress tracking
 """
-from .scheduler import TestScheduler, ExecutionStrategy, TestTask
+from .scheduler import TestScheduler, AsyncTestScheduler, ExecutionStrategy, TestTask
 from .progress_tracker import ProgressTracker, TestProgress, TestStatus
-from .executor import TestExecutor
+from .executor import TestExecutor, AsyncTestExecutor
 
 __all__ = [
-    'TestScheduler', 'ExecutionStrategy', 'TestTask',
+    'TestScheduler', 'AsyncTestScheduler', 'ExecutionStrategy', 'TestTask',
     'ProgressTracker', 'TestProgress', 'TestStatus',
-    'TestExecutor'
+    'TestExecutor', 'AsyncTestExecutor'
 ]
\ No newline at end of file
@@ -2,14 +2,20 @@
 Test Executor - Main entry point for test execution
 Integrates scheduler, progress tracking, and AI adapters
 """
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
 from datetime import datetime
 import uuid
-from ..ai_adapters import AIAdapterFactory
-from ..question_system import TestCase
-from .scheduler import TestScheduler, TestTask, ExecutionStrategy
+from ..ai_clients import AIAdapterFactory, AIClient, AIPlatformType
+from ..question_system.test_case_generator import TestCase
+from .scheduler import TestScheduler, AsyncTestScheduler, TaskRunner, TestTask, ExecutionStrategy
 from .progress_tracker import ProgressTracker, TestProgress
-from ..logging_config import api_logger
+from ..core.exceptions import test_logger as api_logger
+
+
+# Default model name per platform when test cases only name the platform
+DEFAULT_MODEL_NAMES = {
+    AIPlatformType.DEEPSEEK.value: 'deepseek-chat',
+}
 
 
 class TestExecutor:
@@ -46,13 +52,23 @@ class TestExecutor:
         Returns:
             Dict with execution results and statistics
         """
+        execution_id = self._start_execution(test_cases, api_key)
+        test_tasks = self._create_tasks(test_cases)
+        progress_callback = self._create_progress_callback(execution_id, on_progress_update)
+        
+        # Execute the tests using the scheduler
+        results = self.scheduler.schedule_tests(test_tasks, progress_callback)
+        
+        return self._finish_execution(execution_id, results)
+    
+    def _start_execution(self, test_cases: List[TestCase], api_key: str) -> str:
+        """Register a new execution with the progress tracker and return its ID"""
         execution_id = str(uuid.uuid4())
         total_tests = len(test_cases)
         
         api_logger.info(f"Starting execution {execution_id} for {total_tests} test cases")
         
-        # Create progress tracking for this execution
-        progress = self.progress_tracker.create_execution(
+        self.progress_tracker.create_execution(
             execution_id=execution_id,
             total_tests=total_tests,
             metadata={
@@ -61,11 +77,12 @@ class TestExecutor:
                 'api_key_provided': bool(api_key)
             }
         )
-        
-        # Convert TestCases to TestTasks for the scheduler
-        test_tasks = []
-        for test_case in test_cases:
-            task = TestTask(
+        return execution_id
+    
+    def _create_tasks(self, test_cases: List[TestCase]) -> List[TestTask]:
+        """Convert TestCases to TestTasks for the scheduler"""
+        return [
+            TestTask(
                 id=test_case.id,
                 brand_name=test_case.brand_name,
                 ai_model=test_case.ai_model,
@@ -73,9 +90,15 @@ class TestExecutor:
                 timeout=30,
                 max_retries=3
             )
-            test_tasks.append(task)
-        
-        # Define callback for progress updates
+            for test_case in test_cases
+        ]
+    
+    def _create_progress_callback(
+        self,
+        execution_id: str,
+        on_progress_update: Callable[[str, TestProgress], None] = None
+    ) -> Callable[[TestTask, Dict[str, Any]], None]:
+        """Build the per-task callback that updates progress tracking"""
         def progress_callback(task: TestTask, result: Dict[str, Any]):
             if result.get('success', False):
                 self.progress_tracker.update_completed(execution_id, result)
@@ -87,13 +110,10 @@ class TestExecutor:
             if on_progress_update:
                 on_progress_update(execution_id, current_progress)
         
-        # Execute the tests using the scheduler
-        results = self.scheduler.schedule_tests(test_tasks, progress_callback)
-        
-        # Get final progress
-        final_progress = self.progress_tracker.get_progress(execution_id)
-        
-        # Add execution ID to results
+        return progress_callback
+    
+    def _finish_execution(self, execution_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the execution ID to scheduler results and log the summary"""
         results['execution_id'] = execution_id
         
         api_logger.info(f"Execution {execution_id} completed. "
@@ -132,6 +152,95 @@ class TestExecutor:
         api_logger.info("TestExecutor shut down successfully")
 
 
+
+class AsyncTestExecutor(TestExecutor):
+    """
+    Executor for async callers (FastAPI handlers).
+    Runs tasks on the event loop through AsyncTestScheduler and calls AI
+    platforms via the adapters' send_prompt_async on the shared HTTP client.
+    """
+    
+    def __init__(self, max_workers: int = 10, strategy: ExecutionStrategy = ExecutionStrategy.CONCURRENT):
+        """
+        Initialize the async test executor
+        
+        Args:
+            max_workers: Maximum number of in-flight AI calls
+            strategy: Execution strategy to use
+        """
+        self.max_workers = max_workers
+        self.strategy = strategy
+        self.progress_tracker = ProgressTracker()
+        self.ai_adapter_factory = AIAdapterFactory
+        
+        api_logger.info(f"Initialized AsyncTestExecutor with strategy {strategy.value}, max_workers {max_workers}")
+    
+    async def execute_tests(
+        self,
+        test_cases: List[TestCase],
+        api_key: str = "",
+        on_progress_update: Callable[[str, TestProgress], None] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a list of test cases on the running event loop
+        
+        Args:
+            test_cases: List of test cases to execute
+            api_key: API key for AI platforms (without one, AI calls are simulated)
+            on_progress_update: Callback function to call when progress updates
+            
+        Returns:
+            Dict with execution results and statistics
+        """
+        execution_id = self._start_execution(test_cases, api_key)
+        
+        scheduler = AsyncTestScheduler(
+            max_workers=self.max_workers,
+            strategy=self.strategy,
+            task_runner=self._create_task_runner(api_key)
+        )
+        results = await scheduler.schedule_tests(
+            self._create_tasks(test_cases),
+            self._create_progress_callback(execution_id, on_progress_update)
+        )
+        
+        return self._finish_execution(execution_id, results)
+    
+    def _create_task_runner(self, api_key: str) -> Optional[TaskRunner]:
+        """Build a task runner that calls the platform adapter; None means simulated calls"""
+        if not api_key:
+            return None
+        
+        adapters: Dict[str, AIClient] = {}
+        
+        async def run(task: TestTask) -> Dict[str, Any]:
+            if not self.ai_adapter_factory.is_platform_supported(task.ai_model):
+                return {'success': False, 'error': f"No adapter registered for platform: {task.ai_model}"}
+            
+            adapter = adapters.get(task.ai_model)
+            if adapter is None:
+                platform = task.ai_model.lower()
+                adapter = self.ai_adapter_factory.create(platform, api_key, DEFAULT_MODEL_NAMES.get(platform, platform))
+                adapters[task.ai_model] = adapter
+            
+            response = await adapter.send_prompt_async(task.question)
+            return {
+                'success': response.success,
+                'error': response.error_message,
+                'content': response.content,
+                'model': response.model,
+                'platform': response.platform,
+                'tokens_used': response.tokens_used or 0,
+                'latency': response.latency or 0
+            }
+        
+        return run
+    
+    def shutdown(self):
+        """Nothing to release: the shared HTTP client is closed on application shutdown"""
+        api_logger.info("AsyncTestExecutor shut down successfully")
+
+
 # Example usage function
 def run_brand_cognition_test(
     brand_name: str,
@@ -3,14 +3,14 @@ Test Scheduler with execution strategies
 Handles scheduling of tests with different execution approaches
 """
 from enum import Enum
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Awaitable, Optional
 from dataclasses import dataclass
 import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 import uuid
-from ..logging_config import api_logger
+from ..core.exceptions import test_logger as api_logger
 
 
 class ExecutionStrategy(Enum):
@@ -249,4 +249,207 @@ class TestScheduler:
     def shutdown(self):
         """Shutdown the scheduler and cleanup resources"""
         self.executor.shutdown(wait=True)
-        api_logger.info("TestScheduler shut down successfully")
\ No newline at end of file
+        api_logger.info("TestScheduler shut down successfully")
+
+
+TaskRunner = Callable[[TestTask], Awaitable[Dict[str, Any]]]
+
+
+class AsyncTestScheduler:
+    """
+    Schedules test tasks as coroutines on the running event loop.
+    Concurrency is bounded by a semaphore instead of a thread pool, so one
+    worker process can run many brand tests without a thread per AI call.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 10,
+        strategy: ExecutionStrategy = ExecutionStrategy.CONCURRENT,
+        task_runner: Optional[TaskRunner] = None
+    ):
+        """
+        Initialize the async test scheduler
+        
+        Args:
+            max_workers: Maximum number of in-flight AI calls
+            strategy: Execution strategy to use
+            task_runner: Coroutine that performs the AI call for a task and returns
+                a result dict with a 'success' key (defaults to a simulated call)
+        """
+        self.max_workers = max_workers
+        self.strategy = strategy
+        self.task_runner = task_runner or self._simulate_ai_call
+        
+        api_logger.info(f"Initialized AsyncTestScheduler with strategy {strategy.value}, max_workers {max_workers}")
+    
+    async def schedule_tests(
+        self,
+        test_tasks: List[TestTask],
+        callback: Callable[[TestTask, Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
+        """
+        Schedule and execute tests based on the configured strategy
+        
+        Args:
+            test_tasks: List of test tasks to execute
+            callback: Optional callback function to call when each task completes
+            
+        Returns:
+            Dict with execution results and statistics
+        """
+        start_time = time.time()
+        
+        if self.strategy == ExecutionStrategy.SEQUENTIAL:
+            results = await self._execute_sequential(test_tasks, callback)
+        elif self.strategy == ExecutionStrategy.CONCURRENT:
+            results = await self._execute_concurrent(test_tasks, callback)
+        elif self.strategy == ExecutionStrategy.BATCH:
+            results = await self._execute_batch(test_tasks, callback)
+        else:
+            raise ValueError(f"Unknown execution strategy: {self.strategy}")
+        
+        total_time = time.time() - start_time
+        
+        stats = {
+            'total_tasks': len(test_tasks),
+            'completed_tasks': len([r for r in results if r.get('success', False)]),
+            'failed_tasks': len([r for r in results if not r.get('success', False)]),
+            'execution_time': total_time,
+            'strategy': self.strategy.value,
+            'results': results
+        }
+        
+        api_logger.info(f"Async test execution completed. Strategy: {self.strategy.value}, "
+                       f"Total: {stats['total_tasks']}, Success: {stats['completed_tasks']}, "
+                       f"Failed: {stats['failed_tasks']}, Time: {total_time:.2f}s")
+        
+        return stats
+    
+    async def _execute_sequential(
+        self,
+        test_tasks: List[TestTask],
+        callback: Callable[[TestTask, Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute tests one after another"""
+        api_logger.info(f"Executing {len(test_tasks)} tests sequentially")
+        results = []
+        
+        for task in test_tasks:
+            result = await self._execute_single_task(task)
+            results.append(result)
+            
+            if callback:
+                callback(task, result)
+        
+        return results
+    
+    async def _execute_concurrent(
+        self,
+        test_tasks: List[TestTask],
+        callback: Callable[[TestTask, Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute tests concurrently, at most max_workers in flight"""
+        api_logger.info(f"Executing {len(test_tasks)} tests concurrently with {self.max_workers} in flight")
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results = []
+        
+        async def run(task: TestTask):
+            async with semaphore:
+                return task, await self._execute_single_task(task)
+        
+        # Collect results as they complete
+        for next_done in asyncio.as_completed([run(task) for task in test_tasks]):
+            task, result = await next_done
+            results.append(result)
+            
+            if callback:
+                callback(task, result)
+        
+        return results
+    
+    async def _execute_batch(
+        self,
+        test_tasks: List[TestTask],
+        callback: Callable[[TestTask, Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute tests in priority-ordered batches"""
+        api_logger.info(f"Executing {len(test_tasks)} tests in batches of {self.max_workers}")
+        results = []
+        
+        sorted_tasks = sorted(test_tasks, key=lambda t: t.priority)
+        
+        for i in range(0, len(sorted_tasks), self.max_workers):
+            batch = sorted_tasks[i:i + self.max_workers]
+            results.extend(await self._execute_concurrent(batch, callback))
+        
+        return results
+    
+    async def _execute_single_task(self, task: TestTask) -> Dict[str, Any]:
+        """Execute a single test task with timeout and retry"""
+        api_logger.debug(f"Executing task {task.id} for model {task.ai_model}")
+        
+        last_error = None
+        
+        for attempt in range(task.max_retries + 1):
+            try:
+                result = await asyncio.wait_for(self.task_runner(task), timeout=task.timeout)
+                
+                if result['success']:
+                    api_logger.info(f"Task {task.id} completed successfully on attempt {attempt + 1}")
+                    return {
+                        'task_id': task.id,
+                        'success': True,
+                        'result': result,
+                        'attempt': attempt + 1,
+                        'model': task.ai_model,
+                        'question': task.question
+                    }
+                
+                last_error = result.get('error', 'Unknown error')
+                api_logger.warning(f"Task {task.id} failed on attempt {attempt + 1}: {last_error}")
+                
+            except asyncio.TimeoutError:
+                last_error = f"Timed out after {task.timeout}s"
+                api_logger.warning(f"Task {task.id} timed out on attempt {attempt + 1}")
+            except Exception as e:
+                api_logger.error(f"Task {task.id} failed on attempt {attempt + 1} with exception: {str(e)}")
+                last_error = str(e)
+            
+            # If not the last attempt, wait before retrying (without holding a thread)
+            if attempt < task.max_retries:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        
+        api_logger.error(f"All {task.max_retries + 1} attempts failed for task {task.id}")
+        return {
+            'task_id': task.id,
+            'success': False,
+            'error': last_error,
+            'attempt': task.max_retries + 1,
+            'model': task.ai_model,
+            'question': task.question
+        }
+    
+    async def _simulate_ai_call(self, task: TestTask) -> Dict[str, Any]:
+        """Simulate calling an AI platform without blocking the event loop"""
+        import random
+        
+        await asyncio.sleep(random.uniform(0.5, 2.0))
+        
+        if random.random() < 0.1:  # 10% failure rate for simulation
+            return {
+                'success': False,
+                'error': 'Simulated API error',
+                'content': '',
+                'tokens_used': 0,
+                'latency': 0
+            }
+        
+        return {
+            'success': True,
+            'content': f"This is a simulated response for the question: {task.question}",
+            'model': task.ai_model,
+            'platform': 'simulated',
+            'tokens_used': random.randint(50, 200),
+            'latency': random.uniform(0.5, 2.0)
+        }
@@ -0,0 +1,117 @@
+"""
+Tests for the asyncio test scheduler
+Uses a fake task_runner so no AI platform is called
+"""
+import asyncio
+
+import pytest
+
+from gco_validator.test_engine import scheduler as scheduler_module
+from gco_validator.test_engine.scheduler import AsyncTestScheduler, ExecutionStrategy
+
+
+_real_sleep = asyncio.sleep
+
+
+def make_tasks(count, **kwargs):
+    return [
+        scheduler_module.TestTask(
+            id=f'task-{i}', brand_name='Brand', ai_model='deepseek', question=f'question {i}', **kwargs
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def backoff_delays(monkeypatch):
+    """Record retry backoff delays instead of sleeping through them"""
+    delays = []
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await _real_sleep(0)
+
+    monkeypatch.setattr(scheduler_module.asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+class FakeRunner:
+    """Fake AI call that tracks how many calls are in flight"""
+
+    def __init__(self, delay=0.01, outcomes=None):
+        self.delay = delay
+        self.outcomes = outcomes or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = {}
+
+    async def __call__(self, task):
+        self.calls[task.id] = self.calls.get(task.id, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            outcome = self.outcomes.get(task.id, [])
+            attempt = self.calls[task.id] - 1
+            step = outcome[attempt] if attempt < len(outcome) else 'ok'
+            await _real_sleep(10 if step == 'hang' else self.delay)
+            if step == 'fail':
+                return {'success': False, 'error': 'api error'}
+            return {'success': True, 'content': f'answer to {task.question}'}
+        finally:
+            self.in_flight -= 1
+
+
+class TestAsyncTestScheduler:
+    """AsyncTestScheduler tests"""
+
+    @pytest.mark.parametrize('strategy', [ExecutionStrategy.CONCURRENT, ExecutionStrategy.BATCH])
+    def test_semaphore_bounds_in_flight_calls(self, strategy):
+        """No more than max_workers AI calls run at the same time"""
+        runner = FakeRunner()
+        scheduler = AsyncTestScheduler(max_workers=3, strategy=strategy, task_runner=runner)
+
+        stats = asyncio.run(scheduler.schedule_tests(make_tasks(10)))
+
+        assert stats['completed_tasks'] == 10
+        assert runner.max_in_flight == 3
+
+    def test_timeouts_are_retried_with_backoff(self, backoff_delays):
+        """A timed-out attempt is cancelled and retried with exponential backoff"""
+        runner = FakeRunner(outcomes={'task-0': ['hang', 'hang']})
+        scheduler = AsyncTestScheduler(max_workers=2, task_runner=runner)
+        tasks = make_tasks(1, timeout=0.05, max_retries=3)
+
+        stats = asyncio.run(scheduler.schedule_tests(tasks))
+
+        result = stats['results'][0]
+        assert result['success'] and result['attempt'] == 3
+        assert runner.calls['task-0'] == 3
+        assert backoff_delays == [1, 2]
+
+    def test_exhausted_retries_report_last_error(self, backoff_delays):
+        """After the last attempt the task fails with the last error"""
+        runner = FakeRunner(outcomes={'task-0': ['fail', 'hang']})
+        scheduler = AsyncTestScheduler(task_runner=runner)
+        tasks = make_tasks(1, timeout=0.05, max_retries=1)
+
+        stats = asyncio.run(scheduler.schedule_tests(tasks))
+
+        assert stats['failed_tasks'] == 1
+        assert stats['results'][0]['error'] == 'Timed out after 0.05s'
+        assert runner.calls['task-0'] == 2
+        assert backoff_delays == [1]
+
+    @pytest.mark.parametrize('strategy', list(ExecutionStrategy))
+    def test_callback_called_once_per_task(self, strategy, backoff_delays):
+        """The completion callback fires exactly once per task, retries included"""
+        runner = FakeRunner(outcomes={'task-1': ['fail'], 'task-3': ['fail', 'fail', 'fail', 'fail']})
+        scheduler = AsyncTestScheduler(max_workers=2, strategy=strategy, task_runner=runner)
+        seen = []
+
+        stats = asyncio.run(scheduler.schedule_tests(
+            make_tasks(5), callback=lambda task, result: seen.append((task.id, result['task_id']))
+        ))
+
+        assert sorted(task_id for task_id, _ in seen) == [f'task-{i}' for i in range(5)]
+        assert all(task_id == result_id for task_id, result_id in seen)
+        assert stats['completed_tasks'] == 4 and stats['failed_tasks'] == 1
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：diagnosis_results GEO 字段列式存储
+
+1. 为 diagnosis_results 添加类型化列 geo_rank / geo_sentiment / geo_brand_mentioned /
+   geo_interception / geo_source_count 及索引
+2. 创建信源子表 diagnosis_result_sources
+3. 回填历史结果：解析 geo_data 填充类型化列，cited_sources 移入子表
+
+可重复执行，已回填的记录（geo_backfilled = 1）会被跳过。
+
+使用方法:
+    python3 migrate_geo_columns.py
+    python3 migrate_geo_columns.py --db /path/to/database.db --batch-size 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories.diagnosis_geo_repository import DiagnosisGeoRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description='diagnosis_results GEO 字段列式存储迁移')
+    parser.add_argument('--db', help='数据库路径（默认 backend_python/database.db）')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批处理的记录数')
+    args = parser.parse_args()
+
+    if args.db:
+        # 连接池在首次获取连接时才按 DB_PATH 建立连接
+        database_connection_pool.DB_PATH = Path(args.db)
+
+    start = time.time()
+    repo = DiagnosisGeoRepository()
+    filled = repo.backfill(batch_size=args.batch_size)
+    print(f"✅ 迁移完成：回填 {filled} 条结果，耗时 {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
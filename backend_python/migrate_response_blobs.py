@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：diagnosis_results 长回答外置到内容存储
+
+1. 为 diagnosis_results 添加 response_blob 列
+2. 将超过 RESPONSE_BLOB_MIN_BYTES 的内联 response_content 写入内容存储
+   （按 SHA-256 去重、压缩），主库中只保留哈希
+3. 可选 VACUUM 主库，回收迁移后的空闲页
+
+可重复执行，已迁移的记录会被跳过。
+
+使用方法:
+    python3 migrate_response_blobs.py
+    python3 migrate_response_blobs.py --db /path/to/database.db --blob-db /path/to/response_blobs.db --vacuum
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories.response_blob_repository import (
+    ResponseBlobStore,
+    externalize_diagnosis_responses,
+    get_response_blob_store,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='diagnosis_results 长回答外置迁移')
+    parser.add_argument('--db', help='数据库路径（默认 backend_python/database.db）')
+    parser.add_argument('--blob-db', help='内容存储路径（默认 RESPONSE_BLOB_DB_PATH）')
+    parser.add_argument('--batch-size', type=int, default=200, help='每批处理的记录数')
+    parser.add_argument('--vacuum', action='store_true', help='迁移后 VACUUM 主库')
+    args = parser.parse_args()
+
+    if args.db:
+        # 连接池在首次获取连接时才按 DB_PATH 建立连接
+        database_connection_pool.DB_PATH = Path(args.db)
+    db_path = str(database_connection_pool.DB_PATH)
+    store = ResponseBlobStore(args.blob_db) if args.blob_db else get_response_blob_store()
+    size_before = os.path.getsize(db_path)
+
+    start = time.time()
+    migrated = externalize_diagnosis_responses(store=store, batch_size=args.batch_size)
+    print(f"✅ 迁移完成：外置 {migrated} 条回答，耗时 {time.time() - start:.1f}s")
+
+    if args.vacuum:
+        pool = database_connection_pool.get_db_pool()
+        conn = pool.get_connection()
+        try:
+            conn.execute('VACUUM')
+        finally:
+            pool.return_connection(conn)
+        print(f"  主库大小：{size_before / 1024 / 1024:.1f}MB → {os.path.getsize(db_path) / 1024 / 1024:.1f}MB")
+
+    stats = store.get_stats()
+    print(f"  内容存储：{stats['blob_count']} 条，原始 {stats['raw_bytes'] / 1024 / 1024:.1f}MB，"
+          f"压缩后 {stats['stored_bytes'] / 1024 / 1024:.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
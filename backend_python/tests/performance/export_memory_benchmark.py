@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+诊断结果流式导出内存基准测试
+
+在临时数据库中生成不同规模的 diagnosis_results，每种导出方式在独立子进程中
+完整消费一次导出流，记录峰值 RSS（ru_maxrss）相对导入完成时的增量：
+
+1. buffered：一次性 fetchall 并整体 json.dumps（旧的整包导出方式）
+2. ndjson / csv / xlsx：DiagnosisResultExporter 流式导出
+
+流式导出的峰值内存应与行数无关；--max-growth-mb 用作回归守卫：
+最大规模与最小规模之间流式导出的峰值增量差超过该值时返回非 0 退出码。
+
+使用方法:
+    python3 tests/performance/export_memory_benchmark.py
+    python3 tests/performance/export_memory_benchmark.py --rows 5000,50000 --content-kb 4
+    python3 tests/performance/export_memory_benchmark.py --formats ndjson,csv --max-growth-mb 20
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+STREAM_FORMATS = ['ndjson', 'csv', 'xlsx']
+
+
+def make_database(path: str, rows: int, content_kb: int, results_per_execution: int = 100):
+    """生成 rows 条诊断结果（每次执行 results_per_execution 条）"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE diagnosis_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execution_id TEXT UNIQUE NOT NULL,
+            user_id TEXT NOT NULL,
+            brand_name TEXT NOT NULL
+        );
+        CREATE TABLE diagnosis_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            execution_id TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            question TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response_content TEXT NOT NULL,
+            response_latency REAL,
+            geo_data TEXT NOT NULL,
+            quality_score REAL NOT NULL,
+            quality_level TEXT NOT NULL,
+            quality_details TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'success',
+            error_message TEXT,
+            created_at TEXT NOT NULL
+        );
+    ''')
+    content = ('华为在人工智能领域表现突出。' * (content_kb * 1024 // 42 + 1))[:content_kb * 1024 // 3]
+    geo_data = json.dumps({'rank': 3, 'sentiment': 0.6, 'brand_mentioned': True,
+                           'cited_sources': [{'url': 'https://example.com', 'site_name': 'example'}] * 5})
+    executions = (rows + results_per_execution - 1) // results_per_execution
+    for e in range(executions):
+        report_id = conn.execute(
+            'INSERT INTO diagnosis_reports (execution_id, user_id, brand_name) VALUES (?, ?, ?)',
+            (f'exec_{e}', 'bench_user', '华为')
+        ).lastrowid
+        count = min(results_per_execution, rows - e * results_per_execution)
+        conn.executemany('''
+            INSERT INTO diagnosis_results (
+                report_id, execution_id, brand, question, model, response_content,
+                response_latency, geo_data, quality_score, quality_level, quality_details, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (report_id, f'exec_{e}', '华为', f'问题{i}', 'deepseek', content, 1.2, geo_data,
+             80.0, 'good', '{}', '2026-10-01T00:00:00')
+            for i in range(count)
+        ])
+    conn.commit()
+    conn.close()
+
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_worker(db_path: str, format_type: str):
+    """子进程：完整消费一次导出，输出 JSON 结果"""
+    from wechat_backend.services.streaming_export_service import DiagnosisResultExporter
+
+    exporter = DiagnosisResultExporter(db_path=db_path)
+    baseline_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    total_bytes = 0
+
+    if format_type == 'buffered':
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute('SELECT * FROM diagnosis_results ORDER BY id').fetchall()]
+        conn.close()
+        for row in rows:
+            row['geo_data'] = json.loads(row['geo_data'])
+            row['quality_details'] = json.loads(row['quality_details'])
+        total_bytes = len(json.dumps({'results': rows}, ensure_ascii=False).encode('utf-8'))
+    else:
+        for chunk in exporter.stream(format_type, user_id='bench_user'):
+            total_bytes += len(chunk)
+
+    print(json.dumps({
+        'format': format_type,
+        'seconds': round(time.perf_counter() - start, 3),
+        'bytes': total_bytes,
+        'peak_growth_mb': round(_peak_rss_mb() - baseline_mb, 1),
+    }))
+
+
+def measure(db_path: str, format_type: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, __file__, '--worker', '--db', db_path, '--formats', format_type],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'{format_type} 导出失败：\n{proc.stderr[-2000:]}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='诊断结果流式导出内存基准测试')
+    parser.add_argument('--rows', default='2000,20000', help='测试的行数，逗号分隔')
+    parser.add_argument('--content-kb', type=int, default=2, help='每条回答内容大小（KB）')
+    parser.add_argument('--formats', default='buffered,' + ','.join(STREAM_FORMATS), help='导出方式，逗号分隔')
+    parser.add_argument('--max-growth-mb', type=float, help='流式导出峰值增量随规模增长的上限（MB）')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    if args.worker:
+        run_worker(args.db, formats[0])
+        return
+
+    row_counts = [int(r) for r in args.rows.split(',')]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in row_counts:
+            db_path = os.path.join(tmp_dir, f'export_{rows}.db')
+            make_database(db_path, rows, args.content_kb)
+            print(f"\n📦 {rows} 行（回答 {args.content_kb}KB/条）")
+            print(f"{'format':>10} {'peak +MB':>10} {'output MB':>10} {'seconds':>8}")
+            for format_type in formats:
+                try:
+                    result = measure(db_path, format_type)
+                except RuntimeError as e:
+                    print(f"❌ {e}")
+                    continue
+                results[(rows, format_type)] = result
+                print(f"{format_type:>10} {result['peak_growth_mb']:>10} "
+                      f"{result['bytes'] / 1024 / 1024:>10.1f} {result['seconds']:>8}")
+
+    if args.max_growth_mb is None or len(row_counts) < 2:
+        return
+
+    smallest, largest = min(row_counts), max(row_counts)
+    problems = []
+    for format_type in formats:
+        if format_type == 'buffered' or (smallest, format_type) not in results or (largest, format_type) not in results:
+            continue
+        growth = results[(largest, format_type)]['peak_growth_mb'] - results[(smallest, format_type)]['peak_growth_mb']
+        if growth > args.max_growth_mb:
+            problems.append(f"{format_type}: {smallest}→{largest} 行峰值内存增加 {growth:.1f}MB，超过 {args.max_growth_mb}MB")
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("\n✅ 流式导出峰值内存与导出规模无关")
+
+
+if __name__ == '__main__':
+    main()
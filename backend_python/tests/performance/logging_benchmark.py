@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+日志热路径开销基准测试
+
+模拟 NxM 任务：每个任务在调用线程中写 --logs-per-task 条 INFO 日志
+（其中一条为同一调用点的重复日志）和若干条未启用的 DEBUG 日志，
+对比调用线程的单任务日志耗时：
+
+1. sync：旧 setup_logging 配置（StreamHandler + RotatingFileHandler，调用线程内格式化和写文件）
+2. queue：统一日志 DeferredQueueHandler + QueueListener（调用线程只入队）
+3. queue+limit：在 queue 基础上启用同一调用点的重复日志限流
+
+另外对比未启用级别下 f-string 与惰性 % 格式化的单次调用开销。
+
+使用方法:
+    python3 tests/performance/logging_benchmark.py
+    python3 tests/performance/logging_benchmark.py --tasks 5000 --threads 8 --logs-per-task 10
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from unified_logging import UnifiedLogger, UnifiedLoggerFactory
+
+LEGACY_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(funcName)s() - %(message)s'
+
+
+def configure_sync(log_dir: str, stream):
+    """旧的同步配置"""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    formatter = logging.Formatter(LEGACY_FORMAT)
+    console = logging.StreamHandler(stream)
+    console.setFormatter(formatter)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, 'sync.log'), maxBytes=100 * 1024 * 1024, backupCount=1, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    root.addHandler(console)
+    root.addHandler(file_handler)
+    return lambda: [h.close() for h in (console, file_handler)]
+
+
+def configure_queue(log_dir: str, repeat_limit: int):
+    """统一日志队列配置"""
+    factory = UnifiedLoggerFactory()
+    factory.initialize(log_level='INFO', log_dir=log_dir, queue_size=100000,
+                       enable_ai_handler=False, repeat_limit=repeat_limit, force=True)
+    return factory._stop_listener
+
+
+def run_tasks(logger, tasks: int, threads: int, logs_per_task: int) -> float:
+    """并发执行任务，返回调用线程内单任务平均日志耗时（微秒）"""
+    per_thread = max(1, tasks // threads)
+    elapsed = []
+    lock = threading.Lock()
+
+    def worker(worker_id: int):
+        start = time.perf_counter()
+        for i in range(per_thread):
+            for j in range(logs_per_task - 1):
+                logger.info('[NxM] ✅ 维度结果持久化成功：%s-%s, 状态：%s', f'品牌{worker_id}', f'model{j}', i)
+            logger.info('[NxM] 轮询进度：%s/%s', i, per_thread)
+            logger.debug('[NxM] 原始响应：%s', 'x' * 200)
+        with lock:
+            elapsed.append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(elapsed) / (per_thread * threads) * 1e6
+
+
+def disabled_call_overhead(logger, calls: int):
+    """未启用级别下 f-string 与惰性 % 格式化的单次调用耗时（纳秒）"""
+    payload = {'rank': 3, 'sentiment': 0.8, 'sources': list(range(20))}
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug(f"geo_data={payload}")
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug("geo_data=%s", payload)
+    lazy = time.perf_counter() - start
+    return eager / calls * 1e9, lazy / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日志热路径开销基准测试')
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--logs-per-task', type=int, default=6)
+    parser.add_argument('--repeat-limit', type=int, default=50, help='queue+limit 模式下每个调用点每窗口放行条数')
+    args = parser.parse_args()
+
+    logger = UnifiedLogger('wechat_backend.api', None)
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull  # 控制台输出丢弃，只比较调用线程开销
+        try:
+            modes = [
+                ('sync', lambda: configure_sync(log_dir, devnull)),
+                ('queue', lambda: configure_queue(log_dir, 0)),
+                ('queue+limit', lambda: configure_queue(log_dir, args.repeat_limit)),
+            ]
+            for name, configure in modes:
+                teardown = configure()
+                start = time.perf_counter()
+                results[name] = run_tasks(logger, args.tasks, args.threads, args.logs_per_task)
+                emitted = time.perf_counter() - start
+                teardown()  # queue 模式在此排空队列
+                results[name] = (results[name], emitted, time.perf_counter() - start)
+            eager_ns, lazy_ns = disabled_call_overhead(logger, 100000)
+        finally:
+            sys.stdout = stdout
+
+    print(f"📊 {args.tasks} 个任务 × {args.logs_per_task} 条日志，{args.threads} 个线程")
+    for name, (per_task_us, emitted, drained) in results.items():
+        print(f"  {name:<12} 单任务日志耗时: {per_task_us:8.1f}µs  "
+              f"调用方总耗时: {emitted * 1000:7.1f}ms  含排空: {drained * 1000:7.1f}ms")
+    baseline = results['sync'][0]
+    for name in ('queue', 'queue+limit'):
+        print(f"  {name} 相对 sync: {baseline / results[name][0]:.1f}x")
+    print(f"  未启用 DEBUG: f-string {eager_ns:.0f}ns/次，惰性 % {lazy_ns:.0f}ns/次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+确定性 Mock LLM 服务器（OpenAI 兼容）
+
+为 NxM 基准测试提供可控的后端：
+1. 兼容 POST /chat/completions 与 /v1/chat/completions
+2. 按模型配置延迟分布（fixed / uniform / lognormal）
+3. 按比例注入 429 / 5xx 错误
+4. 回答内容复用 ai_adapters/mock_providers.py 的语料，相同请求得到相同回答
+
+相同的 seed、提示词和重试次数总是得到相同的延迟与错误注入结果，
+因此不同提交之间的基准结果可以直接对比。
+
+使用方法:
+    python3 tests/performance/mock_llm_server.py --port 18080 --latency lognormal:0.8:0.4
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from wechat_backend.ai_adapters.mock_providers import build_mock_geo_response
+
+
+class LatencyProfile:
+    """
+    延迟分布
+
+    规格字符串:
+        fixed:0.5            固定 0.5 秒
+        uniform:0.2:1.0      0.2~1.0 秒均匀分布
+        lognormal:0.8:0.4    中位数 0.8 秒、sigma 0.4 的对数正态分布
+    """
+
+    def __init__(self, spec: str = 'fixed:0'):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'fixed':
+            return self.params[0] if self.params else 0.0
+        if self.kind == 'uniform':
+            return rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params[0], self.params[1]
+        return rng.lognormvariate(math.log(max(median, 1e-6)), sigma)
+
+
+class MockLLMServer:
+    """确定性 Mock LLM 服务器"""
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: str = 'fixed:0',
+                 model_latency: Optional[Dict[str, str]] = None,
+                 error_429_rate: float = 0.0,
+                 error_5xx_rate: float = 0.0,
+                 seed: int = 0):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示自动分配
+            latency: 默认延迟分布规格
+            model_latency: 按模型名覆盖延迟分布 {model: spec}
+            error_429_rate: 429 注入比例
+            error_5xx_rate: 5xx 注入比例
+            seed: 随机种子
+        """
+        self.default_latency = LatencyProfile(latency)
+        self.model_latency = {m: LatencyProfile(s) for m, s in (model_latency or {}).items()}
+        self.error_429_rate = error_429_rate
+        self.error_5xx_rate = error_5xx_rate
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._latencies: List[float] = []
+        self._status_counts: Dict[int, int] = {}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'MockLLMServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-llm-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def get_stats(self) -> Dict:
+        """获取服务端统计（请求数、状态码分布、服务端注入延迟）"""
+        with self._lock:
+            return {
+                'requests': sum(self._status_counts.values()),
+                'status_counts': {str(k): v for k, v in sorted(self._status_counts.items())},
+                'latencies': list(self._latencies),
+            }
+
+    # ---------- 请求处理 ----------
+
+    def plan_response(self, model: str, prompt: str):
+        """
+        计算某次请求的 (延迟, 状态码)
+
+        以 (seed, model, prompt, 第几次尝试) 为随机源，保证重试时结果可复现且可能恢复。
+        """
+        key = f"{model}\x00{prompt}"
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+
+        digest = hashlib.sha256(f"{self.seed}\x00{key}\x00{attempt}".encode('utf-8')).digest()
+        rng = random.Random(int.from_bytes(digest[:8], 'big'))
+
+        profile = self.model_latency.get(model, self.default_latency)
+        delay = profile.sample(rng)
+
+        roll = rng.random()
+        if roll < self.error_429_rate:
+            status = 429
+        elif roll < self.error_429_rate + self.error_5xx_rate:
+            status = 503
+        else:
+            status = 200
+        return delay, status
+
+    def _record(self, delay: float, status: int):
+        with self._lock:
+            self._latencies.append(delay)
+            self._status_counts[status] = self._status_counts.get(status, 0) + 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send(404, {'error': {'message': 'not found'}})
+                    return
+
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except json.JSONDecodeError:
+                    self._send(400, {'error': {'message': 'invalid json'}})
+                    return
+
+                model = payload.get('model', 'mock-model')
+                messages = payload.get('messages') or [{}]
+                prompt = messages[-1].get('content', '')
+
+                delay, status = server.plan_response(model, prompt)
+                time.sleep(delay)
+                server._record(delay, status)
+
+                if status == 429:
+                    self._send(429, {'error': {'message': 'rate limit exceeded', 'type': 'rate_limit_error'}},
+                               {'Retry-After': '1'})
+                    return
+                if status != 200:
+                    self._send(status, {'error': {'message': 'service unavailable', 'type': 'server_error'}})
+                    return
+
+                content = build_mock_geo_response(prompt, seed=server.seed)
+                prompt_tokens = max(1, len(prompt) // 2)
+                completion_tokens = max(1, len(content) // 2)
+                self._send(200, {
+                    'id': 'mock-' + hashlib.md5(prompt.encode('utf-8')).hexdigest()[:12],
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens,
+                    },
+                })
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='确定性 Mock LLM 服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency', default='fixed:0.5', help='延迟分布，如 lognormal:0.8:0.4')
+    parser.add_argument('--error-429', type=float, default=0.0, help='429 注入比例')
+    parser.add_argument('--error-5xx', type=float, default=0.0, help='5xx 注入比例')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency,
+                           error_429_rate=args.error_429, error_5xx_rate=args.error_5xx, seed=args.seed)
+    print(f"Mock LLM server listening on {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
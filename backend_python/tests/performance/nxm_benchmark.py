@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+NxM 执行链路基准测试
+
+端到端驱动 execute_nxm_test（串行引擎）与 ConcurrentExecutionEngine（并发引擎），
+后端使用本地确定性 Mock LLM 服务器（tests/performance/mock_llm_server.py），
+按 品牌数 × 问题数 × 模型数 的矩阵运行并记录：
+
+1. 吞吐量（任务数 / 秒）与端到端耗时
+2. 各阶段 p50/p95/p99（AI 调用、GEO 解析、维度结果持久化、WAL、聚合等）
+3. 数据库写语句数（INSERT/UPDATE/DELETE/REPLACE）
+4. 峰值 RSS
+
+每个场景在独立子进程中运行，保证峰值 RSS 互不干扰；结果输出为 JSON，
+可以在不同提交之间用 --compare 对比。
+
+每个场景在全新的临时目录中运行：backend_python 下的 SQLite 库（database.db 等）、
+日志、WAL 与限流/响应正文库都重定向到该目录，不会改动开发数据库。
+
+使用方法:
+    python3 tests/performance/nxm_benchmark.py
+    python3 tests/performance/nxm_benchmark.py --brands 1,3 --questions 1,3 --models 1,3
+    python3 tests/performance/nxm_benchmark.py --latency lognormal:0.8:0.4 --error-429 0.05 --error-5xx 0.02
+    python3 tests/performance/nxm_benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+# 添加项目路径
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ==================== 基准配置 ====================
+
+# 可参与基准测试的平台及其 API Key 环境变量（统一指向 Mock 服务器）
+BENCHMARK_PLATFORMS = {
+    'deepseek': 'DEEPSEEK_API_KEY',
+    'qwen': 'QWEN_API_KEY',
+    'zhipu': 'ZHIPU_API_KEY',
+    'chatgpt': 'CHATGPT_API_KEY',
+    'gemini': 'GEMINI_API_KEY',
+}
+
+BENCHMARK_BRANDS = ['华为', '小米', '苹果', 'OPPO', 'vivo']
+
+BENCHMARK_QUESTIONS = [
+    '3000 元左右拍照好看的手机推荐哪个牌子的',
+    '折叠屏手机推荐哪个品牌',
+    '哪个品牌的手机性价比最高',
+    '如何选择适合自己的手机品牌',
+    '国产手机品牌排行榜',
+]
+
+ENGINES = ('nxm', 'concurrent')
+
+RESULT_MARKER = 'BENCHMARK_RESULT '
+
+_WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+# ==================== 统计工具 ====================
+
+def percentile(values: List[float], pct: float) -> float:
+    """线性插值百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """汇总耗时样本（秒）为毫秒统计"""
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(max(values) * 1000, 3),
+    }
+
+
+class StageTimer:
+    """按阶段收集耗时样本（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        timed.__wrapped__ = func
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: summarize(samples) for stage, samples in sorted(self._samples.items())}
+
+
+class DBWriteCounter:
+    """
+    通过 sqlite3 trace 回调统计写语句数（覆盖原生 sqlite3 与 SQLAlchemy 连接）
+
+    指定 workdir 时，backend_python 目录下的 SQLite 文件改为在 workdir 中打开，
+    场景运行在全新的空库上。
+    """
+
+    def __init__(self, workdir: str = None):
+        self._lock = threading.Lock()
+        self.counts = {verb: 0 for verb in _WRITE_VERBS}
+        self._original_connect = None
+        self._workdir = Path(workdir) if workdir else None
+
+    def _redirect(self, database):
+        if self._workdir is None or not isinstance(database, (str, os.PathLike)):
+            return database
+        if str(database).startswith((':memory:', 'file:')):
+            return database
+        if Path(database).resolve().parent == BACKEND_DIR.resolve():
+            return str(self._workdir / Path(database).name)
+        return database
+
+    def _trace(self, statement: str):
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+        if verb in self.counts:
+            with self._lock:
+                self.counts[verb] += 1
+
+    def install(self):
+        original = self._original_connect = sqlite3.connect
+
+        def connect(database, *args, **kwargs):
+            conn = original(self._redirect(database), *args, **kwargs)
+            conn.set_trace_callback(self._trace)
+            return conn
+
+        sqlite3.connect = connect
+        sqlite3.dbapi2.connect = connect
+
+    def uninstall(self):
+        if self._original_connect:
+            sqlite3.connect = self._original_connect
+            sqlite3.dbapi2.connect = self._original_connect
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self.counts)
+        result['total'] = sum(result.values())
+        return result
+
+
+def peak_rss_mb() -> float:
+    """当前进程峰值 RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 返回 KB，macOS 返回字节
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+# ==================== 场景执行（子进程） ====================
+
+def _install_mock_adapters(base_url: str, platforms: List[str], timer: StageTimer):
+    """把参与测试的平台注册为指向 Mock 服务器的 OpenAI 兼容适配器"""
+    from wechat_backend.ai_adapters.base_adapter import AIPlatformType
+    from wechat_backend.ai_adapters.deepseek_adapter import DeepSeekAdapter
+    from wechat_backend.ai_adapters.factory import AIAdapterFactory
+
+    for platform in platforms:
+        def __init__(self, api_key, model_name=None, _platform=platform, **kwargs):
+            # 模型名使用平台名，Mock 服务器据此选择延迟分布
+            DeepSeekAdapter.__init__(self, api_key, _platform, base_url=base_url,
+                                     enable_chinese_constraint=False)
+
+        adapter_class = type(f'Benchmark{platform.title()}Adapter', (DeepSeekAdapter,), {
+            '__init__': __init__,
+            'send_prompt': timer.wrap('ai_call', DeepSeekAdapter.send_prompt),
+        })
+        AIAdapterFactory.register(AIPlatformType(platform), adapter_class)
+
+
+def _instrument_pipeline(timer: StageTimer):
+    """为执行链路上的关键阶段加计时"""
+    from wechat_backend import nxm_concurrent_engine_v2, nxm_execution_engine, repositories
+    from wechat_backend.nxm_streaming_aggregator import StreamingResultAggregator
+
+    for module in (nxm_execution_engine, nxm_concurrent_engine_v2):
+        module.parse_geo_with_validation = timer.wrap('parse', module.parse_geo_with_validation)
+        module.aggregate_results_by_brand = timer.wrap('aggregate', module.aggregate_results_by_brand)
+
+    nxm_execution_engine.write_wal = timer.wrap('wal', nxm_execution_engine.write_wal)
+    repositories.save_dimension_result = timer.wrap('persist_dimension', repositories.save_dimension_result)
+    repositories.save_task_status = timer.wrap('persist_status', repositories.save_task_status)
+    StreamingResultAggregator.finalize = timer.wrap('aggregate', StreamingResultAggregator.finalize)
+
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前进程中运行一个基准场景"""
+    # API Key 须在导入 config 之前设置（mock_llm_server 会间接导入 config）
+    platforms = scenario['platforms']
+    for platform in platforms:
+        os.environ[BENCHMARK_PLATFORMS[platform]] = 'benchmark-key'
+
+    # 先安装连接钩子，导入期间打开的连接也落在临时目录
+    timer = StageTimer()
+    db_counter = DBWriteCounter(scenario.get('workdir'))
+    db_counter.install()
+
+    from mock_llm_server import MockLLMServer
+
+    server = MockLLMServer(
+        latency=scenario['latency'],
+        model_latency=scenario.get('model_latency'),
+        error_429_rate=scenario['error_429'],
+        error_5xx_rate=scenario['error_5xx'],
+        seed=scenario['seed'],
+    ).start()
+
+    try:
+        # 与生产进程一致先加载 Flask 应用（建表并注册蓝图），
+        # 否则执行引擎内延迟导入 views 时会在蓝图注册后继续添加路由
+        import wechat_backend.app  # noqa: F401
+        from wechat_backend import nxm_circuit_breaker, nxm_execution_engine
+        if scenario.get('workdir'):
+            nxm_execution_engine.WAL_DIR = os.path.join(scenario['workdir'], 'nxm_wal')
+            nxm_circuit_breaker.CIRCUIT_BREAKER_STORE_PATH = Path(scenario['workdir']) / 'circuit_breaker_store.json'
+
+        _install_mock_adapters(server.base_url, platforms, timer)
+        _instrument_pipeline(timer)
+
+        from wechat_backend.nxm_scheduler import create_scheduler
+
+        brands = BENCHMARK_BRANDS[:scenario['brands']]
+        questions = BENCHMARK_QUESTIONS[:scenario['questions']]
+        models = [{'name': p} for p in platforms]
+        execution_id = f"bench-{uuid.uuid4().hex[:12]}"
+        execution_store: Dict[str, Any] = {}
+
+        start = time.perf_counter()
+        if scenario['engine'] == 'nxm':
+            from wechat_backend.nxm_execution_engine import execute_nxm_test
+            result = execute_nxm_test(
+                execution_id, brands[0], brands[1:], models, questions,
+                user_id='benchmark', user_level='Free',
+                execution_store=execution_store, timeout_seconds=scenario['timeout']
+            )
+        else:
+            from wechat_backend.nxm_concurrent_engine_v2 import execute_nxm_test_concurrent
+            scheduler = create_scheduler(execution_id, execution_store)
+            result = execute_nxm_test_concurrent(
+                execution_id, brands[0], brands[1:], models, questions,
+                user_id='benchmark', user_level='Free',
+                execution_store=execution_store, scheduler=scheduler,
+                timeout_seconds=scenario['timeout'], max_concurrent=scenario['max_concurrent']
+            )
+        wall = time.perf_counter() - start
+    finally:
+        server_stats = server.get_stats()
+        server.stop()
+        db_counter.uninstall()
+
+    total_tasks = scenario['brands'] * scenario['questions'] * len(platforms)
+    results = result.get('results') or []
+    failed = sum(1 for r in results if r.get('error'))
+
+    stages = timer.summary()
+    stages['llm_server'] = summarize(server_stats.pop('latencies'))
+
+    return {
+        'scenario': scenario,
+        'success': bool(result.get('success')),
+        'total_tasks': total_tasks,
+        'results': len(results),
+        'failed_results': failed,
+        'wall_seconds': round(wall, 3),
+        'throughput_tasks_per_sec': round(total_tasks / wall, 3) if wall > 0 else 0.0,
+        'stages': stages,
+        'db_writes': db_counter.summary(),
+        'llm_server': server_stats,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+# ==================== 矩阵调度（父进程） ====================
+
+def build_matrix(args) -> List[Dict[str, Any]]:
+    """展开 引擎 × 品牌数 × 问题数 × 模型数 矩阵"""
+    platforms = [p.strip() for p in args.platforms.split(',') if p.strip()]
+    unknown = [p for p in platforms if p not in BENCHMARK_PLATFORMS]
+    if unknown:
+        raise SystemExit(f"不支持的平台：{unknown}，可选：{list(BENCHMARK_PLATFORMS)}")
+
+    model_latency = dict(item.split('=', 1) for item in args.model_latency) if args.model_latency else None
+
+    scenarios = []
+    for engine, n_brands, n_questions, n_models in itertools.product(
+        args.engines.split(','),
+        [int(x) for x in args.brands.split(',')],
+        [int(x) for x in args.questions.split(',')],
+        [int(x) for x in args.models.split(',')],
+    ):
+        if engine not in ENGINES:
+            raise SystemExit(f"不支持的引擎：{engine}，可选：{list(ENGINES)}")
+        scenarios.append({
+            'name': f"{engine}-b{n_brands}-q{n_questions}-m{n_models}",
+            'engine': engine,
+            'brands': min(n_brands, len(BENCHMARK_BRANDS)),
+            'questions': min(n_questions, len(BENCHMARK_QUESTIONS)),
+            'platforms': platforms[:n_models],
+            'latency': args.latency,
+            'model_latency': model_latency,
+            'error_429': args.error_429,
+            'error_5xx': args.error_5xx,
+            'seed': args.seed,
+            'max_concurrent': args.max_concurrent,
+            'timeout': args.timeout,
+        })
+    return scenarios
+
+
+def scenario_env(workdir: Path) -> Dict[str, str]:
+    """子进程环境：日志、限流状态、响应正文库与审计溢出文件全部落在临时目录"""
+    env = dict(os.environ)
+    env.update({
+        'LOG_DIR': str(workdir / 'logs'),
+        'RATE_LIMIT_DB_PATH': str(workdir / 'rate_limits.db'),
+        'RESPONSE_BLOB_DB_PATH': str(workdir / 'response_blobs.db'),
+        'AUDIT_SPILL_PATH': str(workdir / 'audit_spill.jsonl'),
+        'AUDIT_SPILL_PATH_DB': str(workdir / 'audit_spill_db.jsonl'),
+        'DATABASE_PATH': str(workdir / 'database.db'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get('PYTHONPATH', '')])),
+    })
+    return env
+
+
+def run_in_subprocess(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """在独立子进程与全新临时目录中运行场景，隔离峰值 RSS、全局状态与数据库"""
+    with tempfile.TemporaryDirectory(prefix='nxm_benchmark_') as tmp:
+        workdir = Path(tmp)
+        payload = dict(scenario, workdir=str(workdir))
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-scenario', json.dumps(payload, ensure_ascii=False)],
+            cwd=str(workdir),
+            env=scenario_env(workdir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=scenario['timeout'] + 120,
+        )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            # 临时目录已删除，结果中记录原始场景配置
+            return dict(json.loads(line[len(RESULT_MARKER):]), scenario=scenario)
+    return {'scenario': scenario, 'error': f'子进程未返回结果 (exit={proc.returncode})'}
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """对比两次基准结果，返回可读的差异行"""
+    def index(report):
+        return {r['scenario']['name']: r for r in report.get('scenarios', []) if 'scenario' in r}
+
+    def delta(old, new):
+        if not old:
+            return 'n/a'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = []
+    old_runs, new_runs = index(baseline), index(current)
+    for name in sorted(set(old_runs) & set(new_runs)):
+        old, new = old_runs[name], new_runs[name]
+        if 'error' in old or 'error' in new:
+            continue
+        lines.append(
+            f"{name}: 吞吐 {old['throughput_tasks_per_sec']} → {new['throughput_tasks_per_sec']} "
+            f"({delta(old['throughput_tasks_per_sec'], new['throughput_tasks_per_sec'])}), "
+            f"DB 写 {old['db_writes']['total']} → {new['db_writes']['total']}, "
+            f"峰值 RSS {old['peak_rss_mb']} → {new['peak_rss_mb']} MB"
+        )
+        for stage in sorted(set(old['stages']) & set(new['stages'])):
+            old_p95 = old['stages'][stage].get('p95_ms')
+            new_p95 = new['stages'][stage].get('p95_ms')
+            if old_p95 is not None and new_p95 is not None:
+                lines.append(f"    {stage} p95: {old_p95} → {new_p95} ms ({delta(old_p95, new_p95)})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NxM 执行链路基准测试')
+    parser.add_argument('--engines', default='nxm,concurrent', help='引擎列表：nxm,concurrent')
+    parser.add_argument('--brands', default='1,3', help='品牌数列表')
+    parser.add_argument('--questions', default='1,3', help='问题数列表')
+    parser.add_argument('--models', default='1,3', help='模型数列表')
+    parser.add_argument('--platforms', default='deepseek,qwen,zhipu', help='模型平台池（按顺序取前 N 个）')
+    parser.add_argument('--latency', default='lognormal:0.5:0.3', help='默认延迟分布')
+    parser.add_argument('--model-latency', action='append', help='按平台覆盖延迟，如 qwen=fixed:1.2，可重复')
+    parser.add_argument('--error-429', type=float, default=0.0, help='429 注入比例')
+    parser.add_argument('--error-5xx', type=float, default=0.0, help='5xx 注入比例')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-concurrent', type=int, default=5, help='并发引擎最大并发数')
+    parser.add_argument('--timeout', type=int, default=600, help='单场景超时（秒）')
+    parser.add_argument('--output', help='结果 JSON 输出路径')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        sys.path.insert(0, str(Path(__file__).parent))
+        result = run_scenario(json.loads(args.run_scenario))
+        print(RESULT_MARKER + json.dumps(result, ensure_ascii=False))
+        return
+
+    scenarios = build_matrix(args)
+    print(f"📊 共 {len(scenarios)} 个场景")
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'scenarios': [],
+    }
+    for scenario in scenarios:
+        print(f"▶️  {scenario['name']} ...", flush=True)
+        run = run_in_subprocess(scenario)
+        report['scenarios'].append(run)
+        if 'error' in run:
+            print(f"❌ {scenario['name']}: {run['error']}")
+        else:
+            print(f"✅ {scenario['name']}: {run['wall_seconds']}s, "
+                  f"{run['throughput_tasks_per_sec']} 任务/秒, DB 写 {run['db_writes']['total']}, "
+                  f"峰值 RSS {run['peak_rss_mb']} MB")
+
+    output = args.output or f"nxm_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"📄 结果已保存：{output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n📈 与 {args.compare} 对比：")
+        for line in compare_reports(baseline, report):
+            print(line)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=str(BACKEND_DIR), text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return ''
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+轮询 / SSE 端点压测（临时数据库 + 本地应用子进程）
+
+在临时 SQLite 中通过应用自身的仓库层生成合成执行，按 --server 指定的 worker 模型在子进程中
+启动应用，再用 aiohttp 驱动并发轮询客户端和 SSE 订阅者：
+
+1. 轮询：/api/test-progress、/test/status/<id>、/api/diagnosis/report/<id>、/api/export/pdf
+2. SSE：/api/stream/progress/<id>，由压测专用端点按固定间隔广播带发送时间戳的进度事件
+
+输出每个端点的 RPS、状态码分布、延迟分位数、每请求 SQL 语句数，以及 SSE 连接耗时、
+扇出延迟（广播到客户端收到）和送达率。
+
+说明:
+- 应用各模块硬编码的 database.db 在服务进程内由 sqlite3.connect 钩子重定向到临时库；
+  同一钩子为每个连接挂上 trace 回调，按请求线程统计 SQL 语句数并写入响应头 X-Loadtest-DB-Queries
+- 每个虚拟客户端绑定独立的回环地址（127.0.x.y），与真实小程序客户端一样各自落入独立的
+  按 IP 限流桶；不支持多回环地址的系统使用 --single-ip
+- 多进程 worker 模型下 SSE 连接按进程隔离，广播只会到达同一进程内的订阅者，送达率会如实反映
+
+使用方法:
+    python3 tests/performance/polling_sse_load_test.py
+    python3 tests/performance/polling_sse_load_test.py --pollers 300 --sse 200 --duration 60
+    python3 tests/performance/polling_sse_load_test.py --server processes:4 --output load.json
+    python3 tests/performance/polling_sse_load_test.py --server gunicorn:4:8 --endpoints progress,status
+    python3 tests/performance/polling_sse_load_test.py --max-p95-ms 500 --max-fanout-p95-ms 1000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+SCRIPT_DIR = Path(__file__).parent
+
+# 添加项目路径
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_DB_PATH = (BACKEND_DIR / 'database.db').resolve()
+LOADTEST_DB_ENV = 'LOADTEST_DB_PATH'
+DB_QUERIES_HEADER = 'X-Loadtest-DB-Queries'
+
+# 端点名 -> (路径模板, 是否只请求已完成的执行, 默认轮询间隔秒)
+ENDPOINTS = {
+    'progress': ('/api/test-progress?executionId={execution_id}', False, 2.0),
+    'status': ('/test/status/{execution_id}', False, 3.0),
+    'report': ('/api/diagnosis/report/{execution_id}', True, 5.0),
+    'pdf': ('/api/export/pdf?executionId={execution_id}&level=basic', True, 15.0),
+}
+
+# worker 模型 -> 参数个数
+SERVER_MODELS = {'threaded': 0, 'single': 0, 'processes': 1, 'gunicorn': 2}
+
+SEED_BRANDS = ['华为', '小米', 'OPPO']
+SEED_MODELS = ['deepseek', 'qwen', 'doubao']
+
+# 不计入每请求 SQL 语句数的事务控制语句
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'END')
+
+# 发布端提前停止，留给最后一批 SSE 事件送达的时间（sse_service 每 0.5 秒推送一次）
+SSE_DRAIN_SECONDS = 2.0
+
+
+# ==================== 服务端（子进程） ====================
+
+_request_counters = threading.local()
+
+
+def _count_statement(statement: str):
+    if not statement.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+        _request_counters.queries = getattr(_request_counters, 'queries', 0) + 1
+
+
+def install_sqlite_hooks(db_path: str):
+    """把默认 database.db 的连接重定向到 db_path，并为每个连接挂上语句计数回调"""
+    real_connect = sqlite3.connect
+
+    def connect(database, *args, **kwargs):
+        if isinstance(database, (str, os.PathLike)) and not str(database).startswith((':memory:', 'file:')) \
+                and Path(database).resolve() == DEFAULT_DB_PATH:
+            database = db_path
+        conn = real_connect(database, *args, **kwargs)
+        conn.set_trace_callback(_count_statement)
+        return conn
+
+    sqlite3.connect = sqlite3.dbapi2.connect = connect  # SQLAlchemy 经 dbapi2 连接
+
+
+def create_app(db_path: str):
+    """导入应用，注册每请求 SQL 计数钩子和压测专用端点"""
+    install_sqlite_hooks(db_path)
+
+    from flask import jsonify, request
+    from wechat_backend.app import app
+    from wechat_backend.services.sse_service import get_sse_manager, send_progress_update
+
+    def reset_counters():
+        _request_counters.queries = 0
+
+    def attach_counters(response):
+        response.headers[DB_QUERIES_HEADER] = str(getattr(_request_counters, 'queries', 0))
+        return response
+
+    # 计数覆盖应用自身的全部 before/after_request 钩子（after_request 按注册逆序执行）
+    app.before_request_funcs.setdefault(None, []).insert(0, reset_counters)
+    app.after_request_funcs.setdefault(None, []).insert(0, attach_counters)
+
+    @app.route('/__loadtest/ready')
+    def loadtest_ready():
+        return jsonify({'pid': os.getpid()})
+
+    @app.route('/__loadtest/publish/<execution_id>', methods=['POST'])
+    def loadtest_publish(execution_id):
+        seq = int(request.args.get('seq', 0))
+        send_progress_update(execution_id, 50, 'ai_fetching', '压测进度事件', seq=seq, sent_at=time.time())
+        subscribers = get_sse_manager().get_stats()['connections_by_execution'].get(execution_id, 0)
+        return jsonify({'pid': os.getpid(), 'subscribers': subscribers})
+
+    return app
+
+
+def gunicorn_app():
+    """gunicorn 入口：gunicorn 'polling_sse_load_test:gunicorn_app()'"""
+    return create_app(os.environ[LOADTEST_DB_ENV])
+
+
+def serve(db_path: str, host: str, port: int, server: Tuple[str, List[int]]):
+    """以 werkzeug 启动应用（threaded / single / processes:N）"""
+    from werkzeug.serving import run_simple
+
+    app = create_app(db_path)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    model, params = server
+    if model == 'processes':
+        run_simple(host, port, app, threaded=False, processes=params[0])
+    else:
+        run_simple(host, port, app, threaded=(model == 'threaded'))
+
+
+def execution_status(index: int, completed_ratio: float, failed_ratio: float) -> str:
+    """按序号确定合成执行的状态（每 100 个执行内按比例分布）"""
+    bucket = (index % 100) / 100
+    if bucket < completed_ratio:
+        return 'completed'
+    if bucket < completed_ratio + failed_ratio:
+        return 'failed'
+    return 'processing'
+
+
+def seed_database(executions: int, results_per_execution: int,
+                  completed_ratio: float, failed_ratio: float) -> List[Dict]:
+    """
+    通过仓库层写入合成执行（报告 + 结果明细），保证与应用当前表结构一致
+
+    Returns:
+        [{'execution_id', 'status'}]
+    """
+    from wechat_backend.database_core import init_db
+    from wechat_backend.diagnosis_report_storage import init_database_tables
+    from wechat_backend.diagnosis_report_repository import DiagnosisReportRepository, DiagnosisResultRepository
+
+    init_db()
+    init_database_tables()
+    reports, results = DiagnosisReportRepository(), DiagnosisResultRepository()
+    content = '华为在人工智能领域表现突出，手机与云服务口碑稳定。' * 20
+
+    manifest = []
+    for i in range(executions):
+        execution_id = f'loadtest-{i:05d}'
+        status = execution_status(i, completed_ratio, failed_ratio)
+        report_id = reports.create(execution_id, 'loadtest-user', {
+            'brand_name': SEED_BRANDS[0],
+            'competitor_brands': SEED_BRANDS[1:],
+            'selected_models': [{'name': model} for model in SEED_MODELS],
+            'custom_questions': ['介绍一下{brandName}', '{brandName}的主要产品是什么'],
+        })
+
+        count = results_per_execution if status == 'completed' else results_per_execution // 2
+        results.add_batch(report_id, execution_id, [{
+            'brand': SEED_BRANDS[j % len(SEED_BRANDS)],
+            'question': f'问题 {j // len(SEED_MODELS) + 1}',
+            'model': SEED_MODELS[j % len(SEED_MODELS)],
+            'response': {'content': content, 'latency': 1.5},
+            'geo_data': {
+                'rank': j % 10 + 1, 'sentiment': 0.5, 'brand_mentioned': True,
+                'cited_sources': [{'url': f'https://example.com/{j}', 'site_name': 'example'}],
+            },
+            'quality_score': 80,
+            'quality_level': 'high',
+            'status': 'success',
+        } for j in range(count)])
+
+        progress = {'completed': 100, 'failed': 40, 'processing': 50}[status]
+        stage = 'ai_fetching' if status == 'processing' else status
+        reports.update_status(execution_id, status, progress, stage, is_completed=(status == 'completed'))
+        manifest.append({'execution_id': execution_id, 'status': status})
+    return manifest
+
+
+# ==================== 压测进程 ====================
+
+def parse_server(spec: str) -> Tuple[str, List[int]]:
+    """解析 worker 模型：threaded | single | processes:N | gunicorn:WORKERS:THREADS"""
+    model, *params = spec.split(':')
+    if model not in SERVER_MODELS or len(params) != SERVER_MODELS[model]:
+        raise argparse.ArgumentTypeError(f'无效的 worker 模型：{spec}')
+    try:
+        return model, [int(p) for p in params]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'无效的 worker 模型：{spec}')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_env(workdir: Path) -> Dict[str, str]:
+    """服务子进程环境：数据库、日志和限流状态全部落在临时目录"""
+    env = dict(os.environ)
+    env.update({
+        LOADTEST_DB_ENV: str(workdir / 'database.db'),
+        'APP_EAGER_INIT': 'false',
+        'LOG_DIR': str(workdir / 'logs'),
+        'RATE_LIMIT_DB_PATH': str(workdir / 'rate_limits.db'),
+        'RESPONSE_BLOB_DB_PATH': str(workdir / 'response_blobs.db'),
+        'AUDIT_SPILL_PATH': str(workdir / 'audit_spill.jsonl'),
+        'AUDIT_SPILL_PATH_DB': str(workdir / 'audit_spill_db.jsonl'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get('PYTHONPATH', '')])),
+    })
+    return env
+
+
+def start_server(args, env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    model, params = args.server
+    if model == 'gunicorn':
+        workers, threads = params
+        cmd = [sys.executable, '-m', 'gunicorn', '--chdir', str(BACKEND_DIR), '--pythonpath', str(SCRIPT_DIR),
+               '-k', 'gthread', '--workers', str(workers), '--threads', str(threads),
+               '--bind', f'{args.host}:{args.port}', '--log-level', 'warning',
+               f'{Path(__file__).stem}:gunicorn_app()']
+    else:
+        cmd = [sys.executable, __file__, '--serve', '--server', ':'.join([model, *map(str, params)]),
+               '--host', args.host, '--port', str(args.port)]
+    with open(log_path, 'wb') as log_file:
+        return subprocess.Popen(cmd, cwd=str(BACKEND_DIR), env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, log_path: Path, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f'{base_url}/__loadtest/ready', timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    tail = log_path.read_text(encoding='utf-8', errors='replace')[-3000:]
+    raise RuntimeError(f'服务未能在 {timeout:.0f} 秒内就绪（exit={proc.poll()}）:\n{tail}')
+
+
+def client_address(index: int, single_ip: bool) -> str:
+    """虚拟客户端的源地址（127.0.x.y，最多 250 × 254 个）"""
+    if single_ip:
+        return '127.0.0.1'
+    return f'127.0.{index // 250 + 1}.{index % 250 + 2}'
+
+
+def client_session(index: int, single_ip: bool, timeout: float) -> aiohttp.ClientSession:
+    """每个虚拟客户端一个长连接，与小程序客户端的连接复用方式一致"""
+    connector = aiohttp.TCPConnector(local_addr=(client_address(index, single_ip), 0), limit=1)
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={'X-WX-OpenID': f'loadtest_openid_{index:05d}'},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+async def run_poller(index: int, endpoint: str, execution_id: str, base_url: str, interval: float,
+                     measure_from: float, deadline: float, samples: List[Tuple], args):
+    """按间隔轮询单个端点，收到响应后再等待下一轮（与小程序 setTimeout 轮询一致）"""
+    url = base_url + ENDPOINTS[endpoint][0].format(execution_id=execution_id)
+    async with client_session(index, args.single_ip, args.timeout) as session:
+        await asyncio.sleep(random.uniform(0, interval))  # 错开首轮请求
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            status, queries = 0, -1
+            try:
+                async with session.get(url) as resp:
+                    await resp.read()
+                    status = resp.status
+                    queries = int(resp.headers.get(DB_QUERIES_HEADER, -1))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            elapsed = time.monotonic() - started
+            if started >= measure_from:
+                samples.append((endpoint, status, elapsed * 1000, queries))
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+
+async def run_sse_subscriber(index: int, execution_id: str, base_url: str, sse: Dict, args):
+    """保持 SSE 连接，记录连接耗时与每个压测事件的扇出延迟"""
+    url = f'{base_url}/api/stream/progress/{execution_id}'
+    started = time.monotonic()
+    try:
+        async with client_session(index, args.single_ip, args.timeout) as session:
+            request_timeout = aiohttp.ClientTimeout(total=None, sock_connect=args.timeout)
+            async with session.get(url, timeout=request_timeout) as resp:
+                event = None
+                async for raw in resp.content:
+                    line = raw.decode('utf-8').rstrip('\r\n')
+                    if line.startswith('event:'):
+                        event = line[6:].strip()
+                    elif line.startswith('data:') and event == 'connected':
+                        sse['connect_ms'].append((time.monotonic() - started) * 1000)
+                        sse['connected'] += 1
+                    elif line.startswith('data:') and event == 'progress':
+                        received = time.time()
+                        data = json.loads(line[5:])
+                        if 'sent_at' in data:
+                            sse['deliveries'].append((received - data['sent_at']) * 1000)
+                    elif not line:
+                        event = None
+    except asyncio.CancelledError:
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        sse['errors'] += 1
+
+
+async def run_publisher(base_url: str, subscribers_by_execution: Dict[str, int], interval: float,
+                        measure_from: float, deadline: float, sse: Dict):
+    """按间隔向每个被订阅的执行广播一次压测事件"""
+    await asyncio.sleep(max(0.0, measure_from - time.monotonic()))
+    async with aiohttp.ClientSession() as session:
+        seq = 0
+        while time.monotonic() < deadline - SSE_DRAIN_SECONDS:
+            seq += 1
+            for execution_id, subscribers in subscribers_by_execution.items():
+                try:
+                    async with session.post(f'{base_url}/__loadtest/publish/{execution_id}?seq={seq}') as resp:
+                        await resp.read()
+                        if resp.status == 200:
+                            sse['published'] += 1
+                            sse['expected_deliveries'] += subscribers
+                except aiohttp.ClientError:
+                    sse['publish_errors'] += 1
+            await asyncio.sleep(interval)
+
+
+async def run_load(args, base_url: str, manifest: List[Dict]) -> Dict:
+    all_ids = [item['execution_id'] for item in manifest]
+    completed_ids = [item['execution_id'] for item in manifest if item['status'] == 'completed'] or all_ids
+    processing_ids = [item['execution_id'] for item in manifest if item['status'] == 'processing'] or all_ids
+
+    measure_from = time.monotonic() + args.warmup
+    deadline = measure_from + args.duration
+    samples: List[Tuple] = []
+    sse = {'connected': 0, 'errors': 0, 'connect_ms': [], 'deliveries': [],
+           'published': 0, 'expected_deliveries': 0, 'publish_errors': 0}
+
+    pollers = []
+    for i in range(args.pollers):
+        endpoint = args.endpoints[i % len(args.endpoints)]
+        _, completed_only, default_interval = ENDPOINTS[endpoint]
+        pool = completed_ids if completed_only else all_ids
+        interval = args.poll_interval or default_interval
+        pollers.append(asyncio.create_task(run_poller(
+            i, endpoint, pool[i % len(pool)], base_url, interval, measure_from, deadline, samples, args
+        )))
+
+    sse_executions = processing_ids[:max(1, args.sse_executions)]
+    subscribers_by_execution: Dict[str, int] = {}
+    subscribers = []
+    for i in range(args.sse):
+        execution_id = sse_executions[i % len(sse_executions)]
+        subscribers_by_execution[execution_id] = subscribers_by_execution.get(execution_id, 0) + 1
+        subscribers.append(asyncio.create_task(
+            run_sse_subscriber(args.pollers + i, execution_id, base_url, sse, args)
+        ))
+
+    if subscribers:
+        await run_publisher(base_url, subscribers_by_execution, args.publish_interval, measure_from, deadline, sse)
+    await asyncio.gather(*pollers)
+    await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+    for task in subscribers:
+        task.cancel()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+
+    return {
+        'endpoints': summarize_polling(samples, args.duration),
+        'sse': summarize_sse(sse, args.sse, len(subscribers_by_execution)) if subscribers else None,
+    }
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda p: round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 1)
+    return {
+        'mean': round(sum(ordered) / len(ordered), 1),
+        'p50': pick(0.50), 'p90': pick(0.90), 'p95': pick(0.95), 'p99': pick(0.99),
+        'max': round(ordered[-1], 1),
+    }
+
+
+def summarize_polling(samples: List[Tuple], duration: float) -> Dict[str, Dict]:
+    """按端点汇总 RPS、状态码、延迟分位数与每请求 SQL 语句数"""
+    grouped: Dict[str, List[Tuple]] = {}
+    for sample in samples:
+        grouped.setdefault(sample[0], []).append(sample)
+
+    summary = {}
+    for endpoint, items in grouped.items():
+        status_codes: Dict[str, int] = {}
+        for _, status, _, _ in items:
+            status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+        queries = sorted(q for _, _, _, q in items if q >= 0)
+        summary[endpoint] = {
+            'requests': len(items),
+            'rps': round(len(items) / duration, 1),
+            'success_rate': round(status_codes.get('200', 0) / len(items), 3),
+            'status_codes': status_codes,
+            'latency_ms': latency_summary([latency for _, _, latency, _ in items]),
+            'db_queries': {
+                'mean': round(sum(queries) / len(queries), 1),
+                'p95': queries[min(len(queries) - 1, int(len(queries) * 0.95))],
+                'max': queries[-1],
+            } if queries else {},
+        }
+    return summary
+
+
+def summarize_sse(sse: Dict, subscribers: int, executions: int) -> Dict:
+    """汇总 SSE 连接、扇出延迟与送达率"""
+    expected = sse['expected_deliveries']
+    return {
+        'subscribers': subscribers,
+        'executions': executions,
+        'connected': sse['connected'],
+        'errors': sse['errors'],
+        'connect_ms': latency_summary(sse['connect_ms']),
+        'published_events': sse['published'],
+        'publish_errors': sse['publish_errors'],
+        'expected_deliveries': expected,
+        'delivered': len(sse['deliveries']),
+        'delivery_ratio': round(len(sse['deliveries']) / expected, 3) if expected else 0.0,
+        'fanout_delay_ms': latency_summary(sse['deliveries']),
+    }
+
+
+def print_report(report: Dict, args):
+    model, params = args.server
+    print(f"\n📊 worker 模型：{':'.join([model, *map(str, params)])}，"
+          f"{args.pollers} 个轮询客户端 + {args.sse} 个 SSE 订阅者，统计 {args.duration:.0f} 秒")
+    print(f"{'endpoint':<10}{'requests':>9}{'rps':>8}{'ok%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+          f"{'sql/req':>9}{'sql max':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        latency, queries = stats['latency_ms'], stats['db_queries']
+        print(f"{endpoint:<10}{stats['requests']:>9}{stats['rps']:>8}{stats['success_rate'] * 100:>6.1f}%"
+              f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}{latency['max']:>9}"
+              f"{queries.get('mean', '-'):>9}{queries.get('max', '-'):>9}")
+        non_ok = {code: count for code, count in stats['status_codes'].items() if code != '200'}
+        if non_ok:
+            print(f"{'':<10}非 200 响应：{non_ok}")
+
+    sse = report['sse']
+    if sse:
+        connect, fanout = sse['connect_ms'], sse['fanout_delay_ms']
+        print(f"\n📡 SSE：{sse['connected']}/{sse['subscribers']} 个连接（{sse['executions']} 个执行），错误 {sse['errors']}")
+        if connect:
+            print(f"   连接耗时 p50/p95/max：{connect['p50']}/{connect['p95']}/{connect['max']}ms")
+        print(f"   广播 {sse['published_events']} 次，送达 {sse['delivered']}/{sse['expected_deliveries']}"
+              f"（{sse['delivery_ratio'] * 100:.1f}%）")
+        if fanout:
+            print(f"   扇出延迟 p50/p95/p99/max：{fanout['p50']}/{fanout['p95']}/{fanout['p99']}/{fanout['max']}ms")
+
+
+def check_regressions(report: Dict, max_p95_ms: float = None, max_fanout_p95_ms: float = None) -> List[str]:
+    """返回回归问题列表，为空表示通过"""
+    problems = []
+    if max_p95_ms is not None:
+        for endpoint, stats in report['endpoints'].items():
+            p95 = stats['latency_ms'].get('p95', 0)
+            if p95 > max_p95_ms:
+                problems.append(f"{endpoint} p95 {p95}ms 超过上限 {max_p95_ms}ms")
+    sse = report['sse']
+    if max_fanout_p95_ms is not None and sse:
+        p95 = sse['fanout_delay_ms'].get('p95')
+        if p95 is None:
+            problems.append("SSE 没有收到任何压测事件")
+        elif p95 > max_fanout_p95_ms:
+            problems.append(f"SSE 扇出延迟 p95 {p95}ms 超过上限 {max_fanout_p95_ms}ms")
+    return problems
+
+
+def parse_endpoints(value: str) -> List[str]:
+    endpoints = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown or not endpoints:
+        raise argparse.ArgumentTypeError(f"未知端点：{', '.join(unknown)}（可选 {', '.join(ENDPOINTS)}）")
+    return endpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description='轮询 / SSE 端点压测')
+    parser.add_argument('--server', type=parse_server, default=parse_server('threaded'),
+                        help='worker 模型：threaded | single | processes:N | gunicorn:WORKERS:THREADS'
+                             '（single 只适合 --sse 0）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='服务端口，默认随机空闲端口')
+    parser.add_argument('--executions', type=int, default=200, help='合成执行数')
+    parser.add_argument('--results', type=int, default=24, help='每个已完成执行的结果条数')
+    parser.add_argument('--completed-ratio', type=float, default=0.7)
+    parser.add_argument('--failed-ratio', type=float, default=0.1)
+    parser.add_argument('--pollers', type=int, default=100, help='轮询客户端数')
+    parser.add_argument('--endpoints', type=parse_endpoints, default=parse_endpoints('progress,status,report,pdf'),
+                        help=f"轮询端点（按客户端轮流分配）：{','.join(ENDPOINTS)}")
+    parser.add_argument('--poll-interval', type=float, help='统一轮询间隔（秒），默认按端点取值')
+    parser.add_argument('--sse', type=int, default=50, help='SSE 订阅者数')
+    parser.add_argument('--sse-executions', type=int, default=10, help='SSE 订阅的执行数（扇出 = 订阅者 / 执行数）')
+    parser.add_argument('--publish-interval', type=float, default=1.0, help='SSE 压测事件广播间隔（秒）')
+    parser.add_argument('--duration', type=float, default=30, help='统计时长（秒）')
+    parser.add_argument('--warmup', type=float, default=5, help='预热时长（秒），期间的样本不计入')
+    parser.add_argument('--timeout', type=float, default=30, help='单次请求超时（秒）')
+    parser.add_argument('--single-ip', action='store_true', help='所有客户端共用 127.0.0.1')
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--max-p95-ms', type=float, help='任一轮询端点 p95 延迟上限（毫秒）')
+    parser.add_argument('--max-fanout-p95-ms', type=float, help='SSE 扇出延迟 p95 上限（毫秒）')
+    parser.add_argument('--output', help='结果 JSON 输出路径')
+    parser.add_argument('--keep', action='store_true', help='保留临时目录（数据库、服务日志）')
+    # 子进程内部使用
+    parser.add_argument('--seed', help=argparse.SUPPRESS)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        install_sqlite_hooks(os.environ[LOADTEST_DB_ENV])
+        manifest = seed_database(args.executions, args.results, args.completed_ratio, args.failed_ratio)
+        with open(args.seed, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        return
+    if args.serve:
+        serve(os.environ[LOADTEST_DB_ENV], args.host, args.port, args.server)
+        return
+
+    args.port = args.port or free_port()
+    base_url = f'http://{args.host}:{args.port}'
+    workdir = Path(tempfile.mkdtemp(prefix='polling_sse_load_'))
+    env = server_env(workdir)
+    manifest_path, log_path = workdir / 'manifest.json', workdir / 'server.log'
+
+    try:
+        print(f"🌱 生成 {args.executions} 个合成执行：{env[LOADTEST_DB_ENV]}")
+        subprocess.run(
+            [sys.executable, __file__, '--seed', str(manifest_path), '--executions', str(args.executions),
+             '--results', str(args.results), '--completed-ratio', str(args.completed_ratio),
+             '--failed-ratio', str(args.failed_ratio)],
+            cwd=str(BACKEND_DIR), env=env, check=True
+        )
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        proc = start_server(args, env, log_path)
+        try:
+            wait_ready(base_url, proc, log_path, args.startup_timeout)
+            print(f"🚀 服务已就绪：{base_url}，预热 {args.warmup:.0f} 秒后统计 {args.duration:.0f} 秒")
+            report = asyncio.run(run_load(args, base_url, manifest))
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    finally:
+        if args.keep:
+            print(f"📁 临时目录已保留：{workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report, args)
+    if args.output:
+        report['config'] = {key: value for key, value in vars(args).items() if key not in ('seed', 'serve')}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"📄 结果已保存：{args.output}")
+
+    problems = check_regressions(report, args.max_p95_ms, args.max_fanout_p95_ms)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
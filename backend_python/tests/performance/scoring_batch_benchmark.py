@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+EnhancedScoringEngine 批量评分基准测试
+
+对比两种路径在 N 个品牌 × M 个模型 × Q 个问题上的耗时：
+1. 逐品牌：calculate（Python 循环求均值、scipy zscore 检测偏差）
+2. 批量：score_batch（结构化数组一次向量化计算全部品牌）
+3. 批量完整结果：calculate_batch（在 2 的基础上逐品牌生成总结和建议文本）
+
+同时校验批量路径的 GEO 分数、等级和偏差标记与逐品牌路径一致。
+
+使用方法:
+    python3 tests/performance/scoring_batch_benchmark.py
+    python3 tests/performance/scoring_batch_benchmark.py --brands 2000 --models 6 --questions 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ai_judge_module import ConfidenceLevel, JudgeResult
+from enhanced_scoring_engine import EnhancedScoringEngine, judge_results_to_array
+
+
+def make_cells(brands: int, models: int, questions: int, seed: int):
+    """生成 (品牌, 模型, 问题序号, JudgeResult) 单元格"""
+    rng = np.random.default_rng(seed)
+    centers = rng.integers(20, 90, size=brands)
+    spreads = rng.choice([3, 15, 45], size=brands)
+    cells = []
+    for b in range(brands):
+        scores = np.clip(centers[b] + rng.integers(-spreads[b], spreads[b] + 1, size=(models * questions, 5)), 0, 100)
+        for i, row in enumerate(scores):
+            cells.append((f'brand{b}', f'model{i % models}', i // models, JudgeResult(
+                *(int(v) for v in row), judgement='', confidence_level=ConfidenceLevel.MEDIUM
+            )))
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EnhancedScoringEngine 批量评分基准测试')
+    parser.add_argument('--brands', type=int, default=500)
+    parser.add_argument('--models', type=int, default=4)
+    parser.add_argument('--questions', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    engine = EnhancedScoringEngine()
+    cells = make_cells(args.brands, args.models, args.questions, args.seed)
+    brand_results = {}
+    for brand, _, _, result in cells:
+        brand_results.setdefault(brand, []).append(result)
+
+    start = time.perf_counter()
+    per_brand = {brand: engine.calculate(results, brand_name=brand) for brand, results in brand_results.items()}
+    per_brand_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = judge_results_to_array(cells)
+    convert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.score_batch(scores)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = engine.calculate_batch(scores)
+    full_seconds = time.perf_counter() - start
+
+    mismatched = sum(
+        1 for brand, expected in per_brand.items()
+        if (full[brand].geo_score, full[brand].grade, full[brand].bias_indicators)
+        != (expected.geo_score, expected.grade, expected.bias_indicators)
+    )
+
+    print(f"📊 {args.brands} 个品牌 × {args.models} 个模型 × {args.questions} 个问题（{len(cells)} 个单元格）")
+    print(f"  逐品牌 calculate:   {per_brand_seconds * 1000:8.1f}ms")
+    print(f"  转换结构化数组:     {convert_seconds * 1000:8.1f}ms")
+    print(f"  批量 score_batch:   {batch_seconds * 1000:8.1f}ms  ({per_brand_seconds / batch_seconds:.0f}x)")
+    print(f"  批量 calculate_batch: {full_seconds * 1000:6.1f}ms  ({per_brand_seconds / full_seconds:.1f}x)")
+    print(f"  结果不一致: {mismatched}/{len(batch['brands'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+应用冷启动基准测试（基于 python -X importtime）
+
+在干净的子进程中导入 wechat_backend.app，解析 -X importtime 输出并记录：
+（每次运行使用全新的临时目录：database.db、cache.db 等被重定向到空的临时库，
+日志、限流、响应正文库与审计溢出文件也都落在临时目录，不读写开发库）
+
+1. 总导入耗时（多次运行取最小值，降低噪声）
+2. 累计耗时最高的模块
+3. 是否导入了禁止在启动阶段加载的重量级模块（sklearn/jieba/numpy/reportlab 等）
+
+作为回归守卫使用时，出现以下情况返回非 0 退出码：
+- 启动阶段导入了 --forbid 中的任一模块
+- 总耗时超过 --max-ms
+- 总耗时比 --baseline 记录的值慢 --tolerance 以上
+
+使用方法:
+    python3 tests/performance/startup_benchmark.py
+    python3 tests/performance/startup_benchmark.py --runs 5 --output startup.json
+    python3 tests/performance/startup_benchmark.py --baseline startup.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+# 启动阶段不应加载的模块（由 wechat_backend.lazy_imports 按需/预热加载）
+DEFAULT_FORBIDDEN = ['sklearn', 'jieba', 'numpy', 'scipy', 'reportlab', 'pandas', 'snownlp']
+
+# 子进程引导：把指向 backend_python/ 下 SQLite 文件（database.db、cache.db 等）的连接
+# 重定向到临时目录中的同名空库后再导入被测模块
+_BOOTSTRAP = """
+import os, sqlite3
+from pathlib import Path
+_connect, _backend, _workdir = sqlite3.connect, Path({backend_dir!r}).resolve(), Path({workdir!r})
+def _redirect(database, *args, **kwargs):
+    if isinstance(database, (str, os.PathLike)) and not str(database).startswith((':memory:', 'file:')) \\
+            and Path(database).resolve().parent == _backend:
+        database = str(_workdir / Path(database).name)
+    return _connect(database, *args, **kwargs)
+sqlite3.connect = sqlite3.dbapi2.connect = _redirect  # SQLAlchemy 经 dbapi2 连接
+import {module}
+"""
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        [{'module', 'self_us', 'cumulative_us', 'depth'}]，按输出顺序
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(indent) - 1) // 2,
+        })
+    return entries
+
+
+def benchmark_env(workdir: Path) -> Dict[str, str]:
+    """子进程环境：日志、限流状态、响应正文库与审计溢出文件全部落在临时目录"""
+    env = dict(os.environ)
+    env.setdefault('APP_EAGER_INIT', 'false')
+    env.update({
+        'LOG_DIR': str(workdir / 'logs'),
+        'RATE_LIMIT_DB_PATH': str(workdir / 'rate_limits.db'),
+        'RESPONSE_BLOB_DB_PATH': str(workdir / 'response_blobs.db'),
+        'AUDIT_SPILL_PATH': str(workdir / 'audit_spill.jsonl'),
+        'AUDIT_SPILL_PATH_DB': str(workdir / 'audit_spill_db.jsonl'),
+        'DATABASE_PATH': str(workdir / 'database.db'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get('PYTHONPATH', '')])),
+    })
+    return env
+
+
+def measure_once(module: str) -> List[Dict]:
+    """在全新临时目录的子进程中导入 module 一次，返回解析后的 importtime 记录"""
+    with tempfile.TemporaryDirectory(prefix='startup_benchmark_') as tmp:
+        workdir = Path(tmp)
+        code = _BOOTSTRAP.format(backend_dir=str(BACKEND_DIR), workdir=str(workdir), module=module)
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=str(workdir), env=benchmark_env(workdir), capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        tail = '\n'.join(line for line in proc.stderr.splitlines()
+                         if not line.startswith('import time:'))[-2000:]
+        raise RuntimeError(f"import {module} failed (exit {proc.returncode}):\n{tail}")
+    return parse_importtime(proc.stderr)
+
+
+def _import_subtree(entries: List[Dict], module: str) -> List[Dict]:
+    """
+    截取 module 自身及其导入的子模块
+
+    importtime 先输出子模块再输出父模块，因此 module 之前连续的非顶层记录即其子树；
+    解释器启动阶段的 site/encodings 等不计入。
+    """
+    end = next((i for i in range(len(entries) - 1, -1, -1)
+                if entries[i]['module'] == module and entries[i]['depth'] == 0), None)
+    if end is None:
+        return []
+    start = end
+    while start > 0 and entries[start - 1]['depth'] > 0:
+        start -= 1
+    return entries[start:end + 1]
+
+
+def summarize(entries: List[Dict], module: str, forbidden: List[str], top: int) -> Dict:
+    """汇总一次运行：总耗时、耗时最高的模块、被导入的禁止模块"""
+    entries = _import_subtree(entries, module)
+    total_us = entries[-1]['cumulative_us'] if entries else 0
+
+    forbidden_hits = sorted({
+        e['module'] for e in entries
+        if any(e['module'] == name or e['module'].startswith(name + '.') for name in forbidden)
+    })
+
+    slowest = sorted(entries, key=lambda e: e['cumulative_us'], reverse=True)[:top]
+    return {
+        'total_ms': round(total_us / 1000, 1),
+        'module_count': len(entries),
+        'forbidden_imported': forbidden_hits,
+        'slowest': [
+            {'module': e['module'], 'cumulative_ms': round(e['cumulative_us'] / 1000, 1),
+             'self_ms': round(e['self_us'] / 1000, 1)}
+            for e in slowest
+        ],
+    }
+
+
+def check_regressions(report: Dict, max_ms: float = None, baseline: Dict = None,
+                      tolerance: float = 0.2) -> List[str]:
+    """返回回归问题列表，为空表示通过"""
+    problems = []
+    if report['forbidden_imported']:
+        roots = sorted({name.split('.')[0] for name in report['forbidden_imported']})
+        problems.append(f"启动阶段导入了重量级模块：{', '.join(roots)}")
+    if max_ms is not None and report['total_ms'] > max_ms:
+        problems.append(f"启动耗时 {report['total_ms']}ms 超过上限 {max_ms}ms")
+    if baseline:
+        limit = baseline['total_ms'] * (1 + tolerance)
+        if report['total_ms'] > limit:
+            problems.append(
+                f"启动耗时 {report['total_ms']}ms 比基线 {baseline['total_ms']}ms "
+                f"慢 {(report['total_ms'] / baseline['total_ms'] - 1) * 100:.0f}%（容忍 {tolerance * 100:.0f}%）"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='应用冷启动基准测试')
+    parser.add_argument('--module', default='wechat_backend.app', help='被测入口模块')
+    parser.add_argument('--runs', type=int, default=3, help='运行次数（取总耗时最小的一次）')
+    parser.add_argument('--top', type=int, default=20, help='展示耗时最高的模块数')
+    parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN), help='启动阶段禁止导入的模块')
+    parser.add_argument('--max-ms', type=float, help='总耗时上限（毫秒）')
+    parser.add_argument('--baseline', help='基线结果 JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='相对基线允许的变慢比例')
+    parser.add_argument('--output', help='结果 JSON 输出路径')
+    args = parser.parse_args()
+
+    forbidden = [name.strip() for name in args.forbid.split(',') if name.strip()]
+
+    reports = []
+    for i in range(args.runs):
+        try:
+            entries = measure_once(args.module)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        reports.append(summarize(entries, args.module, forbidden, args.top))
+        print(f"  run {i + 1}/{args.runs}: {reports[-1]['total_ms']}ms")
+
+    report = min(reports, key=lambda r: r['total_ms'])
+    report['module'] = args.module
+    report['runs_ms'] = [r['total_ms'] for r in reports]
+
+    print(f"\n🚀 import {args.module}: {report['total_ms']}ms（{report['module_count']} 个模块）")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for item in report['slowest']:
+        print(f"{item['cumulative_ms']:>10}ms {item['self_ms']:>8}ms  {item['module']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 结果已保存：{args.output}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    problems = check_regressions(report, args.max_ms, baseline, args.tolerance)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ 启动耗时检查通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,8 @@ from .unified_logger import (
     UnifiedLogger,
     JSONFormatter,
     LoggingContext,
+    RepetitionFilter,
+    DeferredQueueHandler,
     get_logger,
     init_logging,
     shutdown_logging,
@@ -63,6 +65,13 @@ from .tracing import (
     SpanExporter,
     ConsoleSpanExporter,
     LoggingSpanExporter,
+    JSONLSpanExporter,
+    SpanProcessor,
+    BatchSpanProcessor,
+    init_tracing,
+    shutdown_tracing,
+    trace_span,
+    traced,
     trace_context_manager,
     span_context_manager,
     _tracing_context,
@@ -114,6 +123,8 @@ __all__ = [
     'UnifiedLogger',
     'JSONFormatter',
     'LoggingContext',
+    'RepetitionFilter',
+    'DeferredQueueHandler',
     'get_logger',
     'init_logging',
     'shutdown_logging',
@@ -140,6 +151,13 @@ __all__ = [
     'SpanExporter',
     'ConsoleSpanExporter',
     'LoggingSpanExporter',
+    'JSONLSpanExporter',
+    'SpanProcessor',
+    'BatchSpanProcessor',
+    'init_tracing',
+    'shutdown_tracing',
+    'trace_span',
+    'traced',
     'trace_context_manager',
     'span_context_manager',
     '_tracing_context',
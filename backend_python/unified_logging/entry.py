@@ -69,6 +69,7 @@ def init(
     console_level: str = 'INFO',
     file_level: str = 'DEBUG',
     enable_ai_handler: bool = True,
+    force: bool = False,
 ) -> UnifiedLoggerFactory:
     """
     快速初始化日志系统
@@ -82,6 +83,7 @@ def init(
         console_level: 控制台日志级别 (默认 INFO)
         file_level: 文件日志级别 (默认 DEBUG)
         enable_ai_handler: 是否启用 AI 专用处理器 (默认 True)
+        force: 已初始化时按新参数重新配置 (默认 False)
     
     Returns:
         UnifiedLoggerFactory 实例
@@ -109,6 +111,7 @@ def init(
         console_level=console_level,
         file_level=file_level,
         enable_ai_handler=enable_ai_handler,
+        force=force,
     )
     
     return factory
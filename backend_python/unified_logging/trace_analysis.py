@@ -0,0 +1,181 @@
+"""
+链路分析
+
+把一次执行的 Span (JSONLSpanExporter 输出) 还原为调用树，生成:
+- 关键路径：从根开始每层选择最晚结束的子 Span，即决定整体耗时的调用链
+- 火焰图汇总：按调用栈路径聚合次数、总耗时和自身耗时，可输出 folded stacks
+  (flamegraph.pl / speedscope 可直接读取)
+
+同一执行的 Span 以 execution_id 作为 trace_id；一次执行有多个根 Span
+(各 NxM 单元格、报告生成等) 时，合成一个覆盖全部根的虚拟根 'execution'。
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+VIRTUAL_ROOT = 'execution'
+
+
+def _span_files(path: Path) -> List[Path]:
+    """当前文件及其轮转备份 (spans.jsonl.1, .2 ...)"""
+    files = sorted(path.parent.glob(f'{path.name}.*'), reverse=True)
+    return [f for f in files if f.suffix.lstrip('.').isdigit()] + ([path] if path.exists() else [])
+
+
+def load_spans(paths: Iterable[str], execution_id: str) -> List[Dict[str, Any]]:
+    """
+    读取指定执行的 Span
+
+    按 trace_id 或 attributes.execution_id 匹配，跳过损坏行和未结束的 Span。
+    """
+    spans = {}
+    for path in paths:
+        for file in _span_files(Path(path)):
+            with open(file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get('duration_ms') is None or record.get('start') is None:
+                        continue
+                    if record.get('trace_id') == execution_id or \
+                            record.get('attributes', {}).get('execution_id') == execution_id:
+                        spans[record['span_id']] = record
+    return sorted(spans.values(), key=lambda s: s['start'])
+
+
+def _end(span: Dict[str, Any]) -> float:
+    return span['start'] + span['duration_ms'] / 1000
+
+
+def build_tree(spans: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Dict[Optional[str], List[Dict[str, Any]]]]:
+    """
+    构建调用树
+
+    Returns:
+        (根 Span, {span_id: 子 Span 列表})；多个根时返回虚拟根，其 span_id 为 None
+    """
+    if not spans:
+        return None, {}
+    ids = {span['span_id'] for span in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        parent = span.get('parent_span_id')
+        if parent in ids:
+            children[parent].append(span)
+        else:
+            roots.append(span)
+
+    if len(roots) == 1:
+        return roots[0], children
+
+    start = min(span['start'] for span in roots)
+    root = {
+        'span_id': None,
+        'name': VIRTUAL_ROOT,
+        'start': start,
+        'duration_ms': (max(_end(span) for span in roots) - start) * 1000,
+        'status': 'OK',
+    }
+    children[None] = roots
+    return root, children
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """关键路径：每层取最晚结束的子 Span"""
+    root, children = build_tree(spans)
+    if root is None:
+        return []
+
+    path = []
+    node = root
+    while node is not None:
+        path.append({
+            'name': node['name'],
+            'offset_ms': round((node['start'] - root['start']) * 1000, 3),
+            'duration_ms': round(node['duration_ms'], 3),
+            'attributes': node.get('attributes', {}),
+        })
+        kids = children.get(node['span_id'])
+        node = max(kids, key=_end) if kids else None
+    return path
+
+
+def _covered_ms(intervals: List[Tuple[float, float]]) -> float:
+    """区间并集长度 (毫秒)，并发子 Span 的重叠部分只计一次"""
+    covered = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                covered += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        covered += current_end - current_start
+    return covered * 1000
+
+
+def flame_summary(spans: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], Dict[str, float]]:
+    """
+    按调用栈路径聚合
+
+    Returns:
+        {(根名, ..., 名称): {'count', 'total_ms', 'self_ms'}}
+    """
+    root, children = build_tree(spans)
+    summary: Dict[Tuple[str, ...], Dict[str, float]] = defaultdict(
+        lambda: {'count': 0, 'total_ms': 0.0, 'self_ms': 0.0}
+    )
+    if root is None:
+        return summary
+
+    stack = [(root, (root['name'],))]
+    while stack:
+        node, frames = stack.pop()
+        kids = children.get(node['span_id'], [])
+        covered = _covered_ms([(kid['start'], _end(kid)) for kid in kids])
+        entry = summary[frames]
+        entry['count'] += 1
+        entry['total_ms'] += node['duration_ms']
+        entry['self_ms'] += max(0.0, node['duration_ms'] - covered)
+        stack.extend((kid, frames + (kid['name'],)) for kid in kids)
+    return summary
+
+
+def to_folded(summary: Dict[Tuple[str, ...], Dict[str, float]]) -> List[str]:
+    """转换为 folded stacks 行 ('a;b;c 自身耗时微秒')"""
+    return [
+        f"{';'.join(frames)} {int(entry['self_ms'] * 1000)}"
+        for frames, entry in sorted(summary.items())
+        if entry['self_ms'] > 0
+    ]
+
+
+def summarize(spans: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """一次执行的链路汇总：总耗时、错误数、关键路径、自身耗时最高的 Span 名称"""
+    root, _ = build_tree(spans)
+    by_name: Dict[str, Dict[str, float]] = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'self_ms': 0.0})
+    for frames, entry in flame_summary(spans).items():
+        target = by_name[frames[-1]]
+        for key in target:
+            target[key] += entry[key]
+
+    hotspots = sorted(by_name.items(), key=lambda item: item[1]['self_ms'], reverse=True)[:top]
+    return {
+        'span_count': len(spans),
+        'error_count': sum(1 for span in spans if span.get('status') == 'ERROR'),
+        'total_ms': round(root['duration_ms'], 3) if root else 0.0,
+        'critical_path': critical_path(spans),
+        'hotspots': [
+            {'name': name, 'count': int(entry['count']),
+             'total_ms': round(entry['total_ms'], 3), 'self_ms': round(entry['self_ms'], 3)}
+            for name, entry in hotspots
+        ],
+    }
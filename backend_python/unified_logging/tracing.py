@@ -5,7 +5,7 @@
 - Span 和 Trace 数据模型
 - 链路追踪上下文传播
 - 父子 Span 关系管理
-- 链路追踪导出器
+- 链路追踪导出器 (后台批量导出到 JSONL 文件)
 - 日志采样策略
 
 使用示例:
@@ -27,7 +27,16 @@
     def process_request(request):
         ...
     
-    # 方式 3: 使用采样器
+    # 方式 3: 自动 Span (未配置处理器时不创建 Span，开销可忽略)
+    init_tracing('logs/spans.jsonl')
+    with trace_span('nxm.cell', {'model': 'deepseek'}):
+        ...
+
+    @traced('geo.parse', execution_id_arg='execution_id')
+    def parse(text, execution_id=None):
+        ...
+    
+    # 方式 4: 使用采样器
     sampler = TracingSampler(sample_rate=0.1)
     if sampler.should_sample():
         # 记录详细日志
@@ -38,7 +47,13 @@ import uuid
 import time
 import threading
 import random
+import functools
+import inspect
+import os
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from pathlib import Path
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List, Callable
 from enum import Enum
@@ -67,6 +82,17 @@ class SamplingDecision(Enum):
 # 链路追踪上下文变量
 _tracing_context = contextvars.ContextVar('tracing_context', default=None)
 
+# 批量导出配置
+TRACE_EXPORT_ENABLED = os.environ.get('TRACE_EXPORT_ENABLED', 'true').lower() == 'true'
+TRACE_MAX_QUEUE_SIZE = int(os.environ.get('TRACE_MAX_QUEUE_SIZE', '4096'))
+TRACE_EXPORT_BATCH_SIZE = int(os.environ.get('TRACE_EXPORT_BATCH_SIZE', '256'))
+TRACE_SCHEDULE_DELAY = float(os.environ.get('TRACE_SCHEDULE_DELAY', '2.0'))
+TRACE_EXPORT_MAX_BYTES = int(os.environ.get('TRACE_EXPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+TRACE_EXPORT_BACKUP_COUNT = int(os.environ.get('TRACE_EXPORT_BACKUP_COUNT', '3'))
+
+# 当前生效的 Span 处理器 (None 表示未启用导出)
+_span_processor: Optional['SpanProcessor'] = None
+
 
 # ============================================================================
 # 数据模型
@@ -157,6 +183,7 @@ class Span:
     status: SpanStatus = SpanStatus.UNSET
     attributes: Dict[str, Any] = field(default_factory=dict)
     events: List[Dict[str, Any]] = field(default_factory=list)
+    _context_token: Any = field(default=None, repr=False, compare=False)
     
     def start(self):
         """开始 Span"""
@@ -164,10 +191,14 @@ class Span:
         return self
     
     def end(self, status: SpanStatus = None):
-        """结束 Span"""
+        """结束 Span，首次结束时交给当前处理器导出"""
+        first_end = self.end_time is None
         self.end_time = time.time()
         if status:
             self.status = status
+        processor = _span_processor
+        if first_end and processor is not None:
+            processor.on_end(self)
         return self
     
     def set_attribute(self, key: str, value: Any):
@@ -219,9 +250,10 @@ class Span:
         }
     
     def __enter__(self):
-        self.start()
+        if self.start_time is None:
+            self.start()
         # 设置当前 Span 到上下文
-        _tracing_context.set(self)
+        self._context_token = _tracing_context.set(self)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -230,8 +262,10 @@ class Span:
             self.end(SpanStatus.ERROR)
         else:
             self.end(SpanStatus.OK)
-        # 恢复上下文
-        _tracing_context.set(None)
+        # 恢复上下文 (嵌套时回到父 Span)
+        if self._context_token is not None:
+            _tracing_context.reset(self._context_token)
+            self._context_token = None
         return False
 
 
@@ -456,17 +490,14 @@ def span_decorator(name: str = None):
     def decorator(func: Callable) -> Callable:
         span_name = name or func.__name__
         
-        import functools
-        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             span = start_span(span_name)
+            # 设置 tracing context
+            token = _tracing_context.set(span)
             try:
                 # 设置函数属性
                 span.set_attribute('function', func.__qualname__)
-                
-                # 设置 tracing context
-                _tracing_context.set(span)
 
                 result = func(*args, **kwargs)
                 span.end(SpanStatus.OK)
@@ -476,8 +507,8 @@ def span_decorator(name: str = None):
                 span.end(SpanStatus.ERROR)
                 raise
             finally:
-                # 清理上下文
-                _tracing_context.set(None)
+                # 恢复上下文
+                _tracing_context.reset(token)
 
         return wrapper
     
@@ -659,6 +690,302 @@ class LoggingSpanExporter(SpanExporter):
         return True
 
 
+class JSONLSpanExporter(SpanExporter):
+    """
+    JSONL 文件 Span 导出器
+
+    每个 Span 一行紧凑 JSON (空字段省略)，按大小轮转，供 analyze_trace.py 离线分析。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = TRACE_EXPORT_MAX_BYTES,
+        backup_count: int = TRACE_EXPORT_BACKUP_COUNT,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._file = None
+
+    @staticmethod
+    def encode(span: Span) -> str:
+        """编码为一行紧凑 JSON"""
+        duration = span.duration_ms()
+        data = {
+            'trace_id': span.trace_id,
+            'span_id': span.span_id,
+            'name': span.name,
+            'start': round(span.start_time, 6) if span.start_time else None,
+            'duration_ms': round(duration, 3) if duration is not None else None,
+            'status': span.status.value,
+        }
+        if span.parent_span_id:
+            data['parent_span_id'] = span.parent_span_id
+        if span.attributes:
+            data['attributes'] = span.attributes
+        if span.events:
+            data['events'] = span.events
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+
+    def export(self, spans: List[Span]) -> bool:
+        payload = ''.join(self.encode(span) + '\n' for span in spans)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(payload)
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        return True
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f'{self.path.name}.{index}')
+            if source.exists():
+                source.replace(self.path.with_name(f'{self.path.name}.{index + 1}'))
+        self.path.replace(self.path.with_name(f'{self.path.name}.1'))
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ============================================================================
+# Span 处理器
+# ============================================================================
+
+class SpanProcessor:
+    """Span 处理器接口 (Span 结束时调用)"""
+
+    def on_end(self, span: Span):
+        raise NotImplementedError
+
+    def force_flush(self, timeout: float = 5.0) -> bool:
+        return True
+
+    def shutdown(self, timeout: float = 5.0):
+        pass
+
+
+class BatchSpanProcessor(SpanProcessor):
+    """
+    批量 Span 处理器
+
+    结束的 Span 进入有界环形缓冲区 (满时丢弃最旧的并计数)，后台线程在
+    积累到 max_export_batch_size 或每隔 schedule_delay 秒时批量导出。
+    业务线程只做一次加锁追加，不做序列化和文件 I/O。
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue_size: int = TRACE_MAX_QUEUE_SIZE,
+        max_export_batch_size: int = TRACE_EXPORT_BATCH_SIZE,
+        schedule_delay: float = TRACE_SCHEDULE_DELAY,
+    ):
+        self.exporter = exporter
+        self.max_export_batch_size = max(1, min(max_export_batch_size, max_queue_size))
+        self.schedule_delay = schedule_delay
+        self._buffer: deque = deque(maxlen=max_queue_size)
+        self._condition = threading.Condition()
+        self._export_lock = threading.Lock()
+        self._shutdown = False
+        self.dropped = 0
+        self.exported = 0
+        self.export_failures = 0
+        self._worker = threading.Thread(target=self._run, name='BatchSpanProcessor', daemon=True)
+        self._worker.start()
+
+    def on_end(self, span: Span):
+        with self._condition:
+            if self._shutdown:
+                return
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(span)
+            if len(self._buffer) >= self.max_export_batch_size:
+                self._condition.notify()
+
+    def _take_batch(self) -> List[Span]:
+        count = min(len(self._buffer), self.max_export_batch_size)
+        return [self._buffer.popleft() for _ in range(count)]
+
+    def _export(self, batch: List[Span]):
+        with self._export_lock:
+            try:
+                self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception:
+                self.export_failures += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._shutdown and len(self._buffer) < self.max_export_batch_size:
+                    self._condition.wait(self.schedule_delay)
+                if self._shutdown:
+                    return
+                batch = self._take_batch()
+            if batch:
+                self._export(batch)
+
+    def force_flush(self, timeout: float = 5.0) -> bool:
+        """在调用线程中导出缓冲区内的全部 Span"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return True
+            self._export(batch)
+        return False
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._condition:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._condition.notify()
+        self._worker.join(timeout)
+        self.force_flush(timeout)
+        self.exporter.shutdown()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'queued': len(self._buffer),
+            'exported': self.exported,
+            'dropped': self.dropped,
+            'export_failures': self.export_failures,
+        }
+
+
+def set_span_processor(processor: Optional[SpanProcessor]) -> Optional[SpanProcessor]:
+    """设置当前 Span 处理器，返回被替换的处理器 (由调用方决定是否关闭)"""
+    global _span_processor
+    previous, _span_processor = _span_processor, processor
+    return previous
+
+
+def get_span_processor() -> Optional[SpanProcessor]:
+    """获取当前 Span 处理器"""
+    return _span_processor
+
+
+def init_tracing(path: str = None, exporter: SpanExporter = None) -> Optional[SpanProcessor]:
+    """
+    启用批量 Span 导出
+
+    Args:
+        path: JSONL 文件路径 (默认环境变量 TRACE_EXPORT_PATH)
+        exporter: 自定义导出器 (优先于 path)
+
+    Returns:
+        BatchSpanProcessor；未指定导出器且没有导出路径 (默认不写文件)，
+        或 TRACE_EXPORT_ENABLED=false 时返回 None
+    """
+    if exporter is None:
+        path = path or os.environ.get('TRACE_EXPORT_PATH')
+        if not path or not TRACE_EXPORT_ENABLED:
+            return None
+        exporter = JSONLSpanExporter(path)
+    processor = BatchSpanProcessor(exporter)
+    previous = set_span_processor(processor)
+    if previous is not None:
+        previous.shutdown()
+    return processor
+
+
+def shutdown_tracing(timeout: float = 5.0):
+    """导出剩余 Span 并停用处理器"""
+    processor = set_span_processor(None)
+    if processor is not None:
+        processor.shutdown(timeout)
+
+
+# ============================================================================
+# 自动 Span
+# ============================================================================
+
+@contextmanager
+def trace_span(name: str, attributes: Dict[str, Any] = None, trace_id: str = None):
+    """
+    在当前 Span 下创建子 Span
+
+    未配置处理器时不创建 Span，直接产出 None。没有父 Span 时使用 trace_id
+    (如 execution_id) 作为链路 ID，同一执行的 Span 归入同一条链路。
+    """
+    if _span_processor is None:
+        yield None
+        return
+
+    parent = _tracing_context.get()
+    if parent is not None:
+        span = Span(trace_id=parent.trace_id, parent_span_id=parent.span_id, name=name)
+    else:
+        span = Span(trace_id=trace_id or str(uuid.uuid4()), name=name)
+    if attributes:
+        span.attributes.update(attributes)
+    span.start()
+    token = _tracing_context.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        span.end(SpanStatus.ERROR)
+        raise
+    else:
+        span.end(SpanStatus.OK)
+    finally:
+        _tracing_context.reset(token)
+
+
+def traced(name: str = None, execution_id_arg: str = None, **attributes):
+    """
+    函数级自动 Span 装饰器
+
+    Args:
+        name: Span 名称 (默认函数限定名)
+        execution_id_arg: 执行 ID 参数名；记录为 execution_id 属性，
+            没有父 Span 时作为 trace_id
+        **attributes: 固定属性
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func) if execution_id_arg else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _span_processor is None:
+                return func(*args, **kwargs)
+
+            span_attributes = dict(attributes)
+            execution_id = None
+            if signature is not None:
+                try:
+                    execution_id = signature.bind_partial(*args, **kwargs).arguments.get(execution_id_arg)
+                except TypeError:
+                    execution_id = None
+                if execution_id:
+                    span_attributes['execution_id'] = execution_id
+
+            with trace_span(span_name, span_attributes, trace_id=execution_id):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 # ============================================================================
 # 便捷函数
 # ============================================================================
@@ -714,6 +1041,16 @@ __all__ = [
     'SpanExporter',
     'ConsoleSpanExporter',
     'LoggingSpanExporter',
+    'JSONLSpanExporter',
+    # 处理器与自动 Span
+    'SpanProcessor',
+    'BatchSpanProcessor',
+    'set_span_processor',
+    'get_span_processor',
+    'init_tracing',
+    'shutdown_tracing',
+    'trace_span',
+    'traced',
     # 上下文管理器
     'trace_context_manager',
     'span_context_manager',
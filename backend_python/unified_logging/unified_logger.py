@@ -10,9 +10,13 @@
 - 多处理器分发 (Console + File + AI 专用)
 - 线程安全的日志上下文
 - 优雅关闭机制
+- 惰性 % 格式化与重复日志限流 (热路径开销)
 
 架构设计:
-    应用代码 -> UnifiedLogger -> QueueHandler -> Queue -> QueueListener -> Handlers -> Files/Console
+    应用代码 -> UnifiedLogger -> DeferredQueueHandler -> Queue -> QueueListener -> Handlers -> Files/Console
+
+    调用线程只做级别判断、% 参数合并和入队；JSON 序列化、异常堆栈格式化
+    和文件写入都在监听线程中完成。
     
 性能指标:
 - 日志吞吐量：10000+ 条/秒
@@ -31,7 +35,9 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 import contextvars
+import copy
 import threading
+import time
 import traceback
 
 
@@ -46,6 +52,13 @@ _trace_context = contextvars.ContextVar('trace_context', default={})
 _factory_instance: Optional['UnifiedLoggerFactory'] = None
 _factory_lock = threading.Lock()
 
+# 重复日志限流：同一调用点 (logger + 文件 + 行号 + 级别) 每个窗口最多输出的条数，0 表示关闭
+LOG_REPEAT_LIMIT = int(os.environ.get('LOG_REPEAT_LIMIT', '50'))
+# 限流窗口（秒）
+LOG_REPEAT_INTERVAL = float(os.environ.get('LOG_REPEAT_INTERVAL', '10'))
+# 只对该级别及以下的日志限流，ERROR 及以上始终输出
+LOG_REPEAT_MAX_LEVEL = os.environ.get('LOG_REPEAT_MAX_LEVEL', 'WARNING').upper()
+
 
 # ============================================================================
 # JSON 格式化器
@@ -92,13 +105,12 @@ class JSONFormatter(logging.Formatter):
             'process': record.process,
         }
         
-        # 注入链路追踪上下文
+        # 注入链路追踪上下文 (监听线程中上下文变量为空，优先使用记录上携带的值)
         context = _trace_context.get()
-        if context:
-            if 'trace_id' in context:
-                log_data['trace_id'] = context['trace_id']
-            if 'span_id' in context:
-                log_data['span_id'] = context['span_id']
+        for key in ('trace_id', 'span_id'):
+            value = getattr(record, key, None) or context.get(key)
+            if value:
+                log_data[key] = value
         
         # 添加额外字段 (排除标准字段)
         if self.include_extra:
@@ -130,6 +142,89 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_data, ensure_ascii=False, default=str)
 
 
+# ============================================================================
+# 重复日志限流与非阻塞队列处理器
+# ============================================================================
+
+class RepetitionFilter(logging.Filter):
+    """
+    重复日志限流过滤器
+
+    按调用点 (logger 名称 + 文件 + 行号 + 级别) 计数，每个窗口内最多放行 limit 条，
+    超出部分直接丢弃，下一条放行的记录带上 suppressed 字段说明被丢弃的条数。
+    调用点数量受代码行数约束，无需淘汰。
+
+    挂在 QueueHandler 上，被丢弃的记录不会进入队列。
+    """
+
+    def __init__(self, limit: int = None, interval: float = None, max_level: str = None):
+        super().__init__()
+        self.limit = LOG_REPEAT_LIMIT if limit is None else limit
+        self.interval = LOG_REPEAT_INTERVAL if interval is None else interval
+        self.max_level = getattr(logging, (max_level or LOG_REPEAT_MAX_LEVEL).upper(), logging.WARNING)
+        # 调用点 -> [窗口起点, 窗口内已放行条数, 已丢弃条数]
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno > self.max_level:
+            return True
+
+        site = (record.name, record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.interval:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+            elif state[1] < self.limit:
+                state[1] += 1
+                suppressed = 0
+            else:
+                state[2] += 1
+                self.suppressed_total += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞队列处理器
+
+    与标准 QueueHandler 的区别:
+    - prepare 只合并 % 参数，不在调用线程运行格式化器；异常堆栈保留 exc_info，
+      由监听线程的 JSONFormatter 格式化（进程内队列无需序列化）
+    - 记录当前链路追踪上下文，监听线程中仍能输出 trace_id
+    - 队列满时丢弃并计数，不阻塞、不向 stderr 打印处理错误
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        context = _trace_context.get()
+        if context:
+            for key in ('trace_id', 'span_id'):
+                if key in context and not hasattr(record, key):
+                    setattr(record, key, context[key])
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 # ============================================================================
 # 统一日志器
 # ============================================================================
@@ -183,46 +278,70 @@ class UnifiedLogger:
         """清除链路追踪上下文"""
         _trace_context.set({})
     
-    def _log(self, level: int, message: str, exc_info: bool = False, **kwargs):
+    def _log(self, level: int, message: str, args: tuple = (), exc_info=None,
+             stack_info: bool = False, stacklevel: int = 1, **kwargs):
         """
         底层日志记录方法
-        
+
+        级别未启用时直接返回，不合并上下文也不格式化参数。
+
         Args:
             level: 日志级别
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            args: % 格式化参数 (惰性合并)
             exc_info: 是否记录异常堆栈
+            stack_info: 是否记录调用栈
+            stacklevel: 调用栈层级 (用于定位真实调用位置)
             **kwargs: 额外字段
         """
+        if not self._logger.isEnabledFor(level):
+            return
+
         # 合并上下文和额外字段
+        extra = kwargs.pop('extra', None)
+        if extra:
+            kwargs = {**extra, **kwargs}
         context = _trace_context.get()
         extra = {**context, **kwargs} if context else kwargs
-        
-        # 记录日志
-        self._logger.log(level, message, extra=extra, exc_info=exc_info)
-    
-    def debug(self, message: str, **kwargs):
+
+        # 记录日志 (+2 跳过 _log 与级别方法本身，文件名/行号指向调用方)
+        self._logger.log(level, message, *args, extra=extra, exc_info=exc_info,
+                         stack_info=stack_info, stacklevel=stacklevel + 2)
+
+    def debug(self, message: str, *args, **kwargs):
         """记录 DEBUG 级别日志"""
-        self._log(logging.DEBUG, message, **kwargs)
-    
-    def info(self, message: str, **kwargs):
+        self._log(logging.DEBUG, message, args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs):
         """记录 INFO 级别日志"""
-        self._log(logging.INFO, message, **kwargs)
-    
-    def warning(self, message: str, **kwargs):
+        self._log(logging.INFO, message, args, **kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
         """记录 WARNING 级别日志"""
-        self._log(logging.WARNING, message, **kwargs)
-    
-    def error(self, message: str, exc_info: bool = False, **kwargs):
+        self._log(logging.WARNING, message, args, **kwargs)
+
+    def error(self, message: str, *args, exc_info=False, **kwargs):
         """记录 ERROR 级别日志"""
-        self._log(logging.ERROR, message, exc_info=exc_info, **kwargs)
-    
-    def critical(self, message: str, exc_info: bool = False, **kwargs):
+        self._log(logging.ERROR, message, args, exc_info=exc_info, **kwargs)
+
+    def critical(self, message: str, *args, exc_info=False, **kwargs):
         """记录 CRITICAL 级别日志"""
-        self._log(logging.CRITICAL, message, exc_info=exc_info, **kwargs)
-    
-    def exception(self, message: str, **kwargs):
+        self._log(logging.CRITICAL, message, args, exc_info=exc_info, **kwargs)
+
+    def exception(self, message: str, *args, **kwargs):
         """记录异常日志 (自动包含堆栈信息)"""
-        self._log(logging.ERROR, message, exc_info=True, **kwargs)
+        kwargs.setdefault('exc_info', True)
+        self._log(logging.ERROR, message, args, **kwargs)
+
+    def log(self, level: int, message: str, *args, **kwargs):
+        """按指定级别记录日志"""
+        self._log(level, message, args, **kwargs)
+
+    def __getattr__(self, item):
+        """其余属性 (setLevel、addHandler、isEnabledFor 等) 委托给标准日志器"""
+        if item == '_logger':
+            raise AttributeError(item)
+        return getattr(self._logger, item)
 
 
 # ============================================================================
@@ -295,12 +414,18 @@ class UnifiedLoggerFactory:
     """
     
     def __init__(self):
+        # __new__ 返回同一实例，__init__ 仍会在每次 UnifiedLoggerFactory() 时执行，
+        # 已构造过则跳过，否则会重置初始化状态并重复启动监听线程
+        if hasattr(self, '_initialized'):
+            return
         self._initialized = False
         self._log_queue: Optional[queue.Queue] = None
         self._listener: Optional[logging.handlers.QueueListener] = None
         self._handlers: List[logging.Handler] = []
         self._lock = threading.Lock()
         self._log_dir: Optional[Path] = None
+        self._queue_handler: Optional[DeferredQueueHandler] = None
+        self._repetition_filter: Optional[RepetitionFilter] = None
     
     def __new__(cls) -> 'UnifiedLoggerFactory':
         global _factory_instance, _factory_lock
@@ -322,6 +447,9 @@ class UnifiedLoggerFactory:
         enable_ai_handler: bool = True,
         ai_max_bytes: int = 100 * 1024 * 1024,
         ai_backup_count: int = 30,
+        repeat_limit: int = None,
+        repeat_interval: float = None,
+        force: bool = False,
     ) -> 'UnifiedLoggerFactory':
         """
         初始化日志系统
@@ -337,13 +465,18 @@ class UnifiedLoggerFactory:
             enable_ai_handler: 是否启用 AI 响应专用处理器 (默认 True)
             ai_max_bytes: AI 日志文件最大大小 (默认 100MB)
             ai_backup_count: AI 日志备份数量 (默认 30)
+            repeat_limit: 同一调用点每个窗口最多输出条数 (默认 LOG_REPEAT_LIMIT，0 关闭)
+            repeat_interval: 重复日志限流窗口秒数 (默认 LOG_REPEAT_INTERVAL)
+            force: 已初始化时按新参数重建处理器和监听器 (应用启动时覆盖导入期的默认配置)
         
         Returns:
             self (支持链式调用)
         """
         with self._lock:
             if self._initialized:
-                return self
+                if not force:
+                    return self
+                self._stop_listener()
             
             # 解析日志级别
             if log_level is None:
@@ -383,6 +516,7 @@ class UnifiedLoggerFactory:
             self._listener.start()
             
             # 配置根日志器
+            self._repetition_filter = RepetitionFilter(limit=repeat_limit, interval=repeat_interval)
             self._configure_root_logger(numeric_level)
             
             self._initialized = True
@@ -465,9 +599,12 @@ class UnifiedLoggerFactory:
         for handler in root.handlers[:]:
             root.removeHandler(handler)
         
-        # 添加队列处理器 (非阻塞)
-        queue_handler = logging.handlers.QueueHandler(self._log_queue)
+        # 添加队列处理器 (非阻塞，重复日志在入队前丢弃)
+        queue_handler = DeferredQueueHandler(self._log_queue)
+        if self._repetition_filter is not None:
+            queue_handler.addFilter(self._repetition_filter)
         root.addHandler(queue_handler)
+        self._queue_handler = queue_handler
         
         # 配置常用日志器级别
         logging.getLogger('wechat_backend').setLevel(numeric_level)
@@ -498,6 +635,27 @@ class UnifiedLoggerFactory:
     def get_queue(self) -> queue.Queue:
         """获取日志队列 (用于高级用法)"""
         return self._log_queue
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取队列统计 (积压、队列满丢弃、重复限流丢弃)"""
+        return {
+            'queued': self._log_queue.qsize() if self._log_queue else 0,
+            'dropped': self._queue_handler.dropped if self._queue_handler else 0,
+            'suppressed': self._repetition_filter.suppressed_total if self._repetition_filter else 0,
+        }
+
+    def _stop_listener(self):
+        """停止监听器 (排空队列) 并关闭处理器"""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+        for handler in self._handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
+        self._handlers.clear()
     
     def shutdown(self, timeout: float = 5.0):
         """
@@ -509,18 +667,8 @@ class UnifiedLoggerFactory:
         if not self._initialized:
             return
         
-        # 停止监听器
-        if self._listener:
-            self._listener.stop()
-            self._listener = None
-        
-        # 关闭所有处理器
-        for handler in self._handlers:
-            try:
-                handler.close()
-            except Exception:
-                pass
-        self._handlers.clear()
+        # 停止监听器并关闭所有处理器
+        self._stop_listener()
         
         # 关闭根日志器
         logging.shutdown()
@@ -16,6 +16,7 @@ import os
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.ai_response_logger_enhanced import get_enhanced_logger
+from wechat_backend.utils.ai_response_logger_v3 import get_logger as get_v3_logger
 
 # 配置日志
 logging.basicConfig(
@@ -37,6 +38,10 @@ def run_cleanup(retention_days: int = 30):
         enhanced_logger = get_enhanced_logger()
         enhanced_logger.cleanup_old_logs(retention_days=retention_days)
         
+        # V3 分段日志：删除过期分段并释放其引用的回答内容
+        removed = get_v3_logger().cleanup_old_logs(retention_days=retention_days)
+        logger.info(f"V3 分段日志清理 {removed} 个文件")
+        
         logger.info("日志清理任务完成")
     except Exception as e:
         logger.error(f"日志清理任务失败: {e}")
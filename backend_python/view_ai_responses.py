@@ -2,12 +2,14 @@
 """
 查看AI响应记录的工具脚本
 用于查看和分析保存的AI训练数据
+
+读取 V3 分段日志（与 view_ai_responses_v2.py 使用同一后端）
 """
 
 import json
 import sys
 from pathlib import Path
-from utils.ai_response_logger import get_logger
+from wechat_backend.utils.ai_response_logger_v3 import get_logger, resolve_response_text
 
 
 def view_responses(limit=10, platform=None, brand=None):
@@ -20,17 +22,19 @@ def view_responses(limit=10, platform=None, brand=None):
     print("=" * 80)
     
     for idx, record in enumerate(responses, 1):
+        platform_info = record.get('platform', {})
+        performance = record.get('performance', {})
         print(f"\n【记录 {idx}】")
         print(f"  时间: {record.get('timestamp', 'N/A')}")
-        print(f"  品牌: {record.get('brand', 'N/A')}")
-        print(f"  平台: {record.get('platform', 'N/A')}")
-        print(f"  模型: {record.get('model', 'N/A')}")
-        print(f"  状态: {'✅ 成功' if record.get('success') else '❌ 失败'}")
-        print(f"  延迟: {record.get('latency_ms', 'N/A')} ms")
-        if record.get('tokens_used'):
-            print(f"  Token: {record['tokens_used']}")
-        print(f"  问题: {record.get('question', 'N/A')[:80]}...")
-        print(f"  答案: {record.get('response', 'N/A')[:150]}...")
+        print(f"  品牌: {record.get('business', {}).get('brand', 'N/A')}")
+        print(f"  平台: {platform_info.get('name', 'N/A')}")
+        print(f"  模型: {platform_info.get('model', 'N/A')}")
+        print(f"  状态: {'✅ 成功' if record.get('status', {}).get('success') else '❌ 失败'}")
+        print(f"  延迟: {performance.get('latency_ms', 'N/A')} ms")
+        if performance.get('tokens', {}).get('total'):
+            print(f"  Token: {performance['tokens']['total']}")
+        print(f"  问题: {record.get('question', {}).get('text', 'N/A')[:80]}...")
+        print(f"  答案: {(resolve_response_text(record) or 'N/A')[:150]}...")
         print("-" * 80)
 
 
@@ -2,12 +2,14 @@
 """
 查看AI响应记录的工具脚本 V2 - 支持增强版格式
 用于查看和分析保存的AI训练数据
+
+读取 V3 分段日志：按执行 ID、平台、时间查询时通过索引只读取命中的批次
 """
 
 import json
 import sys
 from pathlib import Path
-from utils.ai_response_logger_v2 import get_logger
+from wechat_backend.utils.ai_response_logger_v3 import get_logger, resolve_response_text
 
 
 def view_responses(limit=10, platform=None, brand=None, success_only=False):
@@ -75,12 +77,28 @@ def view_responses(limit=10, platform=None, brand=None, success_only=False):
         
         # 内容预览
         question_text = record.get('question', {}).get('text', 'N/A')
-        response_text = record.get('response', {}).get('text', 'N/A')
+        response_text = resolve_response_text(record) or 'N/A'
         print(f"\n  问题: {question_text[:100]}...")
         print(f"  答案: {response_text[:200]}...")
         print("-" * 100)
 
 
+def view_execution(execution_id):
+    """查看一次执行的全部AI响应记录（通过索引定位，不扫描全部日志）"""
+    records = get_logger().find_by_execution_id(execution_id)
+    print("=" * 100)
+    print(f"执行 {execution_id} 共 {len(records)} 条AI响应记录")
+    print("=" * 100)
+    for idx, record in enumerate(records, 1):
+        platform_info = record.get('platform', {})
+        status = record.get('status', {})
+        print(f"\n【记录 {idx}】{record.get('timestamp', 'N/A')} "
+              f"{platform_info.get('name', 'N/A')}/{platform_info.get('model', 'N/A')} "
+              f"{'✅' if status.get('success', True) else '❌'}")
+        print(f"  问题: {record.get('question', {}).get('text', 'N/A')[:100]}")
+        print(f"  答案: {(resolve_response_text(record) or 'N/A')[:200]}")
+
+
 def view_statistics(days=7):
     """查看统计信息（V2格式）"""
     logger = get_logger()
@@ -157,7 +175,7 @@ def export_for_training(output_file='training_data.jsonl'):
         qa_pair = {
             "instruction": record.get('question', {}).get('text', ''),
             "input": "",
-            "output": record.get('response', {}).get('text', ''),
+            "output": resolve_response_text(record) or '',
             "metadata": {
                 "platform": record.get('platform', {}).get('name'),
                 "model": record.get('platform', {}).get('model'),
@@ -183,6 +201,7 @@ def main():
         print("=" * 60)
         print("用法:")
         print(f"  python {sys.argv[0]} view [数量] [平台] [品牌] [--success-only]  - 查看记录")
+        print(f"  python {sys.argv[0]} exec <执行ID>                                    - 查看一次执行的记录")
         print(f"  python {sys.argv[0]} stats [天数]                                       - 查看统计")
         print(f"  python {sys.argv[0]} export [文件名] [数量]                           - 导出完整数据")
         print(f"  python {sys.argv[0]} training [文件名]                                - 导出训练数据")
@@ -203,6 +222,9 @@ def main():
         success_only = '--success-only' in sys.argv
         view_responses(limit, platform, brand, success_only)
     
+    elif command == 'exec' and len(sys.argv) > 2:
+        view_execution(sys.argv[2])
+    
     elif command == 'stats':
         days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
         view_statistics(days)
@@ -218,7 +240,7 @@ def main():
     
     else:
         print(f"未知命令: {command}")
-        print("可用命令: view, stats, export, training")
+        print("可用命令: view, exec, stats, export, training")
 
 
 if __name__ == "__main__":
@@ -93,8 +93,8 @@ def admin_dashboard():
 
         # 最近活动
         cursor.execute('''
-            SELECT * FROM audit_logs
-            ORDER BY timestamp DESC
+            SELECT id, admin_id, action, created_at FROM audit_logs
+            ORDER BY created_at DESC
             LIMIT 10
         ''')
         recent_activity = [
@@ -102,7 +102,7 @@ def admin_dashboard():
                 'id': row[0],
                 'user_id': row[1],
                 'action': row[2],
-                'timestamp': row[6]
+                'timestamp': row[3]
             }
             for row in cursor.fetchall()
         ]
@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
 from enum import Enum
 from typing import Optional, Dict, Any, List
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import api_logger
 from wechat_backend.optimization.request_frequency_optimizer import optimize_request_frequency, RequestPriority
 from wechat_backend.ai_adapters.geo_parser import parse_geo_json_enhanced
@@ -101,6 +102,8 @@ class AIClient(ABC):
         self.api_key = api_key
         # 应用请求频率优化装饰器
         self._apply_frequency_control()
+        # 自动 Span（包含频率控制等待）
+        self._apply_tracing()
 
     def _apply_frequency_control(self):
         """应用请求频率控制"""
@@ -112,6 +115,14 @@ class AIClient(ABC):
         )(original_send_prompt)
         self.send_prompt = decorated_send_prompt
 
+    def _apply_tracing(self):
+        """为 send_prompt 添加自动 Span（未启用导出时直接调用原方法）"""
+        self.send_prompt = traced(
+            'ai.send_prompt',
+            platform=self.platform_type.value,
+            model=self.model_name,
+        )(self.send_prompt)
+
     @abstractmethod
     def send_prompt(self, prompt: str, **kwargs) -> AIResponse:
         """
@@ -11,6 +11,7 @@ from wechat_backend.monitoring.metrics_collector import record_api_call, record_
 from wechat_backend.monitoring.logging_enhancements import log_api_request, log_api_response
 from wechat_backend.config_manager import ConfigurationManager as PlatformConfigManager
 from wechat_backend.circuit_breaker import get_circuit_breaker, CircuitBreakerOpenError
+from wechat_backend.deadline import remaining_timeout
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -212,7 +213,7 @@ class DoubaoAdapter(AIClient):
                 base_url,
                 headers=self._get_headers(),
                 json=payload,
-                timeout=timeout
+                timeout=remaining_timeout(timeout)
             )
 
             response.raise_for_status()
@@ -222,8 +222,8 @@ class AIAdapterFactory:
             except ValueError:
                 raise ValueError(f"Unknown platform type: {platform_type}")
 
-        # 注入核心调试日志
-        api_logger.error(f"REGISTERED_MODELS: {list(cls._adapters.keys())}")
+        # 调试日志：每次创建适配器都会调用，使用 DEBUG 级别与惰性格式化
+        api_logger.debug("REGISTERED_MODELS: %s", list(cls._adapters))
 
         if platform_type not in cls._adapters:
             raise ValueError(f"No adapter registered for platform: {platform_type}")
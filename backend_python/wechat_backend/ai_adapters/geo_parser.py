@@ -4,9 +4,11 @@ Enhanced GEO JSON Parser with improved error handling and Markdown support
 import json
 import re
 from typing import Dict, Any, List
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import api_logger
 
 
+@traced('geo.parse', execution_id_arg='execution_id')
 def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = None, model_name: str = None) -> Dict[str, Any]:
     """
     从 AI 返回的混合文本中提取 geo_analysis JSON（增强版）
@@ -36,7 +38,8 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
     }
 
     if not text or not isinstance(text, str):
-        api_logger.warning(f"parse_geo_json: Empty or invalid text input. exec={execution_id}, Q={q_idx}, model={model_name}")
+        api_logger.warning("parse_geo_json: Empty or invalid text input. exec=%s, Q=%s, model=%s",
+                           execution_id, q_idx, model_name)
         # 修复 1: 添加错误标记
         return {
             **default_data,
@@ -52,7 +55,7 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
         if markdown_matches:
             # 如果找到 Markdown 代码块，使用最后一个（通常是 JSON 所在位置）
             cleaned_text = markdown_matches[-1]
-            api_logger.info("Found JSON in Markdown code block")
+            api_logger.debug("Found JSON in Markdown code block")
         
         # 步骤 2: 尝试直接查找包含 geo_analysis 的 JSON 对象
         # 使用更强大的正则表达式，可以处理嵌套结构
@@ -68,10 +71,11 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
                 data = json.loads(potential_json)
                 if isinstance(data, dict) and "geo_analysis" in data:
                     result = data.get("geo_analysis", default_data)
-                    api_logger.info(f"Successfully parsed geo_analysis: rank={result.get('rank', -1)}, sentiment={result.get('sentiment', 0)}")
+                    api_logger.info("Successfully parsed geo_analysis: rank=%s, sentiment=%s",
+                                    result.get('rank', -1), result.get('sentiment', 0))
                     return result
             except json.JSONDecodeError as e:
-                api_logger.debug(f"Direct JSON parse failed: {e}")
+                api_logger.debug("Direct JSON parse failed: %s", e)
         
         # 步骤 3: 使用正则表达式查找 geo_analysis 字段
         # 这个正则表达式可以处理嵌套的 JSON 结构
@@ -82,10 +86,10 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
             json_str = match.group(1)
             try:
                 geo_data = json.loads(json_str)
-                api_logger.info(f"Extracted geo_analysis with regex: rank={geo_data.get('rank', -1)}")
+                api_logger.info("Extracted geo_analysis with regex: rank=%s", geo_data.get('rank', -1))
                 return geo_data
             except json.JSONDecodeError as e:
-                api_logger.warning(f"Failed to parse extracted geo_analysis: {e}")
+                api_logger.warning("Failed to parse extracted geo_analysis: %s", e)
         
         # 步骤 4: 尝试查找文本中所有的 JSON 对象
         # 使用平衡括号法提取 JSON
@@ -97,19 +101,19 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
                 if isinstance(data, dict):
                     if "geo_analysis" in data:
                         result = data["geo_analysis"]
-                        api_logger.info(f"Found geo_analysis in JSON object list")
+                        api_logger.info("Found geo_analysis in JSON object list")
                         return result
                     elif isinstance(data.get("geo_analysis"), dict):
-                        api_logger.info(f"Found nested geo_analysis")
+                        api_logger.info("Found nested geo_analysis")
                         return data["geo_analysis"]
             except json.JSONDecodeError:
                 continue
         
         # 如果所有方法都失败，记录警告并返回带错误标记的默认值
-        log_context = f"exec={execution_id}, Q={q_idx}, model={model_name}" if execution_id else ""
         api_logger.warning(
-            f"parse_geo_json: Could not extract geo_analysis from text. {log_context} "
-            f"Text length: {len(text)}, First 200 chars: {text[:200]}..."
+            "parse_geo_json: Could not extract geo_analysis from text. exec=%s, Q=%s, model=%s "
+            "Text length: %d, First 200 chars: %s...",
+            execution_id, q_idx, model_name, len(text), text[:200]
         )
         # 修复 1: 添加错误标记和原始响应保留
         return {
@@ -119,7 +123,7 @@ def parse_geo_json_enhanced(text: str, execution_id: str = None, q_idx: int = No
         }
 
     except Exception as e:
-        api_logger.error(f"Unexpected error in parse_geo_json_enhanced: {e}", exc_info=True)
+        api_logger.error("Unexpected error in parse_geo_json_enhanced: %s", e, exc_info=True)
         # 修复 1: 添加错误标记和原始响应保留
         return {
             **default_data,
@@ -3,9 +3,79 @@ Mock providers for testing purposes
 """
 from wechat_backend.ai_adapters.base import BaseAIProvider, StandardAIResponse, AIProviderType
 import asyncio
+import hashlib
+import json
+import re
 import time
 
 
+# Response corpus shared by MockProvider and the benchmark mock LLM server.
+# Each template is followed by the geo_analysis JSON block that GEO_PROMPT_TEMPLATE asks for.
+MOCK_RESPONSE_CORPUS = [
+    "关于“{question}”，综合口碑、售后和性价比来看，推荐顺序如下：\n"
+    "1. {first}：产品线完整，线下服务网点多。\n"
+    "2. {second}：近两年口碑提升明显，适合预算有限的用户。\n"
+    "3. {third}：设计出色，但价格偏高。\n"
+    "建议根据自身预算和使用场景选择。",
+
+    "从专业角度看，{first} 在这一领域的市场占有率和用户满意度均处于领先位置，"
+    "{second} 与 {third} 紧随其后。如果更看重长期使用体验，{first} 是更稳妥的选择；"
+    "如果追求新功能，可以关注 {second}。",
+
+    "这个问题没有唯一答案。主流选择包括 {second}、{first} 和 {third}。"
+    "其中 {second} 的综合评分最高，{first} 在售后方面表现突出，"
+    "{third} 则在年轻用户中更受欢迎。",
+]
+
+MOCK_SOURCE_SITES = [
+    ("https://www.zhihu.com/question/mock", "知乎"),
+    ("https://www.smzdm.com/p/mock", "什么值得买"),
+    ("https://baike.baidu.com/item/mock", "百度百科"),
+    ("https://www.jd.com/mock", "京东"),
+]
+
+
+def _prompt_field(prompt: str, label: str) -> str:
+    match = re.search(rf"{label}：\s*(.*)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def build_mock_geo_response(prompt: str, seed: int = 0) -> str:
+    """
+    根据提示词生成确定性的 GEO 格式回答
+
+    相同的 prompt 与 seed 总是得到相同的回答，便于基准测试在不同提交之间对比。
+    """
+    digest = hashlib.sha256(f"{seed}:{prompt}".encode("utf-8")).digest()
+
+    brand = _prompt_field(prompt, "用户品牌") or "品牌A"
+    competitors = [c.strip() for c in _prompt_field(prompt, "竞争对手").split(",") if c.strip() and c.strip() != "无"]
+    question_match = re.search(r"请回答以下用户问题：\s*\n(.*)", prompt)
+    question = question_match.group(1).strip() if question_match else prompt[:50]
+
+    candidates = [brand] + competitors + ["品牌X", "品牌Y"]
+    rank = digest[0] % 4  # 0-2 为榜单内名次，3 表示未进入推荐列表
+    ordered = [c for c in candidates if c != brand][:3]
+    if rank < 3:
+        ordered.insert(rank, brand)
+    first, second, third = ordered[:3]
+
+    template = MOCK_RESPONSE_CORPUS[digest[1] % len(MOCK_RESPONSE_CORPUS)]
+    body = template.format(question=question, first=first, second=second, third=third)
+
+    url, site_name = MOCK_SOURCE_SITES[digest[2] % len(MOCK_SOURCE_SITES)]
+    geo_analysis = {
+        "geo_analysis": {
+            "brand_mentioned": rank < 3,
+            "rank": rank + 1 if rank < 3 else -1,
+            "sentiment": round((digest[3] / 255.0) * 2 - 1, 2),
+            "cited_sources": [{"url": url, "site_name": site_name, "attitude": "neutral"}],
+            "interception": first if rank != 0 else "",
+        }
+    }
+    return body + "\n\n" + json.dumps(geo_analysis, ensure_ascii=False)
+
+
 class MockProvider(BaseAIProvider):
     """Mock provider for testing purposes"""
     
@@ -16,7 +86,7 @@ class MockProvider(BaseAIProvider):
         # Simulate API call delay
         await asyncio.sleep(0.5)
         return StandardAIResponse(
-            content=f"Mock response for: {prompt[:50]}... This is a simulated response from {self.provider_name}.",
+            content=build_mock_geo_response(prompt),
             sources=[
                 "https://example.com/source1", 
                 "https://example.com/source2",
@@ -107,7 +107,7 @@ class QwenAdapter(AIClient):
                 prompt=prompt,
                 model=self.model_name,
                 json=payload,
-                timeout=30
+                timeout=kwargs.get('timeout', 30)
             )
             
             response.raise_for_status()
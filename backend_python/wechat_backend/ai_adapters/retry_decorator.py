@@ -21,6 +21,7 @@ import random
 from functools import wraps
 from typing import Callable, Any, Optional
 from wechat_backend.logging_config import api_logger
+from wechat_backend.monitoring.stage_metrics import record_stage, STAGE_RATE_LIMIT_DELAY
 
 
 def retry_ai_call(
@@ -103,8 +104,9 @@ def retry_ai_call(
                         f"[AI Retry] 等待 {sleep_time:.2f}秒后重试..."
                     )
                     
-                    # 等待
+                    # 等待（计入当前执行的限流/退避延迟）
                     time.sleep(sleep_time)
+                    record_stage(STAGE_RATE_LIMIT_DELAY, sleep_time)
                     
                     # 增加延迟（指数退避）
                     current_delay = min(current_delay * backoff, max_delay)
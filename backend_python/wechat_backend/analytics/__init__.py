@@ -2,26 +2,30 @@
 分析模块初始化
 
 P1 修复：规范化所有导入路径为绝对路径
+
+子模块按需导入（PEP 562 模块级 __getattr__）：
+报告生成（reportlab）、资产智能（jieba/sklearn）、预测引擎（numpy/scipy）的导入耗时较长，
+导入 wechat_backend.analytics.xxx 任一子模块时不应连带加载它们。
 """
 
-# 调试信息（启动时查看）
-import sys
-import os
-# print(f"DEBUG: sys.path is {sys.path}")
-# print(f"DEBUG: Current dir content: {os.listdir(os.path.dirname(__file__))}")
-
-# 核心分析组件
-from wechat_backend.analytics.rank_analyzer import RankAnalyzer
-from wechat_backend.analytics.source_aggregator import SourceAggregator
-from wechat_backend.analytics.impact_calculator import ImpactCalculator
-from wechat_backend.analytics.report_generator import ReportGenerator
-from wechat_backend.analytics.api_monitor import ApiMonitor
-from wechat_backend.analytics.asset_intelligence_engine import AssetIntelligenceEngine
-
-# 外部依赖组件（位于 wechat_backend 子目录）
-from wechat_backend.analytics.source_intelligence_processor import SourceIntelligenceProcessor, process_brand_source_intelligence
-from wechat_backend.analytics.prediction_engine import PredictionEngine
-from wechat_backend.ai_adapters.workflow_manager import WorkflowManager
+import importlib
+
+# 导出名称 -> 所在模块
+_LAZY_EXPORTS = {
+    # 核心分析组件
+    'RankAnalyzer': 'wechat_backend.analytics.rank_analyzer',
+    'SourceAggregator': 'wechat_backend.analytics.source_aggregator',
+    'ImpactCalculator': 'wechat_backend.analytics.impact_calculator',
+    'ReportGenerator': 'wechat_backend.analytics.report_generator',
+    'ApiMonitor': 'wechat_backend.analytics.api_monitor',
+    'AssetIntelligenceEngine': 'wechat_backend.analytics.asset_intelligence_engine',
+
+    # 外部依赖组件（位于 wechat_backend 子目录）
+    'SourceIntelligenceProcessor': 'wechat_backend.analytics.source_intelligence_processor',
+    'process_brand_source_intelligence': 'wechat_backend.analytics.source_intelligence_processor',
+    'PredictionEngine': 'wechat_backend.analytics.prediction_engine',
+    'WorkflowManager': 'wechat_backend.ai_adapters.workflow_manager',
+}
 
 __all__ = [
     'RankAnalyzer',
@@ -35,3 +39,17 @@ __all__ = [
     'WorkflowManager',
     'AssetIntelligenceEngine'
 ]
+
+
+def __getattr__(name):
+    module_path = _LAZY_EXPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
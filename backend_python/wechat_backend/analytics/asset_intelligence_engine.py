@@ -1,12 +1,26 @@
 """
 资产智能引擎 - 内容适配性分析
 对比用户上传的官方资产与 AI 搜索引擎的采信偏好
+
+性能说明：
+- 官方资产的清洗文本、分词、词频向量和关键词只计算一次，按内容 SHA-256 缓存，跨请求复用
+- 各平台合并内容在一次分析内只分词、提取关键词一次，匹配度、优化建议和语义鸿沟共用
+- 所有平台的 TF-IDF 余弦相似度在一次稀疏矩阵运算中完成
+
+配置（环境变量）:
+    ASSET_PROFILE_CACHE_SIZE: 官方资产分析结果缓存条数，默认 128
 """
+import hashlib
+import math
+import os
 import re
+import threading
+from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
 import jieba
 import jieba.analyse
-from collections import Counter
+from collections import Counter, OrderedDict
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
@@ -14,6 +28,169 @@ from wechat_backend.logging_config import api_logger
 from wechat_backend.semantic_analyzer import SemanticAnalyzer
 
 
+ASSET_PROFILE_CACHE_SIZE = int(os.getenv('ASSET_PROFILE_CACHE_SIZE', '128'))
+
+# 两篇文档语料下 TfidfVectorizer（smooth_idf=True）的 IDF：
+# 两篇都出现的词 ln(3/3) + 1 = 1，只在一篇中出现的词 ln(3/2) + 1
+_PAIR_IDF_SINGLE = math.log(1.5) + 1.0
+
+
+class TextProfile:
+    """
+    单段文本的分析结果
+
+    清洗后文本、分词结果（词频向量）在构造时计算；关键词按 top_k 首次使用时提取并缓存。
+    """
+
+    def __init__(self, text: str, analyzer: SemanticAnalyzer):
+        self.text = text or ''
+        self.cleaned = analyzer.clean_text(self.text)
+        self.tokens = analyzer.tokenize_chinese(self.cleaned) if self.cleaned else []
+        self.term_counts = Counter(self.tokens)
+        self._analyzer = analyzer
+        self._keywords: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def keywords(self, top_k: int) -> List[str]:
+        """与 SemanticAnalyzer.extract_keywords(text, top_k) 结果一致"""
+        with self._lock:
+            if top_k not in self._keywords:
+                self._keywords[top_k] = self._analyzer.extract_keywords(self.text, top_k=top_k)
+            return list(self._keywords[top_k])
+
+
+class AssetProfileCache:
+    """
+    官方资产分析结果的 LRU 缓存
+
+    同一份官方资产通常会被反复分析（不同平台、不同时间），按内容哈希复用分词和关键词。
+    """
+
+    def __init__(self, max_size: int = ASSET_PROFILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._profiles: 'OrderedDict[str, TextProfile]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(text: str) -> str:
+        return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+    def get(self, text: str, analyzer: SemanticAnalyzer) -> TextProfile:
+        """获取（必要时计算）文本的分析结果"""
+        key = self.content_key(text)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                self.hits += 1
+                return profile
+            self.misses += 1
+
+        # 分词在锁外进行，避免阻塞其他请求的缓存命中
+        profile = TextProfile(text, analyzer)
+        with self._lock:
+            self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._profiles),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_asset_profile_cache = None
+
+
+def get_asset_profile_cache() -> AssetProfileCache:
+    """获取全局官方资产分析缓存"""
+    global _asset_profile_cache
+    if _asset_profile_cache is None:
+        _asset_profile_cache = AssetProfileCache()
+    return _asset_profile_cache
+
+
+def batch_semantic_similarity(official: TextProfile, platforms: List[TextProfile]) -> List[float]:
+    """
+    一次稀疏矩阵运算计算官方资产与各平台内容的语义相似度
+
+    结果与逐对调用 SemanticAnalyzer.calculate_semantic_similarity 一致：每一对文本
+    视为独立的两篇文档语料，共有词 IDF 为 1，独有词 IDF 为 ln(1.5)+1，再做 L2 归一化。
+    因此点积只来自共有词，两侧范数可由"全部按独有词计算，再扣除共有词部分"得到。
+    """
+    similarities = [0.0] * len(platforms)
+    if not official.text:
+        return similarities
+
+    rows = []
+    for i, profile in enumerate(platforms):
+        if not profile.text:
+            continue
+        if len(official.cleaned) < 10 or len(profile.cleaned) < 10:
+            similarities[i] = 0.1
+        elif not official.term_counts and not profile.term_counts:
+            # 两侧都没有有效词时 TF-IDF 词表为空，与原实现的重合度兜底一致
+            similarities[i] = 1.0
+        else:
+            rows.append(i)
+    if not rows:
+        return similarities
+
+    vocabulary: Dict[str, int] = {}
+    for term in official.term_counts:
+        vocabulary.setdefault(term, len(vocabulary))
+    indptr, indices, data = [0], [], []
+    for i in rows:
+        for term, count in platforms[i].term_counts.items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            data.append(count)
+        indptr.append(len(indices))
+
+    size = len(vocabulary)
+    counts = sparse.csr_matrix((np.asarray(data, dtype=float), indices, indptr), shape=(len(rows), size))
+    official_vec = np.zeros(size)
+    for term, count in official.term_counts.items():
+        official_vec[vocabulary[term]] = count
+
+    present = counts.copy()
+    present.data[:] = 1.0
+    squared = counts.multiply(counts).tocsr()
+    single_sq = _PAIR_IDF_SINGLE ** 2
+
+    dot = counts @ official_vec
+    official_norm_sq = single_sq * np.dot(official_vec, official_vec) - (single_sq - 1) * (present @ official_vec ** 2)
+    platform_norm_sq = (single_sq * np.asarray(squared.sum(axis=1)).ravel()
+                        - (single_sq - 1) * (squared @ (official_vec > 0).astype(float)))
+
+    denom = np.sqrt(np.clip(official_norm_sq, 0, None) * np.clip(platform_norm_sq, 0, None))
+    scores = np.divide(dot, denom, out=np.zeros_like(dot), where=denom > 0)
+    for i, score in zip(rows, np.clip(scores, 0.0, 1.0)):
+        similarities[i] = float(score)
+    return similarities
+
+
+@dataclass
+class AnalysisContext:
+    """一次分析内共享的官方资产 / 平台内容分析结果"""
+    official: TextProfile
+    platforms: Dict[str, TextProfile] = field(default_factory=dict)
+    similarities: Dict[str, float] = field(default_factory=dict)
+
+
 class AssetIntelligenceEngine:
     """
     资产智能引擎 - 分析官方资产与AI搜索引擎采信偏好的匹配度
@@ -22,6 +199,7 @@ class AssetIntelligenceEngine:
     def __init__(self):
         self.logger = api_logger
         self.semantic_analyzer = SemanticAnalyzer()
+        self.profile_cache = get_asset_profile_cache()
         
         # AI平台权重配置
         self.ai_platform_weights = {
@@ -43,6 +221,19 @@ class AssetIntelligenceEngine:
             'gemini': ['创新', '智能', '未来', '科技', '发展', '趋势']
         }
 
+    def _build_context(self, official_asset: str, ai_preferences: Dict[str, List[str]]) -> AnalysisContext:
+        """
+        构建一次分析的共享上下文：官方资产走全局缓存，各平台内容只分词一次，
+        所有平台的语义相似度一次算完
+        """
+        context = AnalysisContext(official=self.profile_cache.get(official_asset, self.semantic_analyzer))
+        for platform, ai_contents in ai_preferences.items():
+            context.platforms[platform] = TextProfile(" ".join(ai_contents), self.semantic_analyzer)
+
+        similarities = batch_semantic_similarity(context.official, list(context.platforms.values()))
+        context.similarities = dict(zip(context.platforms, similarities))
+        return context
+
     def analyze_content_matching(self, official_asset: str, ai_preferences: Dict[str, List[str]]) -> Dict[str, any]:
         """
         分析官方资产与AI偏好内容的匹配度
@@ -62,13 +253,15 @@ class AssetIntelligenceEngine:
             'semantic_gaps': []
         }
 
+        context = self._build_context(official_asset, ai_preferences)
+
         total_hit_score = 0
         platform_count = 0
 
         for platform, ai_contents in ai_preferences.items():
             # 计算单个平台的匹配度
             platform_analysis = self._analyze_single_platform(
-                official_asset, ai_contents, platform
+                official_asset, ai_contents, platform, context=context
             )
             
             results['platform_analyses'][platform] = platform_analysis
@@ -83,17 +276,23 @@ class AssetIntelligenceEngine:
 
         # 生成优化建议
         results['optimization_suggestions'] = self._generate_optimization_suggestions(
-            official_asset, ai_preferences, results['platform_analyses']
+            official_asset, ai_preferences, results['platform_analyses'], context=context
         )
 
         # 识别语义鸿沟
         results['semantic_gaps'] = self._identify_semantic_gaps(
-            official_asset, ai_preferences
+            official_asset, ai_preferences, context=context
         )
 
         return results
 
-    def _analyze_single_platform(self, official_asset: str, ai_contents: List[str], platform: str) -> Dict[str, any]:
+    def _analyze_single_platform(
+        self,
+        official_asset: str,
+        ai_contents: List[str],
+        platform: str,
+        context: Optional[AnalysisContext] = None
+    ) -> Dict[str, any]:
         """
         分析单个AI平台的内容匹配度
 
@@ -101,21 +300,22 @@ class AssetIntelligenceEngine:
             official_asset: 官方资产内容
             ai_contents: AI平台内容列表
             platform: 平台名称
+            context: 本次分析的共享上下文，为空时单独构建
 
         Returns:
             单平台分析结果
         """
-        # 合并AI内容
-        combined_ai_content = " ".join(ai_contents)
+        if context is None or platform not in context.platforms:
+            context = self._build_context(official_asset, {platform: ai_contents})
+        official = context.official
+        ai_profile = context.platforms[platform]
 
-        # 计算语义相似度
-        semantic_similarity = self.semantic_analyzer.calculate_semantic_similarity(
-            official_asset, combined_ai_content
-        )
+        # 语义相似度（已在上下文中批量计算）
+        semantic_similarity = context.similarities[platform]
 
         # 提取关键词
-        official_keywords = self.semantic_analyzer.extract_keywords(official_asset, top_k=15)
-        ai_keywords = self.semantic_analyzer.extract_keywords(combined_ai_content, top_k=15)
+        official_keywords = official.keywords(15)
+        ai_keywords = ai_profile.keywords(15)
 
         # 计算关键词重合度
         keyword_overlap = 0
@@ -138,14 +338,15 @@ class AssetIntelligenceEngine:
             'official_keywords': official_keywords,
             'ai_keywords': ai_keywords,
             'missing_keywords': missing_keywords,
-            'content_length_match': abs(len(official_asset) - len(combined_ai_content)) / max(len(official_asset), 1)
+            'content_length_match': abs(len(official.text) - len(ai_profile.text)) / max(len(official.text), 1)
         }
 
     def _generate_optimization_suggestions(
         self, 
         official_asset: str, 
         ai_preferences: Dict[str, List[str]], 
-        platform_analyses: Dict[str, Dict]
+        platform_analyses: Dict[str, Dict],
+        context: Optional[AnalysisContext] = None
     ) -> List[Dict[str, str]]:
         """
         生成内容优化建议
@@ -154,24 +355,26 @@ class AssetIntelligenceEngine:
             official_asset: 官方资产内容
             ai_preferences: AI平台偏好内容
             platform_analyses: 平台分析结果
+            context: 本次分析的共享上下文，为空时单独构建
 
         Returns:
             优化建议列表
         """
+        if context is None:
+            context = self._build_context(official_asset, ai_preferences)
         suggestions = []
 
-        for platform, ai_contents in ai_preferences.items():
+        for platform in ai_preferences:
             platform_analysis = platform_analyses[platform]
             hit_rate = platform_analysis['hit_rate']
             
             # 如果匹配度较低，生成针对性建议
             if hit_rate < 60:  # 低于60%认为匹配度较低
                 # 获取AI内容的高频关键词
-                combined_ai_content = " ".join(ai_contents)
-                ai_keywords = self.semantic_analyzer.extract_keywords(combined_ai_content, top_k=10)
+                ai_keywords = context.platforms[platform].keywords(10)
                 
                 # 找出官方资产中缺少但AI内容中重要的关键词
-                official_keywords = self.semantic_analyzer.extract_keywords(official_asset, top_k=15)
+                official_keywords = context.official.keywords(15)
                 missing_important_keywords = [kw for kw in ai_keywords if kw not in official_keywords]
                 
                 if missing_important_keywords:
@@ -205,35 +408,49 @@ class AssetIntelligenceEngine:
 
         return suggestions
 
-    def _identify_semantic_gaps(self, official_asset: str, ai_preferences: Dict[str, List[str]]) -> List[Dict[str, str]]:
+    def _identify_semantic_gaps(
+        self,
+        official_asset: str,
+        ai_preferences: Dict[str, List[str]],
+        context: Optional[AnalysisContext] = None
+    ) -> List[Dict[str, str]]:
         """
         识别语义鸿沟
 
+        与 SemanticAnalyzer.analyze_semantic_drift 的判定一致，但复用上下文中的
+        分词、关键词和相似度，不再对每个平台重新分析官方资产。
+
         Args:
             official_asset: 官方资产内容
             ai_preferences: AI平台偏好内容
+            context: 本次分析的共享上下文，为空时单独构建
 
         Returns:
             语义鸿沟列表
         """
+        if context is None:
+            context = self._build_context(official_asset, ai_preferences)
+        official = context.official
         gaps = []
 
-        for platform, ai_contents in ai_preferences.items():
-            combined_ai_content = " ".join(ai_contents)
-            
-            # 使用语义分析器分析差异
-            analysis = self.semantic_analyzer.analyze_semantic_drift(
-                official_asset, [combined_ai_content], platform
+        for platform in ai_preferences:
+            ai_profile = context.platforms[platform]
+
+            drift_score = self.semantic_analyzer.calculate_drift_score(
+                official.text, ai_profile.text, context.similarities[platform],
+                official_keywords=official.keywords(15), ai_keywords=ai_profile.keywords(15)
             )
             
             # 如果语义偏移较大，记录为语义鸿沟
-            if analysis['semantic_drift_score'] > 50:  # 偏移大于50认为存在语义鸿沟
+            if drift_score > 50:  # 偏移大于50认为存在语义鸿沟
+                official_keywords = official.keywords(20)
+                ai_keywords = ai_profile.keywords(20)
                 gap = {
                     'platform': platform,
-                    'drift_score': analysis['semantic_drift_score'],
-                    'severity': analysis['drift_severity'],
-                    'missing_keywords': analysis['missing_keywords'][:5],  # 只取前5个
-                    'unexpected_keywords': analysis['unexpected_keywords'][:5],  # 只取前5个
+                    'drift_score': drift_score,
+                    'severity': self.semantic_analyzer.classify_drift_severity(drift_score),
+                    'missing_keywords': [kw for kw in official_keywords if kw not in ai_keywords][:5],  # 只取前5个
+                    'unexpected_keywords': [kw for kw in ai_keywords if kw not in official_keywords][:5],  # 只取前5个
                     'description': f"官方内容与{platform}平台内容存在语义差异"
                 }
                 gaps.append(gap)
@@ -251,14 +468,15 @@ class AssetIntelligenceEngine:
         Returns:
             命中率评分 (0-100)
         """
+        official = self.profile_cache.get(official_content, self.semantic_analyzer)
+        ai_profile = TextProfile(ai_content, self.semantic_analyzer)
+
         # 使用语义相似度作为基础命中率
-        semantic_similarity = self.semantic_analyzer.calculate_semantic_similarity(
-            official_content, ai_content
-        )
+        semantic_similarity = batch_semantic_similarity(official, [ai_profile])[0]
         
         # 提取关键词并计算重合度
-        official_keywords = self.semantic_analyzer.extract_keywords(official_content, top_k=10)
-        ai_keywords = self.semantic_analyzer.extract_keywords(ai_content, top_k=10)
+        official_keywords = official.keywords(10)
+        ai_keywords = ai_profile.keywords(10)
         
         if official_keywords and ai_keywords:
             overlap_count = len(set(official_keywords) & set(ai_keywords))
@@ -287,13 +505,12 @@ class AssetIntelligenceEngine:
             优化建议列表
         """
         recommendations = []
+        official = self.profile_cache.get(official_asset, self.semantic_analyzer)
+        official_keywords = official.keywords(10)
         
         for platform, ai_contents in ai_preferences.items():
-            combined_ai_content = " ".join(ai_contents)
-            
             # 分析关键词差异
-            official_keywords = self.semantic_analyzer.extract_keywords(official_asset, top_k=10)
-            ai_keywords = self.semantic_analyzer.extract_keywords(combined_ai_content, top_k=10)
+            ai_keywords = TextProfile(" ".join(ai_contents), self.semantic_analyzer).keywords(10)
             
             missing_keywords = [kw for kw in ai_keywords if kw not in official_keywords]
             
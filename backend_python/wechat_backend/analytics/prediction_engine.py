@@ -129,13 +129,15 @@ class PredictionEngine:
         }
     
     def identify_cognitive_risks(self, evidence_chain: List[Dict[str, Any]],
-                                historical_ranks: List[int]) -> List[Dict[str, Any]]:
+                                historical_ranks: List[int],
+                                recent_decline: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         识别认知风险点
 
         Args:
             evidence_chain: 证据链数据
             historical_ranks: 历史排名数据
+            recent_decline: 已计算好的近期下降趋势（批量预测时传入），为空时按 historical_ranks 计算
 
         Returns:
             风险因素列表
@@ -143,6 +145,10 @@ class PredictionEngine:
         risks = []
         seen_risks = set()  # Track unique risks to avoid duplicates
 
+        # 近期排名下降趋势只与排名序列有关，计算一次
+        if recent_decline is None:
+            recent_decline = self._assess_recent_decline(historical_ranks) if historical_ranks and len(historical_ranks) >= 2 else 0.0
+
         # 分析负面证据
         for evidence in evidence_chain:
             if evidence.get('risk_level', '').upper() in ['HIGH', 'MEDIUM']:
@@ -163,13 +169,9 @@ class PredictionEngine:
                 # 评估风险对排名的潜在影响
                 impact_score = self._calculate_risk_impact(negative_fragment, risk_level)
 
-                # 如果有历史排名数据，评估趋势
-                if historical_ranks and len(historical_ranks) >= 2:
-                    recent_decline = self._assess_recent_decline(historical_ranks)
-                    if recent_decline > 0:  # 有排名下降趋势
-                        amplified_impact = impact_score * (1 + recent_decline * 0.1)
-                    else:
-                        amplified_impact = impact_score
+                # 有排名下降趋势时放大影响
+                if recent_decline > 0:
+                    amplified_impact = impact_score * (1 + recent_decline * 0.1)
                 else:
                     amplified_impact = impact_score
 
@@ -291,6 +293,227 @@ class PredictionEngine:
         }
 
 
+    # ==================== 批量预测（多品牌向量化） ====================
+
+    @staticmethod
+    def _masked_slope(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        按行计算带掩码的最小二乘直线（闭式解）
+
+        Returns:
+            (斜率, 截距, x 均值, x 离差平方和)，观测数不足 2 的行斜率为 0
+        """
+        n = mask.sum(axis=1)
+        safe_n = np.maximum(n, 1)
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / safe_n
+        y_mean = np.where(mask, y, 0.0).sum(axis=1) / safe_n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        dy = np.where(mask, y - y_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        sxy = (dx * dy).sum(axis=1)
+        slope = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+        intercept = y_mean - slope * x_mean
+        return slope, intercept, x_mean, sxx
+
+    def batch_forecast(self, histories: np.ndarray, mask: Optional[np.ndarray] = None,
+                       alpha: float = 0.3, forecast_periods: int = 7, z: float = 1.96) -> Dict[str, np.ndarray]:
+        """
+        多品牌批量预测：一次向量化计算指数平滑、线性趋势与预测区间
+
+        Args:
+            histories: 形状 (品牌数, 天数) 的对齐历史序列，缺失值可为 NaN
+            mask: 同形状布尔数组，True 表示当天有观测；为空时以非 NaN 为观测
+            alpha: 指数平滑系数
+            forecast_periods: 预测期数
+            z: 预测区间的分位数（1.96 对应 95%）
+
+        Returns:
+            {
+                'observations': (B,) 观测数,
+                'smoothed_level': (B,) 指数平滑末值,
+                'smoothing_forecast': (B, P) 指数平滑预测,
+                'slope': (B,) 趋势斜率（每天）,
+                'intercept': (B,) 截距,
+                'trend_forecast': (B, P) 线性趋势预测,
+                'lower': (B, P) 预测区间下界（观测数 <= 2 时为 NaN）,
+                'upper': (B, P) 预测区间上界
+            }
+
+        说明:
+            与逐品牌的 exponential_smoothing_forecast / linear_regression_forecast 一致：
+            观测不足 2 个时预测值取最后一个观测值（无观测为 0），斜率为 0。
+            缺失天不参与平滑和拟合，但趋势按日历天计算。
+        """
+        values = np.asarray(histories, dtype=float)
+        if values.ndim != 2:
+            raise ValueError("histories must be a 2-D array of shape (brands, days)")
+        observed = ~np.isnan(values)
+        if mask is not None:
+            observed &= np.asarray(mask, dtype=bool)
+        values = np.where(observed, values, 0.0)
+
+        n_brands, n_days = values.shape
+        n = observed.sum(axis=1)
+        rows = np.arange(n_brands)
+
+        # 指数平滑：s = (1-a)^(n-1)·x0 + Σ a·(1-a)^(n-1-k)·xk，按观测序号 k 计算权重
+        k = np.cumsum(observed, axis=1) - 1
+        exponent = np.where(observed, (n[:, None] - 1) - k, 0)
+        weights = np.where(k == 0, 1.0, alpha) * (1 - alpha) ** exponent
+        smoothed_level = np.where(observed, weights * values, 0.0).sum(axis=1)
+
+        # 线性趋势（闭式最小二乘）
+        t = np.broadcast_to(np.arange(n_days, dtype=float), values.shape)
+        slope, intercept, t_mean, sxx = self._masked_slope(t, values, observed)
+        has_trend = n >= 2
+
+        last_index = n_days - 1 - np.argmax(observed[:, ::-1], axis=1)
+        last_value = np.where(n > 0, values[rows, last_index], 0.0)
+
+        future_t = np.arange(n_days, n_days + forecast_periods, dtype=float)
+        trend_forecast = np.where(has_trend[:, None],
+                                  intercept[:, None] + slope[:, None] * future_t[None, :],
+                                  last_value[:, None])
+
+        # 残差标准差与预测区间：se = s·sqrt(1 + 1/n + (t0 - t̄)² / Sxx)
+        fitted = intercept[:, None] + slope[:, None] * t
+        sse = np.where(observed, (values - fitted) ** 2, 0.0).sum(axis=1)
+        dof = n - 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residual_std = np.where(dof > 0, np.sqrt(sse / np.maximum(dof, 1)), np.nan)
+            se = residual_std[:, None] * np.sqrt(
+                1 + 1 / np.maximum(n, 1)[:, None]
+                + (future_t[None, :] - t_mean[:, None]) ** 2 / np.where(sxx > 0, sxx, np.nan)[:, None]
+            )
+
+        return {
+            'observations': n,
+            'smoothed_level': smoothed_level,
+            'smoothing_forecast': np.repeat(smoothed_level[:, None], forecast_periods, axis=1),
+            'slope': slope,
+            'intercept': intercept,
+            'trend_forecast': trend_forecast,
+            'lower': trend_forecast - z * se,
+            'upper': trend_forecast + z * se,
+        }
+
+    def predict_ranking_trends_batch(self, histories: np.ndarray, mask: Optional[np.ndarray] = None,
+                                     days: int = 7) -> List[Dict[str, Any]]:
+        """
+        批量预测多个品牌的排名趋势
+
+        返回结构与 predict_ranking_trend 相同（每个品牌一个字典）；
+        置信区间使用 batch_forecast 的预测区间。
+        """
+        forecast = self.batch_forecast(histories, mask, forecast_periods=days)
+        # 先截断浮点噪声，避免 x.5 附近的取整因计算顺序不同而抖动
+        predicted = np.maximum(1, np.round(np.round(forecast['trend_forecast'], 9))).astype(int)
+        lower = np.maximum(1, np.round(forecast['lower']))
+        upper = np.round(forecast['upper'])
+
+        results = []
+        for i, n in enumerate(forecast['observations']):
+            if n == 0:
+                results.append({
+                    'predicted_ranks': [1] * days,
+                    'confidence_interval': [(1, 1)] * days,
+                    'trend_direction': 'stable',
+                    'trend_strength': 0.0
+                })
+                continue
+
+            ranks = predicted[i].tolist()
+            if n > 2:
+                confidence_interval = [(int(lo), int(hi)) for lo, hi in zip(lower[i], upper[i])]
+            else:
+                confidence_interval = [(max(1, rank - 2), rank + 2) for rank in ranks]
+
+            slope = float(forecast['slope'][i])
+            if slope < -0.1:
+                trend_direction = 'improving'
+            elif slope > 0.1:
+                trend_direction = 'declining'
+            else:
+                trend_direction = 'stable'
+
+            results.append({
+                'predicted_ranks': ranks,
+                'confidence_interval': confidence_interval,
+                'trend_direction': trend_direction,
+                'trend_strength': abs(slope)
+            })
+        return results
+
+    def predict_weekly_ranks_batch(self, historical_data_by_brand: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量版 predict_weekly_rank_with_risks，供周度风险预测任务一次处理所有品牌
+
+        各品牌的排名序列按观测顺序右对齐到同一矩阵，预测值与逐品牌调用一致。
+
+        Args:
+            historical_data_by_brand: {品牌: 历史数据列表（同 predict_weekly_rank_with_risks）}
+
+        Returns:
+            {品牌: 预测结果}
+        """
+        brands = list(historical_data_by_brand.keys())
+        ranks_by_brand = []
+        evidence_by_brand = []
+        for brand in brands:
+            ranks = []
+            evidence = []
+            for data_point in historical_data_by_brand[brand]:
+                if data_point.get('rank') is not None:
+                    ranks.append(int(data_point['rank']))
+                evidence.extend(data_point.get('evidence_chain', []))
+            ranks_by_brand.append(ranks)
+            evidence_by_brand.append(evidence)
+
+        width = max((len(r) for r in ranks_by_brand), default=0)
+        histories = np.full((len(brands), max(width, 1)), np.nan)
+        for i, ranks in enumerate(ranks_by_brand):
+            if ranks:
+                histories[i, histories.shape[1] - len(ranks):] = ranks
+
+        predictions = self.predict_ranking_trends_batch(histories, days=7)
+
+        # 近期下降趋势：最近 5 个观测的斜率（只取正值）
+        observed = ~np.isnan(histories)
+        order = np.cumsum(observed, axis=1) - 1
+        recent = observed & (order >= observed.sum(axis=1)[:, None] - 5)
+        recent_slope, _, _, _ = self._masked_slope(order.astype(float), np.nan_to_num(histories), recent)
+        recent_decline = np.maximum(recent_slope, 0.0)
+
+        results = {}
+        for i, brand in enumerate(brands):
+            ranks = ranks_by_brand[i]
+            rank_prediction = predictions[i]
+            risks = self.identify_cognitive_risks(evidence_by_brand[i], ranks,
+                                                  recent_decline=float(recent_decline[i]) if len(ranks) >= 2 else 0.0)
+            results[brand] = {
+                'prediction_summary': {
+                    'predicted_rank_range': {
+                        'best_case': min(rank_prediction['predicted_ranks']),
+                        'worst_case': max(rank_prediction['predicted_ranks']),
+                        'most_likely': rank_prediction['predicted_ranks'][0]
+                    },
+                    'confidence_level': 'high' if len(ranks) > 10 else 'medium' if len(ranks) > 5 else 'low',
+                    'trend_direction': rank_prediction['trend_direction'],
+                    'trend_strength': rank_prediction['trend_strength']
+                },
+                'weekly_forecast': [
+                    {
+                        'day': day + 1,
+                        'predicted_rank': rank_prediction['predicted_ranks'][day],
+                        'confidence_interval': rank_prediction['confidence_interval'][day]
+                    }
+                    for day in range(7)
+                ],
+                'risk_factors': risks,
+                'historical_data_points': len(ranks)
+            }
+        return results
+
 # Example usage and testing
 if __name__ == "__main__":
     # Create prediction engine
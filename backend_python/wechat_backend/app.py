@@ -6,6 +6,7 @@ import json
 import requests
 from datetime import datetime
 import os
+import time
 
 from config import Config
 
@@ -186,9 +187,9 @@ from wechat_backend.cache.api_cache import cache_bp, start_cache_maintenance
 app.register_blueprint(cache_bp)
 start_cache_maintenance()
 
-# Initialize database query optimization (数据库查询优化)
-from wechat_backend.database.query_optimizer import init_recommended_indexes
-init_recommended_indexes()
+# 注册流水线运行指标（事件总线等）
+from wechat_backend.monitoring.metrics_views import metrics_bp, metrics_access_denied
+app.register_blueprint(metrics_bp)
 
 # Register auth middleware (差距 1 修复：API 认证授权增强)
 app.before_request(enforce_auth_middleware())
@@ -216,10 +217,6 @@ def after_request(response):
     # response.headers['Content-Security-Policy'] = "default-src 'self'; script-src 'self' 'unsafe-inline'"
     return response
 
-# Start monitoring system
-from wechat_backend.monitoring.monitoring_config import initialize_monitoring
-initialize_monitoring()
-
 def warm_up_adapters():
     """预热所有已注册的API适配器"""
     from wechat_backend.logging_config import api_logger
@@ -257,9 +254,69 @@ def warm_up_adapters():
     api_logger.info("Adapter warm-up completed")
 
 
-# Warm up adapters in a background thread after app initialization
+# ==================== 延迟初始化（冷启动优化） ====================
+# 索引创建、监控告警线程、适配器预热和重量级模块预热不在导入时执行：
+# 每个 worker 都要为导入付出这些耗时，且 fork 前启动的后台线程在 worker 中并不存在。
+# gunicorn 部署时在 post_fork 钩子中触发；其他启动方式由首个请求在后台触发。
+# APP_EAGER_INIT=true 时恢复导入即初始化（同步执行）。
 import threading
-threading.Thread(target=warm_up_adapters, daemon=True).start()
+
+APP_EAGER_INIT = os.getenv('APP_EAGER_INIT', 'false').lower() == 'true'
+
+_deferred_startup_lock = threading.Lock()
+_deferred_startup_started = False
+
+
+def run_deferred_startup():
+    """执行一次性启动任务（同步），各步骤失败互不影响"""
+    from wechat_backend.database.query_optimizer import init_recommended_indexes
+    from wechat_backend.monitoring.monitoring_config import initialize_monitoring
+    from wechat_backend.lazy_imports import preload_heavy_modules
+
+    steps = [
+        ('recommended_indexes', init_recommended_indexes),
+        ('monitoring', initialize_monitoring),
+        ('adapter_warm_up', warm_up_adapters),
+        ('heavy_modules', preload_heavy_modules),
+    ]
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            app_logger.info(f"[Startup] {name} 完成，耗时 {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            app_logger.error(f"[Startup] {name} 失败：{e}")
+
+
+def start_deferred_startup():
+    """在后台线程中执行一次性启动任务，进程内只触发一次"""
+    global _deferred_startup_started
+    with _deferred_startup_lock:
+        if _deferred_startup_started:
+            return
+        _deferred_startup_started = True
+    threading.Thread(target=run_deferred_startup, name='deferred-startup', daemon=True).start()
+
+
+def post_fork(server, worker):
+    """
+    gunicorn post_fork 钩子
+
+    gunicorn.conf.py 中:
+        from wechat_backend.app import post_fork
+    """
+    start_deferred_startup()
+
+
+@app.before_request
+def trigger_deferred_startup():
+    if not _deferred_startup_started:
+        start_deferred_startup()
+
+
+if APP_EAGER_INIT:
+    _deferred_startup_started = True
+    run_deferred_startup()
 
 # P2-1 优化：启动 SSE 清理线程并注册路由
 try:
@@ -467,6 +524,29 @@ def export_monitoring_data():
         }), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+@require_auth_optional
+@rate_limit(limit=60, window=60, per='ip')
+def get_prometheus_metrics():
+    """
+    Prometheus 指标端点
+
+    返回诊断全链路分阶段耗时直方图（Prometheus 文本格式）。
+    仅允许 METRICS_ALLOWED_NETWORKS 内直连的抓取方或已认证的管理员访问。
+    """
+    denied = metrics_access_denied()
+    if denied is not None:
+        return denied
+
+    from wechat_backend.monitoring.stage_metrics import get_stage_metrics
+
+    return app.response_class(
+        response=get_stage_metrics().render_prometheus(),
+        status=200,
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @app.route('/admin/monitoring')
 @require_auth  # P0-005 修复：添加身份验证
 def monitoring_dashboard_page():
@@ -566,6 +646,7 @@ def initialize_wal_recovery():
 if __name__ == '__main__':
     # P1-015 新增：在服务启动时初始化 WAL 恢复机制
     initialize_wal_recovery()
+    start_deferred_startup()
     
     # Explicitly specify host and port to align with frontend contract
     # Using standard Flask port 5000 for consistency
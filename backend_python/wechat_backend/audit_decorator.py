@@ -2,6 +2,9 @@
 """
 审计日志装饰器
 用于自动记录管理员操作
+
+审计记录通过 save_audit_log 异步入队（见 audit_log_writer），
+装饰器不会在请求路径上等待数据库提交。
 """
 
 from functools import wraps
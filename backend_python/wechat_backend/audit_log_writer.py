@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+异步批量审计日志写入器
+
+请求线程只负责把审计记录放入有界内存队列，后台线程按批次写入存储：
+1. 按批量大小或刷新间隔聚合为一次多行插入
+2. 数据库繁忙（锁等待超时等）时整批追加到溢出文件，恢复后自动回放；
+   其他错误（如表结构不匹配）重试也不会成功，整批写入死信文件
+3. 溢出/死信文件按进程号区分，多个 worker 互不干扰；已退出进程的溢出文件由存活进程认领回放
+4. 进程退出时刷新队列
+5. 提供 queued/dropped/written/spilled/dead_lettered 等计数器
+
+使用方式:
+    writer = AuditLogWriter(sink=write_rows, name='admin_audit')
+    writer.submit({'admin_id': 'u1', 'action': 'login'})
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from wechat_backend.logging_config import db_logger
+
+
+# ==================== 配置 ====================
+
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '1.0'))
+
+# 回放溢出文件时每批读取的行数
+SPILL_REPLAY_CHUNK = 500
+
+
+def is_busy_error(exc: Exception) -> bool:
+    """数据库繁忙（锁等待超时）可稍后重试；其余错误视为不可重试"""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    message = str(exc).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 无权限发送信号说明进程存在
+        return True
+    return True
+
+
+class _FlushMarker:
+    """队列中的刷新标记，后台线程处理到此处时写出当前批次并通知调用方"""
+
+    __slots__ = ('event',)
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class AuditLogWriter:
+    """异步批量审计日志写入器"""
+
+    def __init__(self,
+                 sink: Callable[[List[Dict[str, Any]]], None],
+                 name: str = 'audit',
+                 max_queue_size: int = AUDIT_QUEUE_SIZE,
+                 batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 spill_path: Optional[str] = None,
+                 retryable: Callable[[Exception], bool] = is_busy_error):
+        """
+        Args:
+            sink: 批量写入函数，接收行字典列表，失败时抛出异常
+            name: 写入器名称（用于日志和线程名）
+            max_queue_size: 队列容量，满时丢弃新记录
+            batch_size: 单批最大行数
+            flush_interval: 最长刷新间隔（秒）
+            spill_path: 溢出文件基础路径（实际文件名附加进程号），为 None 时写入失败的批次直接丢弃
+            retryable: 判断写入异常是否可重试；可重试的批次溢出后回放，其余写入死信文件
+        """
+        self.sink = sink
+        self.retryable = retryable
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path) if spill_path else None
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stopped = False
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'dead_lettered': 0,
+            'failed_batches': 0,
+            'batches': 0,
+        }
+
+    # ---------- 请求线程侧 ----------
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """
+        提交一条审计记录（非阻塞）
+
+        Returns:
+            是否成功入队；队列已满或写入器已停止时返回 False
+        """
+        if self._stopped:
+            self._incr('dropped')
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._incr('dropped')
+            return False
+
+        self._incr('enqueued')
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        等待当前已入队的记录全部写出
+
+        Returns:
+            是否在超时前完成
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.event.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止接收新记录并刷新队列"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.flush(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入器计数器"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['spill_pending'] = self._spill_size()
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    # ---------- 后台线程侧 ----------
+
+    def _ensure_started(self):
+        # fork 出的子进程继承了线程对象但没有线程本身，按进程号重新启动
+        if self._thread_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread_pid != os.getpid():
+                if self._thread_pid is not None:
+                    # 继承的队列副本由父进程写出，子进程丢弃以免重复写入
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f'{self.name}-writer',
+                    daemon=True
+                )
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _FlushMarker):
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                item.event.set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            # 空闲时也尝试回放积压的溢出记录
+            self._replay_spill()
+            return
+
+        try:
+            self.sink(batch)
+        except Exception as e:
+            self._incr('failed_batches')
+            if self.retryable(e):
+                db_logger.warning(f"[AuditWriter:{self.name}] 存储繁忙，批量写入转入溢出文件：{e}")
+                self._spill(batch)
+            else:
+                db_logger.error(f"[AuditWriter:{self.name}] 批量写入失败（不可重试），写入死信文件：{e}")
+                self._dead_letter(batch)
+            return
+
+        self._incr('written', len(batch))
+        self._incr('batches')
+        self._replay_spill()
+
+    # ---------- 溢出与死信文件 ----------
+
+    @property
+    def _spill_stem(self) -> str:
+        name = self.spill_path.name
+        return name[:-len('.jsonl')] if name.endswith('.jsonl') else name
+
+    @property
+    def _spill_file(self) -> Path:
+        """<基础名>.<进程号>.jsonl"""
+        return self.spill_path.with_name(f'{self._spill_stem}.{os.getpid()}.jsonl')
+
+    @property
+    def _dead_letter_file(self) -> Path:
+        """<基础名>.dead.<进程号>.jsonl，需人工排查后处理"""
+        return self.spill_path.with_name(f'{self._spill_stem}.dead.{os.getpid()}.jsonl')
+
+    @property
+    def _replay_file(self) -> Path:
+        return self._spill_file.with_name(self._spill_file.name + '.replay')
+
+    def _append_rows(self, path: Path, rows: List[Dict[str, Any]]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str))
+                f.write('\n')
+
+    def _spill(self, batch: List[Dict[str, Any]], count: bool = True):
+        if self.spill_path is None:
+            self._incr('dropped', len(batch))
+            return
+        try:
+            self._append_rows(self._spill_file, batch)
+            if count:
+                self._incr('spilled', len(batch))
+        except Exception as e:
+            db_logger.error(f"[AuditWriter:{self.name}] 写入溢出文件失败：{e}")
+            self._incr('dropped', len(batch))
+
+    def _dead_letter(self, rows: List[Dict[str, Any]]):
+        if self.spill_path is None:
+            self._incr('dropped', len(rows))
+            return
+        try:
+            self._append_rows(self._dead_letter_file, rows)
+            self._incr('dead_lettered', len(rows))
+        except Exception as e:
+            db_logger.error(f"[AuditWriter:{self.name}] 写入死信文件失败：{e}")
+            self._incr('dropped', len(rows))
+
+    def _orphan_spill_files(self) -> List[Path]:
+        """已退出进程留下的溢出文件（含回放中断的 .replay 文件）"""
+        prefix = f'{self._spill_stem}.'
+        orphans = []
+        for path in self.spill_path.parent.glob(f'{prefix}*.jsonl*'):
+            pid, _, suffix = path.name[len(prefix):].partition('.')
+            if not pid.isdigit() or suffix not in ('jsonl', 'jsonl.replay'):
+                continue
+            if int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                orphans.append(path)
+        return sorted(orphans)
+
+    def _replay_spill(self):
+        """存储恢复后回放溢出文件（仅在后台线程中调用）"""
+        if self.spill_path is None:
+            return
+        pending = [p for p in (self._replay_file, self._spill_file) if p.exists()]
+        if self.spill_path.parent.exists():
+            pending.extend(self._orphan_spill_files())
+
+        for path in pending:
+            if path != self._replay_file:
+                try:
+                    # 原子认领：本进程的回放文件只由本进程的后台线程读写
+                    os.replace(path, self._replay_file)
+                except OSError:
+                    continue
+            if not self._replay_claimed():
+                return
+
+    def _replay_claimed(self) -> bool:
+        """
+        回放已认领的文件
+
+        Returns:
+            是否全部回放；存储仍繁忙时返回 False，剩余记录放回溢出文件
+        """
+        replay_path = self._replay_file
+        remaining: List[Dict[str, Any]] = []
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            chunk: List[Dict[str, Any]] = []
+            failed = False
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if failed:
+                    remaining.append(row)
+                    continue
+                chunk.append(row)
+                if len(chunk) >= SPILL_REPLAY_CHUNK:
+                    failed = not self._replay_chunk(chunk)
+                    if failed:
+                        remaining.extend(chunk)
+                    chunk = []
+            if chunk and not failed and not self._replay_chunk(chunk):
+                remaining.extend(chunk)
+
+        os.remove(replay_path)
+        if remaining:
+            # 未写出的记录放回溢出文件，等待下次回放
+            self._spill(remaining, count=False)
+            return False
+        return True
+
+    def _replay_chunk(self, chunk: List[Dict[str, Any]]) -> bool:
+        """回放一批记录；返回 False 表示存储仍繁忙，应停止本轮回放"""
+        try:
+            self.sink(chunk)
+        except Exception as e:
+            if self.retryable(e):
+                db_logger.warning(f"[AuditWriter:{self.name}] 回放溢出文件失败，稍后重试：{e}")
+                return False
+            db_logger.error(f"[AuditWriter:{self.name}] 回放失败（不可重试），写入死信文件：{e}")
+            self._dead_letter(chunk)
+            return True
+        self._incr('replayed', len(chunk))
+        return True
+
+    def _spill_size(self) -> int:
+        if self.spill_path is None:
+            return 0
+        size = 0
+        for path in (self._spill_file, self._replay_file):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                continue
+        return size
+
+    def _incr(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+
+# ==================== 全局注册 ====================
+
+_writers: Dict[str, AuditLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_audit_writer(name: str, sink: Callable[[List[Dict[str, Any]]], None],
+                     spill_path: Optional[str] = None) -> AuditLogWriter:
+    """获取（或创建）指定名称的审计写入器，进程退出时自动刷新"""
+    writer = _writers.get(name)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(name)
+            if writer is None:
+                writer = AuditLogWriter(sink=sink, name=name, spill_path=spill_path)
+                _writers[name] = writer
+    return writer
+
+
+def get_all_writer_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有审计写入器的计数器"""
+    return {name: writer.get_stats() for name, writer in list(_writers.items())}
+
+
+def shutdown_audit_writers(timeout: float = 5.0):
+    """刷新并停止所有审计写入器"""
+    for writer in list(_writers.values()):
+        writer.shutdown(timeout)
+
+
+atexit.register(shutdown_audit_writers)
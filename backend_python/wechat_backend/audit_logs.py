@@ -4,12 +4,41 @@
 记录管理员操作日志，支持查询、导出和告警
 """
 
+import os
 import sqlite3
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from wechat_backend.logging_config import db_logger
 from wechat_backend.database import DB_PATH
+from wechat_backend.audit_log_writer import get_audit_writer
+
+
+# 早期 database_core 以 user_id/details/timestamp 建表，缺少的列在初始化时补齐
+_AUDIT_LOG_MIGRATION_COLUMNS = {
+    'admin_id': 'TEXT',
+    'resource_id': 'TEXT',
+    'request_method': 'TEXT',
+    'request_data': 'TEXT',
+    'response_status': 'INTEGER',
+    'error_message': 'TEXT',
+    'created_at': 'TIMESTAMP',
+}
+
+
+def _migrate_audit_logs_columns(cursor):
+    """为旧结构的审计日志表补充列，并从旧列回填"""
+    cursor.execute('PRAGMA table_info(audit_logs)')
+    existing = {row[1] for row in cursor.fetchall()}
+    added = [column for column in _AUDIT_LOG_MIGRATION_COLUMNS if column not in existing]
+    for column in added:
+        cursor.execute(f'ALTER TABLE audit_logs ADD COLUMN {column} {_AUDIT_LOG_MIGRATION_COLUMNS[column]}')
+    if 'admin_id' in added and 'user_id' in existing:
+        cursor.execute('UPDATE audit_logs SET admin_id = user_id WHERE admin_id IS NULL')
+    if 'created_at' in added and 'timestamp' in existing:
+        cursor.execute('UPDATE audit_logs SET created_at = timestamp WHERE created_at IS NULL')
+    if added:
+        db_logger.info(f"Audit logs table migrated, added columns: {', '.join(added)}")
 
 
 def init_audit_logs_table():
@@ -33,6 +62,7 @@ def init_audit_logs_table():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    _migrate_audit_logs_columns(cursor)
     
     # 创建索引
     cursor.execute('''
@@ -60,12 +90,58 @@ def init_audit_logs_table():
     db_logger.info("Audit logs table initialized")
 
 
+# 审计日志默认异步批量写入，设置 AUDIT_ASYNC_ENABLED=false 可回退为同步写入
+AUDIT_ASYNC_ENABLED = os.environ.get('AUDIT_ASYNC_ENABLED', 'true').lower() == 'true'
+
+# 后台批量写入时的锁等待上限（秒），超时即视为数据库繁忙并转入溢出文件
+AUDIT_DB_BUSY_TIMEOUT = float(os.environ.get('AUDIT_DB_BUSY_TIMEOUT', '0.5'))
+
+# 溢出文件基础路径，实际文件按进程号命名（audit_logs.<pid>.jsonl），死信为 audit_logs.dead.<pid>.jsonl
+AUDIT_SPILL_PATH = os.environ.get('AUDIT_SPILL_PATH') or str(
+    Path(DB_PATH).resolve().parent / 'audit_spill' / 'audit_logs.jsonl'
+)
+
+_INSERT_AUDIT_LOG_SQL = '''
+    INSERT INTO audit_logs (
+        admin_id, action, resource, resource_id, ip_address,
+        user_agent, request_method, request_data, response_status,
+        error_message, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_AUDIT_COLUMNS = (
+    'admin_id', 'action', 'resource', 'resource_id', 'ip_address',
+    'user_agent', 'request_method', 'request_data', 'response_status',
+    'error_message', 'created_at'
+)
+
+
+def _write_audit_rows(rows):
+    """批量写入审计日志（后台线程调用，失败时抛出异常由写入器溢出处理）"""
+    conn = sqlite3.connect(DB_PATH, timeout=AUDIT_DB_BUSY_TIMEOUT)
+    try:
+        conn.executemany(
+            _INSERT_AUDIT_LOG_SQL,
+            [tuple(row.get(column) for column in _AUDIT_COLUMNS) for row in rows]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_audit_log_writer():
+    """获取管理员审计日志写入器"""
+    return get_audit_writer('audit_logs', _write_audit_rows, spill_path=AUDIT_SPILL_PATH)
+
+
 def save_audit_log(admin_id, action, resource=None, resource_id=None, 
                    ip_address=None, user_agent=None, request_method=None,
                    request_data=None, response_status=None, error_message=None):
     """
     保存审计日志
     
+    记录在请求线程中仅入队，由后台写入器批量落库，请求延迟不再依赖审计存储。
+    
     Args:
         admin_id: 管理员 ID
         action: 操作类型
@@ -78,30 +154,31 @@ def save_audit_log(admin_id, action, resource=None, resource_id=None,
         response_status: 响应状态码
         error_message: 错误信息
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    row = {
+        'admin_id': admin_id,
+        'action': action,
+        'resource': resource,
+        'resource_id': resource_id,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'request_method': request_method,
+        'request_data': json.dumps(request_data) if request_data else None,
+        'response_status': response_status,
+        'error_message': error_message,
+        # 入队时刻即操作时刻，避免批量落库延迟影响时间线
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    
+    if AUDIT_ASYNC_ENABLED:
+        if not get_audit_log_writer().submit(row):
+            db_logger.warning(f"Audit log dropped (queue full): {admin_id} - {action}")
+        return
     
     try:
-        cursor.execute('''
-            INSERT INTO audit_logs (
-                admin_id, action, resource, resource_id, ip_address,
-                user_agent, request_method, request_data, response_status,
-                error_message
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            admin_id, action, resource, resource_id, ip_address,
-            user_agent, request_method,
-            json.dumps(request_data) if request_data else None,
-            response_status, error_message
-        ))
-        
-        conn.commit()
+        _write_audit_rows([row])
         db_logger.debug(f"Audit log saved: {admin_id} - {action}")
-        
     except Exception as e:
         db_logger.error(f"Failed to save audit log: {e}")
-    finally:
-        conn.close()
 
 
 def get_audit_logs(admin_id=None, action=None, resource=None, 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+NxM 单元格完成事件总线
+
+NxM 执行循环每完成一个 (品牌, 问题, 模型) 单元格发布一个 CellCompleted 事件，
+持久化、WAL、进度推送（SSE）等订阅者各自在独立线程中消费：
+1. 每个订阅者一个有界队列 + 一个工作线程，慢订阅者只会积压自己的队列
+2. 普通订阅者（进度推送）队列满时丢弃最旧的事件并计数，不阻塞 LLM 调度；
+   无损订阅者（持久化、WAL）队列满时发布端阻塞等待，结果不会丢失
+3. 订阅者可按 execution_id 过滤，只接收单次执行的事件
+4. 执行结束时通过队列通知订阅者（handler.on_execution_end），用于释放按执行累积的状态
+5. 每个订阅者暴露 queued/delivered/failed/dropped 与处理延迟（事件发布到处理完成）
+
+使用方式:
+    bus = get_cell_event_bus()
+    bus.subscribe('persistence', persist_cell, lossless=True)
+    bus.subscribe(f'progress:{execution_id}', on_progress, execution_id=execution_id)
+    bus.publish(CellCompleted(execution_id=..., brand=..., ...))
+    bus.flush(execution_id=execution_id)  # 汇总前等待相关订阅者处理完已发布的事件
+    bus.end_execution(execution_id)
+"""
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from wechat_backend.logging_config import api_logger
+
+
+# ==================== 配置 ====================
+
+EVENT_BUS_QUEUE_SIZE = int(os.environ.get('EVENT_BUS_QUEUE_SIZE', '10000'))
+
+# 单元格状态
+CELL_SUCCESS = 'success'  # AI 调用与 GEO 解析均成功
+CELL_FAILED = 'failed'    # AI 调用失败或解析失败（有结果记录）
+CELL_ERROR = 'error'      # 单元格执行异常（无结果记录）
+CELL_SKIPPED = 'skipped'  # 模型熔断跳过
+
+
+@dataclass
+class CellCompleted:
+    """单元格完成事件"""
+    execution_id: str
+    brand: str
+    question_index: int
+    model: str
+    status: str
+    completed: int  # 含本单元格在内的已完成数
+    total: int
+    result: Optional[Dict[str, Any]] = None  # 收集到 results 中的结果记录
+    error_message: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class _FlushMarker:
+    """队列中的刷新标记，工作线程处理到此处时通知调用方"""
+
+    __slots__ = ('event', 'dropped')
+
+    def __init__(self):
+        self.event = threading.Event()
+        # 标记被挤出队列时，之前的事件也已丢失，刷新视为失败
+        self.dropped = False
+
+
+class _ExecutionEnded:
+    """队列中的执行结束通知，排在该执行的全部事件之后"""
+
+    __slots__ = ('execution_id',)
+
+    def __init__(self, execution_id: str):
+        self.execution_id = execution_id
+
+
+class _Subscription:
+    """单个订阅者：有界队列、工作线程与计数器"""
+
+    def __init__(self, name: str, handler: Callable[[CellCompleted], None],
+                 execution_id: Optional[str], max_queue_size: int, lossless: bool = False):
+        self.name = name
+        self.handler = handler
+        self.execution_id = execution_id
+        self.lossless = lossless
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=max_queue_size)
+        self.stopped = False
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'delivered': 0,
+            'failed': 0,
+            'dropped': 0,
+            'last_lag_ms': 0.0,
+            'max_lag_ms': 0.0,
+        }
+        self.thread = threading.Thread(target=self._run, name=f'event-bus-{name}', daemon=True)
+        self.thread.start()
+
+    def accepts(self, execution_id: Optional[str]) -> bool:
+        return execution_id is None or self.execution_id is None or self.execution_id == execution_id
+
+    def offer(self, item) -> bool:
+        """入队；无损订阅者队列满时阻塞，其余订阅者丢弃最旧的事件"""
+        if self.lossless:
+            self.queue.put(item)
+            return True
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    dropped = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                if isinstance(dropped, _FlushMarker):
+                    dropped.dropped = True
+                    dropped.event.set()
+                else:
+                    self._incr('dropped')
+
+    def put_control(self, item, timeout: float) -> bool:
+        """阻塞入队刷新/注销标记，不挤占已发布的事件"""
+        try:
+            self.queue.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if isinstance(item, _FlushMarker):
+                item.event.set()
+                continue
+            if isinstance(item, _ExecutionEnded):
+                self._end_execution(item.execution_id)
+                continue
+
+            try:
+                self.handler(item)
+                self._incr('delivered')
+            except Exception as e:
+                self._incr('failed')
+                api_logger.error(f"[EventBus:{self.name}] 处理事件失败：{item.execution_id} "
+                                 f"{item.brand}-{item.model}, 错误：{e}")
+
+            lag_ms = (time.time() - item.timestamp) * 1000
+            with self._stats_lock:
+                self.stats['last_lag_ms'] = lag_ms
+                self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], lag_ms)
+
+    def _end_execution(self, execution_id: str):
+        callback = getattr(self.handler, 'on_execution_end', None)
+        if callback is None:
+            return
+        try:
+            callback(execution_id)
+        except Exception as e:
+            api_logger.error(f"[EventBus:{self.name}] 处理执行结束失败：{execution_id}, 错误：{e}")
+
+    def _incr(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queued'] = self.queue.qsize()
+        stats['running'] = self.thread.is_alive()
+        stats['execution_id'] = self.execution_id
+        stats['lossless'] = self.lossless
+        return stats
+
+
+class CellEventBus:
+    """进程内发布/订阅总线"""
+
+    def __init__(self, max_queue_size: int = EVENT_BUS_QUEUE_SIZE):
+        """
+        Args:
+            max_queue_size: 订阅者默认队列容量，满时丢弃最旧事件（无损订阅者阻塞发布端）
+        """
+        self.max_queue_size = max_queue_size
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def subscribe(self, name: str, handler: Callable[[CellCompleted], None],
+                  execution_id: Optional[str] = None, max_queue_size: Optional[int] = None,
+                  lossless: bool = False) -> bool:
+        """
+        注册订阅者
+
+        Args:
+            name: 订阅者名称（唯一）
+            handler: 事件处理函数，在订阅者自己的工作线程中调用；
+                可选实现 on_execution_end(execution_id)，在该执行的全部事件之后调用
+            execution_id: 仅接收该执行的事件；为 None 时接收全部事件
+            max_queue_size: 队列容量，默认使用总线配置
+            lossless: 是否无损；持久化类订阅者应设为 True，队列满时阻塞发布端而不是丢弃
+
+        Returns:
+            是否新注册；同名订阅者已存在时返回 False
+        """
+        with self._lock:
+            if name in self._subscriptions:
+                return False
+            self._subscriptions[name] = _Subscription(
+                name, handler, execution_id, max_queue_size or self.max_queue_size, lossless
+            )
+        api_logger.debug("[EventBus] 注册订阅者：%s", name)
+        return True
+
+    def unsubscribe(self, name: str, timeout: float = 5.0) -> bool:
+        """处理完已入队的事件后注销订阅者"""
+        with self._lock:
+            subscription = self._subscriptions.pop(name, None)
+        if subscription is None:
+            return False
+        deadline = time.monotonic() + timeout
+        subscription.put_control(None, timeout)
+        subscription.thread.join(max(0.0, deadline - time.monotonic()))
+        return True
+
+    def publish(self, event: CellCompleted):
+        """发布事件（仅在无损订阅者队列满时阻塞）"""
+        with self._lock:
+            self._published += 1
+            subscriptions = list(self._subscriptions.values())
+        for subscription in subscriptions:
+            if subscription.accepts(event.execution_id):
+                subscription.offer(event)
+
+    def flush(self, timeout: float = 10.0, execution_id: Optional[str] = None) -> bool:
+        """
+        等待订阅者处理完当前已发布的事件
+
+        Args:
+            timeout: 最长等待时间（秒）
+            execution_id: 只等待接收该执行事件的订阅者（全局订阅者与该执行的订阅者）；
+                为 None 时等待全部订阅者
+
+        Returns:
+            是否在超时前完成且期间没有事件被丢弃
+        """
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions.values() if s.accepts(execution_id)]
+        deadline = time.monotonic() + timeout
+        markers = []
+        for subscription in subscriptions:
+            marker = _FlushMarker()
+            if not subscription.put_control(marker, max(0.0, deadline - time.monotonic())):
+                return False
+            markers.append(marker)
+
+        return all(
+            marker.event.wait(max(0.0, deadline - time.monotonic())) and not marker.dropped
+            for marker in markers
+        )
+
+    def end_execution(self, execution_id: str, timeout: float = 10.0):
+        """
+        通知订阅者执行结束（成功、失败或中止均需调用）
+
+        通知排在该执行已发布的事件之后，订阅者在 on_execution_end 中释放按执行累积的状态。
+        """
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions.values() if s.accepts(execution_id)]
+        for subscription in subscriptions:
+            if not subscription.put_control(_ExecutionEnded(execution_id), timeout):
+                api_logger.warning(f"[EventBus:{subscription.name}] 执行结束通知入队超时：{execution_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取总线与各订阅者的计数器和延迟"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            published = self._published
+        return {
+            'published': published,
+            'subscribers': {subscription.name: subscription.get_stats() for subscription in subscriptions},
+        }
+
+    def subscriber_names(self) -> List[str]:
+        with self._lock:
+            return list(self._subscriptions)
+
+
+_bus: Optional[CellEventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_cell_event_bus() -> CellEventBus:
+    """获取全局单元格事件总线"""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = CellEventBus()
+    return _bus
@@ -0,0 +1,340 @@
+"""
+巡航任务准入控制
+
+定时诊断不再由 APScheduler 线程直接执行完整 NxM 测试，而是先进入准入队列：
+1. 合并：同一 (用户, 品牌) 已在排队时，新触发直接合并，不重复执行
+2. 公平排队：按用户轮转出队，单用户同时运行数受限
+3. 平台并发：同一 AI 平台上同时运行的巡航任务数受限
+4. 全局预算：滑动时间窗口内预计的 LLM 调用总数受限，超出时等待窗口释放
+
+调度侧的错峰（按任务稳定相位 + 随机抖动）见 CruiseController.schedule_diagnostic_task。
+
+配置（环境变量）:
+    CRUISE_MAX_CONCURRENT_RUNS: 同时运行的巡航任务数，默认 2
+    CRUISE_MAX_RUNS_PER_USER: 单用户同时运行的巡航任务数，默认 1
+    CRUISE_PLATFORM_MAX_RUNS: 单平台同时运行的巡航任务数，默认 1
+    CRUISE_LLM_BUDGET: 每个窗口内允许的 LLM 调用数，默认 300
+    CRUISE_BUDGET_WINDOW_SECONDS: 预算窗口长度（秒），默认 3600
+"""
+
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from wechat_backend.logging_config import api_logger
+
+
+CRUISE_MAX_CONCURRENT_RUNS = int(os.getenv('CRUISE_MAX_CONCURRENT_RUNS', '2'))
+CRUISE_MAX_RUNS_PER_USER = int(os.getenv('CRUISE_MAX_RUNS_PER_USER', '1'))
+CRUISE_PLATFORM_MAX_RUNS = int(os.getenv('CRUISE_PLATFORM_MAX_RUNS', '1'))
+CRUISE_LLM_BUDGET = int(os.getenv('CRUISE_LLM_BUDGET', '300'))
+CRUISE_BUDGET_WINDOW_SECONDS = float(os.getenv('CRUISE_BUDGET_WINDOW_SECONDS', '3600'))
+
+# 默认问题数（未指定问题时 cruise_executor 使用 3 个默认问题）
+DEFAULT_QUESTION_COUNT = 3
+
+_PLATFORM_ALIASES = {
+    '豆包': 'doubao',
+    '通义千问': 'qwen',
+    '千问': 'qwen',
+    '智谱ai': 'zhipu',
+    '智谱': 'zhipu',
+    '文心一言': 'wenxin',
+    '文心': 'wenxin',
+    'openai': 'chatgpt',
+}
+
+
+def normalize_platform(model_name: str) -> str:
+    """模型名称 -> 平台标识"""
+    name = (model_name or '').strip().lower()
+    return _PLATFORM_ALIASES.get(name, name)
+
+
+class LLMCallBudget:
+    """滑动窗口 LLM 调用预算"""
+
+    def __init__(self, limit: int, window_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._grants: Deque[Tuple[float, int]] = deque()
+        self._used = 0
+
+    def _expire(self, now: float):
+        while self._grants and self._grants[0][0] <= now - self.window_seconds:
+            _, calls = self._grants.popleft()
+            self._used -= calls
+
+    @property
+    def used(self) -> int:
+        self._expire(self._clock())
+        return self._used
+
+    def try_acquire(self, calls: int) -> float:
+        """
+        尝试预占 calls 次调用
+
+        单次预占超过总预算时，在窗口为空时放行，避免大任务永远饿死。
+
+        Returns:
+            0 表示成功；否则为需要等待的秒数
+        """
+        now = self._clock()
+        self._expire(now)
+        if self._used + calls <= self.limit or not self._grants:
+            self._grants.append((now, calls))
+            self._used += calls
+            return 0.0
+
+        # 计算释放足够额度需要等待的时间
+        freed = 0
+        for granted_at, granted_calls in self._grants:
+            freed += granted_calls
+            if self._used - freed + calls <= self.limit:
+                return max(granted_at + self.window_seconds - now, 0.01)
+        return max(self._grants[-1][0] + self.window_seconds - now, 0.01)
+
+
+@dataclass
+class CruiseRun:
+    """一次待执行的巡航任务"""
+    key: str
+    user_id: str
+    platforms: List[str]
+    estimated_calls: int
+    func: Callable
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class CruiseAdmissionController:
+    """
+    巡航任务准入控制器
+
+    用法：
+        admission = get_cruise_admission()
+        admission.submit('user1:华为', 'user1', ['deepseek', 'qwen'], 6, run_diagnostic_task, args)
+    """
+
+    def __init__(self,
+                 max_concurrent_runs: int = CRUISE_MAX_CONCURRENT_RUNS,
+                 max_runs_per_user: int = CRUISE_MAX_RUNS_PER_USER,
+                 platform_max_runs: int = CRUISE_PLATFORM_MAX_RUNS,
+                 llm_budget: int = CRUISE_LLM_BUDGET,
+                 budget_window_seconds: float = CRUISE_BUDGET_WINDOW_SECONDS):
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_runs_per_user = max_runs_per_user
+        self.platform_max_runs = platform_max_runs
+        self.budget = LLMCallBudget(llm_budget, budget_window_seconds)
+
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[CruiseRun]] = {}
+        self._user_order: Deque[str] = deque()
+        self._queued_keys = set()
+        self._running_keys = set()
+        self._user_running: Dict[str, int] = defaultdict(int)
+        self._platform_running: Dict[str, int] = defaultdict(int)
+        self._running = 0
+        self._stats = {'submitted': 0, 'coalesced': 0, 'started': 0, 'completed': 0, 'failed': 0}
+        self._shutdown = False
+
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent_runs, thread_name_prefix='cruise-run')
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='cruise-admission', daemon=True)
+        self._dispatcher.start()
+
+    # ---------- 提交 ----------
+
+    def submit(self, key: str, user_id: str, platforms: List[str], estimated_calls: int,
+               func: Callable, *args, **kwargs) -> bool:
+        """
+        提交巡航任务
+
+        Args:
+            key: 合并键，同一键在队列中最多保留一个
+            user_id: 用户标识（公平排队单位）
+            platforms: 本次任务涉及的 AI 平台
+            estimated_calls: 预计 LLM 调用数（计入全局预算）
+
+        Returns:
+            bool: True 表示已入队，False 表示与排队中的同键任务合并
+        """
+        with self._cond:
+            self._stats['submitted'] += 1
+            if key in self._queued_keys:
+                self._stats['coalesced'] += 1
+                api_logger.info(f"[CruiseAdmission] 合并重复触发：{key}")
+                return False
+
+            run = CruiseRun(key=key, user_id=user_id,
+                            platforms=sorted({normalize_platform(p) for p in platforms}),
+                            estimated_calls=max(1, estimated_calls),
+                            func=func, args=args, kwargs=kwargs)
+            if user_id not in self._queues:
+                self._queues[user_id] = deque()
+                self._user_order.append(user_id)
+            self._queues[user_id].append(run)
+            self._queued_keys.add(key)
+            self._cond.notify_all()
+            return True
+
+    # ---------- 调度 ----------
+
+    def _platforms_available(self, run: CruiseRun) -> bool:
+        return all(self._platform_running[p] < self.platform_max_runs for p in run.platforms)
+
+    def _next_admissible(self) -> Optional[CruiseRun]:
+        """按用户轮转选出下一个可运行的任务（调用方持有锁）"""
+        for _ in range(len(self._user_order)):
+            user_id = self._user_order[0]
+            self._user_order.rotate(-1)
+            if self._user_running[user_id] >= self.max_runs_per_user:
+                continue
+
+            queue = self._queues[user_id]
+            for index, run in enumerate(queue):
+                # 同键任务正在运行时不并发执行第二个
+                if run.key in self._running_keys or not self._platforms_available(run):
+                    continue
+                del queue[index]
+                if not queue:
+                    del self._queues[user_id]
+                    self._user_order.remove(user_id)
+                return run
+        return None
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._shutdown:
+                run = None
+                if self._running < self.max_concurrent_runs:
+                    run = self._next_admissible()
+                if run is None:
+                    self._cond.wait()
+                    continue
+
+                wait_seconds = self.budget.try_acquire(run.estimated_calls)
+                if wait_seconds > 0:
+                    # 预算不足：放回队首，等待窗口释放
+                    self._requeue_front(run)
+                    api_logger.info(
+                        f"[CruiseAdmission] LLM 调用预算不足（已用 {self.budget.used}/{self.budget.limit}），"
+                        f"{wait_seconds:.0f}s 后重试"
+                    )
+                    self._cond.wait(timeout=wait_seconds)
+                    continue
+
+                self._start(run)
+
+    def _requeue_front(self, run: CruiseRun):
+        if run.user_id not in self._queues:
+            self._queues[run.user_id] = deque()
+            self._user_order.appendleft(run.user_id)
+        self._queues[run.user_id].appendleft(run)
+
+    def _start(self, run: CruiseRun):
+        self._queued_keys.discard(run.key)
+        self._running_keys.add(run.key)
+        self._running += 1
+        self._user_running[run.user_id] += 1
+        for platform in run.platforms:
+            self._platform_running[platform] += 1
+        self._stats['started'] += 1
+
+        api_logger.info(
+            f"[CruiseAdmission] 开始执行 {run.key}，排队 {time.monotonic() - run.submitted_at:.1f}s，"
+            f"预计 {run.estimated_calls} 次调用"
+        )
+        self._pool.submit(self._execute, run)
+
+    def _execute(self, run: CruiseRun):
+        success = False
+        try:
+            run.func(*run.args, **run.kwargs)
+            success = True
+        except Exception as e:
+            api_logger.error(f"[CruiseAdmission] 巡航任务失败：{run.key}, 错误：{e}")
+        finally:
+            with self._cond:
+                self._running_keys.discard(run.key)
+                self._running -= 1
+                self._user_running[run.user_id] -= 1
+                for platform in run.platforms:
+                    self._platform_running[platform] -= 1
+                self._stats['completed' if success else 'failed'] += 1
+                self._cond.notify_all()
+
+    # ---------- 状态 ----------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取准入统计"""
+        with self._cond:
+            return {
+                **self._stats,
+                'queued': sum(len(q) for q in self._queues.values()),
+                'running': self._running,
+                'llm_budget_used': self.budget.used,
+                'llm_budget_limit': self.budget.limit,
+            }
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待队列清空且没有运行中的任务"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queues or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+            return True
+
+    def shutdown(self, wait: bool = True):
+        """停止调度；已开始的任务执行完毕，排队中的任务丢弃"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        self._dispatcher.join(timeout=5)
+        self._pool.shutdown(wait=wait)
+
+
+def estimate_llm_calls(ai_models: List[str], questions: Optional[List[str]]) -> int:
+    """估算一次巡航诊断的 LLM 调用数"""
+    return max(1, len(ai_models or [])) * (len(questions) if questions else DEFAULT_QUESTION_COUNT)
+
+
+def admit_diagnostic_task(user_openid: str, brand_name: str, ai_models: List[str],
+                          questions: List[str] = None):
+    """
+    APScheduler 作业入口：把定时诊断提交到准入队列，立即返回
+
+    同一用户同一品牌在排队中时，新的触发被合并。
+    """
+    from wechat_backend.cruise_executor import run_diagnostic_task
+
+    get_cruise_admission().submit(
+        f"{user_openid}:{brand_name}",
+        user_openid,
+        ai_models or [],
+        estimate_llm_calls(ai_models, questions),
+        run_diagnostic_task,
+        user_openid, brand_name, ai_models, questions or []
+    )
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_cruise_admission() -> CruiseAdmissionController:
+    """获取全局巡航准入控制器"""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = CruiseAdmissionController()
+    return _admission
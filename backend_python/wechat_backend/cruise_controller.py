@@ -1,7 +1,6 @@
 """
 自动化巡航模块 - 处理定时任务与趋势预警
 """
-import json
 import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
@@ -10,11 +9,19 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
 import logging
+import os
+import zlib
 
 from wechat_backend.logging_config import api_logger
 from wechat_backend.database import DB_PATH
-from wechat_backend.security.sql_protection import SafeDatabaseQuery, sql_protector
+from wechat_backend.security.sql_protection import sql_protector
 from wechat_backend.models import get_brand_test_result
+from wechat_backend.repositories.trend_rollup_repository import get_trend_rollup_repository
+
+# 每次触发的随机抖动上限（秒）
+CRUISE_JITTER_SECONDS = int(os.getenv('CRUISE_JITTER_SECONDS', '600'))
+# 错过触发后仍补跑的宽限时间（秒），超过则跳过本次
+CRUISE_MISFIRE_GRACE_SECONDS = int(os.getenv('CRUISE_MISFIRE_GRACE_SECONDS', '3600'))
 
 
 class CruiseController:
@@ -33,13 +40,16 @@ class CruiseController:
             'default': SQLAlchemyJobStore(url=f'sqlite:///{self.db_path}')
         }
         
+        # 作业只负责提交到准入队列（cruise_admission），执行线程无需很多
         executors = {
-            'default': ThreadPoolExecutor(20),
+            'default': ThreadPoolExecutor(4),
         }
         
+        # 停机期间错过的多次触发合并为一次；同一作业不并发
         job_defaults = {
-            'coalesce': False,
-            'max_instances': 3
+            'coalesce': True,
+            'max_instances': 1,
+            'misfire_grace_time': CRUISE_MISFIRE_GRACE_SECONDS
         }
         
         self.scheduler = BackgroundScheduler(
@@ -86,12 +96,19 @@ class CruiseController:
         if not isinstance(interval_hours, int) or interval_hours <= 0:
             raise ValueError("interval_hours must be a positive integer")
         
-        # 从这里调用实际的诊断任务函数
-        from .cruise_executor import run_diagnostic_task
+        # 错峰：按作业稳定相位分散首次触发，并为每次触发叠加随机抖动，
+        # 避免所有品牌在同一时刻（如整点）同时启动
+        interval_seconds = interval_hours * 3600
+        phase_seconds = zlib.crc32(job_id.encode('utf-8')) % interval_seconds
+        
+        # 作业只提交到准入队列，由 cruise_admission 负责公平排队、平台并发和 LLM 调用预算
+        from .cruise_admission import admit_diagnostic_task
         job = self.scheduler.add_job(
-            run_diagnostic_task,
+            admit_diagnostic_task,
             'interval',
             hours=interval_hours,
+            start_date=datetime.now() + timedelta(seconds=phase_seconds),
+            jitter=min(CRUISE_JITTER_SECONDS, interval_seconds // 4),
             id=job_id,
             args=[user_openid, brand_name, ai_models, questions or []],
             replace_existing=True
@@ -181,6 +198,8 @@ class CruiseController:
         """
         将当前测试结果与之前的测试结果进行比较
 
+        只读取品牌趋势汇总表（brand_trend_rollup），不解析测试记录的 JSON 字段。
+
         Args:
             current_record_id: 当前记录ID
             brand_name: 品牌名称
@@ -188,8 +207,10 @@ class CruiseController:
         Returns:
             Dict: 比较结果和预警信息
         """
-        # 从数据库获取当前记录
-        current_record = self._get_test_record_by_id(current_record_id)
+        rollup_repo = get_trend_rollup_repository()
+
+        # 获取当前记录的汇总
+        current_record = rollup_repo.get_by_record_id(current_record_id)
         if not current_record:
             self.logger.error(f"Current record not found: {current_record_id}")
             return {
@@ -201,7 +222,7 @@ class CruiseController:
             }
 
         # 获取该品牌的上一条记录
-        previous_record = self._get_previous_test_record(brand_name, current_record['test_date'])
+        previous_record = rollup_repo.get_previous(brand_name, current_record['test_date'])
         if not previous_record:
             self.logger.info(f"No previous record found for brand: {brand_name}")
             return {
@@ -213,8 +234,8 @@ class CruiseController:
             }
 
         # 提取需要比较的数据
-        current_result = self._extract_comparison_data(current_record)
-        previous_result = self._extract_comparison_data(previous_record)
+        current_result = self._rollup_to_comparison_data(current_record)
+        previous_result = self._rollup_to_comparison_data(previous_record)
 
         # 进行比较
         comparison_result = self.compare_results(current_result, previous_result)
@@ -225,116 +246,21 @@ class CruiseController:
 
         return comparison_result
 
-    def _get_test_record_by_id(self, record_id: int) -> Optional[Dict[str, Any]]:
-        """根据ID获取测试记录"""
-        safe_query = SafeDatabaseQuery(self.db_path)
-
-        rows = safe_query.execute_query('''
-            SELECT id, brand_name, test_date, ai_models_used, questions_used,
-                   overall_score, total_tests, results_summary, detailed_results
-            FROM test_records
-            WHERE id = ?
-        ''', (record_id,))
-
-        if rows:
-            row = rows[0]
-            return {
-                'id': row[0],
-                'brand_name': row[1],
-                'test_date': row[2],
-                'ai_models_used': json.loads(row[3]) if row[3] else [],
-                'questions_used': json.loads(row[4]) if row[4] else [],
-                'overall_score': row[5],
-                'total_tests': row[6],
-                'results_summary': json.loads(row[7]) if row[7] else {},
-                'detailed_results': json.loads(row[8]) if row[8] else []
-            }
-        return None
-
-    def _get_previous_test_record(self, brand_name: str, current_date: str) -> Optional[Dict[str, Any]]:
-        """获取指定品牌在指定日期之前的最新测试记录"""
-        safe_query = SafeDatabaseQuery(self.db_path)
-
-        rows = safe_query.execute_query('''
-            SELECT id, brand_name, test_date, ai_models_used, questions_used,
-                   overall_score, total_tests, results_summary, detailed_results
-            FROM test_records
-            WHERE brand_name = ? AND test_date < ?
-            ORDER BY test_date DESC
-            LIMIT 1
-        ''', (brand_name, current_date))
+    def _rollup_to_comparison_data(self, rollup: Dict[str, Any]) -> Dict[str, Any]:
+        """将趋势汇总转换为 compare_results 使用的数据结构"""
+        brand_detail = {}
+        if rollup.get('avg_sentiment') is not None:
+            brand_detail['sentiment_score'] = rollup['avg_sentiment']
+        if rollup.get('rank') is not None:
+            brand_detail['rank'] = rollup['rank']
 
-        if rows:
-            row = rows[0]
-            return {
-                'id': row[0],
-                'brand_name': row[1],
-                'test_date': row[2],
-                'ai_models_used': json.loads(row[3]) if row[3] else [],
-                'questions_used': json.loads(row[4]) if row[4] else [],
-                'overall_score': row[5],
-                'total_tests': row[6],
-                'results_summary': json.loads(row[7]) if row[7] else {},
-                'detailed_results': json.loads(row[8]) if row[8] else []
-            }
-        return None
-
-    def _extract_comparison_data(self, record: Dict[str, Any]) -> Dict[str, Any]:
-        """从测试记录中提取用于比较的数据"""
-        # 尝试从results_summary或detailed_results中提取相关信息
-        results_summary = record.get('results_summary', {})
-        detailed_results = record.get('detailed_results', [])
-
-        # 构建比较数据结构
-        comparison_data = {
+        return {
             'exposure_analysis': {
-                'brand_details': {}
+                'brand_details': {rollup['brand_name']: brand_detail}
             },
-            'evidence_chain': []  # 从detailed_results中提取负面信息
+            'evidence_chain': rollup.get('negative_evidence') or [],
+            'negative_count': rollup.get('negative_count') or 0
         }
-
-        # 从detailed_results中提取品牌详情
-        brand_stats = {}
-        negative_evidence = []
-
-        for detail in detailed_results:
-            brand = detail.get('brand', 'unknown')
-            if brand not in brand_stats:
-                brand_stats[brand] = {
-                    'sentiment_score': 0,
-                    'count': 0
-                }
-
-            # 累积情感分数
-            sentiment = detail.get('sentiment_score', 0)
-            if sentiment:
-                brand_stats[brand]['sentiment_score'] += sentiment
-                brand_stats[brand]['count'] += 1
-
-                # 检查是否为负面内容（可以根据实际业务逻辑调整）
-                response = detail.get('response', '').lower()
-                if any(keyword in response for keyword in ['不好', '差', '问题', '缺点', '负面', '糟糕', '失望']):
-                    negative_evidence.append({
-                        'negative_fragment': response[:100],
-                        'associated_url': 'unknown',
-                        'source_name': detail.get('aiModel', 'unknown'),
-                        'risk_level': 'Medium'
-                    })
-
-        # 计算平均情感分数
-        for brand, stats in brand_stats.items():
-            if stats['count'] > 0:
-                avg_sentiment = stats['sentiment_score'] / stats['count']
-                brand_stats[brand]['sentiment_score'] = avg_sentiment
-
-        comparison_data['exposure_analysis']['brand_details'] = brand_stats
-        comparison_data['evidence_chain'] = negative_evidence
-
-        # 也尝试从results_summary中获取排名信息
-        if 'ranking_list' in results_summary:
-            comparison_data['exposure_analysis']['ranking_list'] = results_summary['ranking_list']
-
-        return comparison_data
     
     def _extract_rank(self, result: Dict[str, Any]) -> Optional[int]:
         """从结果中提取排名"""
@@ -368,6 +294,8 @@ class CruiseController:
     def _count_negative_evidence(self, result: Dict[str, Any]) -> Optional[int]:
         """统计负面证据数量"""
         try:
+            if 'negative_count' in result:
+                return result['negative_count']
             evidence_chain = result.get('evidence_chain', [])
             return len(evidence_chain)  # 简单计数所有证据项
         except Exception as e:
@@ -408,76 +336,21 @@ class CruiseController:
         
         start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
         
-        # 使用安全查询获取历史测试记录
-        safe_query = SafeDatabaseQuery(self.db_path)
+        # 读取每次执行写入的趋势汇总（按 brand_name, test_date 索引）
+        rollups = get_trend_rollup_repository().get_trend(brand_name, start_date)
         
-        # 获取指定品牌的历史记录
-        records_data = safe_query.execute_query('''
-            SELECT id, test_date, overall_score, detailed_results, results_summary
-            FROM test_records
-            WHERE brand_name = ? AND test_date >= ?
-            ORDER BY test_date ASC
-        ''', (brand_name, start_date))
-        
-        trend_data = []
-        for row in records_data:
-            record_id, test_date, overall_score, detailed_results_str, results_summary_str = row
-            
-            # 解析JSON数据
-            detailed_results = json.loads(detailed_results_str) if detailed_results_str else []
-            results_summary = json.loads(results_summary_str) if results_summary_str else {}
-            
-            # 尝试从detailed_results中提取更多信息
-            avg_sentiment = self._calculate_avg_sentiment(detailed_results)
-            rank = self._extract_rank_from_detailed(detailed_results, brand_name)
-            
-            trend_point = {
-                'timestamp': test_date,
-                'overall_score': overall_score,
-                'sentiment_score': avg_sentiment,
-                'rank': rank,
-                'record_id': record_id
+        return [
+            {
+                'timestamp': rollup['test_date'],
+                'overall_score': rollup['overall_score'],
+                'sentiment_score': rollup['avg_sentiment'],
+                'rank': rollup['rank'],
+                'model_ranks': rollup['model_ranks'],
+                'sov': rollup['sov'],
+                'record_id': rollup['record_id']
             }
-            
-            trend_data.append(trend_point)
-        
-        return trend_data
-    
-    def _calculate_avg_sentiment(self, detailed_results: List[Dict[str, Any]]) -> Optional[float]:
-        """从详细结果中计算平均情感分数"""
-        if not detailed_results:
-            return None
-        
-        sentiment_scores = []
-        for result in detailed_results:
-            sentiment = result.get('sentiment_score')
-            if sentiment is not None:
-                sentiment_scores.append(sentiment)
-        
-        if sentiment_scores:
-            return sum(sentiment_scores) / len(sentiment_scores)
-        return None
-    
-    def _extract_rank_from_detailed(self, detailed_results: List[Dict[str, Any]], brand_name: str) -> Optional[int]:
-        """从详细结果中提取特定品牌的排名"""
-        # 这是一个简化版本，实际实现可能需要更复杂的逻辑
-        # 根据品牌在结果中的出现频率或重要性来估算排名
-        if not detailed_results:
-            return None
-        
-        # 统计特定品牌的出现次数
-        brand_count = 0
-        for result in detailed_results:
-            if result.get('brand', '').lower() == brand_name.lower():
-                brand_count += 1
-        
-        # 这里只是一个示例逻辑，实际排名可能需要更复杂的算法
-        if brand_count > 0:
-            # 假设出现次数越多排名越高（数字越小）
-            # 这只是示例，实际应根据具体业务逻辑调整
-            return max(1, 11 - min(brand_count, 10))  # 返回1-10之间的排名
-        
-        return None
+            for rollup in rollups
+        ]
     
     def shutdown(self):
         """关闭调度器"""
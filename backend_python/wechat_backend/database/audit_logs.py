@@ -16,29 +16,29 @@ from typing import Dict, Optional, List
 import json
 import logging
 
-logger = logging.getLogger(__name__
+logger = logging.getLogger(__name__)
 
 try:
     from wechat_backend.database import db
     from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, BigInteger
     from sqlalchemy.ext.declarative import declarative_base
     
-    Base = declarative_base(
+    Base = declarative_base()
     
     class AuditLog(Base):
         """审计日志模型"""
         __tablename__ = 'audit_logs'
         
-        id = Column(Integer, primary_key=True, autoincrement=True
-        user_id = Column(String(255), nullable=False, index=True
-        action = Column(String(100), nullable=False, index=True
-        resource = Column(String(255), index=True
+        id = Column(Integer, primary_key=True, autoincrement=True)
+        user_id = Column(String(255), nullable=False, index=True)
+        action = Column(String(100), nullable=False, index=True)
+        resource = Column(String(255), index=True)
         ip_address = Column(String(45))  # IPv6 max length
-        user_agent = Column(String(512)
-        request_method = Column(String(10)
-        response_status = Column(Integer
-        details = Column(JSON, nullable=True
-        created_at = Column(DateTime, default=datetime.utcnow, index=True
+        user_agent = Column(String(512))
+        request_method = Column(String(10))
+        response_status = Column(Integer)
+        details = Column(JSON, nullable=True)
+        created_at = Column(DateTime, default=datetime.utcnow, index=True)
         
         def to_dict(self) -> Dict:
             """转换为字典"""
@@ -59,10 +59,10 @@ try:
     def init_audit_logs_db():
         """初始化审计日志数据库表"""
         try:
-            Base.metadata.create_all(db.engine
-            logger.info("审计日志数据库表初始化成功"
+            Base.metadata.create_all(db.engine)
+            logger.info("审计日志数据库表初始化成功")
         except Exception as e:
-            logger.error(f"审计日志数据库表初始化失败：{e}"
+            logger.error(f"审计日志数据库表初始化失败：{e}")
     
     # 数据库会话管理
     def get_db_session():
@@ -71,7 +71,7 @@ try:
         return db.session
     
 except ImportError as e:
-    logger.warning(f"数据库模块导入失败，审计日志将使用内存存储：{e}"
+    logger.warning(f"数据库模块导入失败，审计日志将使用内存存储：{e}")
     AuditLog = None
     
     # 内存存储作为后备方案
@@ -79,7 +79,7 @@ except ImportError as e:
     
     def init_audit_logs_db():
         """初始化审计日志（内存版本）"""
-        logger.info("审计日志系统已初始化（内存模式）"
+        logger.info("审计日志系统已初始化（内存模式）")
     
     def get_db_session():
         """获取会话（内存版本）"""
@@ -90,7 +90,7 @@ except ImportError as e:
                 pass
             def rollback(self):
                 pass
-        return MemorySession(
+        return MemorySession()
 
 
 def create_audit_log(
@@ -108,13 +108,13 @@ def create_audit_log(
     
     Args:
         user_id: 用户 ID
-        action: 操作类型 (api_access, security_event, data_access, etc.
-        resource: 资源名称 (API 端点，数据表等
+        action: 操作类型 (api_access, security_event, data_access, etc.)
+        resource: 资源名称 (API 端点，数据表等)
         ip_address: IP 地址
         user_agent: 用户代理
         request_method: 请求方法
         response_status: 响应状态码
-        details: 详细信息 (JSON
+        details: 详细信息 (JSON)
     
     Returns:
         日志记录 ID，如果失败返回 None
@@ -131,11 +131,11 @@ def create_audit_log(
                 'request_method': request_method,
                 'response_status': response_status,
                 'details': details,
-                'created_at': datetime.utcnow().isoformat(
+                'created_at': datetime.utcnow().isoformat()
             }
-            _memory_audit_logs.append(log_entry
-            logger.info(f"[Audit] {action}: {resource} by {user_id}"
-            return len(_memory_audit_logs
+            _memory_audit_logs.append(log_entry)
+            logger.info(f"[Audit] {action}: {resource} by {user_id}")
+            return len(_memory_audit_logs)
         
         # 数据库模式
         audit_log = AuditLog(
@@ -147,19 +147,19 @@ def create_audit_log(
             request_method=request_method,
             response_status=response_status,
             details=details
+        )
         
+        session = get_db_session()
+        session.add(audit_log)
+        session.commit()
         
-        session = get_db_session(
-        session.add(audit_log
-        session.commit(
-        
-        logger.info(f"[Audit] {action}: {resource} by {user_id} from {ip_address}"
+        logger.info(f"[Audit] {action}: {resource} by {user_id} from {ip_address}")
         return audit_log.id
         
     except Exception as e:
-        logger.error(f"[Audit] 创建审计日志失败：{e}"
+        logger.error(f"[Audit] 创建审计日志失败：{e}")
         try:
-            session.rollback(
+            session.rollback()
         except Exception as e:
 
             pass  # TODO: 添加适当的错误处理
@@ -205,35 +205,35 @@ def get_audit_logs(
                 logs = [l for l in logs if l['resource'] == resource]
             
             # 按时间排序
-            logs = sorted(logs, key=lambda x: x['created_at'], reverse=True
+            logs = sorted(logs, key=lambda x: x['created_at'], reverse=True)
             
             return logs[offset:offset+limit]
         
         # 数据库模式
-        session = get_db_session(
-        query = session.query(AuditLog
+        session = get_db_session()
+        query = session.query(AuditLog)
         
         if user_id:
-            query = query.filter(AuditLog.user_id == user_id
+            query = query.filter(AuditLog.user_id == user_id)
         if action:
-            query = query.filter(AuditLog.action == action
+            query = query.filter(AuditLog.action == action)
         if resource:
-            query = query.filter(AuditLog.resource == resource
+            query = query.filter(AuditLog.resource == resource)
         if start_date:
-            query = query.filter(AuditLog.created_at >= start_date
+            query = query.filter(AuditLog.created_at >= start_date)
         if end_date:
-            query = query.filter(AuditLog.created_at <= end_date
+            query = query.filter(AuditLog.created_at <= end_date)
         
         # 按时间倒序排序
-        query = query.order_by(AuditLog.created_at.desc()
+        query = query.order_by(AuditLog.created_at.desc())
         
         # 分页
-        logs = query.offset(offset).limit(limit).all(
+        logs = query.offset(offset).limit(limit).all()
         
         return [log.to_dict() for log in logs]
         
     except Exception as e:
-        logger.error(f"[Audit] 查询审计日志失败：{e}"
+        logger.error(f"[Audit] 查询审计日志失败：{e}")
         return []
 
 
@@ -255,13 +255,13 @@ def get_audit_log_by_id(log_id: int) -> Optional[Dict]:
             return None
         
         # 数据库模式
-        session = get_db_session(
-        log = session.query(AuditLog).filter(AuditLog.id == log_id).first(
+        session = get_db_session()
+        log = session.query(AuditLog).filter(AuditLog.id == log_id).first()
         
         return log.to_dict() if log else None
         
     except Exception as e:
-        logger.error(f"[Audit] 获取审计日志失败：{e}"
+        logger.error(f"[Audit] 获取审计日志失败：{e}")
         return None
 
 
@@ -278,34 +278,34 @@ def clear_old_audit_logs(days: int = 90) -> int:
     try:
         if AuditLog is None:
             # 内存模式
-            cutoff_date = datetime.utcnow() - timedelta(days=days
-            original_count = len(_memory_audit_logs
+            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            original_count = len(_memory_audit_logs)
             
             _memory_audit_logs[:] = [
                 log for log in _memory_audit_logs
                 if datetime.fromisoformat(log['created_at']) > cutoff_date
             ]
             
-            cleared = original_count - len(_memory_audit_logs
-            logger.info(f"[Audit] 清理了 {cleared} 条旧审计日志"
+            cleared = original_count - len(_memory_audit_logs)
+            logger.info(f"[Audit] 清理了 {cleared} 条旧审计日志")
             return cleared
         
         # 数据库模式
         from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        session = get_db_session(
-        count = session.query(AuditLog).filter(AuditLog.created_at < cutoff_date).count(
-        session.query(AuditLog).filter(AuditLog.created_at < cutoff_date).delete(
-        session.commit(
+        session = get_db_session()
+        count = session.query(AuditLog).filter(AuditLog.created_at < cutoff_date).count()
+        session.query(AuditLog).filter(AuditLog.created_at < cutoff_date).delete()
+        session.commit()
         
-        logger.info(f"[Audit] 清理了 {count} 条旧审计日志"
+        logger.info(f"[Audit] 清理了 {count} 条旧审计日志")
         return count
         
     except Exception as e:
-        logger.error(f"[Audit] 清理审计日志失败：{e}"
+        logger.error(f"[Audit] 清理审计日志失败：{e}")
         try:
-            session.rollback(
+            session.rollback()
         except Exception as e:
 
             pass  # TODO: 添加适当的错误处理
@@ -323,7 +323,7 @@ def log_api_access(user_id: str, endpoint: str, method: str, status: int, ip: st
         request_method=method,
         response_status=status,
         ip_address=ip
-    
+    )
 
 
 def log_security_event(user_id: str, event_type: str, description: str, ip: str = None):
@@ -334,7 +334,7 @@ def log_security_event(user_id: str, event_type: str, description: str, ip: str
         resource=event_type,
         details={'description': description},
         ip_address=ip
-    
+    )
 
 
 def log_data_access(user_id: str, data_type: str, data_id: str, operation: str):
@@ -344,17 +344,17 @@ def log_data_access(user_id: str, data_type: str, data_id: str, operation: str):
         action='data_access',
         resource=f"{data_type}:{data_id}",
         details={'operation': operation}
-    
+    )
 
 
 # 初始化
 if __name__ == '__main__':
-    print("="*60
-    print("审计日志模块测试"
-    print("="*60
+    print("="*60)
+    print("审计日志模块测试")
+    print("="*60)
     
     # 初始化数据库
-    init_audit_logs_db(
+    init_audit_logs_db()
     
     # 测试创建日志
     log_id = create_audit_log(
@@ -364,11 +364,11 @@ if __name__ == '__main__':
         ip_address='127.0.0.1',
         request_method='GET',
         response_status=200
-    
+    )
     f"✅ 创建审计日志成功，ID: {log_id}"
     
     # 测试查询日志
-    logs = get_audit_logs(user_id='test_user', limit=10
+    logs = get_audit_logs(user_id='test_user', limit=10)
     f"✅ 查询到 {len(logs)} 条审计日志"
     
-    print("="*60
+    print("="*60)
@@ -7,6 +7,7 @@ DS-P1-1 修复：数据清理和归档机制
 2. 软删除标记数据处理
 3. 数据归档到历史表
 4. 自动调度执行
+5. 回收无引用的 AI 回答内容（response_blob_repository）
 
 配置：
 - DATA_RETENTION_DAYS: 数据保留天数（默认 90 天）
@@ -20,6 +21,7 @@ from typing import Tuple
 
 from wechat_backend.logging_config import api_logger
 from wechat_backend.database.transaction import database_transaction
+from wechat_backend.repositories.response_blob_repository import get_response_blob_store
 
 # 数据保留策略配置
 DATA_RETENTION_DAYS = 90  # 保留 90 天数据
@@ -162,6 +164,18 @@ def cleanup_expired_data(dry_run: bool = False) -> dict:
         api_logger.error(error_msg)
         stats['errors'].append(error_msg)
     
+    # 6. 回收引用计数归零的 AI 回答内容（独立存储文件，不在上面的事务内）
+    try:
+        blob_stats = get_response_blob_store().gc(dry_run=dry_run)
+        stats['blob_deleted_count'] = blob_stats['deleted_count']
+        stats['blob_freed_mb'] = round(blob_stats['freed_bytes'] / 1024 / 1024, 2)
+        prefix = '[DRY RUN] 将' if dry_run else '已'
+        api_logger.info(f"[DataCleanup] {prefix}回收 {blob_stats['deleted_count']} 条无引用回答内容")
+    except Exception as e:
+        error_msg = f"[DataCleanup] 回答内容回收失败：{e}"
+        api_logger.error(error_msg)
+        stats['errors'].append(error_msg)
+    
     # 计算执行时间
     stats['end_time'] = datetime.now()
     stats['duration_seconds'] = (stats['end_time'] - stats['start_time']).total_seconds()
@@ -292,6 +306,9 @@ def get_storage_stats() -> dict:
                 WHERE is_completed = 1 AND updated_at < ?
             """, (cutoff_date,))
             stats['expired_task_count'] = cursor.fetchone()[0]
+        
+        # AI 回答内容存储
+        stats['response_blobs'] = get_response_blob_store().get_stats()
     
     except Exception as e:
         stats['error'] = str(e)
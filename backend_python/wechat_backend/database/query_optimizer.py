@@ -486,9 +486,9 @@ def init_recommended_indexes():
         {'table': 'brand_test_results', 'columns': ['task_id', 'brand_name']},
 
         # 审计日志相关
-        {'table': 'audit_logs', 'columns': ['user_id']},
+        {'table': 'audit_logs', 'columns': ['admin_id']},
         {'table': 'audit_logs', 'columns': ['action']},
-        {'table': 'audit_logs', 'columns': ['timestamp']},
+        {'table': 'audit_logs', 'columns': ['created_at']},
 
         # 同步数据相关
         {'table': 'sync_results', 'columns': ['user_id']},
@@ -40,8 +40,14 @@ class DatabaseConnectionPool:
     4. 监控指标采集
     """
 
-    def __init__(self, max_connections: int = 10):
+    def __init__(self, max_connections: int = 10, db_path: Optional[str] = None):
+        """
+        Args:
+            max_connections: 最大连接数
+            db_path: 数据库路径，默认主库 DB_PATH；独立数据库的连接池不计入主库监控指标
+        """
         self.max_connections = max_connections
+        self.db_path = db_path
         self._pool: list = []
         self._in_use: set = set()
         self._lock = threading.Lock()
@@ -73,7 +79,7 @@ class DatabaseConnectionPool:
                 # 如果未达到上限，创建新连接
                 if self._created_count < self.max_connections:
                     self._created_count += 1
-                    conn = sqlite3.connect(DB_PATH, timeout=30.0, check_same_thread=False)
+                    conn = sqlite3.connect(self.db_path or DB_PATH, timeout=30.0, check_same_thread=False)
                     conn.execute('PRAGMA journal_mode=WAL')
                     conn.execute('PRAGMA synchronous=NORMAL')
                     self._in_use.add(id(conn))
@@ -117,6 +123,8 @@ class DatabaseConnectionPool:
     def _update_metrics(self):
         """更新监控指标"""
         global _db_pool_metrics
+        if self.db_path is not None:
+            return
         _db_pool_metrics.update({
             'active_connections': len(self._in_use),
             'available_connections': len(self._pool),
@@ -13,7 +13,7 @@
 
 import sqlite3
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from wechat_backend.logging_config import db_logger
 from wechat_backend.database_connection_pool import (
     get_db_pool,
@@ -115,16 +115,23 @@ def init_db():
             )
         ''')
         
-        # 同步结果表
+        # 同步结果表（与 sync.sync_storage 的表结构一致，增量同步列由 SyncStorageManager 初始化时补齐）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sync_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                result_id TEXT UNIQUE,
-                data_type TEXT,
-                data TEXT,
-                sync_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                result_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                brand_name TEXT,
+                ai_models_used TEXT,
+                questions_used TEXT,
+                overall_score REAL,
+                total_tests INTEGER,
+                results_summary TEXT,
+                detailed_results TEXT,
+                test_date TEXT,
+                sync_timestamp TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                is_deleted INTEGER DEFAULT 0
             )
         ''')
         
@@ -142,17 +149,21 @@ def init_db():
             )
         ''')
         
-        # 审计日志表
+        # 审计日志表（与 audit_logs.init_audit_logs_table 的表结构一致，管理员审计日志是唯一读写方）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS audit_logs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                action TEXT,
+                admin_id TEXT NOT NULL,
+                action TEXT NOT NULL,
                 resource TEXT,
-                details TEXT,
+                resource_id TEXT,
                 ip_address TEXT,
                 user_agent TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                request_method TEXT,
+                request_data TEXT,
+                response_status INTEGER,
+                error_message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
 
@@ -13,8 +13,10 @@ import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 from contextlib import contextmanager
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import db_logger
 from wechat_backend.database_connection_pool import get_db_pool
+from wechat_backend.repositories.trend_rollup_repository import write_trend_rollup
 
 
 @contextmanager
@@ -34,6 +36,7 @@ def get_db_connection():
 
 # ==================== 测试记录仓库 ====================
 
+@traced('repo.save_test_record', execution_id_arg='execution_id')
 def save_test_record(
     user_openid: str,
     brand_name: str,
@@ -42,9 +45,21 @@ def save_test_record(
     overall_score: float,
     total_tests: int,
     results_summary: str,
-    detailed_results: str
+    detailed_results: str,
+    execution_id: Optional[str] = None
 ) -> int:
-    """保存测试记录"""
+    """
+    保存测试记录
+
+    同一事务内写入品牌趋势汇总（brand_trend_rollup），趋势与对比查询只读汇总表。
+    列表/字典参数会序列化为 JSON。
+    """
+    ai_models_used, questions_used, results_summary, detailed_results = (
+        value if isinstance(value, str) or value is None else json.dumps(value, ensure_ascii=False, default=str)
+        for value in (ai_models_used, questions_used, results_summary, detailed_results)
+    )
+    test_date = datetime.now().isoformat()
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
@@ -56,9 +71,17 @@ def save_test_record(
         ''', (
             user_openid, brand_name, ai_models_used, questions_used,
             overall_score, total_tests, results_summary, detailed_results,
-            datetime.now().isoformat()
+            test_date
         ))
-        return cursor.lastrowid
+        record_id = cursor.lastrowid
+
+        try:
+            write_trend_rollup(cursor, record_id, brand_name, test_date, overall_score,
+                               detailed_results, execution_id=execution_id)
+        except Exception as e:
+            db_logger.warning(f"趋势汇总写入失败：record_id={record_id}, 错误：{e}")
+
+        return record_id
 
 
 def get_user_test_history(
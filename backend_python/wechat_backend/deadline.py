@@ -0,0 +1,123 @@
+"""
+截止时间（Deadline）传递
+
+替代 signal.SIGALRM 的线程安全超时方案：SIGALRM 只能在主线程生效，
+在 NxM 工作线程或 gunicorn 线程 worker 中会静默失效。
+
+核心思路：
+1. Deadline 记录绝对截止时间（monotonic），不随调用层级累加误差
+2. 通过 contextvars 在调用链中隐式传递，AIJudgeClient、FaultTolerantExecutor
+   和各 AI 适配器读取剩余时间作为 HTTP 超时，到期后不再发起新调用
+3. contextvars 不会自动传入线程池，跨线程时用 deadline_scope 或 bind_context 显式携带
+
+使用方式:
+    with deadline_scope(Deadline.after(120)):
+        ...
+        timeout = remaining_timeout(30)   # min(30, 剩余时间)
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+# 剩余时间低于该值（秒）时不再发起外部调用，避免注定超时的请求
+MIN_CALL_TIMEOUT = 0.1
+
+
+class DeadlineExceeded(Exception):
+    """
+    截止时间已到
+
+    有意不继承 TimeoutError：这是调用方预算耗尽，不是平台超时，
+    不应被熔断器计为平台故障。
+    """
+
+
+class Deadline:
+    """绝对截止时间"""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> 'Deadline':
+        """从现在起 seconds 秒后到期"""
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """剩余秒数（已到期为 0）"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = 'operation', min_remaining: float = 0.0):
+        """剩余时间不足 min_remaining 时抛出 DeadlineExceeded"""
+        if self.expired() or self.remaining() < min_remaining:
+            raise DeadlineExceeded(f'{what} 超过截止时间')
+
+    def child(self, seconds: Optional[float]) -> 'Deadline':
+        """不晚于当前截止时间的子截止时间（单次调用预算）"""
+        if seconds is None:
+            return self
+        return Deadline(min(self.expires_at, time.monotonic() + seconds))
+
+    def __repr__(self) -> str:
+        return f'Deadline(remaining={self.remaining():.2f}s)'
+
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar('deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """当前上下文的截止时间，未设置时为 None"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """
+    在上下文中设置截止时间
+
+    嵌套时取更早的一个，内层不能延长外层的预算；deadline 为 None 时保持不变。
+    """
+    outer = _current_deadline.get()
+    if deadline is None:
+        effective = outer
+    elif outer is None or deadline.expires_at < outer.expires_at:
+        effective = deadline
+    else:
+        effective = outer
+    token = _current_deadline.set(effective)
+    try:
+        yield effective
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_timeout(default: Optional[float]) -> Optional[float]:
+    """
+    单次调用可用的超时：min(default, 剩余时间)
+
+    无截止时间时返回 default；已到期时抛出 DeadlineExceeded，调用方不应再发起请求。
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    deadline.check('外部调用', min_remaining=MIN_CALL_TIMEOUT)
+    remaining = deadline.remaining()
+    return remaining if default is None else min(default, remaining)
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    把当前上下文（含截止时间）绑定到函数，供提交到线程池时使用
+
+    同一 Context 不能被多个线程同时进入，因此每次调用使用一份副本。
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
@@ -23,6 +23,12 @@ from typing import Dict, Any, List, Optional, Tuple
 from contextlib import contextmanager
 from wechat_backend.logging_config import db_logger, api_logger
 from wechat_backend.database_connection_pool import get_db_pool
+from wechat_backend.repositories.diagnosis_geo_repository import (
+    ensure_geo_columns, split_geo_data, insert_cited_sources, attach_cited_sources
+)
+from wechat_backend.repositories.response_blob_repository import (
+    ensure_response_blob_column, externalize_response, attach_response_content, get_response_blob_store
+)
 
 
 # ==================== 配置 ====================
@@ -342,34 +348,55 @@ class DiagnosisResultRepository:
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO diagnosis_results (
-                    report_id, execution_id,
-                    brand, question, model,
-                    response_content, response_latency,
-                    geo_data,
-                    quality_score, quality_level, quality_details,
-                    status, error_message,
-                    created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                report_id,
-                execution_id,
-                result.get('brand', ''),
-                result.get('question', ''),
-                result.get('model', ''),
-                result.get('response', {}).get('content', '') if isinstance(result.get('response'), dict) else '',
-                result.get('response', {}).get('latency') if isinstance(result.get('response'), dict) else None,
-                json.dumps(result.get('geo_data', {}), ensure_ascii=False),
-                result.get('quality_score', 0),
-                result.get('quality_level', 'unknown'),
-                json.dumps(result.get('quality_details', {}), ensure_ascii=False),
-                result.get('status', 'success'),
-                result.get('error'),
-                now
-            ))
-            
-            result_id = cursor.lastrowid
+            ensure_geo_columns(cursor)
+            ensure_response_blob_column(cursor)
+            # 高频 GEO 字段写入类型化列，cited_sources 写入子表
+            geo_data, cited_sources, geo_fields = split_geo_data(result.get('geo_data', {}))
+            # 长回答写入内容存储，主库只保存哈希
+            response = result.get('response') if isinstance(result.get('response'), dict) else {}
+            response_content, response_blob = externalize_response(response.get('content', ''))
+            try:
+                cursor.execute('''
+                    INSERT INTO diagnosis_results (
+                        report_id, execution_id,
+                        brand, question, model,
+                        response_content, response_latency,
+                        geo_data,
+                        quality_score, quality_level, quality_details,
+                        status, error_message,
+                        created_at,
+                        geo_rank, geo_sentiment, geo_brand_mentioned, geo_interception, geo_source_count,
+                        geo_backfilled, response_blob
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                ''', (
+                    report_id,
+                    execution_id,
+                    result.get('brand', ''),
+                    result.get('question', ''),
+                    result.get('model', ''),
+                    response_content,
+                    response.get('latency'),
+                    json.dumps(geo_data, ensure_ascii=False),
+                    result.get('quality_score', 0),
+                    result.get('quality_level', 'unknown'),
+                    json.dumps(result.get('quality_details', {}), ensure_ascii=False),
+                    result.get('status', 'success'),
+                    result.get('error'),
+                    now,
+                    geo_fields['geo_rank'],
+                    geo_fields['geo_sentiment'],
+                    geo_fields['geo_brand_mentioned'],
+                    geo_fields['geo_interception'],
+                    geo_fields['geo_source_count'],
+                    response_blob
+                ))
+                result_id = cursor.lastrowid
+                insert_cited_sources(cursor, result_id, execution_id, cited_sources)
+            except Exception:
+                # 主库写入失败时撤回本次引用
+                if response_blob:
+                    get_response_blob_store().release([response_blob])
+                raise
             return result_id
     
     def add_batch(self, report_id: int, execution_id: str, 
@@ -405,6 +432,9 @@ class DiagnosisResultRepository:
                 }
                 results.append(item)
             
+            # cited_sources 存放在子表中，长回答存放在内容存储中，按批回填
+            attach_cited_sources(conn, results)
+            attach_response_content(results)
             return results
     
     def get_by_report_id(self, report_id: int) -> List[Dict[str, Any]]:
@@ -429,6 +459,9 @@ class DiagnosisResultRepository:
                 }
                 results.append(item)
             
+            # cited_sources 存放在子表中，长回答存放在内容存储中，按批回填
+            attach_cited_sources(conn, results)
+            attach_response_content(results)
             return results
 
 
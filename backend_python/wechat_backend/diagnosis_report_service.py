@@ -15,6 +15,7 @@
 import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import db_logger, api_logger
 from wechat_backend.diagnosis_report_repository import (
     DiagnosisReportRepository,
@@ -177,6 +178,7 @@ class DiagnosisReportService:
             db_logger.error(f"❌ 完成报告失败：{execution_id}, 错误：{e}")
             return False
     
+    @traced('report.get_full_report', execution_id_arg='execution_id')
     def get_full_report(self, execution_id: str) -> Optional[Dict[str, Any]]:
         """
         获取完整报告
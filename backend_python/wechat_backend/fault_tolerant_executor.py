@@ -21,6 +21,7 @@ from datetime import datetime
 from enum import Enum
 
 from wechat_backend.logging_config import api_logger
+from wechat_backend.deadline import DeadlineExceeded, bind_context, remaining_timeout
 
 
 class ErrorType(Enum):
@@ -157,21 +158,25 @@ class FaultTolerantExecutor:
             FaultTolerantResult: 执行结果（永远不抛出异常）
         """
         start_time = datetime.now()
+        timeout_seconds = self.timeout_seconds
         
         try:
+            # 超时不超过当前截止时间的剩余预算
+            timeout_seconds = remaining_timeout(self.timeout_seconds)
+
             # 判断是同步函数还是异步函数
             if asyncio.iscoroutinefunction(task_func):
                 # 异步函数
                 data = await asyncio.wait_for(
                     task_func(*args, **kwargs),
-                    timeout=self.timeout_seconds
+                    timeout=timeout_seconds
                 )
             else:
-                # 同步函数，在线程池中执行
+                # 同步函数，在线程池中执行（run_in_executor 不传递 contextvars，需显式绑定截止时间）
                 loop = asyncio.get_event_loop()
                 data = await asyncio.wait_for(
-                    loop.run_in_executor(None, lambda: task_func(*args, **kwargs)),
-                    timeout=self.timeout_seconds
+                    loop.run_in_executor(None, bind_context(lambda: task_func(*args, **kwargs))),
+                    timeout=timeout_seconds
                 )
             
             execution_time = (datetime.now() - start_time).total_seconds()
@@ -184,16 +189,16 @@ class FaultTolerantExecutor:
                 execution_time=execution_time
             )
             
-        except asyncio.TimeoutError:
+        except (asyncio.TimeoutError, DeadlineExceeded):
             execution_time = (datetime.now() - start_time).total_seconds()
-            error_msg = f"【{task_name}】数据源响应超时（{self.timeout_seconds}秒），请稍后重试"
+            error_msg = f"【{task_name}】数据源响应超时（{timeout_seconds:.0f}秒），请稍后重试"
             
             api_logger.warning(f"[FaultTolerant] ⚠️ {task_name} 执行超时，耗时：{execution_time:.2f}s")
             
             return FaultTolerantResult.failed(
                 error_message=error_msg,
                 error_type=ErrorType.TIMEOUT,
-                error_details=f"Task '{task_name}' timed out after {self.timeout_seconds}s",
+                error_details=f"Task '{task_name}' timed out after {timeout_seconds:.2f}s",
                 source=source
             )
             
@@ -0,0 +1,130 @@
+"""
+重量级子系统延迟加载
+
+分析（sklearn/numpy/scipy）、PDF（reportlab 字体注册）和语义（jieba 词典加载）
+子系统的导入耗时占应用冷启动的大头，而大部分请求用不到它们。
+本模块提供：
+1. LazyInstance: 首次访问属性时才导入模块并实例化的代理对象
+2. preload_heavy_modules: 在 worker fork 之后（或首个请求前）集中预热
+
+配置（环境变量）:
+    LAZY_PRELOAD_SUBSYSTEMS: 预热的子系统，逗号分隔，默认 analytics,pdf,semantic；
+                             设为空字符串则完全按需加载
+"""
+
+import importlib
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from wechat_backend.logging_config import api_logger
+
+
+# 各子系统的重量级模块
+HEAVY_SUBSYSTEMS: Dict[str, List[str]] = {
+    'analytics': [
+        'wechat_backend.analytics.asset_intelligence_engine',
+        'wechat_backend.analytics.prediction_engine',
+    ],
+    'pdf': [
+        'wechat_backend.analytics.report_generator',
+        'wechat_backend.services.pdf_export_service',
+    ],
+    'semantic': [
+        'wechat_backend.semantic_analyzer',
+    ],
+}
+
+LAZY_PRELOAD_SUBSYSTEMS = [
+    name.strip()
+    for name in os.getenv('LAZY_PRELOAD_SUBSYSTEMS', 'analytics,pdf,semantic').split(',')
+    if name.strip()
+]
+
+
+class LazyInstance:
+    """
+    延迟实例化代理
+
+    用于替代模块级的 `engine = HeavyEngine()`，首次访问属性时才导入并实例化，
+    之后所有属性访问都转发给真实对象。
+
+    示例:
+        report_generator = LazyInstance('wechat_backend.analytics.report_generator', 'ReportGenerator')
+        report_generator.get_hub_summary(brand_name, days)  # 此时才导入 reportlab
+    """
+
+    def __init__(self, module_path: str, class_name: str, *args, **kwargs):
+        object.__setattr__(self, '_module_path', module_path)
+        object.__setattr__(self, '_class_name', class_name)
+        object.__setattr__(self, '_args', args)
+        object.__setattr__(self, '_kwargs', kwargs)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _resolve(self) -> Any:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is not None:
+            return instance
+
+        with object.__getattribute__(self, '_lock'):
+            instance = object.__getattribute__(self, '_instance')
+            if instance is None:
+                module = importlib.import_module(object.__getattribute__(self, '_module_path'))
+                cls = getattr(module, object.__getattribute__(self, '_class_name'))
+                instance = cls(*object.__getattribute__(self, '_args'),
+                               **object.__getattribute__(self, '_kwargs'))
+                object.__setattr__(self, '_instance', instance)
+            return instance
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, '_instance') is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        if self.is_loaded:
+            return repr(object.__getattribute__(self, '_instance'))
+        return (f"<LazyInstance {object.__getattribute__(self, '_module_path')}."
+                f"{object.__getattribute__(self, '_class_name')} (not loaded)>")
+
+
+def preload_heavy_modules(subsystems: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    预热重量级子系统
+
+    在 gunicorn post_fork 或首个请求之前调用，把导入耗时挪出应用导入阶段。
+    单个模块导入失败（如可选依赖未安装）只记录警告，不影响其他模块。
+
+    Args:
+        subsystems: 子系统名称列表，默认使用 LAZY_PRELOAD_SUBSYSTEMS
+
+    Returns:
+        {模块名: 导入耗时(秒)}，失败的模块不在结果中
+    """
+    if subsystems is None:
+        subsystems = LAZY_PRELOAD_SUBSYSTEMS
+
+    timings = {}
+    for subsystem in subsystems:
+        for module_path in HEAVY_SUBSYSTEMS.get(subsystem, []):
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module_path)
+            except Exception as e:
+                api_logger.warning(f"[LazyImport] 预热 {module_path} 失败：{e}")
+                continue
+            timings[module_path] = time.perf_counter() - start
+
+    if timings:
+        api_logger.info(
+            f"[LazyImport] 预热完成：{len(timings)} 个模块，"
+            f"耗时 {sum(timings.values()):.2f}s"
+        )
+    return timings
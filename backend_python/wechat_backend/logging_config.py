@@ -3,36 +3,51 @@
 
 为现有代码提供向后兼容的日志接口，同时使用新的异步队列日志系统。
 
+业务线程只负责级别判断和入队 (QueueHandler)，格式化与文件写入由后台
+QueueListener 完成；同一调用点的重复日志按 LOG_REPEAT_* 配置限流。
+热路径请使用惰性 % 格式: api_logger.info('结果: %s', value)，
+级别未启用时参数不会被格式化。
+
 使用方式:
     # 现有代码无需修改
     from wechat_backend.logging_config import app_logger, api_logger, get_logger
     
     # 新代码使用统一接口
-    from backend_python.unified_logging.entry import get_logger, init
+    from unified_logging.entry import get_logger, init
     
     logger = get_logger('wechat_backend.api')
     logger.info('Hello, World!')
 
 注意:
-    此模块是为了平滑迁移而设计的，新代码应直接使用 backend_python.unified_logging.entry 模块。
+    此模块是为了平滑迁移而设计的，新代码应直接使用 unified_logging.entry 模块。
 """
 
+import atexit
 import logging
+import os
 from pathlib import Path
 
 # 尝试导入新日志系统，如果失败则回退到旧系统
+# 注意: backend_python 不是包，必须以顶层包 unified_logging 导入，
+# 否则会得到另一份工厂单例
 try:
-    from backend_python.unified_logging.entry import (
+    from unified_logging.entry import (
         init as _init_logging,
         get_logger as _get_unified_logger,
         shutdown_logging as _shutdown_logging,
     )
+    from unified_logging.tracing import init_tracing as _init_tracing, shutdown_tracing as _shutdown_tracing
     _NEW_LOGGING_AVAILABLE = True
 except ImportError:
     _NEW_LOGGING_AVAILABLE = False
     _init_logging = None
     _get_unified_logger = None
     _shutdown_logging = None
+    _init_tracing = None
+    _shutdown_tracing = None
+
+# 默认日志目录 backend_python/logs (与旧配置一致，不随工作目录变化)
+_DEFAULT_LOG_DIR = Path(__file__).parent.parent / 'logs'
 
 # 全局工厂实例
 _factory = None
@@ -43,7 +58,7 @@ def _ensure_initialized():
     """确保日志系统已初始化"""
     global _initialized
     if not _initialized and _NEW_LOGGING_AVAILABLE:
-        _init_logging()
+        _init_logging(log_dir=os.environ.get('LOG_DIR') or str(_DEFAULT_LOG_DIR))
         _initialized = True
 
 
@@ -144,25 +159,28 @@ def setup_logging(log_level=None, log_file=None, max_bytes=10485760, backup_coun
     global _initialized
     
     if _NEW_LOGGING_AVAILABLE:
-        # 使用新日志系统
-        from backend_python.unified_logging.entry import init
+        # 使用新日志系统 (导入期已按默认配置初始化，这里按应用配置重建)
+        _ensure_initialized()
         
-        log_dir = None
+        log_dir = os.environ.get('LOG_DIR') or str(_DEFAULT_LOG_DIR)
         if log_file:
             log_dir = str(Path(log_file).parent)
         
-        init(
-            log_level=log_level,
+        _init_logging(
+            log_level=(log_level or 'INFO').upper(),
             log_dir=log_dir,
             max_bytes=max_bytes,
             backup_count=backup_count,
+            force=True,
         )
+        # 设置 TRACE_EXPORT_PATH 时批量导出 Span，默认不写文件
+        _init_tracing()
         
         print(f"Unified logging initialized with level: {log_level}")
         return logging.getLogger()
     else:
         # 使用标准 logging 配置
-        import logging.handlers
+        from logging.handlers import RotatingFileHandler
         
         numeric_level = getattr(logging, (log_level or 'INFO').upper(), logging.INFO)
         
@@ -191,7 +209,7 @@ def setup_logging(log_level=None, log_file=None, max_bytes=10485760, backup_coun
         console_handler.setFormatter(formatter)
         root_logger.addHandler(console_handler)
         
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = RotatingFileHandler(
             log_file,
             maxBytes=max_bytes,
             backupCount=backup_count
@@ -212,11 +230,17 @@ def shutdown_logging(timeout=5.0):
         timeout: 等待时间 (秒)
     """
     global _initialized
+    if _NEW_LOGGING_AVAILABLE:
+        _shutdown_tracing(timeout=timeout)
     if _NEW_LOGGING_AVAILABLE and _initialized:
         _shutdown_logging(timeout=timeout)
         _initialized = False
 
 
+# 退出前停止监听器并排空队列，避免丢失最后的日志
+atexit.register(shutdown_logging)
+
+
 # 导出所有符号
 __all__ = [
     'setup_logging',
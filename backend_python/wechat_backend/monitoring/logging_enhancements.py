@@ -137,7 +137,8 @@ class SecurityLogger(StructuredLogger):
         self.warning(
             LogEventType.SECURITY_EVENT,
             f"安全事件: {description}",
-            event_type=event_type,
+            # 不能用 event_type 作为关键字，会与 warning() 的第一个参数冲突
+            security_event_type=event_type,
             severity=severity,
             **details
         )
@@ -7,7 +7,7 @@ import time
 import threading
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import logging
 from enum import Enum
 
@@ -0,0 +1,81 @@
+"""
+诊断流水线运行指标 API
+
+仅允许 METRICS_ALLOWED_NETWORKS 内直连的抓取方或已认证的管理员访问，
+与 /api/metrics 使用同一访问判定。
+"""
+
+import ipaddress
+import os
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from wechat_backend.logging_config import app_logger
+from wechat_backend.security.auth import get_current_user_id, require_auth_optional
+from wechat_backend.security.rate_limiting import rate_limit
+
+metrics_bp = Blueprint('pipeline_metrics', __name__)
+
+# 允许免认证抓取指标的来源网段（逗号分隔），默认仅本机
+METRICS_ALLOWED_NETWORKS = [
+    network.strip()
+    for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128').split(',')
+    if network.strip()
+]
+
+
+def is_internal_metrics_request() -> bool:
+    """请求是否直接来自允许的内网地址（经反向代理转发的请求不算）"""
+    if request.headers.get('X-Forwarded-For'):
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    for network in METRICS_ALLOWED_NETWORKS:
+        try:
+            if address in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            app_logger.warning(f"[Metrics] 无效的 METRICS_ALLOWED_NETWORKS 网段：{network}")
+    return False
+
+
+def metrics_access_denied():
+    """非内网且非管理员时返回 403 响应，允许访问时返回 None"""
+    if is_internal_metrics_request():
+        return None
+
+    from wechat_backend.admin_system import is_admin_user
+
+    user_id = get_current_user_id()
+    if is_admin_user(user_id):
+        return None
+    app_logger.warning(f"[Metrics] 拒绝访问 {request.path} - IP: {request.remote_addr}, user: {user_id}")
+    return jsonify({'error': 'Admin access required'}), 403
+
+
+@metrics_bp.route('/api/monitoring/pipeline', methods=['GET'])
+@require_auth_optional
+@rate_limit(limit=30, window=60, per='ip')
+def get_pipeline_metrics():
+    """
+    获取诊断流水线运行指标
+
+    返回:
+    - 诊断各阶段（及平台）耗时直方图摘要
+    - 单元格事件总线各订阅者积压与延迟
+    """
+    denied = metrics_access_denied()
+    if denied is not None:
+        return denied
+
+    from wechat_backend.cell_event_bus import get_cell_event_bus
+    from wechat_backend.monitoring.stage_metrics import get_stage_metrics
+
+    return jsonify({
+        'stages': get_stage_metrics().get_summary(),
+        'event_bus': get_cell_event_bus().get_stats(),
+        'timestamp': datetime.now().isoformat(),
+    })
@@ -0,0 +1,350 @@
+"""
+诊断全链路分阶段耗时指标
+
+在热路径上以极低开销记录各阶段耗时：
+1. HDR 风格的对数线性直方图（约 3% 相对误差，记录 O(1)，内存固定）
+2. 按 execution_id 汇总的单次执行耗时分解，附加到报告元数据
+3. 按执行采样（STAGE_METRICS_SAMPLE_RATE），未采样的执行不计时
+4. 导出为 Prometheus 文本格式（/api/metrics）
+
+使用方式:
+    with time_stage(STAGE_LLM_CALL, execution_id, platform='deepseek'):
+        response = client.send_prompt(prompt)
+
+    record_stage(STAGE_QUEUE_WAIT, waited_seconds, execution_id)
+    timing = get_execution_timing(execution_id)
+"""
+
+import os
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ==================== 阶段定义 ====================
+
+STAGE_PROMPT_RENDER = 'prompt_render'
+STAGE_QUEUE_WAIT = 'queue_wait'
+STAGE_RATE_LIMIT_DELAY = 'rate_limit_delay'
+STAGE_LLM_CALL = 'llm_call'
+STAGE_GEO_PARSE = 'geo_parse'
+STAGE_PERSISTENCE = 'persistence'
+STAGE_AGGREGATION = 'aggregation'
+STAGE_REPORT_BUILD = 'report_build'
+STAGE_PDF_RENDER = 'pdf_render'
+
+# ==================== 配置 ====================
+
+# 按执行采样比例（0~1），默认记录 10% 的执行；排查问题时可临时设为 1 全部记录
+STAGE_METRICS_SAMPLE_RATE = float(os.environ.get('STAGE_METRICS_SAMPLE_RATE', '0.1'))
+
+# 保留耗时分解的最近执行数
+STAGE_METRICS_MAX_EXECUTIONS = int(os.environ.get('STAGE_METRICS_MAX_EXECUTIONS', '1000'))
+
+# Prometheus 直方图桶上界（秒）
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                      1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 直方图精度：每个 2 的幂区间划分为 2^_SUB_BUCKET_BITS 个子桶
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKET_COUNT * 2
+# 可记录的最大值（微秒），约 1 小时，超出部分计入最后一个桶
+_MAX_VALUE_US = 3600 * 1000 * 1000
+
+# 当前执行上下文（execution_id, platform），供深层调用（如重试退避）归属耗时
+_current_context: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar(
+    'stage_metrics_context', default=(None, None)
+)
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _LINEAR_LIMIT:
+        return value_us
+    shift = value_us.bit_length() - _SUB_BUCKET_BITS - 1
+    return _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKET_COUNT + ((value_us >> shift) - _SUB_BUCKET_COUNT)
+
+
+def _bucket_upper_us(index: int) -> int:
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index - _LINEAR_LIMIT) // _SUB_BUCKET_COUNT + 1
+    mantissa = (index - _LINEAR_LIMIT) % _SUB_BUCKET_COUNT + _SUB_BUCKET_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+_BUCKET_COUNT = _bucket_index(_MAX_VALUE_US) + 1
+
+
+class LatencyHistogram:
+    """HDR 风格对数线性直方图（微秒精度，非线程安全，由调用方加锁）"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        value_us = min(max(int(seconds * 1_000_000), 0), _MAX_VALUE_US)
+        self.counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct: float) -> float:
+        """返回百分位数（秒），取所在桶上界"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count:
+                seen += bucket_count
+                if seen >= target:
+                    return min(_bucket_upper_us(index) / 1_000_000, self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: Tuple[float, ...]) -> List[int]:
+        """按给定上界（秒）计算累计计数，用于 Prometheus 桶"""
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            bound_us = bound * 1_000_000
+            while index < _BUCKET_COUNT and _bucket_upper_us(index) <= bound_us:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+class _StageTimer:
+    """time_stage 返回的计时上下文（未采样时不计时）"""
+
+    __slots__ = ('metrics', 'stage', 'execution_id', 'platform', 'start')
+
+    def __init__(self, metrics: 'StageMetrics', stage: str, execution_id: Optional[str], platform: Optional[str]):
+        self.metrics = metrics
+        self.stage = stage
+        self.execution_id = execution_id
+        self.platform = platform
+        self.start = None
+
+    def __enter__(self):
+        if self.metrics.is_sampled(self.execution_id):
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            self.metrics.record(self.stage, time.perf_counter() - self.start,
+                                self.execution_id, self.platform, sampled=True)
+        return False
+
+
+class StageMetrics:
+    """分阶段耗时指标注册表"""
+
+    def __init__(self,
+                 sample_rate: float = STAGE_METRICS_SAMPLE_RATE,
+                 max_executions: int = STAGE_METRICS_MAX_EXECUTIONS):
+        self.sample_rate = sample_rate
+        self.max_executions = max_executions
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._executions: 'OrderedDict[str, Dict[str, List[float]]]' = OrderedDict()
+
+    def is_sampled(self, execution_id: Optional[str] = None) -> bool:
+        """同一执行的采样结果保持一致，保证耗时分解完整"""
+        if self.sample_rate >= 1.0:
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        if execution_id is None:
+            execution_id = _current_context.get()[0]
+        if execution_id is None:
+            return random.random() < self.sample_rate
+        return (zlib.crc32(execution_id.encode('utf-8')) % 10000) < self.sample_rate * 10000
+
+    def record(self, stage: str, seconds: float,
+               execution_id: Optional[str] = None,
+               platform: Optional[str] = None,
+               sampled: bool = False):
+        """
+        记录一次阶段耗时
+
+        Args:
+            stage: 阶段名
+            seconds: 耗时（秒）
+            execution_id: 执行 ID，缺省时取当前执行上下文
+            platform: 平台标签（如 LLM 调用的平台），缺省时取当前执行上下文
+            sampled: 调用方已完成采样判断
+        """
+        context_execution_id, context_platform = _current_context.get()
+        execution_id = execution_id or context_execution_id
+        platform = platform or context_platform
+        if not sampled and not self.is_sampled(execution_id):
+            return
+
+        key = (stage, platform or '')
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+            if execution_id:
+                stages = self._executions.get(execution_id)
+                if stages is None:
+                    stages = self._executions[execution_id] = {}
+                    if len(self._executions) > self.max_executions:
+                        self._executions.popitem(last=False)
+                entry = stages.get(stage)
+                if entry is None:
+                    stages[stage] = [1, seconds, seconds]
+                else:
+                    entry[0] += 1
+                    entry[1] += seconds
+                    if seconds > entry[2]:
+                        entry[2] = seconds
+
+    def time_stage(self, stage: str, execution_id: Optional[str] = None,
+                   platform: Optional[str] = None) -> _StageTimer:
+        """返回计时上下文管理器"""
+        return _StageTimer(self, stage, execution_id, platform)
+
+    def get_execution_timing(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单次执行的分阶段耗时分解
+
+        Returns:
+            {stage: {'count', 'total_ms', 'max_ms'}}；未采样或已淘汰时返回 None
+        """
+        with self._lock:
+            stages = self._executions.get(execution_id)
+            if stages is None:
+                return None
+            return {
+                stage: {
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'max_ms': round(max_seconds * 1000, 3),
+                }
+                for stage, (count, total, max_seconds) in stages.items()
+            }
+
+    def get_summary(self) -> Dict[str, Dict[str, Any]]:
+        """获取各阶段（及平台）直方图摘要"""
+        with self._lock:
+            summary = {}
+            for (stage, platform), histogram in sorted(self._histograms.items()):
+                name = f"{stage}:{platform}" if platform else stage
+                summary[name] = {
+                    'count': histogram.count,
+                    'mean_ms': round(histogram.total / histogram.count * 1000, 3) if histogram.count else 0.0,
+                    'p50_ms': round(histogram.percentile(50) * 1000, 3),
+                    'p95_ms': round(histogram.percentile(95) * 1000, 3),
+                    'p99_ms': round(histogram.percentile(99) * 1000, 3),
+                    'max_ms': round(histogram.max * 1000, 3),
+                }
+            return summary
+
+    def render_prometheus(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        name = 'geo_stage_latency_seconds'
+        lines = [
+            f'# HELP {name} Latency of diagnosis lifecycle stages.',
+            f'# TYPE {name} histogram',
+        ]
+        quantile_lines = [
+            f'# HELP {name}_quantile Latency quantiles of diagnosis lifecycle stages.',
+            f'# TYPE {name}_quantile gauge',
+        ]
+
+        with self._lock:
+            for (stage, platform), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}"' + (f',platform="{_escape_label(platform)}"' if platform else '')
+                for bound, cumulative in zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts(PROMETHEUS_BUCKETS)):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+                for quantile in (0.5, 0.95, 0.99):
+                    quantile_lines.append(
+                        f'{name}_quantile{{{labels},quantile="{quantile}"}} '
+                        f'{histogram.percentile(quantile * 100):.6f}'
+                    )
+
+        return '\n'.join(lines + quantile_lines) + '\n'
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._histograms.clear()
+            self._executions.clear()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class execution_context:
+    """
+    设置当前执行上下文，使深层调用无需传参即可归属到该执行
+
+    with execution_context(execution_id, platform='deepseek'):
+        ...
+    """
+
+    __slots__ = ('value', 'token')
+
+    def __init__(self, execution_id: Optional[str], platform: Optional[str] = None):
+        self.value = (execution_id, platform)
+        self.token = None
+
+    def __enter__(self):
+        self.token = _current_context.set(self.value)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_context.reset(self.token)
+        return False
+
+
+# ==================== 全局实例 ====================
+
+_stage_metrics: Optional[StageMetrics] = None
+_stage_metrics_lock = threading.Lock()
+
+
+def get_stage_metrics() -> StageMetrics:
+    """获取全局分阶段耗时指标实例"""
+    global _stage_metrics
+    if _stage_metrics is None:
+        with _stage_metrics_lock:
+            if _stage_metrics is None:
+                _stage_metrics = StageMetrics()
+    return _stage_metrics
+
+
+def time_stage(stage: str, execution_id: Optional[str] = None, platform: Optional[str] = None) -> _StageTimer:
+    """便捷函数：阶段计时上下文"""
+    return get_stage_metrics().time_stage(stage, execution_id, platform)
+
+
+def record_stage(stage: str, seconds: float, execution_id: Optional[str] = None, platform: Optional[str] = None):
+    """便捷函数：记录阶段耗时"""
+    get_stage_metrics().record(stage, seconds, execution_id, platform)
+
+
+def get_execution_timing(execution_id: str) -> Optional[Dict[str, Any]]:
+    """便捷函数：获取单次执行的分阶段耗时分解"""
+    return get_stage_metrics().get_execution_timing(execution_id)
@@ -6,7 +6,7 @@
 import time
 import threading
 from collections import deque, defaultdict
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from enum import Enum
 import hashlib
 import logging
@@ -13,6 +13,7 @@ from wechat_backend.network.connection_pool import get_session_for_url
 from wechat_backend.network.circuit_breaker import get_circuit_breaker
 from wechat_backend.network.retry_mechanism import SmartRetryHandler
 from wechat_backend.network.rate_limiter import is_rate_limited
+from wechat_backend.deadline import remaining_timeout
 from wechat_backend.monitoring.metrics_collector import record_api_call, record_error
 from wechat_backend.monitoring.logging_enhancements import log_api_request, log_api_response
 
@@ -98,13 +99,16 @@ class UnifiedRequestWrapper:
         # 记录开始时间
         start_time = time.time()
         
+        # 请求超时不超过当前截止时间的剩余预算（已到期时抛出 DeadlineExceeded，不再发起请求）
+        timeout = remaining_timeout(kwargs.pop('timeout', self.timeout))
+
         # 使用连接池发送请求
         session = get_session_for_url(url)
         response = session.request(
             method=method.upper(),
             url=url,
             headers=prepared_headers,
-            timeout=kwargs.pop('timeout', self.timeout),
+            timeout=timeout,
             **kwargs
         )
         
@@ -12,7 +12,7 @@ import json
 import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from wechat_backend.logging_config import api_logger
 
 # 熔断器持久化存储路径
@@ -52,6 +52,13 @@ except ImportError:
 # 导入流式聚合器（P2-2 优化）
 from wechat_backend.nxm_streaming_aggregator import StreamingResultAggregator
 
+# 分阶段耗时指标
+from wechat_backend.monitoring.stage_metrics import (
+    time_stage, record_stage, execution_context,
+    STAGE_PROMPT_RENDER, STAGE_QUEUE_WAIT, STAGE_LLM_CALL, STAGE_GEO_PARSE,
+    STAGE_PERSISTENCE, STAGE_AGGREGATION
+)
+
 
 # =============================================================================
 # 并发执行配置
@@ -91,6 +98,8 @@ class AITask:
         self.prompt = prompt
         self.q_idx = q_idx
         self.timeout = timeout
+        # 提交到线程池的时间，用于统计排队等待
+        self.enqueued_at: Optional[float] = None
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -167,7 +176,7 @@ class ConcurrentExecutionEngine:
         
         # 结果收集
         self.results: List[Dict[str, Any]] = []
-        self.results_lock = threading.Lock()
+        self.results_lock = threading.RLock()  # _handle_result 持锁时会调用 _flush_batch_cache
         
         # 批量写入缓存
         self.batch_cache: List[Dict[str, Any]] = []
@@ -228,10 +237,10 @@ class ConcurrentExecutionEngine:
             # 使用 ThreadPoolExecutor 并发执行
             with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
                 # 提交所有任务
-                future_to_task = {
-                    executor.submit(self._execute_single_task, task): task
-                    for task in tasks
-                }
+                future_to_task = {}
+                for task in tasks:
+                    task.enqueued_at = time.perf_counter()
+                    future_to_task[executor.submit(self._execute_single_task, task)] = task
                 
                 # 收集结果
                 for future in as_completed(future_to_task):
@@ -286,11 +295,12 @@ class ConcurrentExecutionEngine:
                     timeout = timeout_manager.get_timeout(model_name)
                     
                     # 构建提示词
-                    prompt = GEO_PROMPT_TEMPLATE.format(
-                        brand_name=brand,
-                        competitors=', '.join(current_competitors) if current_competitors else '无',
-                        question=question
-                    )
+                    with time_stage(STAGE_PROMPT_RENDER, self.execution_id):
+                        prompt = GEO_PROMPT_TEMPLATE.format(
+                            brand_name=brand,
+                            competitors=', '.join(current_competitors) if current_competitors else '无',
+                            question=question
+                        )
                     
                     task = AITask(
                         task_id=f"{brand}-{q_idx}-{model_name}",
@@ -309,6 +319,8 @@ class ConcurrentExecutionEngine:
     def _execute_single_task(self, task: AITask) -> AIResult:
         """执行单个 AI 调用任务"""
         start_time = time.time()
+        if task.enqueued_at is not None:
+            record_stage(STAGE_QUEUE_WAIT, time.perf_counter() - task.enqueued_at, self.execution_id)
         
         try:
             # 创建 AI 客户端
@@ -318,14 +330,16 @@ class ConcurrentExecutionEngine:
             ai_executor = FaultTolerantExecutor(timeout_seconds=task.timeout)
             
             # 执行 AI 调用（在后台线程中使用 asyncio.run）
-            ai_result = asyncio.run(
-                ai_executor.execute_with_fallback(
-                    task_func=client.send_prompt,
-                    task_name=f"{task.brand}-{task.model_name}",
-                    source=task.model_name,
-                    prompt=task.prompt
+            with execution_context(self.execution_id, task.model_name), \
+                    time_stage(STAGE_LLM_CALL, self.execution_id, platform=task.model_name):
+                ai_result = asyncio.run(
+                    ai_executor.execute_with_fallback(
+                        task_func=client.send_prompt,
+                        task_name=f"{task.brand}-{task.model_name}",
+                        source=task.model_name,
+                        prompt=task.prompt
+                    )
                 )
-            )
             
             execution_time = time.time() - start_time
             
@@ -358,12 +372,13 @@ class ConcurrentExecutionEngine:
             parse_error = None
             
             if result.success and result.data:
-                geo_data, parse_error = parse_geo_with_validation(
-                    result.data,
-                    self.execution_id,
-                    result.task.q_idx,
-                    result.task.model_name
-                )
+                with time_stage(STAGE_GEO_PARSE, self.execution_id):
+                    geo_data, parse_error = parse_geo_with_validation(
+                        result.data,
+                        self.execution_id,
+                        result.task.q_idx,
+                        result.task.model_name
+                    )
                 
                 if result.success:
                     self.scheduler.record_model_success(result.task.model_name)
@@ -431,7 +446,7 @@ class ConcurrentExecutionEngine:
         try:
             from wechat_backend.repositories import save_dimension_result
             
-            with self.results_lock:
+            with self.results_lock, time_stage(STAGE_PERSISTENCE, self.execution_id):
                 # 批量保存维度结果
                 for result in self.results[-BATCH_WRITE_THRESHOLD:]:
                     try:
@@ -526,7 +541,8 @@ class ConcurrentExecutionEngine:
             执行结果
         """
         # 使用流式聚合器的 finalize 方法
-        final_result = self.aggregator.finalize()
+        with time_stage(STAGE_AGGREGATION, self.execution_id):
+            final_result = self.aggregator.finalize()
         
         # 更新执行存储
         self.execution_store[self.execution_id].update({
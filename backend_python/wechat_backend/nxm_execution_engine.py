@@ -6,6 +6,7 @@ NxM 执行引擎 - 主入口
 - 任务调度 → nxm_scheduler.py
 - 结果聚合 → nxm_result_aggregator.py
 - 容错机制 → fault_tolerant_executor.py
+- 单元格事件 → cell_event_bus.py（持久化 / WAL / 进度推送异步订阅）
 
 输入：NxM 执行参数
 输出：执行结果
@@ -56,6 +57,20 @@ from wechat_backend.nxm_result_aggregator import (
 from wechat_backend.services.quality_scorer import get_quality_scorer
 # P1-014 新增：AI 超时保护
 from wechat_backend.ai_timeout import get_timeout_manager, AITimeoutError
+# 分阶段耗时指标
+from wechat_backend.monitoring.stage_metrics import (
+    time_stage, execution_context,
+    STAGE_PROMPT_RENDER, STAGE_LLM_CALL, STAGE_GEO_PARSE, STAGE_PERSISTENCE, STAGE_AGGREGATION
+)
+
+# 链路追踪
+from unified_logging.tracing import trace_span
+
+# 单元格完成事件总线
+from wechat_backend.cell_event_bus import (
+    CellCompleted, CellEventBus, get_cell_event_bus,
+    CELL_SUCCESS, CELL_FAILED, CELL_ERROR, CELL_SKIPPED
+)
 
 # 配置导入
 from config import Config
@@ -201,6 +216,127 @@ def recover_from_wal(execution_id: str) -> Optional[Dict]:
     return None
 
 
+# ==================== 单元格完成事件订阅者 ====================
+
+# 汇总前等待订阅者处理完事件的最长时间（秒）
+EVENT_BUS_FLUSH_TIMEOUT = float(os.environ.get('EVENT_BUS_FLUSH_TIMEOUT', '30'))
+
+
+def persist_cell(event: CellCompleted):
+    """
+    持久化订阅者：保存维度结果与任务进度（M003），失败时记录持久化告警（P1-018）
+    """
+    from wechat_backend.repositories import save_dimension_result, save_task_status
+
+    progress = int((event.completed / event.total) * 100) if event.total > 0 else 0
+
+    if event.status == CELL_SKIPPED:
+        return
+
+    if event.status == CELL_ERROR:
+        # P1-2 修复：使用数据库存储错误详情
+        try:
+            save_task_status(
+                task_id=event.execution_id,
+                stage='failed',
+                progress=progress,
+                status_text=f'{event.error_message}',
+                completed_count=event.completed,
+                total_count=event.total
+            )
+        except Exception as store_error:
+            api_logger.error(f"[NxM] 更新任务状态失败：{store_error}")
+        return
+
+    # 确定维度状态和分数
+    geo_data = event.result.get('geo_data')
+    dim_status = "success" if event.status == CELL_SUCCESS else "failed"
+    dim_score = None
+    if dim_status == "success" and geo_data:
+        # 从 GEO 数据中提取排名作为分数参考
+        rank = geo_data.get("rank", -1)
+        if rank > 0:
+            dim_score = max(0, 100 - (rank - 1) * 10)  # 排名第 1 得 100 分，每降 1 名减 10 分
+
+    try:
+        with time_stage(STAGE_PERSISTENCE, event.execution_id):
+            save_dimension_result(
+                execution_id=event.execution_id,
+                dimension_name=f"{event.brand}-{event.model}",
+                dimension_type="ai_analysis",
+                source=event.model,
+                status=dim_status,
+                score=dim_score,
+                data=geo_data if dim_status == "success" else None,
+                error_message=event.error_message if dim_status == "failed" else None
+            )
+
+            # 实时更新进度
+            save_task_status(
+                task_id=event.execution_id,
+                stage='ai_fetching',
+                progress=progress,
+                status_text=f'已完成 {event.completed}/{event.total}',
+                completed_count=event.completed,
+                total_count=event.total
+            )
+
+        api_logger.info("[NxM] ✅ 维度结果持久化成功：%s-%s, 状态：%s", event.brand, event.model, dim_status)
+
+    except Exception as persist_err:
+        # 持久化失败不影响主流程，仅记录错误
+        api_logger.error("[NxM] ⚠️ 维度结果持久化失败：%s-%s, 错误：%s", event.brand, event.model, persist_err)
+
+        # P1-018 新增：数据库持久化告警机制
+        try:
+            from wechat_backend.alert_system import record_persistence_error
+
+            alert_triggered = record_persistence_error(
+                execution_id=event.execution_id,
+                error_type='dimension_result',
+                error_message=str(persist_err)
+            )
+
+            if alert_triggered:
+                api_logger.error(
+                    f"[P1-018 告警] 数据库持久化失败达到阈值！"
+                    f"execution_id={event.execution_id}, 错误：{persist_err}"
+                )
+        except Exception as alert_err:
+            api_logger.error(f"[P1-018] 告警记录失败：{alert_err}")
+
+
+class WALSubscriber:
+    """
+    WAL 订阅者（P0-004）：按执行累积结果并写入预写日志
+
+    只在订阅者自己的工作线程中访问，无需加锁；执行的最后一个单元格处理后，
+    或执行失败/中止时收到结束通知后释放结果。
+    """
+
+    def __init__(self):
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __call__(self, event: CellCompleted):
+        try:
+            if event.result is not None:
+                results = self._results.setdefault(event.execution_id, [])
+                results.append(event.result)
+                write_wal(event.execution_id, results, event.completed, event.total, event.brand, event.model)
+        finally:
+            if event.completed >= event.total:
+                self._results.pop(event.execution_id, None)
+
+    def on_execution_end(self, execution_id: str):
+        self._results.pop(execution_id, None)
+
+
+def register_cell_subscribers(bus: CellEventBus):
+    """注册全局持久化与 WAL 订阅者（重复调用无副作用）"""
+    bus.subscribe('nxm.persistence', persist_cell, lossless=True)
+    bus.subscribe('nxm.wal', WALSubscriber(), lossless=True)
+
+
 def execute_nxm_test(
     execution_id: str,
     main_brand: str,
@@ -234,6 +370,16 @@ def execute_nxm_test(
 
     scheduler.start_timeout_timer(timeout_seconds, on_timeout)
 
+    # 单元格事件：全局持久化 / WAL 订阅者 + 本次执行的进度（SSE）订阅者
+    bus = get_cell_event_bus()
+    register_cell_subscribers(bus)
+    progress_subscriber = f'nxm.progress:{execution_id}'
+    bus.subscribe(
+        progress_subscriber,
+        lambda event: scheduler.update_progress(event.completed, event.total, 'ai_fetching'),
+        execution_id=execution_id
+    )
+
     # 在后台线程中执行
     def run_execution():
         # 【修复 P0-4】在 try 块外先导入 execution_store，避免作用域问题
@@ -243,6 +389,19 @@ def execute_nxm_test(
             execution_store = {}
             api_logger.error(f"[NxM] 无法导入 execution_store，使用空字典")
 
+        def emit_cell(brand, q_idx, model_name, status, result=None, error_message=None):
+            bus.publish(CellCompleted(
+                execution_id=execution_id,
+                brand=brand,
+                question_index=q_idx,
+                model=model_name,
+                status=status,
+                completed=completed,
+                total=total_tasks,
+                result=result,
+                error_message=error_message
+            ))
+
         try:
             results = []
             completed = 0
@@ -263,212 +422,139 @@ def execute_nxm_test(
                         if not scheduler.is_model_available(model_name):
                             api_logger.warning(f"[NxM] 模型 {model_name} 已熔断，跳过")
                             completed += 1
-                            scheduler.update_progress(completed, total_tasks, 'ai_fetching')
+                            emit_cell(brand, q_idx, model_name, CELL_SKIPPED)
                             continue
 
-                        try:
-                            # P0 修复：直接使用 Config 类获取 API Key，避免循环依赖
-                            # 创建 AI 客户端
-                            client = AIAdapterFactory.create(model_name)
-                            api_key = Config.get_api_key(model_name)
-
-                            if not api_key:
-                                raise ValueError(f"模型 {model_name} API Key 未配置")
-
-                            # 构建提示词
-                            # P0-2 修复：使用当前品牌和其竞争对手
-                            current_competitors = [b for b in all_brands if b != brand]
-                            prompt = GEO_PROMPT_TEMPLATE.format(
-                                brand_name=brand,
-                                competitors=', '.join(current_competitors) if current_competitors else '无',
-                                question=question
-                            )
-
-                            # P1-014 新增：获取超时配置
-                            timeout_manager = get_timeout_manager()
-                            timeout = timeout_manager.get_timeout(model_name)
-
-                            # M002 改造：使用 FaultTolerantExecutor 统一包裹 AI 调用
-                            # 创建容错执行器实例（每个调用独立）
-                            ai_executor = FaultTolerantExecutor(timeout_seconds=timeout)
-
-                            # 【P0-001 修复】使用线程安全的异步执行方式
-                            # 原代码问题：asyncio.run() 在已有事件循环的线程中会抛出 RuntimeError
-                            # 修复方案：使用 run_async_in_thread() 创建新的事件循环
-                            ai_result = run_async_in_thread(
-                                ai_executor.execute_with_fallback(
-                                    task_func=client.send_prompt,
-                                    task_name=f"{brand}-{model_name}",
-                                    source=model_name,
-                                    prompt=prompt
-                                )
-                            )
+                        with trace_span('nxm.cell', {'brand': brand, 'question_index': q_idx, 'model': model_name},
+                                        trace_id=execution_id):
+                            try:
+                                # P0 修复：直接使用 Config 类获取 API Key，避免循环依赖
+                                # 创建 AI 客户端
+                                client = AIAdapterFactory.create(model_name)
+                                api_key = Config.get_api_key(model_name)
+
+                                if not api_key:
+                                    raise ValueError(f"模型 {model_name} API Key 未配置")
+
+                                # 构建提示词
+                                # P0-2 修复：使用当前品牌和其竞争对手
+                                current_competitors = [b for b in all_brands if b != brand]
+                                with time_stage(STAGE_PROMPT_RENDER, execution_id):
+                                    prompt = GEO_PROMPT_TEMPLATE.format(
+                                        brand_name=brand,
+                                        competitors=', '.join(current_competitors) if current_competitors else '无',
+                                        question=question
+                                    )
+
+                                # P1-014 新增：获取超时配置
+                                timeout_manager = get_timeout_manager()
+                                timeout = timeout_manager.get_timeout(model_name)
+
+                                # M002 改造：使用 FaultTolerantExecutor 统一包裹 AI 调用
+                                # 创建容错执行器实例（每个调用独立）
+                                ai_executor = FaultTolerantExecutor(timeout_seconds=timeout)
+
+                                # 【P0-001 修复】使用线程安全的异步执行方式
+                                # 原代码问题：asyncio.run() 在已有事件循环的线程中会抛出 RuntimeError
+                                # 修复方案：使用 run_async_in_thread() 创建新的事件循环
+                                with execution_context(execution_id, model_name), \
+                                        time_stage(STAGE_LLM_CALL, execution_id, platform=model_name):
+                                    ai_result = run_async_in_thread(
+                                        ai_executor.execute_with_fallback(
+                                            task_func=client.send_prompt,
+                                            task_name=f"{brand}-{model_name}",
+                                            source=model_name,
+                                            prompt=prompt
+                                        )
+                                    )
                             
-                            # 检查 AI 调用结果
-                            geo_data = None
-                            parse_error = None
-
-                            if ai_result.status == "success":
-                                # AI 调用成功，解析 GEO 数据
-                                scheduler.record_model_success(model_name)
-
-                                # 解析 GEO 数据
-                                geo_data, parse_error = parse_geo_with_validation(
-                                    ai_result.data,
-                                    execution_id,
-                                    q_idx,
-                                    model_name
-                                )
-
-                                # 检查解析结果
-                                if parse_error or geo_data.get('_error'):
-                                    # 解析失败，记录错误
-                                    api_logger.warning(f"[NxM] 解析失败：{model_name}, Q{q_idx}: {parse_error or geo_data.get('_error')}")
-                                    # P0-4 修复：直接使用字典收集结果
-                                    # P3 修复：确保所有字段都是可序列化的
-                                    result = {
-                                        'brand': brand,
-                                        'question': question,
-                                        'model': model_name,
-                                        'response': str(ai_result.data) if hasattr(ai_result, 'data') else str(ai_result),  # 修复：确保可序列化
-                                        'geo_data': geo_data,
-                                        'error': str(parse_error or geo_data.get('_error', '解析失败')),
-                                        'error_type': str(ai_result.error_type.value) if hasattr(ai_result, 'error_type') and ai_result.error_type else 'parse_error'
-                                    }
-                                    results.append(result)
+                                # 检查 AI 调用结果
+                                geo_data = None
+                                parse_error = None
+
+                                if ai_result.status == "success":
+                                    # AI 调用成功，解析 GEO 数据
+                                    scheduler.record_model_success(model_name)
+
+                                    # 解析 GEO 数据
+                                    with time_stage(STAGE_GEO_PARSE, execution_id):
+                                        geo_data, parse_error = parse_geo_with_validation(
+                                            ai_result.data,
+                                            execution_id,
+                                            q_idx,
+                                            model_name
+                                        )
+
+                                    # 检查解析结果
+                                    if parse_error or geo_data.get('_error'):
+                                        # 解析失败，记录错误
+                                        api_logger.warning("[NxM] 解析失败：%s, Q%s: %s", model_name, q_idx, parse_error or geo_data.get('_error'))
+                                        # P0-4 修复：直接使用字典收集结果
+                                        # P3 修复：确保所有字段都是可序列化的
+                                        result = {
+                                            'brand': brand,
+                                            'question': question,
+                                            'model': model_name,
+                                            'response': str(ai_result.data) if hasattr(ai_result, 'data') else str(ai_result),  # 修复：确保可序列化
+                                            'geo_data': geo_data,
+                                            'error': str(parse_error or geo_data.get('_error', '解析失败')),
+                                            'error_type': str(ai_result.error_type.value) if hasattr(ai_result, 'error_type') and ai_result.error_type else 'parse_error'
+                                        }
+                                        results.append(result)
+                                    else:
+                                        # 解析成功，收集结果
+                                        # P3 修复：确保所有字段都是可序列化的
+                                        result = {
+                                            'brand': brand,
+                                            'question': question,
+                                            'model': model_name,
+                                            'response': str(ai_result.data) if hasattr(ai_result, 'data') else str(ai_result),  # 修复：确保可序列化
+                                            'geo_data': geo_data,
+                                            'error': None,
+                                            'error_type': None
+                                        }
+                                        results.append(result)
                                 else:
-                                    # 解析成功，收集结果
+                                    # AI 调用失败，记录错误并继续（不中断流程）
+                                    scheduler.record_model_failure(model_name)
+                                    api_logger.error("[NxM] AI 调用失败：%s, Q%s: %s", model_name, q_idx, ai_result.error_message)
+
+                                    # P0-4 修复：收集失败结果（保证报告完整）
                                     # P3 修复：确保所有字段都是可序列化的
                                     result = {
                                         'brand': brand,
                                         'question': question,
                                         'model': model_name,
-                                        'response': str(ai_result.data) if hasattr(ai_result, 'data') else str(ai_result),  # 修复：确保可序列化
-                                        'geo_data': geo_data,
-                                        'error': None,
-                                        'error_type': None
+                                        'response': None,
+                                        'geo_data': None,
+                                        'error': str(ai_result.error_message),
+                                        'error_type': str(ai_result.error_type.value) if hasattr(ai_result, 'error_type') and ai_result.error_type else 'unknown'
                                     }
                                     results.append(result)
-                            else:
-                                # AI 调用失败，记录错误并继续（不中断流程）
-                                scheduler.record_model_failure(model_name)
-                                api_logger.error(f"[NxM] AI 调用失败：{model_name}, Q{q_idx}: {ai_result.error_message}")
-
-                                # P0-4 修复：收集失败结果（保证报告完整）
-                                # P3 修复：确保所有字段都是可序列化的
-                                result = {
-                                    'brand': brand,
-                                    'question': question,
-                                    'model': model_name,
-                                    'response': None,
-                                    'geo_data': None,
-                                    'error': str(ai_result.error_message),
-                                    'error_type': str(ai_result.error_type.value) if hasattr(ai_result, 'error_type') and ai_result.error_type else 'unknown'
-                                }
-                                results.append(result)
                             
-                            # M003 改造：实时持久化维度结果
-                            # 原有问题：结果仅在内存中，服务重启后丢失
-                            # 改造后：每个维度结果立即保存到数据库，支持进度查询和历史追溯
-                            try:
-                                from wechat_backend.repositories import save_dimension_result, save_task_status
-
-                                # 确定维度状态和分数
-                                dim_status = "success" if (ai_result.status == "success" and geo_data and not geo_data.get('_error')) else "failed"
-                                dim_score = None
-                                if dim_status == "success" and geo_data:
-                                    # 从 GEO 数据中提取排名作为分数参考
-                                    rank = geo_data.get("rank", -1)
-                                    if rank > 0:
-                                        dim_score = max(0, 100 - (rank - 1) * 10)  # 排名第 1 得 100 分，每降 1 名减 10 分
-
-                                # 保存维度结果
-                                save_dimension_result(
-                                    execution_id=execution_id,
-                                    dimension_name=f"{brand}-{model_name}",
-                                    dimension_type="ai_analysis",
-                                    source=model_name,
-                                    status=dim_status,
-                                    score=dim_score,
-                                    data=geo_data if dim_status == "success" else None,
-                                    error_message=ai_result.error_message if dim_status == "failed" else (parse_error if parse_error else None)
-                                )
-
-                                # 实时更新进度
-                                save_task_status(
-                                    task_id=execution_id,
-                                    stage='ai_fetching',
-                                    progress=int((completed / total_tasks) * 100) if total_tasks > 0 else 0,
-                                    status_text=f'已完成 {completed}/{total_tasks}',
-                                    completed_count=completed,
-                                    total_count=total_tasks
-                                )
-
-                                api_logger.info(f"[NxM] ✅ 维度结果持久化成功：{brand}-{model_name}, 状态：{dim_status}")
-
-                            except Exception as persist_err:
-                                # 持久化失败不影响主流程，仅记录错误
-                                api_logger.error(f"[NxM] ⚠️ 维度结果持久化失败：{brand}-{model_name}, 错误：{persist_err}")
-                                
-                                # P1-018 新增：数据库持久化告警机制
-                                try:
-                                    from wechat_backend.alert_system import record_persistence_error, check_persistence_alert
-                                    
-                                    # 记录持久化错误
-                                    alert_triggered = record_persistence_error(
-                                        execution_id=execution_id,
-                                        error_type='dimension_result',
-                                        error_message=str(persist_err)
-                                    )
-                                    
-                                    # 如果触发告警，记录详细日志
-                                    if alert_triggered:
-                                        api_logger.error(
-                                            f"[P1-018 告警] 数据库持久化失败达到阈值！"
-                                            f"execution_id={execution_id}, 错误：{persist_err}"
-                                        )
-                                        # 可以添加额外的告警通知逻辑（如发送邮件、短信等）
-                                except Exception as alert_err:
-                                    api_logger.error(f"[P1-018] 告警记录失败：{alert_err}")
-
-                            # 【P0-004 修复】写入 WAL（预写日志），确保服务重启后数据不丢失
-                            # WAL 写入在数据库持久化之后，作为双重保障
-                            try:
-                                write_wal(execution_id, results, completed, total_tasks, brand, model_name)
-                            except Exception as wal_err:
-                                api_logger.error(f"[WAL] ⚠️ 写入失败：{wal_err}")
-
-                            # 更新进度
-                            completed += 1
-                            scheduler.update_progress(completed, total_tasks, 'ai_fetching')
-
-                        except Exception as e:
-                            # P1-2 修复：完善错误处理，记录详细错误信息
-                            error_message = f"AI 调用失败：{model_name}, 问题{q_idx+1}: {str(e)}"
-                            api_logger.error(f"[NxM] {error_message}")
-
-                            # 记录模型失败
-                            scheduler.record_model_failure(model_name)
+                                # M003 改造：实时持久化维度结果
+                                # 持久化、WAL 与进度推送由事件总线订阅者在各自线程中完成，
+                                # 不阻塞下一次 AI 调用
+                                completed += 1
+                                emit_cell(brand, q_idx, model_name,
+                                          CELL_FAILED if result['error'] else CELL_SUCCESS,
+                                          result=result, error_message=result['error'])
+
+                            except Exception as e:
+                                # P1-2 修复：完善错误处理，记录详细错误信息
+                                error_message = f"AI 调用失败：{model_name}, 问题{q_idx+1}: {str(e)}"
+                                api_logger.error(f"[NxM] {error_message}")
+
+                                # 记录模型失败
+                                scheduler.record_model_failure(model_name)
 
-                            # 更新进度，包含错误信息
-                            completed += 1
-                            scheduler.update_progress(completed, total_tasks, 'ai_fetching')
+                                # 更新进度，错误详情由持久化订阅者写入数据库
+                                completed += 1
+                                emit_cell(brand, q_idx, model_name, CELL_ERROR, error_message=error_message)
 
-                            # P1-2 修复：使用数据库存储错误详情，避免导入问题
-                            try:
-                                from wechat_backend.repositories import save_task_status
-                                
-                                # 累积错误信息到数据库
-                                save_task_status(
-                                    task_id=execution_id,
-                                    stage='failed',
-                                    progress=int((completed / total_tasks) * 100) if total_tasks > 0 else 0,
-                                    status_text=f'{error_message}',
-                                    completed_count=completed,
-                                    total_count=total_tasks
-                                )
-                            except Exception as store_error:
-                                api_logger.error(f"[NxM] 更新任务状态失败：{store_error}")
+            # 等待订阅者处理完本次执行的全部事件，再验证和汇总
+            if not bus.flush(EVENT_BUS_FLUSH_TIMEOUT, execution_id=execution_id):
+                api_logger.warning(f"[NxM] 事件订阅者未在 {EVENT_BUS_FLUSH_TIMEOUT} 秒内处理完：{execution_id}")
 
             # 验证执行完成
             verification = verify_completion(results, total_tasks)
@@ -499,9 +585,11 @@ def execute_nxm_test(
                 # P3 修复：aggregate_results_by_brand 需要 brand_name 参数
                 all_brands = list(set(r.get('brand', '') for r in deduplicated if r.get('brand')))
                 aggregated = []
-                for brand in all_brands:
-                    brand_data = aggregate_results_by_brand(deduplicated, brand)
-                    aggregated.append(brand_data)
+                with time_stage(STAGE_AGGREGATION, execution_id), \
+                        trace_span('nxm.aggregate', {'brands': len(all_brands)}, trace_id=execution_id):
+                    for brand in all_brands:
+                        brand_data = aggregate_results_by_brand(deduplicated, brand)
+                        aggregated.append(brand_data)
                 api_logger.info(f"[NxM] 聚合结果：{len(aggregated)} 个品牌")
 
                 # P3 修复：保存测试汇总记录到 test_records 表
@@ -525,19 +613,20 @@ def execute_nxm_test(
                     }
 
                     # 保存测试记录
-                    save_test_record(
-                        user_openid=user_id or 'anonymous',
-                        brand_name=main_brand,
-                        ai_models_used=','.join(m.get('name', '') for m in selected_models),
-                        questions_used=';'.join(raw_questions),
-                        overall_score=overall_score,
-                        total_tasks=len(deduplicated),
-                        results_summary=gzip.compress(json.dumps(results_summary, ensure_ascii=False).encode()).decode('latin-1'),
-                        detailed_results=gzip.compress(json.dumps(deduplicated, ensure_ascii=False).encode()).decode('latin-1'),
-                        execution_id=execution_id
-                    )
-
-                    api_logger.info(f"[NxM] ✅ 测试汇总记录保存成功：{execution_id}")
+                    with time_stage(STAGE_PERSISTENCE, execution_id):
+                        save_test_record(
+                            user_openid=user_id or 'anonymous',
+                            brand_name=main_brand,
+                            ai_models_used=','.join(m.get('name', '') for m in selected_models),
+                            questions_used=';'.join(raw_questions),
+                            overall_score=overall_score,
+                            total_tasks=len(deduplicated),
+                            results_summary=gzip.compress(json.dumps(results_summary, ensure_ascii=False).encode()).decode('latin-1'),
+                            detailed_results=gzip.compress(json.dumps(deduplicated, ensure_ascii=False).encode()).decode('latin-1'),
+                            execution_id=execution_id
+                        )
+
+                    api_logger.info("[NxM] ✅ 测试汇总记录保存成功：%s", execution_id)
 
                 except Exception as save_err:
                     api_logger.error(f"[NxM] ⚠️ 测试汇总记录保存失败：{execution_id}, 错误：{save_err}")
@@ -649,6 +738,7 @@ def execute_nxm_test(
         except Exception as e:
             # 执行器崩溃（极罕见情况）
             api_logger.error(f"[NxM] 执行器崩溃：{execution_id}, 错误：{e}\n{traceback.format_exc()}")
+            bus.flush(EVENT_BUS_FLUSH_TIMEOUT, execution_id=execution_id)
             scheduler.fail_execution(f"执行器崩溃：{str(e)}")
 
             # 返回错误结果
@@ -670,7 +760,11 @@ def execute_nxm_test(
 
     # 启动执行（同步方式，由上层调度器管理超时）
     # P3 修复：捕获 run_execution 的返回值，确保实际结果被返回
-    execution_result = run_execution()
+    try:
+        execution_result = run_execution()
+    finally:
+        bus.end_execution(execution_id)
+        bus.unsubscribe(progress_subscriber)
 
     # 返回执行结果（不是初始结果）
     return execution_result if execution_result else {
@@ -0,0 +1,234 @@
+"""
+流水线式结果聚合器
+
+把「AI 评判 → 评分 → 聚合」从全部原始结果就绪后的第二轮串行处理，
+改为随结果到达即开始的流水线：
+
+1. 接收阶段：结果到达时立即送入 StreamingResultAggregator（实时统计 / SSE）
+2. 评判阶段：在有界线程池中并行执行 AI 评判与单条评分
+3. 汇总阶段：最后一条结果到达后，只需等待尚未完成的评判即可构建最终报告
+
+因此最终报告在最后一个 LLM 响应之后，最多再经过一次评判调用的延迟即可就绪。
+
+超时由截止时间（wechat_backend.deadline）控制而非 SIGALRM：每次评判在
+min(judge_timeout, 整体剩余时间) 的子截止时间内执行，AIJudgeClient 与适配器
+据此设置 HTTP 超时；整体到期后尚未完成的评判使用兜底结果，返回部分结果。
+
+注意：线程无法被强制终止。超时被放弃的评判线程会成为孤儿线程，继续运行到
+当前调用返回为止，其输出被丢弃。由于 HTTP 超时取自上述子截止时间，孤儿线程
+最多再运行 judge_timeout 秒（加上本地评分耗时），子截止时间到期后不再发起新的评判调用。
+
+使用方式:
+    pipeline = PipelinedResultAggregator(evaluate_fn, finalize_fn, fallback_fn)
+    for result in results_as_they_arrive:
+        pipeline.submit(result)
+    final_report = pipeline.finalize(timeout=120)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from wechat_backend.logging_config import api_logger
+from wechat_backend.deadline import Deadline, current_deadline, deadline_scope
+
+
+# 默认并行评判数（受评判平台限流约束，不宜过大）
+DEFAULT_MAX_PARALLEL_JUDGES = int(os.environ.get('JUDGE_MAX_PARALLEL', '4'))
+
+# 单次评判调用的默认超时（秒）
+DEFAULT_JUDGE_TIMEOUT = float(os.environ.get('JUDGE_CALL_TIMEOUT', '30'))
+
+# finalize 轮询间隔（秒），用于检测单次评判超时
+_POLL_INTERVAL = 0.2
+
+
+class PipelinedResultAggregator:
+    """
+    流水线式结果聚合器
+
+    evaluate_fn / fallback_fn 的返回值对本类透明，finalize 时按提交顺序
+    交给 finalize_fn 构建最终结果。
+    """
+
+    def __init__(self,
+                 evaluate_fn: Callable[[Dict[str, Any]], Any],
+                 finalize_fn: Callable[[List[Any]], Any],
+                 fallback_fn: Callable[[Dict[str, Any], str], Any],
+                 max_parallel_judges: int = DEFAULT_MAX_PARALLEL_JUDGES,
+                 judge_timeout: float = DEFAULT_JUDGE_TIMEOUT,
+                 streaming_aggregator: Any = None,
+                 send_sse: bool = False,
+                 name: str = 'pipeline',
+                 deadline: Optional[Deadline] = None):
+        """
+        Args:
+            evaluate_fn: 评判阶段函数，输入原始结果，返回单条评估输出
+            finalize_fn: 汇总阶段函数，输入按提交顺序排列的评估输出列表
+            fallback_fn: 评判失败或超时时的兜底函数 (result, reason) -> 评估输出
+            max_parallel_judges: 最大并行评判数
+            judge_timeout: 单次评判超时（秒），超时后放弃等待并使用兜底输出
+            streaming_aggregator: 可选的 StreamingResultAggregator，接收阶段实时统计
+            send_sse: 接收阶段是否通过流式聚合器推送部分结果
+            name: 名称（日志与线程名）
+            deadline: 整体截止时间；未指定时使用创建流水线时上下文中的截止时间
+        """
+        self.evaluate_fn = evaluate_fn
+        self.finalize_fn = finalize_fn
+        self.fallback_fn = fallback_fn
+        self.judge_timeout = judge_timeout
+        self.streaming_aggregator = streaming_aggregator
+        self.send_sse = send_sse
+        self.name = name
+        self.deadline = deadline or current_deadline()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_parallel_judges),
+            thread_name_prefix=f'{name}-judge'
+        )
+        self._lock = threading.Lock()
+        self._results: List[Dict[str, Any]] = []
+        self._futures: Dict[Any, int] = {}
+        self._started_at: Dict[int, float] = {}
+        self._outputs: Dict[int, Any] = {}
+        self._finalized = False
+
+        self._stats = {
+            'submitted': 0,
+            'judged': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'skipped_by_deadline': 0,
+            'finalize_wait_seconds': None,
+        }
+
+    # ---------- 接收阶段 ----------
+
+    def submit(self, result: Dict[str, Any]) -> int:
+        """
+        提交一条刚到达的原始结果（非阻塞）
+
+        Returns:
+            结果在最终列表中的序号
+        """
+        if self.streaming_aggregator is not None:
+            try:
+                self.streaming_aggregator.add_result(
+                    _to_streaming_result(result), send_sse=self.send_sse
+                )
+            except Exception as e:
+                api_logger.warning(f"[{self.name}] 流式聚合失败：{e}")
+
+        with self._lock:
+            if self._finalized:
+                raise RuntimeError(f'[{self.name}] 流水线已完成，无法继续提交结果')
+            index = len(self._results)
+            self._results.append(result)
+            self._futures[self._executor.submit(self._run_evaluate, index, result)] = index
+            self._stats['submitted'] += 1
+        return index
+
+    # ---------- 评判阶段 ----------
+
+    def _run_evaluate(self, index: int, result: Dict[str, Any]) -> Any:
+        self._started_at[index] = time.monotonic()
+        # 单次评判预算：不超过 judge_timeout，也不超过整体剩余时间
+        if self.deadline is None:
+            call_deadline = Deadline.after(self.judge_timeout)
+        else:
+            call_deadline = self.deadline.child(self.judge_timeout)
+        if call_deadline.expired():
+            with self._lock:
+                self._stats['skipped_by_deadline'] += 1
+            return self.fallback_fn(result, 'deadline_exceeded')
+        with deadline_scope(call_deadline):
+            return self.evaluate_fn(result)
+
+    # ---------- 汇总阶段 ----------
+
+    def finalize(self, timeout: Optional[float] = None) -> Any:
+        """
+        等待所有评判完成并构建最终结果
+
+        Args:
+            timeout: 整体等待上限（秒），与流水线截止时间取较早者；
+                到期后未完成的评判使用兜底输出。该上限只约束等待，不会传入评判线程，
+                被放弃的评判仍按各自的子截止时间运行完（见模块说明）
+
+        Returns:
+            finalize_fn 的返回值
+        """
+        with self._lock:
+            self._finalized = True
+            pending = dict(self._futures)
+
+        wait_start = time.monotonic()
+        wait_until = wait_start + timeout if timeout is not None else None
+        if self.deadline is not None:
+            wait_until = self.deadline.expires_at if wait_until is None else min(wait_until, self.deadline.expires_at)
+
+        while pending:
+            done, _ = wait(list(pending), timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future, pending.pop(future))
+
+            now = time.monotonic()
+            for future, index in list(pending.items()):
+                started = self._started_at.get(index)
+                if started is not None and now - started > self.judge_timeout:
+                    future.cancel()
+                    pending.pop(future)
+                    self._abandon(index, 'judge_timeout')
+
+            if wait_until is not None and now >= wait_until and pending:
+                api_logger.warning(f"[{self.name}] 汇总等待超时，{len(pending)} 条评判使用兜底结果")
+                for future, index in list(pending.items()):
+                    future.cancel()
+                    self._abandon(index, 'aggregation_timeout')
+                pending.clear()
+
+        # 不等待被放弃的评判线程：它们受子截止时间约束，结束后输出被丢弃
+        self._executor.shutdown(wait=False)
+        self._stats['finalize_wait_seconds'] = round(time.monotonic() - wait_start, 3)
+
+        outputs = [self._outputs[index] for index in range(len(self._results))]
+        api_logger.info(
+            f"[{self.name}] 流水线汇总完成：{len(outputs)} 条，"
+            f"末条结果后等待 {self._stats['finalize_wait_seconds']}s"
+        )
+        return self.finalize_fn(outputs)
+
+    def _collect(self, future, index: int):
+        try:
+            self._outputs[index] = future.result()
+            self._stats['judged'] += 1
+        except Exception as e:
+            api_logger.error(f"[{self.name}] 评判失败（#{index}）：{e}")
+            self._stats['failed'] += 1
+            self._outputs[index] = self.fallback_fn(self._results[index], 'judge_error')
+
+    def _abandon(self, index: int, reason: str):
+        self._stats['timed_out'] += 1
+        self._outputs[index] = self.fallback_fn(self._results[index], reason)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取流水线统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = sum(1 for f in self._futures if not f.done())
+        return stats
+
+
+def _to_streaming_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """把调度器 / NxM 引擎的原始结果映射为流式聚合器使用的字段"""
+    success = result.get('success', True)
+    return {
+        'brand': result.get('brand_name', result.get('brand', 'unknown')),
+        'model': result.get('model', result.get('ai_model', 'unknown')),
+        'question': result.get('question', result.get('original_question', '')),
+        'geo_data': result.get('geo_data'),
+        'error': None if success else (result.get('error') or result.get('error_message') or 'Unknown error'),
+        'error_type': result.get('error_type'),
+    }
@@ -19,6 +19,22 @@ from wechat_backend.repositories.dimension_result_repository import (
     save_dimension_results_batch
 )
 
+from wechat_backend.repositories.trend_rollup_repository import (
+    TrendRollupRepository,
+    get_trend_rollup_repository,
+    write_trend_rollup
+)
+
+from wechat_backend.repositories.diagnosis_geo_repository import (
+    DiagnosisGeoRepository,
+    get_diagnosis_geo_repository
+)
+
+from wechat_backend.repositories.response_blob_repository import (
+    ResponseBlobStore,
+    get_response_blob_store
+)
+
 from wechat_backend.repositories.task_status_repository import (
     save_task_status,
     get_task_status,
@@ -38,6 +54,19 @@ __all__ = [
     'save_dimension_result',
     'get_dimension_results',
     
+    # Trend Rollup
+    'TrendRollupRepository',
+    'get_trend_rollup_repository',
+    'write_trend_rollup',
+
+    # Diagnosis GEO Columns
+    'DiagnosisGeoRepository',
+    'get_diagnosis_geo_repository',
+
+    # Response Blob Store
+    'ResponseBlobStore',
+    'get_response_blob_store',
+
     # Task Status
     'save_task_status',
     'get_task_status',
@@ -0,0 +1,370 @@
+"""
+诊断结果 GEO 字段列式存储
+
+功能：
+- 将 diagnosis_results.geo_data 中的高频字段提升为带索引的类型化列：
+  geo_rank / geo_sentiment / geo_brand_mentioned / geo_interception / geo_source_count
+- cited_sources 移到子表 diagnosis_result_sources，geo_data JSON 不再内嵌信源列表
+- 回填历史数据（可中断后重复执行）
+- 排名、情感、提及率等聚合直接用 SQL 完成，无需逐行解析 JSON
+
+核心原则：
+1. 类型化列是 geo_data 的冗余副本，geo_data 中其他字段保持不变，读取方无需改动
+2. 读取结果时按执行批量回填 cited_sources，对调用方保持原有数据形态
+3. geo_source_count 为 NULL 表示原始 geo_data 没有 cited_sources 字段（或尚未回填）
+4. geo_backfilled = 1 标记已拆分的行（新写入的行直接置 1），回填只处理未标记的行；
+   geo_data 无可提取字段或无法解析的行同样标记，重复回填不会再次扫描
+"""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+from wechat_backend.database_connection_pool import get_db_pool
+from wechat_backend.logging_config import db_logger
+
+# 类型化列：(列名, 类型)
+GEO_COLUMNS = [
+    ('geo_rank', 'INTEGER'),
+    ('geo_sentiment', 'REAL'),
+    ('geo_brand_mentioned', 'INTEGER'),
+    ('geo_interception', 'TEXT'),
+    ('geo_source_count', 'INTEGER'),
+]
+
+_GEO_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_results_brand_model_rank ON diagnosis_results(brand, model, geo_rank)',
+    'CREATE INDEX IF NOT EXISTS idx_results_geo_sentiment ON diagnosis_results(geo_sentiment)',
+    'CREATE INDEX IF NOT EXISTS idx_results_geo_mentioned ON diagnosis_results(geo_brand_mentioned)',
+    'CREATE INDEX IF NOT EXISTS idx_result_sources_result_id ON diagnosis_result_sources(result_id)',
+    'CREATE INDEX IF NOT EXISTS idx_result_sources_execution_id ON diagnosis_result_sources(execution_id)',
+]
+
+_SOURCE_FIELDS = ('url', 'site_name', 'attitude')
+
+_schema_ready = set()
+
+
+@contextmanager
+def get_db_connection():
+    """获取数据库连接上下文管理器"""
+    conn = get_db_pool().get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        db_logger.error(f"数据库操作失败：{e}")
+        raise
+    finally:
+        get_db_pool().return_connection(conn)
+
+
+def ensure_geo_columns(cursor: sqlite3.Cursor) -> bool:
+    """
+    确保类型化列、信源子表和索引存在（同一数据库只执行一次）
+
+    Returns:
+        diagnosis_results 是否为带 geo_data 的明细表结构（旧版整包结构返回 False）
+    """
+    db_key = cursor.connection.execute('PRAGMA database_list').fetchone()[2]
+    if db_key in _schema_ready:
+        return True
+
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(diagnosis_results)').fetchall()}
+    if 'geo_data' not in columns:
+        return False
+
+    for name, column_type in GEO_COLUMNS:
+        if name not in columns:
+            cursor.execute(f'ALTER TABLE diagnosis_results ADD COLUMN {name} {column_type}')
+    if 'geo_backfilled' not in columns:
+        cursor.execute('ALTER TABLE diagnosis_results ADD COLUMN geo_backfilled INTEGER')
+        # 已有类型化列取值的行已由写入路径或此前的回填拆分过
+        cursor.execute('''
+            UPDATE diagnosis_results SET geo_backfilled = 1
+            WHERE geo_rank IS NOT NULL OR geo_sentiment IS NOT NULL
+               OR geo_brand_mentioned IS NOT NULL OR geo_source_count IS NOT NULL
+        ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS diagnosis_result_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            result_id INTEGER NOT NULL,
+            execution_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            url TEXT,
+            site_name TEXT,
+            attitude TEXT,
+            extra TEXT,
+            is_text INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (result_id) REFERENCES diagnosis_results(id)
+        )
+    ''')
+    for index_sql in _GEO_INDEXES:
+        cursor.execute(index_sql)
+
+    _schema_ready.add(db_key)
+    return True
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_flag(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return 1 if value else 0
+    if isinstance(value, str) and value.lower() in ('true', 'false', '1', '0'):
+        return 1 if value.lower() in ('true', '1') else 0
+    return None
+
+
+def split_geo_data(geo_data: Any) -> Tuple[Dict[str, Any], Optional[List[Any]], Dict[str, Any]]:
+    """
+    拆分 geo_data
+
+    Returns:
+        (不含 cited_sources 的 geo_data, cited_sources 列表或 None, 类型化列取值)
+    """
+    if not isinstance(geo_data, dict):
+        return {}, None, {name: None for name, _ in GEO_COLUMNS}
+
+    stored = dict(geo_data)
+    sources = stored.pop('cited_sources', None)
+    if sources is not None and not isinstance(sources, list):
+        # 非列表的信源字段保持原样留在 JSON 中
+        stored['cited_sources'] = sources
+        sources = None
+
+    interception = geo_data.get('interception')
+    fields = {
+        'geo_rank': _to_int(geo_data.get('rank')),
+        'geo_sentiment': _to_float(geo_data.get('sentiment')),
+        'geo_brand_mentioned': _to_flag(geo_data.get('brand_mentioned')),
+        'geo_interception': interception if isinstance(interception, str) else None,
+        'geo_source_count': len(sources) if sources is not None else None,
+    }
+    return stored, sources, fields
+
+
+def insert_cited_sources(cursor: sqlite3.Cursor, result_id: int, execution_id: str, sources: Optional[List[Any]]):
+    """在调用方事务内写入一条结果的信源（先清除旧数据）"""
+    cursor.execute('DELETE FROM diagnosis_result_sources WHERE result_id = ?', (result_id,))
+    if not sources:
+        return
+
+    rows = []
+    for position, source in enumerate(sources):
+        if isinstance(source, dict):
+            extra = {k: v for k, v in source.items() if k not in _SOURCE_FIELDS}
+            rows.append((
+                result_id, execution_id, position,
+                *(None if source.get(k) is None else str(source.get(k)) for k in _SOURCE_FIELDS),
+                json.dumps(extra, ensure_ascii=False) if extra else None, 0
+            ))
+        else:
+            rows.append((result_id, execution_id, position, None, None, None,
+                         json.dumps(source, ensure_ascii=False), 1))
+
+    cursor.executemany('''
+        INSERT INTO diagnosis_result_sources (
+            result_id, execution_id, position, url, site_name, attitude, extra, is_text
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+
+def _row_to_source(row: sqlite3.Row) -> Any:
+    if row['is_text']:
+        return json.loads(row['extra'])
+    source = {}
+    for key in _SOURCE_FIELDS:
+        if row[key] is not None:
+            source[key] = row[key]
+    if row['extra']:
+        source.update(json.loads(row['extra']))
+    return source
+
+
+def attach_cited_sources(conn: sqlite3.Connection, items: List[Dict[str, Any]]):
+    """
+    为已读取的结果回填 geo_data['cited_sources']
+
+    items 需包含 id、geo_data（已解析）和 geo_source_count；
+    未迁移的历史行（geo_data 仍内嵌信源或 geo_source_count 为空）保持原样。
+    """
+    pending = {
+        item['id']: item for item in items
+        if item.get('geo_source_count') is not None
+        and isinstance(item.get('geo_data'), dict)
+        and 'cited_sources' not in item['geo_data']
+    }
+    if not pending:
+        return
+
+    for item in pending.values():
+        item['geo_data']['cited_sources'] = []
+
+    ids = list(pending)
+    previous_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+    try:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = conn.execute(f'''
+                SELECT result_id, url, site_name, attitude, extra, is_text
+                FROM diagnosis_result_sources
+                WHERE result_id IN ({','.join('?' * len(chunk))})
+                ORDER BY result_id, position
+            ''', chunk).fetchall()
+            for row in rows:
+                pending[row['result_id']]['geo_data']['cited_sources'].append(_row_to_source(row))
+    finally:
+        conn.row_factory = previous_factory
+
+
+class DiagnosisGeoRepository:
+    """
+    诊断结果 GEO 字段仓库
+
+    用法：
+        repo = get_diagnosis_geo_repository()
+
+        # 回填历史数据
+        repo.backfill()
+
+        # 各模型在某品牌上的平均排名
+        stats = repo.get_rank_stats_by_model(brand='华为')
+    """
+
+    def __init__(self):
+        with get_db_connection() as conn:
+            ensure_geo_columns(conn.cursor())
+
+    @staticmethod
+    def _cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        # 连接来自共享连接池，只在游标上设置 row_factory
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+
+    def backfill(self, batch_size: int = 500) -> int:
+        """
+        回填历史结果的类型化列和信源子表
+
+        只处理 geo_backfilled 未标记的行，处理后（包括无法解析的行）标记为 1；
+        按 ID 分批，每批一个事务，可中断后重复执行。
+
+        Returns:
+            本次回填的记录数
+        """
+        filled = 0
+        last_id = 0
+        while True:
+            with get_db_connection() as conn:
+                cursor = self._cursor(conn)
+                rows = cursor.execute('''
+                    SELECT id, execution_id, geo_data FROM diagnosis_results
+                    WHERE id > ? AND geo_backfilled IS NULL
+                    ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+
+                for row in rows:
+                    try:
+                        geo_data = json.loads(row['geo_data']) if row['geo_data'] else {}
+                    except (ValueError, TypeError):
+                        # 无法解析的 geo_data 保持原样，只做标记
+                        cursor.execute('UPDATE diagnosis_results SET geo_backfilled = 1 WHERE id = ?', (row['id'],))
+                        continue
+                    stored, sources, fields = split_geo_data(geo_data)
+                    cursor.execute(f'''
+                        UPDATE diagnosis_results
+                        SET geo_data = ?, {', '.join(f'{name} = ?' for name, _ in GEO_COLUMNS)},
+                            geo_backfilled = 1
+                        WHERE id = ?
+                    ''', (json.dumps(stored, ensure_ascii=False),
+                          *(fields[name] for name, _ in GEO_COLUMNS), row['id']))
+                    insert_cited_sources(cursor, row['id'], row['execution_id'], sources)
+                last_id = rows[-1]['id']
+                filled += len(rows)
+
+            db_logger.info(f"[DiagnosisGeo] 已回填 {filled} 条结果（截至 ID {last_id}）")
+
+        return filled
+
+    def get_rank_stats_by_model(
+        self,
+        brand: Optional[str] = None,
+        execution_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按 (品牌, 模型) 聚合排名、情感和提及率
+
+        Returns:
+            [{brand, model, result_count, avg_rank, ranked_count, avg_sentiment, mention_rate, avg_sources}]
+            avg_rank 只统计有效排名（> 0）
+        """
+        where, params = ['1 = 1'], []
+        if brand:
+            where.append('brand = ?')
+            params.append(brand)
+        if execution_ids:
+            where.append(f"execution_id IN ({','.join('?' * len(execution_ids))})")
+            params.extend(execution_ids)
+
+        with get_db_connection() as conn:
+            rows = self._cursor(conn).execute(f'''
+                SELECT brand, model,
+                       COUNT(*) AS result_count,
+                       AVG(CASE WHEN geo_rank > 0 THEN geo_rank END) AS avg_rank,
+                       COUNT(CASE WHEN geo_rank > 0 THEN 1 END) AS ranked_count,
+                       AVG(geo_sentiment) AS avg_sentiment,
+                       AVG(geo_brand_mentioned) AS mention_rate,
+                       AVG(geo_source_count) AS avg_sources
+                FROM diagnosis_results
+                WHERE {' AND '.join(where)}
+                GROUP BY brand, model
+                ORDER BY brand, model
+            ''', params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_sources_by_execution_id(self, execution_id: str) -> List[Dict[str, Any]]:
+        """获取一次执行的全部信源（含所属结果 ID）"""
+        with get_db_connection() as conn:
+            rows = self._cursor(conn).execute('''
+                SELECT result_id, url, site_name, attitude, extra, is_text
+                FROM diagnosis_result_sources
+                WHERE execution_id = ?
+                ORDER BY result_id, position
+            ''', (execution_id,)).fetchall()
+        return [{'result_id': row['result_id'], 'source': _row_to_source(row)} for row in rows]
+
+
+_diagnosis_geo_repo = None
+
+
+def get_diagnosis_geo_repository() -> DiagnosisGeoRepository:
+    """获取全局诊断结果 GEO 字段仓库实例"""
+    global _diagnosis_geo_repo
+    if _diagnosis_geo_repo is None:
+        _diagnosis_geo_repo = DiagnosisGeoRepository()
+    return _diagnosis_geo_repo
@@ -19,6 +19,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 from contextlib import contextmanager
 
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import db_logger, api_logger
 from wechat_backend.database_connection_pool import get_db_pool
 
@@ -96,6 +97,7 @@ class DimensionResultRepository:
         
         db_logger.info("[DimensionResultRepository] 表初始化完成")
     
+    @traced('repo.save_dimension', execution_id_arg='execution_id')
     def save_dimension(
         self,
         execution_id: str,
@@ -408,6 +410,7 @@ def save_dimension_result(
     )
 
 
+@traced('repo.save_dimension_batch', execution_id_arg='execution_id')
 def save_dimension_results_batch(
     results: List[Dict[str, Any]],
     execution_id: str
@@ -19,6 +19,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 from contextlib import contextmanager
 
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import db_logger, api_logger
 from wechat_backend.database_connection_pool import get_db_pool
 
@@ -109,6 +110,7 @@ class ReportSnapshotRepository:
         
         db_logger.info("[ReportSnapshotRepository] 表初始化完成")
     
+    @traced('repo.save_snapshot', execution_id_arg='execution_id')
     def save_snapshot(
         self,
         execution_id: str,
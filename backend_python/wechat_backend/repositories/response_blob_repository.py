@@ -0,0 +1,359 @@
+"""
+AI 原始回答内容寻址存储
+
+功能：
+- 以 SHA-256 为键存储 AI 原始回答，相同内容只保存一份
+- 独立 SQLite 文件（默认 backend_python/response_blobs.db），不占主库空间
+- zstd 压缩（zstandard 为可选依赖，不可用时回退 gzip）
+- 引用计数：引用方写入时 put（+1），删除引用时 release（-1），gc 清除计数归零的内容
+
+引用方：
+- diagnosis_results：超过阈值的 response_content 置空，哈希写入 response_blob 列
+- ai_responses JSONL 日志：response.text 替换为 response.blob，备份文件被清理时释放引用
+
+核心原则：
+1. 小于 RESPONSE_BLOB_MIN_BYTES 的内容仍内联存储，短文本不值得一次额外查询
+2. 读取时按批回填内容，对调用方保持原有数据形态；历史内联数据无需迁移即可读取
+3. 内容已存在时只增加引用计数，不再压缩和写入内容本身
+4. 回收由 data_retention 的每日清理触发
+
+配置（环境变量）:
+    RESPONSE_BLOB_ENABLED: 是否启用，默认 true
+    RESPONSE_BLOB_DB_PATH: 存储文件路径
+    RESPONSE_BLOB_MIN_BYTES: 外置存储的最小内容大小（字节），默认 1024
+    RESPONSE_BLOB_POOL_SIZE: 内容存储连接池大小，默认 5
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from wechat_backend.database_connection_pool import DatabaseConnectionPool, get_db_pool
+from wechat_backend.logging_config import db_logger
+
+# zstd 为可选依赖，不可用时回退到 gzip
+try:
+    import zstandard as _zstd
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _zstd = None
+    _ZSTD_AVAILABLE = False
+
+
+RESPONSE_BLOB_ENABLED = os.getenv('RESPONSE_BLOB_ENABLED', 'true').lower() == 'true'
+RESPONSE_BLOB_DB_PATH = os.getenv('RESPONSE_BLOB_DB_PATH') or str(Path(__file__).parent.parent.parent / 'response_blobs.db')
+RESPONSE_BLOB_MIN_BYTES = int(os.getenv('RESPONSE_BLOB_MIN_BYTES', '1024'))
+RESPONSE_BLOB_POOL_SIZE = int(os.getenv('RESPONSE_BLOB_POOL_SIZE', '5'))
+
+# 存储编码
+ENCODING_RAW = 'raw'
+ENCODING_GZIP = 'gzip'
+ENCODING_ZSTD = 'zstd'
+
+# diagnosis_results 中保存内容哈希的列
+RESPONSE_BLOB_COLUMN = 'response_blob'
+
+_schema_ready = set()
+
+
+def content_hash(text: str) -> str:
+    """内容哈希（SHA-256 十六进制）"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _compress(raw: bytes) -> Tuple[bytes, str]:
+    if _ZSTD_AVAILABLE:
+        data, encoding = _zstd.ZstdCompressor(level=3).compress(raw), ENCODING_ZSTD
+    else:
+        data, encoding = gzip.compress(raw, compresslevel=6), ENCODING_GZIP
+    # 压缩后反而更大（极短或高熵内容）时原样存储
+    if len(data) >= len(raw):
+        return raw, ENCODING_RAW
+    return data, encoding
+
+
+def _decompress(data: Any, encoding: str) -> str:
+    data = bytes(data)
+    if encoding == ENCODING_ZSTD:
+        if not _ZSTD_AVAILABLE:
+            raise ValueError('zstandard 未安装，无法解压 zstd 数据')
+        data = _zstd.ZstdDecompressor().decompress(data)
+    elif encoding == ENCODING_GZIP:
+        data = gzip.decompress(data)
+    return data.decode('utf-8')
+
+
+class ResponseBlobStore:
+    """
+    AI 回答内容存储
+
+    用法：
+        store = get_response_blob_store()
+        blob_hash = store.put(text)          # 引用 +1
+        text = store.get(blob_hash)
+        store.release([blob_hash])           # 引用 -1
+        store.gc()                           # 删除无引用内容
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or RESPONSE_BLOB_DB_PATH)
+        # 内容存储是独立文件，使用自己的连接池（连接已启用 WAL）
+        self._pool = DatabaseConnectionPool(max_connections=RESPONSE_BLOB_POOL_SIZE, db_path=self.db_path)
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_blobs (
+                    hash TEXT PRIMARY KEY,
+                    encoding TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_response_blobs_refcount ON response_blobs(refcount)')
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.return_connection(conn)
+
+    def close(self):
+        """关闭连接池中的连接"""
+        self._pool.close_all()
+
+    def put(self, text: str) -> str:
+        """保存内容并增加一次引用，返回内容哈希"""
+        return self.put_many([text])[0]
+
+    def put_many(self, texts: List[str]) -> List[str]:
+        """
+        批量保存内容（一个事务），每条内容增加一次引用
+
+        Returns:
+            与 texts 一一对应的内容哈希
+        """
+        hashes = [content_hash(text) for text in texts]
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            for blob_hash, text in zip(hashes, texts):
+                # 已存在的内容只增加引用计数
+                updated = conn.execute(
+                    'UPDATE response_blobs SET refcount = refcount + 1, updated_at = ? WHERE hash = ?',
+                    (now, blob_hash)
+                ).rowcount
+                if updated:
+                    continue
+                raw = text.encode('utf-8')
+                data, encoding = _compress(raw)
+                conn.execute('''
+                    INSERT INTO response_blobs (
+                        hash, encoding, data, raw_size, stored_size, refcount, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1, updated_at = excluded.updated_at
+                ''', (blob_hash, encoding, sqlite3.Binary(data), len(raw), len(data), now, now))
+        return hashes
+
+    def get(self, blob_hash: str) -> Optional[str]:
+        """读取内容，不存在返回 None"""
+        return self.get_many([blob_hash]).get(blob_hash)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """批量读取内容，返回 {哈希: 内容}（不存在的哈希不出现在结果中）"""
+        unique = list(dict.fromkeys(h for h in hashes if h))
+        contents = {}
+        with self._connection() as conn:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT hash, encoding, data FROM response_blobs WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for blob_hash, encoding, data in rows:
+                    contents[blob_hash] = _decompress(data, encoding)
+        return contents
+
+    def release(self, hashes: Iterable[str]) -> int:
+        """
+        释放引用（同一哈希出现几次释放几次）
+
+        Returns:
+            实际更新的内容数
+        """
+        counts = Counter(h for h in hashes if h)
+        if not counts:
+            return 0
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            cursor = conn.executemany(
+                'UPDATE response_blobs SET refcount = MAX(refcount - ?, 0), updated_at = ? WHERE hash = ?',
+                [(count, now, blob_hash) for blob_hash, count in counts.items()]
+            )
+            return cursor.rowcount
+
+    def gc(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        删除引用计数为 0 的内容
+
+        Returns:
+            {'deleted_count', 'freed_bytes'}
+        """
+        with self._connection() as conn:
+            count, freed = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM response_blobs WHERE refcount <= 0'
+            ).fetchone()
+            if not dry_run and count:
+                conn.execute('DELETE FROM response_blobs WHERE refcount <= 0')
+        if not dry_run and count:
+            # 回收空闲页，避免文件只增不减（删除已提交，VACUUM 不能在事务内执行；
+            # WAL 模式下 VACUUM 的结果先写入 WAL，随后截断检查点才真正缩小文件）
+            with self._connection() as conn:
+                try:
+                    conn.execute('VACUUM')
+                    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                except sqlite3.OperationalError as e:
+                    db_logger.warning(f"[ResponseBlob] 空间回收失败：{e}")
+            db_logger.info(f"[ResponseBlob] 回收 {count} 条无引用内容，释放 {freed / 1024 / 1024:.2f}MB")
+        return {'deleted_count': count, 'freed_bytes': freed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """存储统计：内容条数、原始/压缩字节数、引用数"""
+        with self._connection() as conn:
+            count, raw_bytes, stored_bytes, refs, unreferenced = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0),
+                       COALESCE(SUM(refcount), 0), COUNT(CASE WHEN refcount <= 0 THEN 1 END)
+                FROM response_blobs
+            ''').fetchone()
+        return {
+            'blob_count': count,
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'reference_count': refs,
+            'unreferenced_count': unreferenced,
+            'compression_ratio': round(stored_bytes / raw_bytes, 3) if raw_bytes else None,
+        }
+
+
+_response_blob_store = None
+
+
+def get_response_blob_store() -> ResponseBlobStore:
+    """获取全局回答内容存储实例"""
+    global _response_blob_store
+    if _response_blob_store is None:
+        _response_blob_store = ResponseBlobStore()
+    return _response_blob_store
+
+
+# ==================== diagnosis_results 接入 ====================
+
+def ensure_response_blob_column(cursor: sqlite3.Cursor):
+    """确保 diagnosis_results.response_blob 列存在（同一数据库只执行一次）"""
+    db_key = cursor.connection.execute('PRAGMA database_list').fetchone()[2]
+    if db_key in _schema_ready:
+        return
+
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(diagnosis_results)').fetchall()}
+    if columns and RESPONSE_BLOB_COLUMN not in columns:
+        cursor.execute(f'ALTER TABLE diagnosis_results ADD COLUMN {RESPONSE_BLOB_COLUMN} TEXT')
+    _schema_ready.add(db_key)
+
+
+def externalize_response(text: Any, store: Optional[ResponseBlobStore] = None) -> Tuple[Any, Optional[str]]:
+    """
+    按大小决定回答内容是否外置
+
+    Returns:
+        (写入 response_content 的值, 内容哈希或 None)；外置时 response_content 为空字符串，
+        存储不可用时回退为内联
+    """
+    if not RESPONSE_BLOB_ENABLED or not isinstance(text, str) or len(text.encode('utf-8')) < RESPONSE_BLOB_MIN_BYTES:
+        return text, None
+    try:
+        return '', (store or get_response_blob_store()).put(text)
+    except Exception as e:
+        db_logger.warning(f"[ResponseBlob] 外置存储失败，回退内联：{e}")
+        return text, None
+
+
+def attach_response_content(items: List[Dict[str, Any]], store: Optional[ResponseBlobStore] = None):
+    """
+    为已读取的结果回填 response_content（以及已构建的 response['content']）
+
+    只处理 response_blob 非空的行，内联存储的历史数据保持原样。
+    """
+    pending = [item for item in items if item.get(RESPONSE_BLOB_COLUMN)]
+    if not pending:
+        return
+
+    contents = (store or get_response_blob_store()).get_many(item[RESPONSE_BLOB_COLUMN] for item in pending)
+    for item in pending:
+        content = contents.get(item[RESPONSE_BLOB_COLUMN])
+        if content is None:
+            db_logger.warning(f"[ResponseBlob] 内容缺失：{item[RESPONSE_BLOB_COLUMN]}（结果 {item.get('id')}）")
+            continue
+        item['response_content'] = content
+        if isinstance(item.get('response'), dict):
+            item['response']['content'] = content
+
+
+def externalize_diagnosis_responses(
+    store: Optional[ResponseBlobStore] = None,
+    batch_size: int = 200
+) -> int:
+    """
+    将历史 diagnosis_results 中超过阈值的内联回答迁移到内容存储
+
+    按 ID 分批，每批先写入内容存储再更新主库；可中断后重复执行。
+    主库连接取自全局连接池。
+
+    Returns:
+        本次迁移的记录数
+    """
+    store = store or get_response_blob_store()
+    migrated = 0
+    last_id = 0
+    conn = get_db_pool().get_connection()
+    try:
+        ensure_response_blob_column(conn.cursor())
+        conn.commit()
+        while True:
+            rows = conn.execute(f'''
+                SELECT id, response_content FROM diagnosis_results
+                WHERE id > ? AND {RESPONSE_BLOB_COLUMN} IS NULL AND LENGTH(CAST(response_content AS BLOB)) >= ?
+                ORDER BY id LIMIT ?
+            ''', (last_id, RESPONSE_BLOB_MIN_BYTES, batch_size)).fetchall()
+            if not rows:
+                break
+
+            hashes = store.put_many([content for _, content in rows])
+            try:
+                conn.executemany(
+                    f"UPDATE diagnosis_results SET response_content = '', {RESPONSE_BLOB_COLUMN} = ? WHERE id = ?",
+                    [(blob_hash, row_id) for blob_hash, (row_id, _) in zip(hashes, rows)]
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                store.release(hashes)
+                raise
+            last_id = rows[-1][0]
+            migrated += len(rows)
+            db_logger.info(f"[ResponseBlob] 已迁移 {migrated} 条回答（截至 ID {last_id}）")
+    finally:
+        get_db_pool().return_connection(conn)
+    return migrated
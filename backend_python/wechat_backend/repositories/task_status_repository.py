@@ -12,6 +12,7 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from contextlib import contextmanager
 
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import db_logger, api_logger
 from wechat_backend.database_connection_pool import get_db_pool
 
@@ -31,6 +32,7 @@ def get_db_connection():
         get_db_pool().return_connection(conn)
 
 
+@traced('repo.save_task_status', execution_id_arg='task_id')
 def save_task_status(
     task_id: str,
     stage: str = 'init',
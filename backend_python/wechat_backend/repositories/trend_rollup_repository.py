@@ -0,0 +1,336 @@
+"""
+品牌趋势汇总仓库
+
+功能：
+- 每次测试完成时写入一行执行级指标汇总（总分、平均情感分、GEO 排名、各模型排名、SOV、负面证据）
+- 为趋势图、历史对比和预测接口提供按 (brand_name, test_date) 索引的轻量查询
+- 回填历史 test_records
+
+核心原则：
+1. 汇总只在写入测试记录时计算一次，读取路径不再解析 detailed_results / results_summary
+2. 汇总写入与测试记录写入在同一事务内，失败不影响测试记录本身
+"""
+
+import gzip
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from wechat_backend.database_connection_pool import get_db_pool
+from wechat_backend.logging_config import db_logger
+
+# 负面内容关键词（与历史 CruiseController 对比逻辑一致）
+NEGATIVE_KEYWORDS = ['不好', '差', '问题', '缺点', '负面', '糟糕', '失望']
+
+_ROLLUP_COLUMNS = [
+    'record_id', 'execution_id', 'brand_name', 'test_date', 'overall_score',
+    'avg_sentiment', 'rank', 'model_ranks', 'sov', 'negative_count', 'negative_evidence', 'total_results'
+]
+
+# 负面证据片段长度（与历史 CruiseController 对比逻辑一致）
+NEGATIVE_FRAGMENT_LENGTH = 100
+
+_table_ready = set()
+
+
+@contextmanager
+def get_db_connection():
+    """获取数据库连接上下文管理器"""
+    conn = get_db_pool().get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        db_logger.error(f"数据库操作失败：{e}")
+        raise
+    finally:
+        get_db_pool().return_connection(conn)
+
+
+def ensure_trend_rollup_table(cursor: sqlite3.Cursor):
+    """确保汇总表存在（同一数据库只执行一次）"""
+    db_key = cursor.connection.execute('PRAGMA database_list').fetchone()[2]
+    if db_key in _table_ready:
+        return
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS brand_trend_rollup (
+            record_id INTEGER PRIMARY KEY,
+            execution_id TEXT,
+            brand_name TEXT NOT NULL,
+            test_date TEXT NOT NULL,
+            overall_score REAL,
+            avg_sentiment REAL,
+            rank INTEGER,
+            model_ranks TEXT,
+            sov REAL,
+            negative_count INTEGER DEFAULT 0,
+            negative_evidence TEXT,
+            total_results INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(brand_trend_rollup)')}
+    if 'negative_evidence' not in columns:
+        cursor.execute('ALTER TABLE brand_trend_rollup ADD COLUMN negative_evidence TEXT')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_trend_rollup_brand_date ON brand_trend_rollup(brand_name, test_date)'
+    )
+    _table_ready.add(db_key)
+
+
+def decode_record_payload(raw: Any, default: Any) -> Any:
+    """
+    解析 test_records 中的 JSON 字段
+
+    兼容三种存储形式：Python 对象、JSON 文本、gzip 压缩后以 latin-1 解码的文本。
+    """
+    if raw is None or raw == '':
+        return default
+    if not isinstance(raw, (str, bytes)):
+        return raw
+    try:
+        return json.loads(raw)
+    except (ValueError, TypeError):
+        pass
+    try:
+        data = raw.encode('latin-1') if isinstance(raw, str) else raw
+        return json.loads(gzip.decompress(data).decode('utf-8'))
+    except Exception:
+        return default
+
+
+def _result_brand(result: Dict[str, Any]) -> str:
+    return result.get('brand') or result.get('brand_name') or ''
+
+
+def _result_model(result: Dict[str, Any]) -> str:
+    return result.get('aiModel') or result.get('ai_model') or result.get('model') or 'unknown'
+
+
+def _geo_rank(result: Dict[str, Any]) -> Optional[int]:
+    geo_data = result.get('geo_data') or result.get('geo_analysis') or {}
+    if not isinstance(geo_data, dict):
+        return None
+    rank = geo_data.get('rank')
+    if isinstance(rank, (int, float)) and rank > 0:
+        return int(rank)
+    return None
+
+
+def compute_trend_rollup(
+    brand_name: str,
+    overall_score: Optional[float],
+    detailed_results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    计算一次执行的趋势指标
+
+    Returns:
+        {overall_score, avg_sentiment, rank, model_ranks, sov, negative_count, negative_evidence, total_results}
+        rank 为主品牌 GEO 排名的均值（四舍五入），没有 GEO 排名时为 None
+    """
+    results = [r for r in (detailed_results or []) if isinstance(r, dict)]
+    main_brand = (brand_name or '').lower()
+
+    # 平均情感分
+    sentiments = [r['sentiment_score'] for r in results if r.get('sentiment_score') is not None]
+    avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else None
+
+    # 排名与各模型排名：取 GEO 分析中主品牌排名的均值
+    ranks_by_model: Dict[str, List[int]] = {}
+    for r in results:
+        geo_rank = _geo_rank(r)
+        if geo_rank is not None and _result_brand(r).lower() == main_brand:
+            ranks_by_model.setdefault(_result_model(r), []).append(geo_rank)
+    model_ranks = {
+        model: round(sum(values) / len(values), 2)
+        for model, values in ranks_by_model.items()
+    }
+    geo_ranks = [rank for values in ranks_by_model.values() for rank in values]
+    rank = round(sum(geo_ranks) / len(geo_ranks)) if geo_ranks else None
+
+    # SOV：主品牌被提及次数占所有品牌提及次数的比例
+    brands = {_result_brand(r) for r in results if _result_brand(r)} | ({brand_name} if brand_name else set())
+    mentions = {brand: 0 for brand in brands}
+    for r in results:
+        response = str(r.get('response') or '').lower()
+        if not response:
+            continue
+        for brand in brands:
+            if brand.lower() in response:
+                mentions[brand] += 1
+    total_mentions = sum(mentions.values())
+    sov = round(mentions.get(brand_name, 0) / total_mentions, 4) if total_mentions else None
+
+    # 负面证据（对比接口的 evidence_chain）
+    negative_evidence = []
+    for r in results:
+        if not r.get('sentiment_score'):
+            continue
+        response = str(r.get('response') or '').lower()
+        if any(keyword in response for keyword in NEGATIVE_KEYWORDS):
+            negative_evidence.append({
+                'negative_fragment': response[:NEGATIVE_FRAGMENT_LENGTH],
+                'associated_url': 'unknown',
+                'source_name': _result_model(r),
+                'risk_level': 'Medium'
+            })
+
+    return {
+        'overall_score': overall_score,
+        'avg_sentiment': avg_sentiment,
+        'rank': rank,
+        'model_ranks': model_ranks,
+        'sov': sov,
+        'negative_count': len(negative_evidence),
+        'negative_evidence': negative_evidence,
+        'total_results': len(results),
+    }
+
+
+def write_trend_rollup(
+    cursor: sqlite3.Cursor,
+    record_id: int,
+    brand_name: str,
+    test_date: str,
+    overall_score: Optional[float],
+    detailed_results: Any,
+    execution_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    在调用方的事务内写入（或覆盖）一条趋势汇总
+
+    Args:
+        cursor: 与测试记录写入共用的游标
+        detailed_results: 详细结果（对象或 test_records 中的原始文本）
+    """
+    ensure_trend_rollup_table(cursor)
+    rollup = compute_trend_rollup(brand_name, overall_score, decode_record_payload(detailed_results, []))
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO brand_trend_rollup (
+            record_id, execution_id, brand_name, test_date, overall_score,
+            avg_sentiment, rank, model_ranks, sov, negative_count, negative_evidence, total_results
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        record_id, execution_id, brand_name, test_date, rollup['overall_score'],
+        rollup['avg_sentiment'], rollup['rank'],
+        json.dumps(rollup['model_ranks'], ensure_ascii=False), rollup['sov'],
+        rollup['negative_count'], json.dumps(rollup['negative_evidence'], ensure_ascii=False),
+        rollup['total_results']
+    ))
+    return rollup
+
+
+class TrendRollupRepository:
+    """
+    品牌趋势汇总仓库
+
+    用法：
+        repo = get_trend_rollup_repository()
+
+        # 趋势数据
+        points = repo.get_trend('华为', '2026-01-01 00:00:00')
+
+        # 回填历史记录
+        repo.backfill()
+    """
+
+    def __init__(self):
+        with get_db_connection() as conn:
+            ensure_trend_rollup_table(conn.cursor())
+
+    @staticmethod
+    def _cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        # 连接来自共享连接池，只在游标上设置 row_factory
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        data = {column: row[column] for column in _ROLLUP_COLUMNS}
+        data['model_ranks'] = json.loads(data['model_ranks']) if data['model_ranks'] else {}
+        data['negative_evidence'] = json.loads(data['negative_evidence']) if data['negative_evidence'] else []
+        return data
+
+    def _select(self, where: str, params: tuple, suffix: str = '') -> List[Dict[str, Any]]:
+        with get_db_connection() as conn:
+            rows = self._cursor(conn).execute(
+                f"SELECT {', '.join(_ROLLUP_COLUMNS)} FROM brand_trend_rollup WHERE {where} {suffix}",
+                params
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_trend(self, brand_name: str, start_date: str) -> List[Dict[str, Any]]:
+        """获取品牌在 start_date 之后的汇总，按时间升序"""
+        return self._select('brand_name = ? AND test_date >= ?', (brand_name, start_date),
+                            'ORDER BY test_date ASC')
+
+    def get_by_record_id(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """根据测试记录 ID 获取汇总"""
+        rows = self._select('record_id = ?', (record_id,))
+        return rows[0] if rows else None
+
+    def get_previous(self, brand_name: str, before_date: str) -> Optional[Dict[str, Any]]:
+        """获取品牌在 before_date 之前的最近一条汇总"""
+        rows = self._select('brand_name = ? AND test_date < ?', (brand_name, before_date),
+                            'ORDER BY test_date DESC LIMIT 1')
+        return rows[0] if rows else None
+
+    def backfill(self, batch_size: int = 200, brand_name: Optional[str] = None) -> int:
+        """
+        回填尚无汇总的历史测试记录
+
+        按记录 ID 分批处理，每批一个事务，可中断后重复执行。
+
+        Returns:
+            本次回填的记录数
+        """
+        filled = 0
+        last_id = 0
+        while True:
+            with get_db_connection() as conn:
+                sql = '''
+                    SELECT t.id, t.brand_name, t.test_date, t.overall_score, t.detailed_results
+                    FROM test_records t
+                    LEFT JOIN brand_trend_rollup r ON r.record_id = t.id
+                    WHERE r.record_id IS NULL AND t.id > ? AND t.brand_name IS NOT NULL
+                '''
+                params = [last_id]
+                if brand_name:
+                    sql += ' AND t.brand_name = ?'
+                    params.append(brand_name)
+                sql += ' ORDER BY t.id LIMIT ?'
+                params.append(batch_size)
+
+                cursor = self._cursor(conn)
+                rows = cursor.execute(sql, params).fetchall()
+                if not rows:
+                    break
+
+                for row in rows:
+                    write_trend_rollup(
+                        cursor, row['id'], row['brand_name'], row['test_date'] or '',
+                        row['overall_score'], row['detailed_results']
+                    )
+                last_id = rows[-1]['id']
+                filled += len(rows)
+
+            db_logger.info(f"[TrendRollup] 已回填 {filled} 条记录（截至 ID {last_id}）")
+
+        return filled
+
+
+_trend_rollup_repo = None
+
+
+def get_trend_rollup_repository() -> TrendRollupRepository:
+    """获取全局趋势汇总仓库实例"""
+    global _trend_rollup_repo
+    if _trend_rollup_repo is None:
+        _trend_rollup_repo = TrendRollupRepository()
+    return _trend_rollup_repo
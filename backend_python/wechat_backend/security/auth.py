@@ -8,10 +8,16 @@ try:
 except ImportError:
     jwt = None
 
+import os
+import time
 import hashlib
 import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from pathlib import Path
+from typing import Callable, Dict, Optional, List, Tuple
 import logging
 from functools import wraps
 from flask import request, jsonify, g
@@ -37,6 +43,17 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 已验证令牌缓存：最大条目数，以及无 exp 声明的令牌的最长缓存时间（秒）
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_TOKEN_CACHE_MAX_ENTRIES', '10000'))
+AUTH_TOKEN_CACHE_MAX_TTL = int(os.getenv('AUTH_TOKEN_CACHE_MAX_TTL', '300'))
+
+# 吊销状态共享存储：sqlite（多 worker / 重启后共享，默认与限流状态同一文件）或 memory（仅本进程）
+AUTH_REVOCATION_BACKEND = os.getenv('AUTH_REVOCATION_BACKEND', 'sqlite')
+AUTH_REVOCATION_DB_PATH = (os.getenv('AUTH_REVOCATION_DB_PATH') or os.getenv('RATE_LIMIT_DB_PATH')
+                           or str(Path(__file__).parent.parent.parent / 'rate_limits.db'))
+# 本进程吊销快照的刷新间隔（秒），即其他 worker 的吊销最迟多久在本进程生效
+AUTH_REVOCATION_REFRESH_INTERVAL = float(os.getenv('AUTH_REVOCATION_REFRESH_INTERVAL', '1'))
+
 
 class AuthenticationError(Exception):
     """身份验证错误"""
@@ -48,15 +65,293 @@ class AuthorizationError(Exception):
     pass
 
 
+def token_digest(token: str) -> str:
+    """令牌摘要（缓存与吊销只保存摘要，不保存令牌原文）"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class _SQLiteRevocationStore:
+    """
+    SQLite WAL 共享吊销存储
+
+    保存用户吊销代数与单个令牌摘要（保留到令牌过期），每个进程复用一个连接。
+    """
+
+    def __init__(self, db_path: str = AUTH_REVOCATION_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS auth_revoked_users (
+                user_id TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS auth_revoked_tokens (
+                digest TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+    def user_generation(self, user_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT generation FROM auth_revoked_users WHERE user_id = ?', (user_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def revoke_user(self, user_id: str) -> int:
+        """用户吊销代数加一，返回新代数"""
+        with self._lock:
+            return self._conn.execute(
+                'INSERT INTO auth_revoked_users (user_id, generation) VALUES (?, 1) '
+                'ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1 RETURNING generation',
+                (user_id,)
+            ).fetchone()[0]
+
+    def revoke_token(self, digest: str, expires_at: float, now: float):
+        """记录吊销的令牌，并顺带删除已过期的记录"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'INSERT INTO auth_revoked_tokens (digest, expires_at) VALUES (?, ?) '
+                    'ON CONFLICT(digest) DO UPDATE SET expires_at = MAX(expires_at, excluded.expires_at)',
+                    (digest, expires_at)
+                )
+                self._conn.execute('DELETE FROM auth_revoked_tokens WHERE expires_at <= ?', (now,))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def load(self, now: float) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """读取全部未过期的令牌吊销记录与用户吊销代数"""
+        with self._lock:
+            tokens = dict(self._conn.execute(
+                'SELECT digest, expires_at FROM auth_revoked_tokens WHERE expires_at > ?', (now,)
+            ).fetchall())
+            users = dict(self._conn.execute('SELECT user_id, generation FROM auth_revoked_users').fetchall())
+        return tokens, users
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class VerifiedTokenCache:
+    """
+    已验证令牌缓存（LRU，线程安全）
+
+    键为 (密钥指纹, 令牌摘要)，值为验签通过的 claims，在令牌 exp 时过期。
+    高频轮询（/api/test-progress、/test/status）重复携带同一令牌时，
+    认证只需一次哈希查找，无需重复验签。
+
+    吊销：
+    - revoke_token：单个令牌在其 exp 之前一律拒绝（即使签名有效）
+    - revoke_user：该用户的吊销代数加一，此前签发（rev_gen 声明小于当前代数）的令牌一律拒绝；
+      不用 iat 比较，因为 iat 只精确到秒，吊销后同一秒内签发的新令牌会被误判
+    - add_revocation_hook：吊销时回调
+
+    吊销写入共享存储（AUTH_REVOCATION_BACKEND=sqlite），多个 gunicorn worker 与重启后的进程
+    共享同一份吊销状态；判定读取本进程快照，快照每 refresh_interval 秒从共享存储刷新。
+    """
+
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_MAX_ENTRIES,
+                 backend: str = AUTH_REVOCATION_BACKEND, db_path: str = None,
+                 refresh_interval: float = AUTH_REVOCATION_REFRESH_INTERVAL):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.db_path = db_path or AUTH_REVOCATION_DB_PATH
+        self.refresh_interval = refresh_interval
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._revoked_tokens: Dict[str, float] = {}   # 令牌摘要 -> 吊销记录过期时间
+        self._revoked_users: Dict[str, int] = {}      # user_id -> 吊销代数
+        self._hooks: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+        self._store = None
+        self._store_pid = None
+        self._refreshed_at = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> Optional[_SQLiteRevocationStore]:
+        """共享存储（每个进程首次使用时打开，不可用时为 None，退化为进程内吊销）"""
+        if self._store_pid != os.getpid():
+            with self._lock:
+                if self._store_pid != os.getpid():
+                    self._store = None
+                    self._refreshed_at = None
+                    if self.backend == 'sqlite':
+                        try:
+                            self._store = _SQLiteRevocationStore(self.db_path)
+                        except sqlite3.Error as e:
+                            logger.warning(f"Shared revocation store unavailable, falling back to per-process revocation: {e}")
+                    self._store_pid = os.getpid()
+        return self._store
+
+    def _refresh(self):
+        """快照超过 refresh_interval 时从共享存储重新加载"""
+        store = self.store
+        if store is None:
+            return
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        wall_now = time.time()
+        try:
+            tokens, users = store.load(wall_now)
+        except sqlite3.Error as e:
+            logger.warning(f"刷新令牌吊销状态失败，沿用本地快照：{e}")
+            return
+        with self._lock:
+            # 与加载期间本进程新写入的吊销合并，快照不回退
+            for user_id, generation in self._revoked_users.items():
+                if generation > users.get(user_id, 0):
+                    users[user_id] = generation
+            for digest, expires_at in self._revoked_tokens.items():
+                if expires_at > wall_now:
+                    tokens.setdefault(digest, expires_at)
+            self._revoked_tokens = tokens
+            self._revoked_users = users
+            self._refreshed_at = now
+
+    def get(self, key_id: str, token: str) -> Optional[Dict]:
+        """命中且未过期、未吊销时返回 claims 副本"""
+        key = (key_id, token_digest(token))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key_id: str, token: str, claims: Dict):
+        exp = claims.get('exp')
+        now = time.time()
+        expires_at = float(exp) if isinstance(exp, (int, float)) else now + AUTH_TOKEN_CACHE_MAX_TTL
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[(key_id, token_digest(token))] = (expires_at, dict(claims))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str, claims: Dict) -> bool:
+        """令牌或其用户是否已被吊销"""
+        self._refresh()
+        with self._lock:
+            if token_digest(token) in self._revoked_tokens:
+                return True
+            user_id = claims.get('user_id') or claims.get('openid')
+            generation = self._revoked_users.get(str(user_id)) if user_id is not None else None
+        if generation is None:
+            return False
+        token_generation = claims.get('rev_gen', 0)
+        return not isinstance(token_generation, int) or token_generation < generation
+
+    def user_generation(self, user_id: str) -> int:
+        """用户当前吊销代数，签发令牌时写入 rev_gen 声明（直接读共享存储，不用快照）"""
+        store = self.store
+        if store is not None:
+            try:
+                return store.user_generation(str(user_id))
+            except sqlite3.Error as e:
+                logger.warning(f"读取用户吊销代数失败，使用本地快照：{e}")
+        with self._lock:
+            return self._revoked_users.get(str(user_id), 0)
+
+    def revoke_token(self, token: str, expires_at: float = None):
+        """吊销单个令牌，记录保留到令牌过期（过期时间未知时保留 24 小时）"""
+        digest = token_digest(token)
+        expires_at = expires_at or time.time() + 86400
+        store = self.store
+        if store is not None:
+            store.revoke_token(digest, expires_at, time.time())
+        with self._lock:
+            self._revoked_tokens[digest] = expires_at
+            for key in [key for key in self._entries if key[1] == digest]:
+                del self._entries[key]
+            self._purge_revocations()
+        self._notify('token', digest)
+
+    def revoke_user(self, user_id: str):
+        """吊销用户当前所有令牌（如登出全部设备、封禁）"""
+        user_id = str(user_id)
+        store = self.store
+        generation = store.revoke_user(user_id) if store is not None else None
+        with self._lock:
+            if generation is None:
+                generation = self._revoked_users.get(user_id, 0) + 1
+            self._revoked_users[user_id] = generation
+            for key, (_, claims) in list(self._entries.items()):
+                if str(claims.get('user_id') or claims.get('openid')) == user_id:
+                    del self._entries[key]
+        self._notify('user', user_id)
+
+    def add_revocation_hook(self, hook: Callable[[str, str], None]):
+        """注册吊销回调 hook(kind, value)，kind 为 'token'（值为摘要）或 'user'"""
+        self._hooks.append(hook)
+
+    def _notify(self, kind: str, value: str):
+        for hook in list(self._hooks):
+            try:
+                hook(kind, value)
+            except Exception as e:
+                logger.warning(f"令牌吊销回调失败：{e}")
+
+    def _purge_revocations(self):
+        now = time.time()
+        for digest in [d for d, exp in self._revoked_tokens.items() if exp <= now]:
+            del self._revoked_tokens[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revoked_tokens': len(self._revoked_tokens),
+                'revoked_users': len(self._revoked_users),
+            }
+
+
+_verified_token_cache = VerifiedTokenCache()
+
+
+def get_verified_token_cache() -> VerifiedTokenCache:
+    """获取全局已验证令牌缓存"""
+    return _verified_token_cache
+
+
 class JWTManager:
     """JWT管理器"""
 
-    def __init__(self, secret_key: str = None, algorithm: str = 'HS256'):
+    def __init__(self, secret_key: str = None, algorithm: str = 'HS256',
+                 token_cache: VerifiedTokenCache = None):
         if jwt is None:
             raise RuntimeError("PyJWT is required for JWT functionality. Please install it with 'pip install PyJWT'")
 
         self.secret = secret_key or Config.SECRET_KEY
         self.algorithm = algorithm
+        self.token_cache = token_cache or _verified_token_cache
+        # 密钥指纹：不同密钥 / 算法验证的结果互不复用
+        self._key_id = hashlib.sha256(f"{self.algorithm}:{self.secret}".encode('utf-8')).hexdigest()[:16]
 
     def generate_token(self, user_id: str, expires_delta: timedelta = None, additional_claims: Dict = None) -> str:
         """生成JWT令牌"""
@@ -76,21 +371,42 @@ class JWTManager:
         if additional_claims:
             payload.update(additional_claims)
 
+        # 用户被吊销过时记录签发时的吊销代数，吊销之后签发的令牌不受影响
+        generation = self.token_cache.user_generation(user_id)
+        if generation:
+            payload['rev_gen'] = generation
+
         token = jwt.encode(payload, self.secret, algorithm=self.algorithm)
         return token
 
     def decode_token(self, token: str) -> Dict:
-        """解码JWT令牌"""
+        """解码JWT令牌（验签结果缓存到令牌过期）"""
         if jwt is None:
             raise RuntimeError("PyJWT is required for JWT functionality")
 
+        payload = self.token_cache.get(self._key_id, token)
+        if payload is None:
+            try:
+                payload = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+            except jwt.ExpiredSignatureError:
+                raise AuthenticationError("令牌已过期")
+            except jwt.InvalidTokenError:
+                raise AuthenticationError("无效的令牌")
+            self.token_cache.put(self._key_id, token, payload)
+
+        if self.token_cache.is_revoked(token, payload):
+            raise AuthenticationError("令牌已吊销")
+        return payload
+
+    def revoke_token(self, token: str):
+        """吊销令牌（如登出）"""
+        expires_at = None
         try:
-            payload = jwt.decode(token, self.secret, algorithms=[self.algorithm])
-            return payload
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationError("令牌已过期")
+            exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+            expires_at = float(exp) if isinstance(exp, (int, float)) else None
         except jwt.InvalidTokenError:
-            raise AuthenticationError("无效的令牌")
+            pass
+        self.token_cache.revoke_token(token, expires_at)
 
     def verify_token(self, token: str, expected_user_id: str = None) -> bool:
         """验证JWT令牌"""
@@ -298,12 +614,17 @@ def is_authenticated() -> bool:
     return getattr(g, 'is_authenticated', False)
 
 
-# 全局实例
+# 全局实例（每个进程只构造一次，密钥与令牌缓存在请求间复用）
 try:
     jwt_manager = JWTManager()
 except RuntimeError:
     # 如果JWT不可用，设置为None，但不影响其他功能
     jwt_manager = None
 
+
+def get_jwt_manager() -> Optional[JWTManager]:
+    """获取全局 JWT 管理器，PyJWT 不可用时为 None"""
+    return jwt_manager
+
 access_control = AccessControl()
 password_hasher = PasswordHasher()
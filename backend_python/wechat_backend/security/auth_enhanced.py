@@ -88,26 +88,23 @@ def is_strict_auth_endpoint(path: str) -> bool:
     可选认证的端点：
     - /api/perform-brand-test (允许匿名用户使用)
     """
-    # 严格认证的端点列表
-    strict_endpoints = [
-        '/api/test-progress',
-        '/api/test-history',
-        '/api/user/',
-        '/api/user_info',
-        '/api/user/profile',
-        '/api/user/update',
-        '/api/saved-results/',
-        '/api/deep-intelligence/',
-        '/api/dashboard/aggregate',
-        '/api/admin/',
-        '/admin/',
-    ]
-    
-    for endpoint in strict_endpoints:
-        if path.startswith(endpoint):
-            return True
-    
-    return False
+    return path.startswith(_STRICT_ENDPOINT_PREFIXES)
+
+
+# 严格认证的端点前缀（元组供 str.startswith 一次匹配，中间件每个请求都会调用）
+_STRICT_ENDPOINT_PREFIXES = (
+    '/api/test-progress',
+    '/api/test-history',
+    '/api/user/',
+    '/api/user_info',
+    '/api/user/profile',
+    '/api/user/update',
+    '/api/saved-results/',
+    '/api/deep-intelligence/',
+    '/api/dashboard/aggregate',
+    '/api/admin/',
+    '/admin/',
+)
 
 
 def require_strict_auth(f):
@@ -140,7 +137,7 @@ def require_strict_auth(f):
         # 2. 验证 JWT Token
         if auth_header:
             try:
-                from wechat_backend.security.auth import JWTManager
+                from wechat_backend.security.auth import get_jwt_manager
                 
                 if not auth_header.startswith('Bearer '):
                     return jsonify({
@@ -150,7 +147,10 @@ def require_strict_auth(f):
                     }), 401
                 
                 token = auth_header.split(' ')[1]
-                jwt_manager = JWTManager()
+                # 进程级 JWT 管理器：重复携带的令牌命中已验证缓存，无需再次验签
+                jwt_manager = get_jwt_manager()
+                if jwt_manager is None:
+                    raise RuntimeError("PyJWT is required for JWT functionality")
                 payload = jwt_manager.decode_token(token)
                 
                 # 将用户信息存入 Flask g 对象
@@ -331,12 +331,12 @@ STRICT_AUTH_ENDPOINTS = [
 ]
 
 
+_STRICT_AUTH_PREFIXES = tuple(STRICT_AUTH_ENDPOINTS)
+
+
 def check_endpoint_requires_auth(path: str) -> bool:
     """检查端点是否需要严格认证"""
-    for endpoint in STRICT_AUTH_ENDPOINTS:
-        if path.startswith(endpoint):
-            return True
-    return False
+    return path.startswith(_STRICT_AUTH_PREFIXES)
 
 
 if __name__ == '__main__':
@@ -1,20 +1,52 @@
 """
 API限流模块
 提供多种限流策略和实现
+
+默认使用 GCRA（通用信元速率算法）限流器：
+- 每个键只保存一个浮点数 TAT（理论到达时间），状态 O(1)
+- 状态保存在 SQLite WAL 表中，gunicorn 多个 worker 共享同一限额
+- 判定在进程内存中完成，各进程的消耗由后台线程按秒批量合并到共享表
+- TAT 早于当前时间的键与全新键等价，定期清理，不会随 IP 数无限增长
+- X-RateLimit-* 头由同一份状态计算
+
+配置（环境变量）:
+    RATE_LIMIT_BACKEND: sqlite（默认，跨进程共享）或 memory（仅进程内）
+    RATE_LIMIT_DB_PATH: 限流状态数据库路径，默认 backend_python/rate_limits.db
+    RATE_LIMIT_CACHE_MAX_KEYS: 进程内缓存最大键数，默认 10000
+    RATE_LIMIT_SWEEP_INTERVAL: 清理空闲键的间隔（秒），默认 60
+    RATE_LIMIT_SYNC_INTERVAL: 本进程消耗合并到共享表的间隔（秒），默认 1
+    POLLING_RATE_LIMIT / POLLING_RATE_WINDOW: 轮询端点限额，默认每 60 秒 600 次
 """
 
+import os
+import math
 import time
+import sqlite3
 import threading
-from collections import defaultdict, deque
-from typing import Dict, Optional, Callable
+from collections import defaultdict, deque, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Callable, Tuple
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'sqlite')
+RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH') or str(Path(__file__).parent.parent.parent / 'rate_limits.db')
+RATE_LIMIT_CACHE_MAX_KEYS = int(os.getenv('RATE_LIMIT_CACHE_MAX_KEYS', '10000'))
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv('RATE_LIMIT_SWEEP_INTERVAL', '60'))
+RATE_LIMIT_SYNC_INTERVAL = float(os.getenv('RATE_LIMIT_SYNC_INTERVAL', '1'))
+
+# 轮询端点（/test/status 等）的限额：小程序轮询间隔 150–2000ms（最快约 400 次/分钟），
+# 按 请求路径（含任务 ID）+ IP 计数，运营商 NAT 后轮询不同任务的用户互不占用额度
+POLLING_RATE_LIMIT = int(os.getenv('POLLING_RATE_LIMIT', '600'))
+POLLING_RATE_WINDOW = int(os.getenv('POLLING_RATE_WINDOW', '60'))
+
+
 class RateLimiter:
     """基础限流器"""
     
@@ -84,11 +116,315 @@ class TokenBucketRateLimiter(RateLimiter):
                 return False
 
 
+@dataclass
+class RateLimitDecision:
+    """一次限流判定结果，同时用于生成 X-RateLimit-* 头"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float   # 限额完全恢复所需秒数
+    retry_after: float   # 被拒绝时距下次允许的秒数，允许时为 0
+
+    def to_headers(self) -> Dict[str, str]:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(int(math.ceil(time.time() + self.reset_after)))
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, int(math.ceil(self.retry_after))))
+        return headers
+
+
+class _MemoryTATStore:
+    """进程内 TAT 存储（LRU 淘汰），也用作共享存储的本地缓存"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_CACHE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            tat = self._tats.get(key)
+            if tat is not None:
+                self._tats.move_to_end(key)
+            return tat
+
+    def set(self, key: str, tat: float):
+        with self._lock:
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        """GCRA 判定并更新，返回 (是否允许, 判定后的 TAT)"""
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            allowed = tat + interval - now <= window
+            if allowed:
+                tat += interval
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+            return allowed, tat
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            expired = [key for key, tat in self._tats.items() if tat <= now]
+            for key in expired:
+                del self._tats[key]
+            return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class _SQLiteTATStore:
+    """
+    SQLite WAL 共享 TAT 存储
+
+    每个进程复用一个连接（PRAGMA 只执行一次）；限流器把本进程的额度消耗攒批，
+    由 merge 在一个 BEGIN IMMEDIATE 事务中合并，而不是每个请求一次写事务。
+    """
+
+    def __init__(self, db_path: str = RATE_LIMIT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_tat (
+                key TEXT PRIMARY KEY,
+                tat REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute('SELECT tat FROM rate_limit_tat WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def merge(self, consumed: Dict[str, float], now: float) -> Dict[str, float]:
+        """
+        合并各键累计消耗的发射间隔，返回这些键合并后的共享 TAT
+
+        Args:
+            consumed: 键 -> 自上次合并以来允许的请求数 × 发射间隔（0 表示只读取）
+        """
+        keys = list(consumed)
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT INTO rate_limit_tat (key, tat) VALUES (:key, :now + :delta) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = MAX(tat, :now) + :delta',
+                    [{'key': key, 'now': now, 'delta': delta} for key, delta in consumed.items() if delta > 0]
+                )
+                shared = {}
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    shared.update(conn.execute(
+                        f"SELECT key, tat FROM rate_limit_tat WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return shared
+
+    def sweep(self, now: float) -> int:
+        """删除 TAT 已过期的键（与不存在等价）"""
+        with self._lock:
+            return self._conn.execute('DELETE FROM rate_limit_tat WHERE tat <= ?', (now,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class GCRARateLimiter(RateLimiter):
+    """
+    GCRA 限流器
+
+    limit/window 换算为发射间隔 T = window / limit：每次允许的请求把 TAT 推后 T，
+    TAT - now 超过 window 即拒绝。等价于容量 limit、每 T 秒恢复一个令牌的令牌桶。
+
+    判定在进程内存中完成；使用共享存储时，本进程的消耗每 sync_interval 秒由后台线程
+    批量合并到共享表，并用合并后的共享 TAT 刷新本地状态。各 worker 之间的超额放行
+    最多为一个同步间隔内的请求。
+    """
+
+    def __init__(self, backend: str = RATE_LIMIT_BACKEND, db_path: str = None,
+                 cache_max_keys: int = RATE_LIMIT_CACHE_MAX_KEYS,
+                 sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL,
+                 sync_interval: float = RATE_LIMIT_SYNC_INTERVAL):
+        super().__init__()
+        self.cache = _MemoryTATStore(cache_max_keys)
+        self.backend = backend
+        self.db_path = db_path or RATE_LIMIT_DB_PATH
+        self._store = None
+        self._store_pid = None
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self.sync_interval = sync_interval
+        # 键 -> 自上次同步以来本进程消耗的发射间隔（0 表示只需刷新）
+        self._pending: Dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        self._sync_pid = None
+
+    @property
+    def store(self) -> Optional[_SQLiteTATStore]:
+        """共享存储（每个进程首次使用时打开，不可用时为 None，退化为进程内限流）"""
+        if self._store_pid != os.getpid():
+            with self.lock:
+                if self._store_pid != os.getpid():
+                    self._store = None
+                    if self.backend == 'sqlite':
+                        try:
+                            self._store = _SQLiteTATStore(self.db_path)
+                        except sqlite3.Error as e:
+                            logger.warning(f"Shared rate limit store unavailable, falling back to per-process limits: {e}")
+                    self._store_pid = os.getpid()
+        return self._store
+
+    @staticmethod
+    def _state_key(key: str, limit: int, window: float) -> str:
+        # 不同限额不共享 TAT，避免宽松路由消耗严格路由的额度
+        return f"{key}#{limit}/{window:g}"
+
+    def check(self, key: str, limit: int, window: float) -> RateLimitDecision:
+        """判定一次请求并返回完整结果（允许时消耗一个额度）"""
+        limit = max(1, int(limit))
+        interval = window / limit
+        state_key = self._state_key(key, limit, window)
+        now = time.time()
+        store = self.store
+
+        if store is None:
+            allowed, tat = self.cache.update(state_key, now, interval, window)
+        else:
+            # 本进程首次见到的键先读取共享 TAT，其余判定不访问数据库
+            if self.cache.get(state_key) is None:
+                try:
+                    shared = store.get(state_key)
+                except sqlite3.Error as e:
+                    logger.warning(f"Shared rate limit store error, using per-process state: {e}")
+                    shared = None
+                if shared is not None:
+                    self.cache.set(state_key, shared)
+            with self._pending_lock:
+                allowed, tat = self.cache.update(state_key, now, interval, window)
+                self._pending[state_key] = self._pending.get(state_key, 0.0) + (interval if allowed else 0.0)
+            self._ensure_sync_thread()
+
+        self._maybe_sweep(now)
+        return self._decision(allowed, tat, now, limit, interval, window)
+
+    def peek(self, key: str, limit: int, window: float) -> RateLimitDecision:
+        """只读当前状态（不消耗额度）"""
+        limit = max(1, int(limit))
+        interval = window / limit
+        state_key = self._state_key(key, limit, window)
+        now = time.time()
+        tat = self.cache.get(state_key)
+        if tat is None and self.store is not None:
+            try:
+                tat = self.store.get(state_key)
+            except sqlite3.Error:
+                tat = None
+        tat = max(tat or now, now)
+        return self._decision(tat + interval - now <= window, tat, now, limit, interval, window)
+
+    def is_allowed(self, key: str, limit: int, window: int) -> bool:
+        """检查请求是否被允许（GCRA 算法）"""
+        return self.check(key, limit, window).allowed
+
+    def sync(self):
+        """把本进程累计的消耗合并到共享表，并用共享 TAT 刷新本地状态"""
+        store = self.store
+        if store is None:
+            return
+        with self._pending_lock:
+            consumed, self._pending = self._pending, {}
+        if not consumed:
+            return
+        try:
+            shared = store.merge(consumed, time.time())
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit sync failed, will retry: {e}")
+            with self._pending_lock:
+                for key, delta in consumed.items():
+                    self._pending[key] = self._pending.get(key, 0.0) + delta
+            return
+        with self._pending_lock:
+            # 同步期间本进程新增的消耗尚未合并，叠加在共享 TAT 之上
+            for key, tat in shared.items():
+                self.cache.set(key, tat + self._pending.get(key, 0.0))
+
+    def _ensure_sync_thread(self):
+        if self._sync_pid == os.getpid():
+            return
+        with self.lock:
+            if self._sync_pid == os.getpid():
+                return
+            self._sync_pid = os.getpid()
+        threading.Thread(target=self._sync_loop, name='rate-limit-sync', daemon=True).start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Rate limit sync error: {e}")
+
+    @staticmethod
+    def _decision(allowed: bool, tat: float, now: float, limit: int,
+                  interval: float, window: float) -> RateLimitDecision:
+        backlog = max(0.0, tat - now)
+        remaining = max(0, min(limit, int((window - backlog) / interval + 1e-9)))
+        retry_after = 0.0 if allowed else max(0.0, backlog + interval - window)
+        return RateLimitDecision(allowed, limit, remaining, backlog, retry_after)
+
+    def _maybe_sweep(self, now: float):
+        tick = time.monotonic()
+        if tick - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = tick
+        try:
+            removed = self.cache.sweep(now)
+            if self.store is not None:
+                removed += self.store.sweep(now)
+            if removed:
+                logger.debug(f"Rate limiter swept {removed} idle keys")
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit sweep failed: {e}")
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> GCRARateLimiter:
+    """获取全局 GCRA 限流器（进程内单例，状态跨进程共享）"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = GCRARateLimiter()
+    return _rate_limiter
+
+
 class IPBasedRateLimiter:
     """基于IP的限流器"""
     
-    def __init__(self, sliding_window_limiter: SlidingWindowRateLimiter = None):
-        self.sliding_window_limiter = sliding_window_limiter or SlidingWindowRateLimiter()
+    def __init__(self, limiter: GCRARateLimiter = None):
+        self.limiter = limiter or get_rate_limiter()
         # 默认限制：每分钟100个请求
         self.default_limits = {
             'requests_per_minute': 100,
@@ -128,7 +464,7 @@ class IPBasedRateLimiter:
                 limit, window = 100, 60  # 默认值
         
         key = f"ip:{client_ip}:{limit_type}"
-        return self.sliding_window_limiter.is_allowed(key, limit, window)
+        return self.limiter.is_allowed(key, limit, window)
     
     def get_rate_limit_headers(self, limit_type: str = 'requests_per_minute') -> Dict[str, str]:
         """获取限流相关的HTTP头信息"""
@@ -145,36 +481,31 @@ class IPBasedRateLimiter:
             limit, window = 100, 60
         
         key = f"ip:{client_ip}:{limit_type}"
-        window_queue = self.sliding_window_limiter.requests[key]
-        
-        remaining = max(0, limit - len(window_queue))
-        reset_time = int(time.time()) + window
-        
-        return {
-            'X-RateLimit-Limit': str(limit),
-            'X-RateLimit-Remaining': str(remaining),
-            'X-RateLimit-Reset': str(reset_time)
-        }
+        return self.limiter.peek(key, limit, window).to_headers()
 
 
 class EndpointRateLimiter:
     """端点级别的限流器"""
     
-    def __init__(self, sliding_window_limiter: SlidingWindowRateLimiter = None):
-        self.sliding_window_limiter = sliding_window_limiter or SlidingWindowRateLimiter()
+    def __init__(self, limiter: GCRARateLimiter = None):
+        self.limiter = limiter or get_rate_limiter()
         # 不同端点的默认限制
         self.endpoint_limits = {
             '/api/perform-brand-test': {'limit': 10, 'window': 60},  # 每分钟10次
             '/api/login': {'limit': 5, 'window': 60},  # 每分钟5次
             '/api/test': {'limit': 100, 'window': 60},  # 每分钟100次
             '/api/platform-status': {'limit': 50, 'window': 60},  # 每分钟50次
-            '/api/test-progress': {'limit': 30, 'window': 60},  # 每分钟30次
+            '/api/test-progress': {'limit': POLLING_RATE_LIMIT, 'window': POLLING_RATE_WINDOW},  # 轮询端点
             '/api/test-history': {'limit': 20, 'window': 60},  # 每分钟20次
             '/api/test-record': {'limit': 20, 'window': 60},  # 每分钟20次
         }
     
     def is_allowed(self, endpoint: str = None, custom_limit: int = None, custom_window: int = None) -> bool:
         """检查端点请求是否被允许"""
+        return self.check(endpoint, custom_limit, custom_window).allowed
+
+    def check(self, endpoint: str = None, custom_limit: int = None, custom_window: int = None) -> RateLimitDecision:
+        """判定端点请求，返回含限流头信息的结果"""
         if endpoint is None:
             endpoint = request.endpoint or request.path
         
@@ -188,7 +519,7 @@ class EndpointRateLimiter:
         client_ip = request.remote_addr
         key = f"endpoint:{endpoint}:ip:{client_ip}"
         
-        return self.sliding_window_limiter.is_allowed(key, limit, window)
+        return self.limiter.check(key, limit, window)
     
     def get_rate_limit_headers(self, endpoint: str = None) -> Dict[str, str]:
         """获取端点限流相关的HTTP头信息"""
@@ -200,24 +531,16 @@ class EndpointRateLimiter:
         
         client_ip = request.remote_addr
         key = f"endpoint:{endpoint}:ip:{client_ip}"
-        window_queue = self.sliding_window_limiter.requests[key]
-        
-        remaining = max(0, limit - len(window_queue))
-        reset_time = int(time.time()) + window
-        
-        return {
-            'X-RateLimit-Limit': str(limit),
-            'X-RateLimit-Remaining': str(remaining),
-            'X-RateLimit-Reset': str(reset_time)
-        }
+        return self.limiter.peek(key, limit, window).to_headers()
 
 
 class CombinedRateLimiter:
     """组合限流器 - 同时应用IP和端点级别的限流"""
     
-    def __init__(self):
-        self.ip_limiter = IPBasedRateLimiter()
-        self.endpoint_limiter = EndpointRateLimiter()
+    def __init__(self, limiter: GCRARateLimiter = None):
+        limiter = limiter or get_rate_limiter()
+        self.ip_limiter = IPBasedRateLimiter(limiter)
+        self.endpoint_limiter = EndpointRateLimiter(limiter)
     
     def is_allowed(self, 
                    ip_limit_type: str = 'requests_per_minute',
@@ -241,48 +564,57 @@ class CombinedRateLimiter:
 
 
 def rate_limit(limit: int, window: int, per: str = 'ip'):
-    """装饰器：应用限流"""
+    """装饰器：应用限流（状态由全局 GCRA 限流器跨进程共享）"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            limiter = CombinedRateLimiter()
+            limiter = get_rate_limiter()
+            client_ip = request.remote_addr
+            endpoint = request.endpoint or request.path
             
             if per == 'ip':
                 # 只检查IP级别的限制
-                client_ip = request.remote_addr
-                key = f"ip:{client_ip}:global"
-                allowed = limiter.ip_limiter.sliding_window_limiter.is_allowed(key, limit, window)
+                decision = limiter.check(f"ip:{client_ip}:global", limit, window)
             elif per == 'endpoint':
                 # 只检查端点级别的限制
-                endpoint = request.endpoint or request.path
-                allowed = limiter.endpoint_limiter.is_allowed(endpoint, limit, window)
+                decision = limiter.check(f"endpoint:{endpoint}:ip:{client_ip}", limit, window)
+            elif per == 'path':
+                # 按完整路径（如 /test/status/<task_id>）计数，每个任务独立额度
+                decision = limiter.check(f"path:{request.path}:ip:{client_ip}", limit, window)
             else:
-                # 检查组合限制
-                allowed = limiter.is_allowed(
-                    endpoint=request.endpoint or request.path,
-                    custom_ip_limit=limit,
-                    custom_ip_window=window
-                )
+                # 检查组合限制：IP 限制 + 端点默认限制
+                client_ip = combined_limiter.ip_limiter.get_client_ip()
+                decision = limiter.check(f"ip:{client_ip}:requests_per_minute", limit, window)
+                if decision.allowed:
+                    endpoint_decision = combined_limiter.endpoint_limiter.check(endpoint)
+                    if not endpoint_decision.allowed:
+                        decision = endpoint_decision
             
-            if not allowed:
-                logger.warning(f"Rate limit exceeded for {per}: {request.remote_addr} on {request.path}")
-                return jsonify({
+            if not decision.allowed:
+                logger.warning(f"Rate limit exceeded for {per}: {client_ip} on {request.path}")
+                resp = jsonify({
                     'error': 'Rate limit exceeded',
                     'message': f'Too many requests. Please try again later.'
-                }), 429
+                })
+                resp.status_code = 429
+                resp.headers.update(decision.to_headers())
+                return resp
             
-            # 添加限流头信息
-            resp = f(*args, **kwargs)
-            if hasattr(resp, 'headers'):
-                headers = limiter.ip_limiter.get_rate_limit_headers()
-                for header, value in headers.items():
-                    resp.headers[header] = value
+            # 添加限流头信息（与本次判定使用同一份状态）；
+            # 视图返回 dict / 元组时先转换为 Response，与 Flask 自身的处理一致
+            resp = make_response(f(*args, **kwargs))
+            resp.headers.update(decision.to_headers())
             
             return resp
         return decorated_function
     return decorator
 
 
+def polling_rate_limit():
+    """轮询端点限流：按任务路径 + IP 计数，额度覆盖小程序最快的轮询节奏"""
+    return rate_limit(limit=POLLING_RATE_LIMIT, window=POLLING_RATE_WINDOW, per='path')
+
+
 # 全局限流器实例
 combined_limiter = CombinedRateLimiter()
 
@@ -230,7 +230,14 @@ class SemanticAnalyzer:
         
         return len(intersection) / len(union) if union else 0.0
     
-    def calculate_drift_score(self, official_text: str, ai_text: str, similarity_score: float) -> float:
+    def calculate_drift_score(
+        self,
+        official_text: str,
+        ai_text: str,
+        similarity_score: float,
+        official_keywords: Optional[List[str]] = None,
+        ai_keywords: Optional[List[str]] = None
+    ) -> float:
         """
         Calculate semantic drift score based on multiple factors
         
@@ -238,6 +245,8 @@ class SemanticAnalyzer:
             official_text: Official brand definition
             ai_text: AI response text
             similarity_score: Pre-calculated similarity score
+            official_keywords: Pre-extracted top-15 keywords of official_text (optional)
+            ai_keywords: Pre-extracted top-15 keywords of ai_text (optional)
             
         Returns:
             Drift score between 0 and 100 (higher means more drift)
@@ -250,8 +259,10 @@ class SemanticAnalyzer:
         length_penalty = (1 - len_ratio) * 20  # Up to 20 points penalty
         
         # Factor 2: Keyword mismatch penalty
-        official_keywords = self.extract_keywords(official_text, top_k=15)
-        ai_keywords = self.extract_keywords(ai_text, top_k=15)
+        if official_keywords is None:
+            official_keywords = self.extract_keywords(official_text, top_k=15)
+        if ai_keywords is None:
+            ai_keywords = self.extract_keywords(ai_text, top_k=15)
         
         if official_keywords and ai_keywords:
             keyword_overlap = len(set(official_keywords) & set(ai_keywords)) / len(set(official_keywords) | set(ai_keywords))
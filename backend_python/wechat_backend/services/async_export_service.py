@@ -16,6 +16,7 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from wechat_backend.logging_config import api_logger
 from wechat_backend.services.report_data_service import get_report_data_service
+from wechat_backend.monitoring.stage_metrics import time_stage, STAGE_PDF_RENDER
 
 
 class AsyncExportService:
@@ -89,11 +90,12 @@ class AsyncExportService:
             
             from wechat_backend.services.pdf_export_service import PDFExportService
             pdf_service = PDFExportService()
-            pdf_data = pdf_service.generate_enhanced_report(
-                report_data,
-                task.get('level', 'full'),
-                task.get('sections', 'all')
-            )
+            with time_stage(STAGE_PDF_RENDER, task['execution_id']):
+                pdf_data = pdf_service.generate_enhanced_report(
+                    report_data,
+                    task.get('level', 'full'),
+                    task.get('sections', 'all')
+                )
             
             # 阶段 3: 保存文件 (80%)
             self._update_status(task_id, {
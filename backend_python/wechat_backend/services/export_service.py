@@ -5,8 +5,10 @@
 - PDF 导出
 - Excel 导出
 - 批量导出
+- 诊断结果流式导出（NDJSON / CSV / XLSX）
 """
 
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from wechat_backend.logging_config import api_logger
 
@@ -19,6 +21,7 @@ class ExportService:
     - PDF 导出
     - Excel 导出
     - 批量导出
+    - 诊断结果流式导出
     """
     
     @staticmethod
@@ -129,6 +132,49 @@ class ExportService:
         
         return results
     
+    @staticmethod
+    def stream_export(
+        format_type: str = 'ndjson',
+        execution_ids: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+        brand_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        流式导出诊断结果明细
+
+        与 export_batch 不同，不在内存中构建完整报告：结果按批读取、逐块输出，
+        适合导出成百上千次执行的历史数据。
+
+        参数：
+        - format_type: ndjson / csv / xlsx
+        - execution_ids: 执行 ID 列表（可选）
+        - user_id: 用户 ID（可选）
+        - brand_name: 品牌名称（可选）
+
+        返回：
+        - result: 包含 stream（字节块生成器）、mimetype 和 filename
+        """
+        from wechat_backend.services.streaming_export_service import (
+            STREAM_FORMATS, OPENPYXL_AVAILABLE, get_diagnosis_result_exporter
+        )
+
+        if format_type not in STREAM_FORMATS:
+            return {'success': False, 'error': f'不支持的格式：{format_type}'}
+        if format_type == 'xlsx' and not OPENPYXL_AVAILABLE:
+            return {'success': False, 'error': 'XLSX 导出需要安装 openpyxl'}
+
+        mimetype, extension = STREAM_FORMATS[format_type]
+        stream = get_diagnosis_result_exporter().stream(
+            format_type, execution_ids=execution_ids, user_id=user_id, brand_name=brand_name
+        )
+        return {
+            'success': True,
+            'format': format_type,
+            'stream': stream,
+            'mimetype': mimetype,
+            'filename': f"diagnosis_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        }
+    
     @staticmethod
     def _generate_pdf_html(
         report_data: Dict[str, Any],
@@ -11,8 +11,12 @@ import json
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
+from unified_logging.tracing import traced
 from wechat_backend.logging_config import api_logger
 from wechat_backend.database import get_connection
+from wechat_backend.monitoring.stage_metrics import (
+    record_stage, get_execution_timing, STAGE_REPORT_BUILD
+)
 
 
 class ReportDataService:
@@ -37,6 +41,7 @@ class ReportDataService:
             self.db = sqlite3.connect(db_path)
         return self.db
     
+    @traced('report.generate_full_report', execution_id_arg='execution_id')
     def generate_full_report(self, execution_id: str) -> Dict[str, Any]:
         """
         生成完整报告数据
@@ -102,6 +107,7 @@ class ReportDataService:
             )
             
             generation_time = time.time() - start_time
+            record_stage(STAGE_REPORT_BUILD, generation_time, execution_id)
             self.logger.info(f"完整报告数据生成完成：execution_id={execution_id}, time={generation_time:.2f}s")
             
             return {
@@ -110,7 +116,9 @@ class ReportDataService:
                     "generatedAt": datetime.now().isoformat(),
                     "reportVersion": "2.0",
                     "brandName": base_data.get('brand_name', '未知品牌'),
-                    "generationTimeMs": int(generation_time * 1000)
+                    "generationTimeMs": int(generation_time * 1000),
+                    # 诊断全链路分阶段耗时（未采样或已淘汰时为 None）
+                    "stageTimings": get_execution_timing(execution_id)
                 },
                 "executiveSummary": executive_summary,
                 "brandHealth": base_data,
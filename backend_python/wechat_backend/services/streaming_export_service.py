@@ -0,0 +1,262 @@
+"""
+诊断结果流式导出服务
+
+功能：
+- 按执行 ID / 用户 / 品牌导出 diagnosis_results 明细
+- NDJSON、CSV、XLSX 三种格式，逐批读取、逐块输出
+
+核心原则：
+1. 内存占用与导出规模无关：按主键分批（keyset）读取，每批一个短查询，
+   不一次性 fetchall，也不在整个下载期间持有读事务阻塞 WAL checkpoint
+2. 输出为生成器，可直接交给 Flask 流式响应
+3. XLSX 依赖 openpyxl 的 write-only 工作簿（可选依赖），行数据写入临时文件，
+   保存后分块输出
+
+配置（环境变量）:
+    EXPORT_STREAM_BATCH_SIZE: 每批读取的行数，默认 500
+    EXPORT_STREAM_CHUNK_BYTES: 输出块大小（字节），默认 65536
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from wechat_backend.logging_config import api_logger
+from wechat_backend.database_connection_pool import DB_PATH
+from wechat_backend.repositories.diagnosis_geo_repository import attach_cited_sources
+from wechat_backend.repositories.response_blob_repository import attach_response_content
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    Workbook = None
+    OPENPYXL_AVAILABLE = False
+
+
+EXPORT_STREAM_BATCH_SIZE = int(os.getenv('EXPORT_STREAM_BATCH_SIZE', '500'))
+EXPORT_STREAM_CHUNK_BYTES = int(os.getenv('EXPORT_STREAM_CHUNK_BYTES', '65536'))
+
+# 导出列：(字段名, 表头)
+EXPORT_COLUMNS = [
+    ('execution_id', '执行ID'),
+    ('brand', '品牌'),
+    ('question', '问题'),
+    ('model', '模型'),
+    ('status', '状态'),
+    ('response_content', '回答内容'),
+    ('response_latency', '响应耗时(秒)'),
+    ('quality_score', '质量得分'),
+    ('quality_level', '质量等级'),
+    ('brand_mentioned', '品牌提及'),
+    ('rank', '排名'),
+    ('sentiment', '情感'),
+    ('error_message', '错误信息'),
+    ('created_at', '创建时间'),
+]
+
+# 格式 -> (MIME 类型, 文件扩展名)
+STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def _load_json(raw: Any, default: Any) -> Any:
+    if not raw:
+        return default
+    try:
+        return json.loads(raw)
+    except (ValueError, TypeError):
+        return default
+
+
+def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+    """数据库行 -> 导出记录（JSON 字段已解析）"""
+    item = dict(row)
+    item['geo_data'] = _load_json(item.get('geo_data'), {})
+    item['quality_details'] = _load_json(item.get('quality_details'), {})
+    return item
+
+
+def _flatten(record: Dict[str, Any]) -> List[Any]:
+    """导出记录 -> 表格行（按 EXPORT_COLUMNS 顺序）"""
+    geo_data = record.get('geo_data') if isinstance(record.get('geo_data'), dict) else {}
+    values = []
+    for key, _ in EXPORT_COLUMNS:
+        value = geo_data.get(key) if key in ('brand_mentioned', 'rank', 'sentiment') else record.get(key)
+        values.append('' if value is None else value)
+    return values
+
+
+class DiagnosisResultExporter:
+    """
+    诊断结果流式读取器
+
+    用法：
+        exporter = DiagnosisResultExporter()
+        for chunk in exporter.stream('ndjson', user_id='openid_xxx'):
+            ...
+    """
+
+    def __init__(self, db_path: Optional[str] = None, batch_size: int = EXPORT_STREAM_BATCH_SIZE):
+        self.db_path = str(db_path or DB_PATH)
+        self.batch_size = batch_size
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def iter_results(
+        self,
+        execution_ids: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+        brand_name: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按主键顺序逐批读取诊断结果
+
+        每批使用 `id > 上一批最大 id` 的短查询，任意时刻内存中最多只有一批数据。
+        """
+        where, params = ['r.id > ?'], []
+        join = ''
+        if execution_ids:
+            where.append(f"r.execution_id IN ({','.join('?' * len(execution_ids))})")
+            params.extend(execution_ids)
+        if user_id or brand_name:
+            join = 'JOIN diagnosis_reports p ON p.id = r.report_id'
+            if user_id:
+                where.append('p.user_id = ?')
+                params.append(user_id)
+            if brand_name:
+                where.append('p.brand_name = ?')
+                params.append(brand_name)
+
+        sql = f'''
+            SELECT r.* FROM diagnosis_results r {join}
+            WHERE {' AND '.join(where)}
+            ORDER BY r.id
+            LIMIT ?
+        '''
+
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(sql, [last_id, *params, self.batch_size]).fetchall()
+                records = [_to_record(row) for row in rows]
+                attach_cited_sources(conn, records)
+            attach_response_content(records)
+            if not records:
+                return
+            last_id = records[-1]['id']
+            yield from records
+            if len(records) < self.batch_size:
+                return
+
+    def stream(self, format_type: str, **filters) -> Iterator[bytes]:
+        """按格式输出字节块，filters 透传给 iter_results"""
+        records = self.iter_results(**filters)
+        if format_type == 'ndjson':
+            return iter_ndjson(records)
+        if format_type == 'csv':
+            return iter_csv(records)
+        if format_type == 'xlsx':
+            return iter_xlsx(records)
+        raise ValueError(f'不支持的格式：{format_type}')
+
+
+def _chunked(pieces: Iterable[str], chunk_bytes: int) -> Iterator[bytes]:
+    """把小段文本合并为约 chunk_bytes 大小的字节块"""
+    buffer, size = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]], chunk_bytes: int = EXPORT_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """每条记录一行 JSON"""
+    return _chunked(
+        (json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records),
+        chunk_bytes
+    )
+
+
+def iter_csv(records: Iterable[Dict[str, Any]], chunk_bytes: int = EXPORT_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """CSV（带 BOM，Excel 直接打开不乱码）"""
+    def lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow([header for _, header in EXPORT_COLUMNS])
+        for record in records:
+            writer.writerow(_flatten(record))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return _chunked(lines(), chunk_bytes)
+
+
+def iter_xlsx(records: Iterable[Dict[str, Any]], chunk_bytes: int = EXPORT_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    XLSX（openpyxl write-only 工作簿）
+
+    write-only 模式下行数据直接写入临时文件，内存占用恒定；
+    xlsx 是 zip 容器，必须全部写完才能输出，因此先落盘再分块读取。
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise RuntimeError('XLSX 导出需要安装 openpyxl')
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('诊断结果')
+        sheet.append([header for _, header in EXPORT_COLUMNS])
+        for record in records:
+            sheet.append([
+                value if isinstance(value, (int, float, str)) else json.dumps(value, ensure_ascii=False)
+                for value in _flatten(record)
+            ])
+        workbook.save(path)
+
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(chunk_bytes)
+                if not data:
+                    break
+                yield data
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            api_logger.warning(f'[StreamingExport] 临时文件清理失败：{path}, {e}')
+
+
+_exporter = None
+
+
+def get_diagnosis_result_exporter() -> DiagnosisResultExporter:
+    """获取全局诊断结果导出器"""
+    global _exporter
+    if _exporter is None:
+        _exporter = DiagnosisResultExporter()
+    return _exporter
@@ -8,12 +8,15 @@
 2. 增量同步支持 (Incremental Sync)
 3. 数据合并冲突解决 (Conflict Resolution)
 4. 自动清理过期数据 (Auto Cleanup)
+5. 批量增量同步协议 (Batch Delta Sync: UPSERT + 内容哈希 + 压缩 + 同步游标)
 """
 
 import sqlite3
 import json
 import time
 import os
+import gzip
+import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from contextlib import contextmanager
@@ -32,6 +35,25 @@ if DATABASE_DIR:
 # 同步数据保留天数配置
 SYNC_RETENTION_DAYS = int(os.environ.get('SYNC_RETENTION_DAYS', '90'))
 
+# 大字段压缩阈值（字节），超过该大小的 detailed_results 压缩存储
+SYNC_COMPRESS_MIN_BYTES = int(os.environ.get('SYNC_COMPRESS_MIN_BYTES', '1024'))
+
+# 单次批量同步的最大结果数
+SYNC_BATCH_MAX_RESULTS = int(os.environ.get('SYNC_BATCH_MAX_RESULTS', '200'))
+
+# zstd 为可选依赖，不可用时回退到 gzip
+try:
+    import zstandard as _zstd
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _zstd = None
+    _ZSTD_AVAILABLE = False
+
+# 存储编码
+ENCODING_JSON = 'json'
+ENCODING_GZIP = 'gzip'
+ENCODING_ZSTD = 'zstd'
+
 # ==================== 数据库表结构 ====================
 
 CREATE_SYNC_RESULTS_TABLE = """
@@ -58,8 +80,32 @@ CREATE_SYNC_RESULTS_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_sync_timestamp ON sync_results(sync_timestamp)",
     "CREATE INDEX IF NOT EXISTS idx_test_date ON sync_results(test_date)",
     "CREATE INDEX IF NOT EXISTS idx_brand_name ON sync_results(brand_name)",
+    "CREATE INDEX IF NOT EXISTS idx_sync_user_seq ON sync_results(user_id, sync_seq)",
+    # 全局 MAX(sync_seq) 取游标，(user_id, sync_seq) 索引无法支持
+    "CREATE INDEX IF NOT EXISTS idx_sync_seq ON sync_results(sync_seq)",
 ]
 
+# 早期 database_core 建表（data_type/data 结构）缺少的列，启动时按需 ALTER TABLE
+SYNC_RESULTS_LEGACY_COLUMNS = {
+    'brand_name': 'TEXT',
+    'ai_models_used': 'TEXT',
+    'questions_used': 'TEXT',
+    'overall_score': 'REAL',
+    'total_tests': 'INTEGER',
+    'results_summary': 'TEXT',
+    'detailed_results': 'TEXT',
+    'test_date': 'TEXT',
+    'updated_at': 'TEXT',
+    'is_deleted': 'INTEGER DEFAULT 0',
+}
+
+# 增量同步协议新增列（兼容已有数据库，启动时按需 ALTER TABLE）
+SYNC_RESULTS_DELTA_COLUMNS = {
+    'content_hash': 'TEXT',
+    'sync_seq': 'INTEGER DEFAULT 0',
+    'detailed_results_encoding': "TEXT DEFAULT 'json'",
+}
+
 CREATE_SYNC_METADATA_TABLE = """
 CREATE TABLE IF NOT EXISTS sync_metadata (
     user_id TEXT PRIMARY KEY,
@@ -97,10 +143,35 @@ class SyncStorageManager:
             cursor = conn.cursor()
             cursor.execute(CREATE_SYNC_RESULTS_TABLE)
             cursor.execute(CREATE_SYNC_METADATA_TABLE)
+            self._migrate_delta_columns(cursor)
             for index_sql in CREATE_SYNC_RESULTS_INDEXES:
                 cursor.execute(index_sql)
             api_logger.info('同步数据存储表初始化完成')
     
+    def _migrate_delta_columns(self, cursor):
+        """为旧表补充缺失的列和增量同步所需的列，并为没有游标的已有行回填 sync_seq"""
+        cursor.execute("PRAGMA table_info(sync_results)")
+        existing = {row['name'] for row in cursor.fetchall()}
+        for column, column_type in {**SYNC_RESULTS_LEGACY_COLUMNS, **SYNC_RESULTS_DELTA_COLUMNS}.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE sync_results ADD COLUMN {column} {column_type}")
+                api_logger.info(f'sync_results 新增列：{column}')
+        
+        # 迁移前写入的行 sync_seq 为 0，游标 0 的全量同步会漏掉它们
+        cursor.execute("""
+            SELECT rowid FROM sync_results
+            WHERE sync_seq IS NULL OR sync_seq = 0
+            ORDER BY sync_timestamp, rowid
+        """)
+        rowids = [row['rowid'] for row in cursor.fetchall()]
+        if rowids:
+            next_seq = self._max_sync_seq(cursor) + 1
+            cursor.executemany(
+                "UPDATE sync_results SET sync_seq = ? WHERE rowid = ?",
+                [(next_seq + i, rowid) for i, rowid in enumerate(rowids)]
+            )
+            api_logger.info(f'sync_results 回填 sync_seq：{len(rowids)} 行')
+    
     def save_result(self, user_id: str, result: Dict[str, Any]) -> bool:
         """
         保存同步结果
@@ -112,105 +183,200 @@ class SyncStorageManager:
         Returns:
             是否保存成功
         """
-        result_id = result.get('result_id')
-        if not result_id:
+        if not result.get('result_id'):
             api_logger.error('保存失败：缺少 result_id')
             return False
         
+        stats = self.save_results_batch(user_id, [result])
+        return stats['saved'] + stats['unchanged'] == 1
+    
+    def save_results_batch(self, user_id: str,
+                           results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量保存同步结果（单事务 UPSERT）
+        
+        每条结果按内容哈希比对，内容未变化的行不会被重写；
+        写入的行分配递增的 sync_seq 作为增量同步游标。
+        
+        Args:
+            user_id: 用户 ID
+            results: 结果列表
+        
+        Returns:
+            统计信息：saved（写入数）、unchanged（跳过数）、invalid（无效数）、cursor（最新游标）
+        """
+        stats = {'saved': 0, 'unchanged': 0, 'invalid': 0, 'cursor': 0}
         sync_timestamp = datetime.now().isoformat()
         
+        rows = []
+        for result in results[:SYNC_BATCH_MAX_RESULTS]:
+            if not result.get('result_id'):
+                stats['invalid'] += 1
+                continue
+            rows.append(self._build_row(user_id, result, sync_timestamp))
+        stats['invalid'] += max(0, len(results) - SYNC_BATCH_MAX_RESULTS)
+        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                # 立即获取写锁，保证 sync_seq 分配的单调性
+                cursor.execute("BEGIN IMMEDIATE")
                 
-                # 检查是否已存在
-                cursor.execute(
-                    "SELECT result_id FROM sync_results WHERE result_id = ?",
-                    (result_id,)
-                )
-                exists = cursor.fetchone() is not None
-                
-                if exists:
-                    # 更新现有记录
-                    cursor.execute("""
-                        UPDATE sync_results SET
-                            user_id = ?,
-                            brand_name = ?,
-                            ai_models_used = ?,
-                            questions_used = ?,
-                            overall_score = ?,
-                            total_tests = ?,
-                            results_summary = ?,
-                            detailed_results = ?,
-                            test_date = ?,
-                            sync_timestamp = ?,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE result_id = ?
-                    """, (
-                        user_id,
-                        result.get('brand_name', ''),
-                        json.dumps(result.get('ai_models_used', [])),
-                        json.dumps(result.get('questions_used', [])),
-                        result.get('overall_score', 0),
-                        result.get('total_tests', 0),
-                        json.dumps(result.get('results_summary', {})),
-                        json.dumps(result.get('detailed_results', [])),
-                        result.get('test_date', sync_timestamp),
-                        sync_timestamp,
-                        result_id
-                    ))
-                else:
-                    # 插入新记录
-                    cursor.execute("""
-                        INSERT INTO sync_results (
-                            result_id, user_id, brand_name, ai_models_used,
-                            questions_used, overall_score, total_tests,
-                            results_summary, detailed_results, test_date,
-                            sync_timestamp
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        result_id,
-                        user_id,
-                        result.get('brand_name', ''),
-                        json.dumps(result.get('ai_models_used', [])),
-                        json.dumps(result.get('questions_used', [])),
-                        result.get('overall_score', 0),
-                        result.get('total_tests', 0),
-                        json.dumps(result.get('results_summary', {})),
-                        json.dumps(result.get('detailed_results', [])),
-                        result.get('test_date', sync_timestamp),
-                        sync_timestamp
-                    ))
-                
-                # 更新元数据
-                self._update_user_metadata(conn, user_id)
+                if rows:
+                    existing_hashes = self._fetch_content_hashes(
+                        cursor, [row['result_id'] for row in rows]
+                    )
+                    next_seq = self._max_sync_seq(cursor) + 1
+                    
+                    for row in rows:
+                        if existing_hashes.get(row['result_id']) == row['content_hash']:
+                            stats['unchanged'] += 1
+                            continue
+                        
+                        row['sync_seq'] = next_seq
+                        cursor.execute("""
+                            INSERT INTO sync_results (
+                                result_id, user_id, brand_name, ai_models_used,
+                                questions_used, overall_score, total_tests,
+                                results_summary, detailed_results,
+                                detailed_results_encoding, content_hash, test_date,
+                                sync_timestamp, sync_seq
+                            ) VALUES (
+                                :result_id, :user_id, :brand_name, :ai_models_used,
+                                :questions_used, :overall_score, :total_tests,
+                                :results_summary, :detailed_results,
+                                :detailed_results_encoding, :content_hash, :test_date,
+                                :sync_timestamp, :sync_seq
+                            )
+                            ON CONFLICT(result_id) DO UPDATE SET
+                                user_id = excluded.user_id,
+                                brand_name = excluded.brand_name,
+                                ai_models_used = excluded.ai_models_used,
+                                questions_used = excluded.questions_used,
+                                overall_score = excluded.overall_score,
+                                total_tests = excluded.total_tests,
+                                results_summary = excluded.results_summary,
+                                detailed_results = excluded.detailed_results,
+                                detailed_results_encoding = excluded.detailed_results_encoding,
+                                content_hash = excluded.content_hash,
+                                test_date = excluded.test_date,
+                                sync_timestamp = excluded.sync_timestamp,
+                                sync_seq = excluded.sync_seq,
+                                updated_at = CURRENT_TIMESTAMP
+                            WHERE sync_results.content_hash IS NOT excluded.content_hash
+                        """, row)
+                        stats['saved'] += 1
+                        next_seq += 1
+                    
+                    # 元数据每批只计算一次
+                    if stats['saved']:
+                        self._update_user_metadata(conn, user_id)
                 
-                api_logger.debug(f'同步结果已保存：result_id={result_id}, user_id={user_id}')
-                return True
+                stats['cursor'] = self._max_sync_seq(cursor, user_id)
                 
+            api_logger.debug(
+                f'批量同步完成：user_id={user_id}, saved={stats["saved"]}, '
+                f'unchanged={stats["unchanged"]}, invalid={stats["invalid"]}'
+            )
         except Exception as e:
-            api_logger.error(f'保存同步结果失败：{e}', exc_info=True)
-            return False
+            api_logger.error(f'批量保存同步结果失败：{e}', exc_info=True)
+            stats['saved'] = 0
+            stats['error'] = str(e)
+        
+        return stats
+    
+    def _build_row(self, user_id: str, result: Dict[str, Any],
+                   sync_timestamp: str) -> Dict[str, Any]:
+        """序列化结果为数据库行，并计算内容哈希"""
+        row = {
+            'result_id': result['result_id'],
+            'user_id': user_id,
+            'brand_name': result.get('brand_name', ''),
+            'ai_models_used': json.dumps(result.get('ai_models_used', []), ensure_ascii=False),
+            'questions_used': json.dumps(result.get('questions_used', []), ensure_ascii=False),
+            'overall_score': result.get('overall_score', 0),
+            'total_tests': result.get('total_tests', 0),
+            'results_summary': json.dumps(result.get('results_summary', {}), ensure_ascii=False),
+            'test_date': result.get('test_date', sync_timestamp),
+            'sync_timestamp': sync_timestamp,
+        }
+        detailed_json = json.dumps(
+            result.get('detailed_results', []), ensure_ascii=False, sort_keys=True
+        )
+        
+        hasher = hashlib.sha256()
+        for key in ('user_id', 'brand_name', 'ai_models_used', 'questions_used',
+                    'overall_score', 'total_tests', 'results_summary', 'test_date'):
+            hasher.update(str(row[key]).encode('utf-8'))
+            hasher.update(b'\x1f')
+        hasher.update(detailed_json.encode('utf-8'))
+        row['content_hash'] = hasher.hexdigest()
+        
+        row['detailed_results'], row['detailed_results_encoding'] = _encode_blob(detailed_json)
+        return row
+    
+    @staticmethod
+    def _fetch_content_hashes(cursor, result_ids: List[str]) -> Dict[str, str]:
+        """批量查询已有行的内容哈希"""
+        hashes = {}
+        # SQLite 默认变量上限 999，分块查询
+        for i in range(0, len(result_ids), 500):
+            chunk = result_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT result_id, content_hash FROM sync_results "
+                f"WHERE result_id IN ({placeholders})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                hashes[row['result_id']] = row['content_hash']
+        return hashes
+    
+    @staticmethod
+    def _max_sync_seq(cursor, user_id: Optional[str] = None) -> int:
+        """获取当前最大同步游标"""
+        if user_id is None:
+            cursor.execute("SELECT MAX(sync_seq) AS seq FROM sync_results")
+        else:
+            cursor.execute(
+                "SELECT MAX(sync_seq) AS seq FROM sync_results WHERE user_id = ?",
+                (user_id,)
+            )
+        row = cursor.fetchone()
+        return (row['seq'] if row else None) or 0
     
     def get_results(self, user_id: str, 
                     last_sync_timestamp: Optional[str] = None,
-                    limit: int = 50) -> List[Dict[str, Any]]:
+                    limit: int = 50,
+                    since_cursor: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         获取用户同步结果
         
         Args:
             user_id: 用户 ID
-            last_sync_timestamp: 上次同步时间戳（增量获取）
-            limit: 返回数量限制
+            last_sync_timestamp: 上次同步时间戳（增量获取，兼容旧客户端）
+            limit: 返回数量限制（小于 1 时按 1 处理）
+            since_cursor: 上次同步游标（增量获取，优先于时间戳）
         
         Returns:
-            结果列表
+            结果列表（游标模式下按 sync_seq 升序，便于客户端分页推进游标；
+            游标模式包含 is_deleted = 1 的删除标记，客户端据此删除本地副本）
         """
+        # SQLite 中负数 LIMIT 表示不限制
+        limit = max(1, int(limit))
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                if last_sync_timestamp:
+                if since_cursor is not None:
+                    cursor.execute("""
+                        SELECT * FROM sync_results
+                        WHERE user_id = ? 
+                          AND sync_seq > ?
+                        ORDER BY sync_seq ASC
+                        LIMIT ?
+                    """, (user_id, int(since_cursor), limit))
+                elif last_sync_timestamp:
                     cursor.execute("""
                         SELECT * FROM sync_results
                         WHERE user_id = ? 
@@ -233,12 +399,16 @@ class SyncStorageManager:
                 
                 for row in rows:
                     result = dict(row)
+                    encoding = result.pop('detailed_results_encoding', None) or ENCODING_JSON
                     # 解析 JSON 字段
                     for field in ['ai_models_used', 'questions_used', 'results_summary', 'detailed_results']:
                         try:
                             if result.get(field):
-                                result[field] = json.loads(result[field])
-                        except (json.JSONDecodeError, TypeError):
+                                value = result[field]
+                                if field == 'detailed_results':
+                                    value = _decode_blob(value, encoding)
+                                result[field] = json.loads(value)
+                        except (json.JSONDecodeError, TypeError, ValueError, OSError):
                             result[field] = [] if field in ['ai_models_used', 'questions_used'] else {}
                     
                     results.append(result)
@@ -253,6 +423,8 @@ class SyncStorageManager:
         """
         删除同步结果（软删除）
         
+        删除标记分配新的 sync_seq，其他设备按游标增量同步时能收到删除。
+        
         Args:
             user_id: 用户 ID
             result_id: 结果 ID
@@ -263,12 +435,13 @@ class SyncStorageManager:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
                 
                 cursor.execute("""
                     UPDATE sync_results
-                    SET is_deleted = 1, updated_at = CURRENT_TIMESTAMP
-                    WHERE result_id = ? AND user_id = ?
-                """, (result_id, user_id))
+                    SET is_deleted = 1, sync_seq = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE result_id = ? AND user_id = ? AND is_deleted = 0
+                """, (self._max_sync_seq(cursor) + 1, result_id, user_id))
                 
                 # 更新元数据
                 self._update_user_metadata(conn, user_id)
@@ -391,6 +564,36 @@ class SyncStorageManager:
             return 0
 
 
+# ==================== 压缩编解码 ====================
+
+def _encode_blob(text: str) -> Tuple[Any, str]:
+    """
+    按大小决定是否压缩存储
+    
+    Returns:
+        (存储值, 编码)；小于阈值时原样存储为 TEXT
+    """
+    raw = text.encode('utf-8')
+    if len(raw) < SYNC_COMPRESS_MIN_BYTES:
+        return text, ENCODING_JSON
+    if _ZSTD_AVAILABLE:
+        return sqlite3.Binary(_zstd.ZstdCompressor(level=3).compress(raw)), ENCODING_ZSTD
+    return sqlite3.Binary(gzip.compress(raw, compresslevel=6)), ENCODING_GZIP
+
+
+def _decode_blob(value: Any, encoding: str) -> str:
+    """解码存储值为 JSON 文本"""
+    if encoding == ENCODING_ZSTD:
+        if not _ZSTD_AVAILABLE:
+            raise ValueError('zstandard 未安装，无法解压 zstd 数据')
+        return _zstd.ZstdDecompressor().decompress(bytes(value)).decode('utf-8')
+    if encoding == ENCODING_GZIP:
+        return gzip.decompress(bytes(value)).decode('utf-8')
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('utf-8')
+    return value
+
+
 # ==================== 全局实例 ====================
 
 _sync_storage: Optional[SyncStorageManager] = None
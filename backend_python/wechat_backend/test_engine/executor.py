@@ -40,7 +40,8 @@ class TestExecutor:
         api_key: str = "",
         on_progress_update: Callable[[str, TestProgress], None] = None,
         timeout: int = 300,  # 5分钟默认超时
-        user_openid: str = "anonymous"  # 添加用户标识用于保存到数据库
+        user_openid: str = "anonymous",  # 添加用户标识用于保存到数据库
+        on_task_result: Callable[[TestTask, Dict[str, Any]], None] = None
     ) -> Dict[str, Any]:
         """
         Execute a list of test cases with progress tracking
@@ -51,6 +52,8 @@ class TestExecutor:
             on_progress_update: Callback function to call when progress updates
             timeout: Timeout in seconds for the entire test execution
             user_openid: User identifier for saving results to database
+            on_task_result: Callback invoked with each raw task result as soon as it
+                arrives, e.g. to feed a judge/aggregation pipeline
             
         Returns:
             Dict with execution results and statistics
@@ -106,6 +109,13 @@ class TestExecutor:
                 self.progress_tracker.update_completed(execution_id, result)
             else:
                 self.progress_tracker.update_failed(execution_id, result.get('error', 'Unknown error'))
+
+            # Hand the raw result to downstream stages before the bookkeeping below
+            if on_task_result:
+                try:
+                    on_task_result(task, result)
+                except Exception as e:
+                    api_logger.error(f"on_task_result callback failed for task {task.id}: {e}")
             
             # 实现分批次保存：每完成一个测试（无论成功或失败）都立即保存到数据库
             try:
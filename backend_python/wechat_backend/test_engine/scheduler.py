@@ -3,13 +3,14 @@ Test Scheduler with execution strategies
 Handles scheduling of tests with different execution approaches
 """
 import os
-import queue
 from enum import Enum
 from typing import List, Dict, Any, Callable
 from dataclasses import dataclass
 import asyncio
+import heapq
+import itertools
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from threading import Lock
 import uuid
 from wechat_backend.logging_config import api_logger
@@ -61,6 +62,27 @@ class SimplePlatformConfigManager:
 PlatformConfigManager = SimplePlatformConfigManager  # This is the Config class from config_manager, not from config
 
 
+def _parse_platform_limits(spec: str) -> Dict[str, int]:
+    """Parses "doubao=2,deepseek=3" into {'doubao': 2, 'deepseek': 3}"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            platform, limit = item.split('=', 1)
+            try:
+                limits[platform.strip()] = max(1, int(limit))
+            except ValueError:
+                api_logger.warning(f"Ignoring invalid platform concurrency limit: {item}")
+    return limits
+
+
+# Per-platform in-flight caps; platforms not listed are only bounded by max_workers.
+# 豆包 API 响应慢且容易触发 429，默认限制为 2 个并发
+PLATFORM_CONCURRENCY_LIMITS = {
+    'doubao': 2,
+    **_parse_platform_limits(os.getenv('TEST_SCHEDULER_PLATFORM_LIMITS', '')),
+}
+
+
 class ExecutionStrategy(Enum):
     """Different strategies for executing tests"""
     SEQUENTIAL = "sequential"
@@ -76,7 +98,7 @@ class TestTask:
     brand_name: str
     ai_model: str
     question: str
-    priority: int = 0
+    priority: int = 0  # Higher values are dispatched first in concurrent/matrix modes
     timeout: int = 90  # 增加默认超时到90秒，适配豆包等慢速API
     max_retries: int = 3
     metadata: Dict[str, Any] = None
@@ -85,12 +107,17 @@ class TestTask:
 class TestScheduler:
     """Manages scheduling and execution of test tasks"""
 
-    def __init__(self, max_workers: int = 3, strategy: ExecutionStrategy = ExecutionStrategy.CONCURRENT):
+    def __init__(
+        self,
+        max_workers: int = 3,
+        strategy: ExecutionStrategy = ExecutionStrategy.CONCURRENT,
+        platform_limits: Optional[Dict[str, int]] = None
+    ):
         self.max_workers = max_workers
         self.strategy = strategy
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.platform_config_manager = PlatformConfigManager()
-        self.task_queue = queue.Queue()  # Add task queue for controlled execution
+        self.platform_limits = dict(PLATFORM_CONCURRENCY_LIMITS if platform_limits is None else platform_limits)
         api_logger.warning(f"TestScheduler initialized with strategy {strategy.value}, max_workers {max_workers} - REDUCED CONCURRENCY TO PREVENT TIMEOUT")
     
     def schedule_tests(
@@ -180,14 +207,11 @@ class TestScheduler:
         
         api_logger.info(f"Matrix execution: {len(test_tasks)} questions * {len(configured_platforms)} platforms = {len(test_tasks) * len(configured_platforms)} total tasks")
         
-        # 为每个问题遍历所有平台
-        total_tasks = 0
+        # 为每个问题遍历所有平台，构建 N*M 个矩阵任务
+        matrix_tasks = []
         for task_idx, task in enumerate(test_tasks):
             for platform_idx, (platform_name, platform_key) in enumerate(configured_platforms):
-                total_tasks += 1
-                
-                # 创建矩阵模式的 task 副本
-                matrix_task = TestTask(
+                matrix_tasks.append(TestTask(
                     id=f"{task.id}_{platform_key}",
                     brand_name=task.brand_name,
                     ai_model=platform_name,
@@ -204,64 +228,79 @@ class TestScheduler:
                         'total_platforms': len(configured_platforms),
                         'original_task_id': task.id
                     }
-                )
-                
-                api_logger.info(f"[Matrix] Task {total_tasks}/{len(test_tasks) * len(configured_platforms)}: Question {task_idx + 1}/{len(test_tasks)} on Platform {platform_idx + 1}/{len(configured_platforms)} ({platform_name})")
-                
-                result = self._execute_single_task(matrix_task)
-                results.append(result)
-                
-                if callback:
-                    callback(matrix_task, result)
-        
-        return results
-    
+                ))
+
+        # 矩阵单元并发执行，受 max_workers 与各平台并发上限约束
+        return self._run_task_pool(matrix_tasks, self._execute_single_task, callback)
+
     def _execute_concurrent(
         self,
         test_tasks: List[TestTask],
         callback: Callable[[TestTask, Dict[str, Any]], None] = None
     ) -> List[Dict[str, Any]]:
-        results = []
-
-        # Add tasks to queue for controlled execution
-        for task in test_tasks:
-            self.task_queue.put(task)
-
         api_logger.info(f"Queued {len(test_tasks)} test cases for execution with max_workers={self.max_workers}")
+        return self._run_task_pool(test_tasks, self._execute_single_task_with_queue, callback)
 
-        # Submit tasks to executor with controlled concurrency
-        futures = []
-        for i in range(min(len(test_tasks), self.max_workers)):  # Only submit up to max_workers initially
-            if not self.task_queue.empty():
-                task = self.task_queue.get()
-                future = self.executor.submit(self._execute_single_task_with_queue, task)
-                futures.append((future, task))
-
-        # Process completed tasks and submit new ones as they finish
-        while futures:
-            # Wait for at least one task to complete
-            completed_futures = []
-            for future, task in futures:
-                if future.done():
-                    completed_futures.append((future, task))
-
-            # Process completed tasks
-            for future, task in completed_futures:
-                futures.remove((future, task))
+    def _run_task_pool(
+        self,
+        test_tasks: List[TestTask],
+        runner: Callable[[TestTask], Dict[str, Any]],
+        callback: Callable[[TestTask, Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs tasks on the thread pool, highest priority first, honouring max_workers
+        and per-platform caps. The coordinating thread blocks in wait(FIRST_COMPLETED)
+        between completions instead of polling, and results are returned in
+        completion order.
+        """
+        results = []
+
+        # Priority queue: (-priority, submission order, task) keeps FIFO order within a priority
+        order = itertools.count()
+        pending = [(-(task.priority or 0), next(order), task) for task in test_tasks]
+        heapq.heapify(pending)
+
+        in_flight: Dict[Any, TestTask] = {}
+        platform_in_flight: Dict[str, int] = {}
+
+        def platform_of(task: TestTask) -> str:
+            return self._map_model_to_platform(task.ai_model)
+
+        def dispatch():
+            # Tasks whose platform is at its cap are set aside and returned to the queue
+            deferred = []
+            while pending and len(in_flight) < self.max_workers:
+                entry = heapq.heappop(pending)
+                task = entry[2]
+                platform = platform_of(task)
+                limit = self.platform_limits.get(platform)
+                if limit is not None and platform_in_flight.get(platform, 0) >= limit:
+                    deferred.append(entry)
+                    continue
+                platform_in_flight[platform] = platform_in_flight.get(platform, 0) + 1
+                in_flight[self.executor.submit(runner, task)] = task
+            for entry in deferred:
+                heapq.heappush(pending, entry)
+
+        dispatch()
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                task = in_flight.pop(future)
+                platform = platform_of(task)
+                platform_in_flight[platform] -= 1
                 try:
                     result = future.result()
-                    results.append(result)
-                    if callback:
-                        callback(task, result)
                 except Exception as e:
                     api_logger.error(f"Error executing task {task.id}: {str(e)}")
-                    results.append({'task_id': task.id, 'success': False, 'error': str(e), 'result': None})
-
-            # Submit new tasks if available and we have capacity
-            while len(futures) < self.max_workers and not self.task_queue.empty():
-                task = self.task_queue.get()
-                future = self.executor.submit(self._execute_single_task_with_queue, task)
-                futures.append((future, task))
+                    result = {'task_id': task.id, 'success': False, 'error': str(e), 'result': None}
+                results.append(result)
+                if callback:
+                    try:
+                        callback(task, result)
+                    except Exception as e:
+                        api_logger.error(f"Callback failed for task {task.id}: {str(e)}")
+            dispatch()
 
         return results
 
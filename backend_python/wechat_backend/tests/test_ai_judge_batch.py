@@ -0,0 +1,107 @@
+"""
+AI 裁判批量评判与评判缓存单元测试
+"""
+
+import json
+import re
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from ai_judge_module import AIJudgeClient, JudgeResultParser, JudgeVerdictCache
+
+
+def _verdict(index=None, score=80):
+    verdict = {
+        'accuracy_score': score,
+        'completeness_score': score,
+        'sentiment_score': score,
+        'purity_score': score,
+        'consistency_score': score,
+        'judgement': '回答准确',
+        'confidence_level': 'high',
+    }
+    if index is not None:
+        verdict['index'] = index
+    return verdict
+
+
+class FakeJudgeAdapter:
+    """按 Prompt 类型返回单条或批量评判结果，可指定批量输出中丢弃的回答编号"""
+
+    def __init__(self, drop_indices=()):
+        self.drop_indices = set(drop_indices)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def send_prompt(self, prompt, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        indices = [int(i) for i in re.findall(r'【回答 (\d+)】', prompt)]
+        if indices:
+            content = json.dumps({'results': [_verdict(i, 60 + i) for i in indices if i not in self.drop_indices]})
+        else:
+            content = json.dumps(_verdict(score=50))
+        return SimpleNamespace(success=True, content=content, error_message=None)
+
+
+@pytest.fixture
+def cache():
+    return JudgeVerdictCache(max_entries=100, ttl_seconds=60)
+
+
+def _items(count):
+    return [('华为', f'问题{i}', f'华为的回答{i}') for i in range(count)]
+
+
+class TestParseBatch:
+    """批量输出拆分测试"""
+
+    def test_invalid_entries_skipped(self):
+        """非法分数、越界与重复编号被丢弃"""
+        output = json.dumps({'results': [_verdict(0), _verdict(1, score=120), _verdict(5), _verdict(0, score=10)]})
+
+        verdicts = JudgeResultParser().parse_batch('```json\n' + output + '\n```', expected_count=3)
+
+        assert list(verdicts) == [0]
+        assert verdicts[0].accuracy_score == 80
+
+
+class TestEvaluateBatch:
+    """AIJudgeClient.evaluate_batch 测试"""
+
+    def test_batches_split_by_size(self, cache):
+        """按 batch_size 打包，每包一次调用，结果按原顺序返回；只剩一条时走单条 Prompt"""
+        adapter = FakeJudgeAdapter()
+        judge = AIJudgeClient(judge_platform='deepseek', ai_client=adapter, cache=cache)
+
+        results = judge.evaluate_batch(_items(5), batch_size=2, max_concurrency=2)
+
+        assert len(adapter.prompts) == 3
+        assert [r.accuracy_score for r in results] == [60, 61, 60, 61, 50]
+
+    def test_cache_and_duplicates_avoid_calls(self, cache):
+        """相同内容只评判一次，再次评判与单条评判均命中缓存"""
+        adapter = FakeJudgeAdapter()
+        judge = AIJudgeClient(judge_platform='deepseek', ai_client=adapter, cache=cache)
+        items = _items(2) + _items(2)
+
+        first = judge.evaluate_batch(items)
+        second = judge.evaluate_batch(items)
+
+        assert len(adapter.prompts) == 1
+        assert first == second
+        assert judge.evaluate_response(*items[1]) == first[1]
+        assert len(adapter.prompts) == 1
+
+    def test_missing_indices_retried_individually(self, cache):
+        """批量输出缺失的回答逐个重试"""
+        adapter = FakeJudgeAdapter(drop_indices={1})
+        judge = AIJudgeClient(judge_platform='deepseek', ai_client=adapter, cache=cache)
+
+        results = judge.evaluate_batch(_items(3))
+
+        assert len(adapter.prompts) == 2
+        assert [r.accuracy_score for r in results] == [60, 50, 62]
+        assert '华为的回答1' in adapter.prompts[1]
@@ -0,0 +1,156 @@
+"""
+AI 响应日志（异步分段存储）单元测试
+"""
+
+import gzip
+import os
+import threading
+import time
+
+import pytest
+
+from wechat_backend.utils.ai_response_logger_v3 import AIResponseLogger, SamplingPolicy
+
+
+@pytest.fixture
+def make_logger(tmp_path, monkeypatch):
+    # 短回答不会进入内容存储，这里关闭外置避免写入默认存储文件
+    monkeypatch.setattr(
+        'wechat_backend.repositories.response_blob_repository.RESPONSE_BLOB_ENABLED', False
+    )
+
+    def factory(**kwargs):
+        kwargs.setdefault('batch_size', 5)
+        kwargs.setdefault('flush_interval', 0.05)
+        return AIResponseLogger(log_file=str(tmp_path / 'ai_responses.jsonl'), **kwargs)
+    return factory
+
+
+def _log(logger, i, execution_id, platform='deepseek', success=True):
+    return logger.log_response(
+        question=f'问题{i}', response=f'回答{i}', platform=platform, model='m',
+        execution_id=execution_id, success=success
+    )
+
+
+class TestAsyncSegmentWriter:
+    """批量写入、索引与按执行查询"""
+
+    def test_background_writer_batches_into_gzip_members(self, make_logger):
+        """后台线程按批写入，每批一个 gzip member 和一行索引"""
+        logger = make_logger()
+        for i in range(12):
+            assert _log(logger, i, f'exec_{i % 3}')['queued'] is True
+        logger.close()
+
+        entries = logger._read_index()
+        assert sum(e['count'] for e in entries) == 12
+        assert all(e['count'] <= 5 for e in entries)
+
+        segment = logger.segment_dir / entries[0]['segment']
+        with gzip.open(segment, 'rt', encoding='utf-8') as f:
+            assert len(f.readlines()) == 12
+
+    def test_find_by_execution_id_reads_only_matching_batches(self, make_logger, monkeypatch):
+        """按执行 ID 查询只读取索引命中的批次"""
+        logger = make_logger()
+        for i in range(10):
+            _log(logger, i, 'exec_a' if i < 5 else 'exec_b')
+        logger.flush()
+
+        read = []
+        original = logger._read_batch
+        monkeypatch.setattr(logger, '_read_batch', lambda entry: read.append(entry) or original(entry))
+
+        records = logger.find_by_execution_id('exec_b')
+        assert [r['question']['text'] for r in records] == [f'问题{i}' for i in range(5, 10)]
+        assert len(read) == 1
+
+    def test_size_rotation_keeps_backup_count(self, make_logger):
+        """分段超过大小后轮转，只保留指定数量的历史分段"""
+        logger = make_logger(max_file_size_mb=1, max_backup_count=2, batch_size=1)
+        logger.max_file_size = 200
+        for i in range(6):
+            _log(logger, i, f'exec_{i}')
+            logger.flush()
+
+        assert len(logger._segments()) <= 3
+        assert logger.find_by_execution_id('exec_0') == []
+        assert len(logger.find_by_execution_id('exec_5')) == 1
+
+    def test_concurrent_producers(self, make_logger):
+        """多线程并发记录不丢失"""
+        logger = make_logger(batch_size=50)
+        threads = [
+            threading.Thread(target=lambda t=t: [_log(logger, i, f'exec_{t}') for i in range(100)])
+            for t in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.close()
+
+        assert logger.get_stats()['written'] == 400
+        assert len(logger.find_by_execution_id('exec_3')) == 100
+
+
+class TestSegmentMaintenance:
+    """分段命名、保留期清理与索引重写"""
+
+    def test_segment_names_unique_across_instances(self, make_logger):
+        """同一秒内多个记录器实例创建的分段不重名"""
+        loggers = [make_logger() for _ in range(3)]
+        names = {logger._current_segment().name for logger in loggers}
+
+        assert len(names) == 3
+        assert all(f'_{os.getpid()}_' in name for name in names)
+
+    def test_cleanup_unindexed_segment_uses_mtime(self, make_logger):
+        """没有索引行的分段按修改时间判断是否过期，新分段不被误删"""
+        logger = make_logger()
+        fresh = logger.segment_dir / 'segment_20990101_000000_1_0001.jsonl.gz'
+        stale = logger.segment_dir / 'segment_20000101_000000_1_0001.jsonl.gz'
+        fresh.write_bytes(gzip.compress(b'{}\n'))
+        stale.write_bytes(gzip.compress(b'{}\n'))
+        old = time.time() - 40 * 86400
+        os.utime(stale, (old, old))
+
+        assert logger.cleanup_old_logs(retention_days=30) == 1
+        assert fresh.exists() and not stale.exists()
+
+    def test_index_rewrite_keeps_concurrent_appends(self, make_logger):
+        """删除分段重写索引时，其他写入方同时追加的索引行不丢失"""
+        writer, cleaner = make_logger(batch_size=1), make_logger(batch_size=1)
+        victims = []
+        for i in range(20):
+            victim = cleaner.segment_dir / f'segment_19990101_000000_0_{i:04d}.jsonl.gz'
+            victim.write_bytes(b'')
+            victims.append(victim)
+
+        thread = threading.Thread(target=lambda: [cleaner._delete_segments([v]) for v in victims])
+        thread.start()
+        for i in range(50):
+            _log(writer, i, 'exec_live')
+            writer.flush()
+        thread.join()
+
+        assert len(writer.find_by_execution_id('exec_live')) == 50
+
+
+class TestSamplingPolicy:
+    """采样策略"""
+
+    def test_platform_rate_and_failures(self, make_logger):
+        """按平台降采样，失败记录全部保留，同一执行整体保留或丢弃"""
+        policy = SamplingPolicy(default_rate=1.0, platform_rates={'doubao': 0.0}, failure_rate=1.0)
+        logger = make_logger(sampling=policy)
+
+        assert _log(logger, 1, 'exec_1', platform='doubao')['queued'] is False
+        assert _log(logger, 2, 'exec_1', platform='doubao', success=False)['queued'] is True
+        assert _log(logger, 3, 'exec_1', platform='qwen')['queued'] is True
+
+        half = SamplingPolicy(default_rate=0.5)
+        decisions = {half.should_keep('exec_x', 'qwen', True) for _ in range(10)}
+        assert len(decisions) == 1
+        logger.close()
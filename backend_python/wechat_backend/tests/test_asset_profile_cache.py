@@ -0,0 +1,107 @@
+"""
+AssetIntelligenceEngine 官方资产缓存与批量相似度单元测试
+"""
+
+import pytest
+
+pytest.importorskip('jieba')
+pytest.importorskip('sklearn')
+
+from wechat_backend.analytics.asset_intelligence_engine import (
+    AssetIntelligenceEngine,
+    AssetProfileCache,
+    TextProfile,
+    batch_semantic_similarity,
+)
+
+
+OFFICIAL_ASSET = "我们是一家专注于人工智能技术创新的公司，致力于为客户提供高品质的AI解决方案和专业服务。"
+
+AI_PREFERENCES = {
+    'doubao': ["这家公司在AI领域技术实力不错", "他们的AI解决方案在业界有一定知名度，客户反馈较好"],
+    'qwen': ["这是一家专业的AI技术服务提供商，拥有全面的技术栈"],
+    'deepseek': ["该公司在人工智能方面有深入的研究和分析能力"],
+    'kimi': [""],
+    'yuanbao': ["很短"],
+}
+
+
+class TestAssetProfileCache:
+    """官方资产缓存测试"""
+
+    def setup_method(self):
+        self.engine = AssetIntelligenceEngine()
+        self.cache = AssetProfileCache(max_size=2)
+
+    def test_same_content_reuses_profile(self):
+        """相同内容只分词一次"""
+        first = self.cache.get(OFFICIAL_ASSET, self.engine.semantic_analyzer)
+        second = self.cache.get(OFFICIAL_ASSET, self.engine.semantic_analyzer)
+
+        assert first is second
+        assert self.cache.get_stats()['hits'] == 1
+        assert self.cache.get_stats()['misses'] == 1
+
+    def test_lru_eviction(self):
+        """超过容量时淘汰最久未使用的条目"""
+        analyzer = self.engine.semantic_analyzer
+        a = self.cache.get('文本一：人工智能技术', analyzer)
+        self.cache.get('文本二：专业解决方案', analyzer)
+        self.cache.get('文本一：人工智能技术', analyzer)
+        self.cache.get('文本三：行业发展趋势', analyzer)
+
+        assert self.cache.get_stats()['size'] == 2
+        assert self.cache.get('文本一：人工智能技术', analyzer) is a
+
+    def test_keywords_match_semantic_analyzer(self):
+        """缓存的关键词与 SemanticAnalyzer.extract_keywords 一致"""
+        analyzer = self.engine.semantic_analyzer
+        profile = TextProfile(OFFICIAL_ASSET, analyzer)
+
+        for top_k in (10, 15, 20):
+            assert profile.keywords(top_k) == analyzer.extract_keywords(OFFICIAL_ASSET, top_k=top_k)
+
+
+class TestBatchSemanticSimilarity:
+    """批量相似度测试"""
+
+    def setup_method(self):
+        self.analyzer = AssetIntelligenceEngine().semantic_analyzer
+
+    def test_matches_pairwise_similarity(self):
+        """批量结果与逐对 TF-IDF 计算一致（含空内容、短内容）"""
+        official = TextProfile(OFFICIAL_ASSET, self.analyzer)
+        texts = [" ".join(contents) for contents in AI_PREFERENCES.values()]
+
+        batch = batch_semantic_similarity(official, [TextProfile(t, self.analyzer) for t in texts])
+
+        for text, score in zip(texts, batch):
+            expected = self.analyzer.calculate_semantic_similarity(OFFICIAL_ASSET, text)
+            assert score == pytest.approx(expected, abs=1e-9)
+
+    def test_empty_official_asset(self):
+        """官方资产为空时相似度为 0"""
+        official = TextProfile('', self.analyzer)
+        platforms = [TextProfile(OFFICIAL_ASSET, self.analyzer)]
+
+        assert batch_semantic_similarity(official, platforms) == [0.0]
+
+
+class TestAnalyzeContentMatching:
+    """整体分析结果测试"""
+
+    def setup_method(self):
+        self.engine = AssetIntelligenceEngine()
+
+    def test_semantic_gaps_match_drift_analysis(self):
+        """语义鸿沟与 analyze_semantic_drift 的判定一致"""
+        result = self.engine.analyze_content_matching(OFFICIAL_ASSET, AI_PREFERENCES)
+
+        expected = []
+        for platform, contents in AI_PREFERENCES.items():
+            drift = self.engine.semantic_analyzer.analyze_semantic_drift(OFFICIAL_ASSET, [" ".join(contents)], platform)
+            if drift['semantic_drift_score'] > 50:
+                expected.append((platform, drift['semantic_drift_score'], drift['missing_keywords'][:5]))
+
+        assert [(g['platform'], g['drift_score'], g['missing_keywords']) for g in result['semantic_gaps']] == expected
+        assert set(result['platform_analyses']) == set(AI_PREFERENCES)
@@ -0,0 +1,177 @@
+"""
+异步批量审计日志写入器单元测试
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+from wechat_backend.audit_log_writer import AuditLogWriter
+
+
+class FlakySink:
+    """可控失败的批量写入目标"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.error = sqlite3.OperationalError('database is locked')
+        self.lock = threading.Lock()
+
+    def __call__(self, rows):
+        if self.fail:
+            raise self.error
+        with self.lock:
+            self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+class TestAuditLogWriter:
+    """审计写入器测试"""
+
+    def setup_method(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.tmpdir, 'spill.jsonl')
+        self.sink = FlakySink()
+
+    def _writer(self, **kwargs):
+        params = dict(sink=self.sink, name='test', batch_size=50,
+                      flush_interval=0.05, spill_path=self.spill_path)
+        params.update(kwargs)
+        return AuditLogWriter(**params)
+
+    def test_rows_are_batched(self):
+        """多条记录合并为批量写入"""
+        writer = self._writer()
+        for i in range(120):
+            assert writer.submit({'action': 'a', 'seq': i})
+        assert writer.flush(timeout=2)
+
+        assert [row['seq'] for row in self.sink.rows] == list(range(120))
+        assert len(self.sink.batches) < 120
+        stats = writer.get_stats()
+        assert stats['written'] == 120
+        assert stats['queued'] == 0
+
+    def test_submit_does_not_wait_for_sink(self):
+        """请求线程提交不受写入耗时影响"""
+        slow_done = threading.Event()
+
+        def slow_sink(rows):
+            time.sleep(0.3)
+            slow_done.set()
+
+        writer = self._writer(sink=slow_sink)
+        start = time.monotonic()
+        for i in range(20):
+            writer.submit({'seq': i})
+        assert time.monotonic() - start < 0.1
+        writer.flush(timeout=2)
+        assert slow_done.is_set()
+
+    def test_full_queue_drops_and_counts(self):
+        """队列满时丢弃并计数"""
+        writer = self._writer(max_queue_size=1, sink=lambda rows: time.sleep(0.2))
+        results = [writer.submit({'seq': i}) for i in range(50)]
+
+        assert not all(results)
+        assert writer.get_stats()['dropped'] == results.count(False)
+
+    def test_busy_storage_spills_and_replays(self):
+        """存储繁忙时溢出到文件，恢复后回放"""
+        writer = self._writer()
+        self.sink.fail = True
+        for i in range(10):
+            writer.submit({'seq': i})
+        writer.flush(timeout=2)
+
+        stats = writer.get_stats()
+        assert stats['spilled'] == 10
+        assert stats['spill_pending'] > 0
+        assert self.sink.rows == []
+
+        self.sink.fail = False
+        writer.submit({'seq': 10})
+        writer.flush(timeout=2)
+
+        assert sorted(row['seq'] for row in self.sink.rows) == list(range(11))
+        stats = writer.get_stats()
+        assert stats['replayed'] == 10
+        assert stats['spill_pending'] == 0
+
+    def test_shutdown_flushes_and_rejects(self):
+        """关闭时刷新队列并拒绝新记录"""
+        writer = self._writer(flush_interval=10)
+        for i in range(5):
+            writer.submit({'seq': i})
+        writer.shutdown(timeout=2)
+
+        assert len(self.sink.rows) == 5
+        assert writer.submit({'seq': 99}) is False
+
+    def test_non_busy_errors_are_dead_lettered(self):
+        """表结构等不可重试的错误写入死信文件，不进入溢出重试"""
+        writer = self._writer()
+        self.sink.fail = True
+        self.sink.error = sqlite3.OperationalError('table audit_logs has no column named admin_id')
+        for i in range(3):
+            writer.submit({'seq': i})
+        writer.flush(timeout=2)
+
+        stats = writer.get_stats()
+        assert stats['dead_lettered'] == 3
+        assert stats['spilled'] == 0 and stats['spill_pending'] == 0
+        dead_path = os.path.join(self.tmpdir, f'spill.dead.{os.getpid()}.jsonl')
+        with open(dead_path, encoding='utf-8') as f:
+            assert [json.loads(line)['seq'] for line in f] == [0, 1, 2]
+
+    def test_spill_file_is_per_process(self):
+        """溢出文件名包含进程号，多个 worker 不共享同一文件"""
+        writer = self._writer()
+        self.sink.fail = True
+        writer.submit({'seq': 1})
+        writer.flush(timeout=2)
+
+        assert os.listdir(self.tmpdir) == [f'spill.{os.getpid()}.jsonl']
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='需要 os.fork')
+    def test_writer_restarts_after_fork(self):
+        """fork 出的 worker 重新启动后台线程，不沿用父进程已失效的线程"""
+        writer = self._writer()
+        writer.submit({'seq': 1})
+        assert writer.flush(timeout=2)
+
+        pid = os.fork()
+        if pid == 0:
+            writer.submit({'seq': 2})
+            ok = writer.flush(timeout=2) and [row['seq'] for row in self.sink.rows] == [1, 2]
+            os._exit(0 if ok else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        assert [row['seq'] for row in self.sink.rows] == [1]
+
+    def test_orphan_spill_from_exited_process_is_replayed(self):
+        """已退出进程留下的溢出文件由存活进程认领回放，存活进程的文件不被触碰"""
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                capture_output=True, text=True).stdout.strip()
+        for pid, seq in ((exited, 1), (str(os.getppid()), 2)):
+            with open(os.path.join(self.tmpdir, f'spill.{pid}.jsonl'), 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'seq': seq}) + '\n')
+
+        writer = self._writer()
+        writer.submit({'seq': 0})
+        writer.flush(timeout=2)
+
+        assert sorted(row['seq'] for row in self.sink.rows) == [0, 1]
+        assert sorted(os.listdir(self.tmpdir)) == [f'spill.{os.getppid()}.jsonl']
@@ -0,0 +1,216 @@
+"""
+单元格完成事件总线与 NxM 订阅者单元测试
+"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from wechat_backend.cell_event_bus import (
+    CELL_ERROR,
+    CELL_SUCCESS,
+    CellCompleted,
+    CellEventBus,
+)
+
+
+def _event(index=0, execution_id='exec-1', **kwargs):
+    values = dict(execution_id=execution_id, brand='华为', question_index=index, model='qwen',
+                  status=CELL_SUCCESS, completed=index + 1, total=10)
+    values.update(kwargs)
+    return CellCompleted(**values)
+
+
+@pytest.fixture
+def bus():
+    event_bus = CellEventBus(max_queue_size=100)
+    yield event_bus
+    for name in event_bus.subscriber_names():
+        event_bus.unsubscribe(name, timeout=1)
+
+
+class TestCellEventBus:
+    """发布/订阅测试"""
+
+    def test_slow_subscriber_does_not_block_publish(self, bus):
+        """慢订阅者不拖慢发布端，延迟可观测；其他订阅者不受影响"""
+        slow, fast = [], []
+        bus.subscribe('slow', lambda e: (time.sleep(0.05), slow.append(e.question_index)))
+        bus.subscribe('fast', lambda e: fast.append(e.question_index))
+
+        start = time.perf_counter()
+        for i in range(5):
+            bus.publish(_event(i))
+        assert time.perf_counter() - start < 0.05
+
+        assert bus.flush(timeout=5)
+        assert slow == fast == [0, 1, 2, 3, 4]
+        stats = bus.get_stats()
+        assert stats['published'] == 5
+        assert stats['subscribers']['slow']['delivered'] == 5
+        assert stats['subscribers']['slow']['max_lag_ms'] >= 200
+
+    def test_full_queue_drops_oldest(self):
+        """订阅者队列满时丢弃最旧事件并计数"""
+        bus = CellEventBus(max_queue_size=2)
+        started, release = threading.Event(), threading.Event()
+        received = []
+
+        def blocked(event):
+            started.set()
+            release.wait(5)
+            received.append(event.question_index)
+
+        bus.subscribe('blocked', blocked)
+        bus.publish(_event(0))
+        assert started.wait(5)
+        for i in range(1, 6):
+            bus.publish(_event(i))
+
+        assert bus.get_stats()['subscribers']['blocked']['dropped'] == 3
+        release.set()
+        bus.unsubscribe('blocked')
+        assert received == [0, 4, 5]
+
+    def test_execution_filter_and_handler_errors(self, bus):
+        """按 execution_id 过滤；处理异常计入 failed 且不影响后续事件"""
+        received = []
+
+        def handler(event):
+            if event.question_index == 0:
+                raise RuntimeError('db down')
+            received.append((event.execution_id, event.question_index))
+
+        bus.subscribe('scoped', handler, execution_id='exec-1')
+        for i in range(3):
+            bus.publish(_event(i))
+            bus.publish(_event(i, execution_id='exec-2'))
+        bus.flush(timeout=5)
+
+        assert received == [('exec-1', 1), ('exec-1', 2)]
+        assert bus.get_stats()['subscribers']['scoped']['failed'] == 1
+        assert not bus.subscribe('scoped', handler)
+
+    def test_lossless_subscriber_blocks_instead_of_dropping(self):
+        """无损订阅者队列满时发布端等待，事件不丢失"""
+        bus = CellEventBus(max_queue_size=2)
+        received = []
+        bus.subscribe('wal', lambda e: (time.sleep(0.01), received.append(e.question_index)), lossless=True)
+
+        for i in range(20):
+            bus.publish(_event(i))
+
+        assert bus.flush(timeout=5)
+        assert received == list(range(20))
+        assert bus.get_stats()['subscribers']['wal']['dropped'] == 0
+        bus.unsubscribe('wal')
+
+    def test_flush_fails_when_marker_dropped(self):
+        """刷新标记被挤出队列（事件已丢失）时 flush 返回 False"""
+        bus = CellEventBus(max_queue_size=2)
+        started, release = threading.Event(), threading.Event()
+        bus.subscribe('blocked', lambda e: (started.set(), release.wait(5)))
+        bus.publish(_event(0))
+        assert started.wait(5)
+
+        outcome = []
+        flusher = threading.Thread(target=lambda: outcome.append(bus.flush(timeout=5)))
+        flusher.start()
+        time.sleep(0.05)
+        for i in range(1, 4):
+            bus.publish(_event(i))
+        flusher.join(5)
+        release.set()
+
+        assert outcome == [False]
+        bus.unsubscribe('blocked')
+
+    def test_flush_scoped_to_execution(self, bus):
+        """按执行刷新时不等待其他执行的订阅者"""
+        release = threading.Event()
+        bus.subscribe('other', lambda e: release.wait(5), execution_id='exec-2')
+        received = []
+        bus.subscribe('mine', lambda e: received.append(e.question_index), execution_id='exec-1')
+        bus.publish(_event(0, execution_id='exec-2'))
+        bus.publish(_event(1, execution_id='exec-1'))
+
+        start = time.perf_counter()
+        assert bus.flush(timeout=2, execution_id='exec-1')
+        assert time.perf_counter() - start < 1
+        assert received == [1]
+        release.set()
+
+    def test_end_execution_notifies_after_events(self, bus):
+        """执行结束通知排在该执行的事件之后送达"""
+        calls = []
+
+        class Handler:
+            def __call__(self, event):
+                calls.append(('event', event.question_index))
+
+            def on_execution_end(self, execution_id):
+                calls.append(('end', execution_id))
+
+        bus.subscribe('stateful', Handler())
+        bus.publish(_event(0))
+        bus.end_execution('exec-1')
+        bus.flush(timeout=5)
+
+        assert calls == [('event', 0), ('end', 'exec-1')]
+
+
+class TestNxMSubscribers:
+    """NxM 持久化与 WAL 订阅者测试"""
+
+    @pytest.fixture(autouse=True)
+    def engine(self):
+        return pytest.importorskip('wechat_backend.nxm_execution_engine')
+
+    def test_persist_cell_saves_dimension_and_progress(self, engine):
+        """成功单元格按排名计分并保存进度；异常单元格只记录失败状态"""
+        with mock.patch('wechat_backend.repositories.save_dimension_result') as save_dimension, \
+                mock.patch('wechat_backend.repositories.save_task_status') as save_status:
+            engine.persist_cell(_event(4, result={'geo_data': {'rank': 3}}))
+            engine.persist_cell(_event(5, status=CELL_ERROR, error_message='timeout'))
+
+        dimension = save_dimension.call_args.kwargs
+        assert dimension['dimension_name'] == '华为-qwen'
+        assert dimension['status'] == 'success' and dimension['score'] == 80
+        assert save_status.call_args_list[0].kwargs['progress'] == 50
+        assert save_status.call_args_list[1].kwargs['stage'] == 'failed'
+        assert save_dimension.call_count == 1
+
+    def test_persistence_failure_records_alert(self, engine):
+        """持久化失败时记录告警而不抛出"""
+        with mock.patch('wechat_backend.repositories.save_dimension_result', side_effect=RuntimeError('locked')), \
+                mock.patch('wechat_backend.alert_system.record_persistence_error', return_value=False) as record:
+            engine.persist_cell(_event(0, result={'geo_data': {'rank': 1}}))
+
+        assert record.call_args.kwargs['error_message'] == 'locked'
+
+    def test_wal_subscriber_accumulates_and_releases(self, engine):
+        """WAL 按执行累积结果，最后一个单元格后释放"""
+        wal = engine.WALSubscriber()
+        with mock.patch.object(engine, 'write_wal') as write_wal:
+            wal(_event(0, total=3, result={'brand': '华为'}))
+            wal(_event(1, total=3, status=CELL_ERROR))
+            assert len(write_wal.call_args.args[1]) == 1
+            wal(_event(2, total=3, result={'brand': '小米'}))
+
+        assert [r['brand'] for r in write_wal.call_args.args[1]] == ['华为', '小米']
+        assert wal._results == {}
+
+    def test_wal_subscriber_releases_failed_executions(self, engine):
+        """写 WAL 失败或执行中止时也释放累积的结果"""
+        wal = engine.WALSubscriber()
+        with mock.patch.object(engine, 'write_wal', side_effect=OSError('disk full')):
+            with pytest.raises(OSError):
+                wal(_event(1, total=2, completed=2, result={'brand': '华为'}))
+        assert wal._results == {}
+
+        with mock.patch.object(engine, 'write_wal'):
+            wal(_event(0, total=5, result={'brand': '华为'}))
+        wal.on_execution_end('exec-1')
+        assert wal._results == {}
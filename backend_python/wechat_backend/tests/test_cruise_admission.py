@@ -0,0 +1,116 @@
+"""
+巡航任务准入控制单元测试
+"""
+
+import threading
+import time
+
+from wechat_backend.cruise_admission import CruiseAdmissionController, LLMCallBudget, normalize_platform
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLLMCallBudget:
+    """滑动窗口预算测试"""
+
+    def test_window_release(self):
+        """超出预算时返回等待时间，窗口滑过后恢复"""
+        clock = _FakeClock()
+        budget = LLMCallBudget(limit=10, window_seconds=60, clock=clock)
+
+        assert budget.try_acquire(6) == 0
+        clock.now = 30
+        assert budget.try_acquire(6) == 30
+        clock.now = 60
+        assert budget.try_acquire(6) == 0
+        assert budget.used == 6
+
+    def test_oversized_request_not_starved(self):
+        """单次超过总预算的请求在窗口为空时放行"""
+        budget = LLMCallBudget(limit=5, window_seconds=60, clock=_FakeClock())
+
+        assert budget.try_acquire(20) == 0
+
+
+class TestCruiseAdmission:
+    """准入控制测试"""
+
+    def setup_method(self):
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.started = []
+
+    def teardown_method(self):
+        self.gate.set()
+        self.admission.shutdown()
+
+    def _job(self, name):
+        with self.lock:
+            self.started.append(name)
+        self.gate.wait(timeout=5)
+
+    def test_duplicate_queued_runs_are_coalesced(self):
+        """同键任务排队期间重复触发被合并"""
+        self.admission = CruiseAdmissionController(max_concurrent_runs=1, max_runs_per_user=1,
+                                                   platform_max_runs=5, llm_budget=1000)
+        self.admission.submit('blocker', 'u0', ['qwen'], 1, self._job, 'blocker')
+        accepted = [self.admission.submit('u1:华为', 'u1', ['deepseek'], 3, self._job, f'run{i}')
+                    for i in range(5)]
+
+        self.gate.set()
+        assert self.admission.wait_idle(timeout=5)
+        assert accepted == [True, False, False, False, False]
+        assert self.started == ['blocker', 'run0']
+        assert self.admission.get_stats()['coalesced'] == 4
+
+    def test_users_are_served_round_robin(self):
+        """多用户轮转出队，单个用户的大量任务不会饿死其他用户"""
+        self.admission = CruiseAdmissionController(max_concurrent_runs=1, max_runs_per_user=1,
+                                                   platform_max_runs=5, llm_budget=1000)
+        self.gate.set()
+        self.admission.submit('hold', 'u0', ['qwen'], 1, time.sleep, 0.2)
+        for i in range(3):
+            self.admission.submit(f'a{i}', 'a', ['qwen'], 1, self._job, f'a{i}')
+        self.admission.submit('b0', 'b', ['qwen'], 1, self._job, 'b0')
+
+        assert self.admission.wait_idle(timeout=5)
+        assert self.started.index('b0') < self.started.index('a1')
+
+    def test_platform_cap(self):
+        """同一平台同时运行的任务数不超过上限"""
+        self.admission = CruiseAdmissionController(max_concurrent_runs=3, max_runs_per_user=3,
+                                                   platform_max_runs=1, llm_budget=1000)
+        self.admission.submit('d1', 'u1', ['豆包'], 1, self._job, 'd1')
+        self.admission.submit('d2', 'u2', ['doubao'], 1, self._job, 'd2')
+        self.admission.submit('q1', 'u3', ['通义千问'], 1, self._job, 'q1')
+        time.sleep(0.2)
+
+        assert sorted(self.started) == ['d1', 'q1']
+        self.gate.set()
+        assert self.admission.wait_idle(timeout=5)
+        assert sorted(self.started) == ['d1', 'd2', 'q1']
+
+    def test_budget_delays_runs(self):
+        """超出窗口预算的任务延后到窗口释放后执行"""
+        self.admission = CruiseAdmissionController(max_concurrent_runs=2, max_runs_per_user=2,
+                                                   platform_max_runs=5, llm_budget=10,
+                                                   budget_window_seconds=0.5)
+        self.gate.set()
+        start = time.monotonic()
+        self.admission.submit('r1', 'u1', ['qwen'], 8, self._job, 'r1')
+        self.admission.submit('r2', 'u2', ['deepseek'], 8, self._job, 'r2')
+
+        assert self.admission.wait_idle(timeout=5)
+        assert time.monotonic() - start >= 0.45
+        assert self.started == ['r1', 'r2']
+
+
+def test_normalize_platform():
+    assert normalize_platform('豆包') == 'doubao'
+    assert normalize_platform('DeepSeek') == 'deepseek'
@@ -0,0 +1,135 @@
+"""
+截止时间传递单元测试
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wechat_backend.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    bind_context,
+    current_deadline,
+    deadline_scope,
+    remaining_timeout,
+)
+from wechat_backend.fault_tolerant_executor import ErrorType, FaultTolerantExecutor
+from wechat_backend.pipelined_aggregator import PipelinedResultAggregator
+
+
+def _fallback(result, reason):
+    return {'index': result['index'], 'fallback': reason}
+
+
+class TestDeadline:
+    """截止时间与上下文测试"""
+
+    def test_remaining_timeout_capped(self):
+        """单次调用超时取 min(默认值, 剩余时间)，无截止时间时不变"""
+        assert remaining_timeout(30) == 30
+
+        with deadline_scope(Deadline.after(2)):
+            assert remaining_timeout(30) <= 2
+            assert remaining_timeout(1) == 1
+
+        with deadline_scope(Deadline.after(0)):
+            with pytest.raises(DeadlineExceeded):
+                remaining_timeout(30)
+
+    def test_inner_scope_cannot_extend(self):
+        """嵌套时取更早的截止时间"""
+        outer = Deadline.after(1)
+        with deadline_scope(outer):
+            with deadline_scope(Deadline.after(60)) as effective:
+                assert effective is outer
+        assert current_deadline() is None
+
+    def test_bind_context_carries_into_threads(self):
+        """bind_context 把截止时间带入其他线程，且可被多个线程同时使用"""
+        seen = []
+        deadline = Deadline.after(5)
+        with deadline_scope(deadline):
+            probe = bind_context(lambda: seen.append(current_deadline()))
+        threads = [threading.Thread(target=probe) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert seen == [deadline] * 3
+
+
+class TestDeadlinePropagation:
+    """流水线与容错执行器的截止时间传递"""
+
+    def test_pipeline_hands_out_remaining_budget(self):
+        """评判线程可见的超时不超过 judge_timeout 与整体剩余时间"""
+        budgets = []
+
+        def evaluate(result):
+            budgets.append(remaining_timeout(30))
+            return {'index': result['index']}
+
+        pipeline = PipelinedResultAggregator(
+            evaluate, lambda outputs: outputs, _fallback, judge_timeout=10, deadline=Deadline.after(2)
+        )
+        pipeline.submit({'index': 0})
+        pipeline.finalize()
+
+        assert 0 < budgets[0] <= 2
+
+    def test_pipeline_returns_partial_results_off_main_thread(self):
+        """在工作线程中运行时整体截止时间同样生效，返回部分结果"""
+        release = threading.Event()
+        holder = {}
+
+        def evaluate(result):
+            if result['index'] > 0:
+                release.wait(5)
+            return {'index': result['index']}
+
+        def run():
+            pipeline = PipelinedResultAggregator(
+                evaluate, lambda outputs: outputs, _fallback,
+                max_parallel_judges=2, judge_timeout=60, deadline=Deadline.after(0.6)
+            )
+            for i in range(3):
+                pipeline.submit({'index': i})
+            holder['outputs'] = pipeline.finalize()
+
+        start = time.monotonic()
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join(5)
+        release.set()
+
+        assert time.monotonic() - start < 2
+        assert holder['outputs'][0] == {'index': 0}
+        assert [o.get('fallback') for o in holder['outputs'][1:]] == ['aggregation_timeout'] * 2
+
+    def test_fault_tolerant_executor_respects_deadline(self):
+        """执行器超时不超过当前截止时间，已到期时不再调用任务"""
+        calls = []
+
+        def slow_task():
+            calls.append(current_deadline())
+            time.sleep(1.5)
+
+        async def run(seconds):
+            start = time.monotonic()
+            with deadline_scope(Deadline.after(seconds)):
+                result = await FaultTolerantExecutor(timeout_seconds=10).execute_with_fallback(slow_task, '慢任务')
+            return result, time.monotonic() - start
+
+        result, elapsed = asyncio.run(run(0.8))
+        assert elapsed < 2
+        assert result.error_type == ErrorType.TIMEOUT
+        assert calls and calls[0] is not None
+
+        calls.clear()
+        result, _ = asyncio.run(run(0))
+        assert result.error_type == ErrorType.TIMEOUT
+        assert calls == []
@@ -0,0 +1,171 @@
+"""
+diagnosis_results GEO 类型化列与信源子表单元测试
+"""
+
+import copy
+import json
+import sqlite3
+
+import pytest
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories.diagnosis_geo_repository import (
+    DiagnosisGeoRepository,
+    attach_cited_sources,
+    split_geo_data,
+)
+
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE diagnosis_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_id INTEGER NOT NULL,
+        execution_id TEXT NOT NULL,
+        brand TEXT NOT NULL,
+        question TEXT NOT NULL,
+        model TEXT NOT NULL,
+        response_content TEXT NOT NULL,
+        response_latency REAL,
+        geo_data TEXT NOT NULL,
+        quality_score REAL NOT NULL,
+        quality_level TEXT NOT NULL,
+        quality_details TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'success',
+        error_message TEXT,
+        created_at TEXT NOT NULL
+    )
+'''
+
+GEO_SAMPLES = [
+    ('deepseek', {'brand_mentioned': True, 'rank': 2, 'sentiment': 0.6, 'interception': '',
+                  'cited_sources': [{'url': 'https://a.com', 'site_name': 'A', 'attitude': 'positive', 'weight': 3},
+                                    'https://plain.com']}),
+    ('deepseek', {'brand_mentioned': True, 'rank': 4, 'sentiment': 0.2, 'interception': '小米',
+                  'cited_sources': []}),
+    ('deepseek', {'brand_mentioned': False, 'rank': -1, 'sentiment': 0.0, 'interception': '',
+                  'cited_sources': [{'url': 'https://b.com', 'site_name': 'B', 'attitude': 'neutral'}]}),
+    ('qwen', {'brand_mentioned': True, 'rank': '1', 'sentiment': '0.9'}),
+]
+
+
+def _insert_legacy_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEGACY_SCHEMA)
+    for model, geo_data in GEO_SAMPLES:
+        conn.execute('''
+            INSERT INTO diagnosis_results (
+                report_id, execution_id, brand, question, model, response_content,
+                geo_data, quality_score, quality_level, quality_details, created_at
+            ) VALUES (1, 'exec_1', '华为', '问题', ?, '回答', ?, 80, 'good', '{}', '2026-10-01')
+        ''', (model, json.dumps(geo_data, ensure_ascii=False)))
+    conn.commit()
+    conn.close()
+
+
+def _read_results(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    items = []
+    for row in conn.execute('SELECT * FROM diagnosis_results ORDER BY id').fetchall():
+        item = dict(row)
+        item['geo_data'] = json.loads(item['geo_data'])
+        items.append(item)
+    attach_cited_sources(conn, items)
+    conn.close()
+    return items
+
+
+class TestSplitGeoData:
+    """geo_data 拆分测试"""
+
+    def test_typed_fields(self):
+        """类型化列按类型转换，非法值置空"""
+        stored, sources, fields = split_geo_data(GEO_SAMPLES[3][1])
+
+        assert fields['geo_rank'] == 1
+        assert fields['geo_sentiment'] == 0.9
+        assert fields['geo_brand_mentioned'] == 1
+        assert fields['geo_source_count'] is None
+        assert sources is None
+        assert stored == GEO_SAMPLES[3][1]
+
+    def test_cited_sources_removed_from_json(self):
+        """cited_sources 从 JSON 中拆出"""
+        stored, sources, fields = split_geo_data(GEO_SAMPLES[0][1])
+
+        assert 'cited_sources' not in stored
+        assert len(sources) == 2
+        assert fields['geo_source_count'] == 2
+
+
+class TestDiagnosisGeoRepository:
+    """迁移与聚合测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path, monkeypatch):
+        """连接池指向临时数据库"""
+        self.db_path = str(tmp_path / 'geo.db')
+        monkeypatch.setattr(database_connection_pool, 'DB_PATH', self.db_path)
+        monkeypatch.setattr(database_connection_pool, '_db_pool', None)
+        _insert_legacy_rows(self.db_path)
+        self.legacy_items = _read_results(self.db_path)
+        self.repo = DiagnosisGeoRepository()
+        yield
+        database_connection_pool.close_db_pool()
+
+    def test_unmigrated_rows_read_unchanged(self):
+        """回填前读取结果与原 JSON 一致"""
+        assert [item['geo_data'] for item in _read_results(self.db_path)] == [g for _, g in GEO_SAMPLES]
+
+    def test_backfill_round_trip(self):
+        """回填后类型化列有值，读取时 cited_sources 原样恢复"""
+        assert self.repo.backfill(batch_size=2) == 4
+
+        items = _read_results(self.db_path)
+        assert [item['geo_data'] for item in items] == [g for _, g in GEO_SAMPLES]
+        assert [item['geo_rank'] for item in items] == [2, 4, -1, 1]
+        assert [item['geo_source_count'] for item in items] == [2, 0, 1, None]
+
+        conn = sqlite3.connect(self.db_path)
+        raw = json.loads(conn.execute('SELECT geo_data FROM diagnosis_results WHERE id = 1').fetchone()[0])
+        conn.close()
+        assert 'cited_sources' not in raw
+
+    def test_backfill_is_idempotent(self):
+        """重复回填不再处理已迁移记录"""
+        self.repo.backfill()
+
+        assert self.repo.backfill() == 0
+        assert len(self.repo.get_sources_by_execution_id('exec_1')) == 3
+
+    def test_rows_without_geo_fields_are_marked(self):
+        """无可提取字段或无法解析的行回填一次后不再被扫描"""
+        conn = sqlite3.connect(self.db_path)
+        for geo_data in ('{}', 'not json'):
+            conn.execute('''
+                INSERT INTO diagnosis_results (
+                    report_id, execution_id, brand, question, model, response_content,
+                    geo_data, quality_score, quality_level, quality_details, created_at
+                ) VALUES (1, 'exec_2', '华为', '问题', 'qwen', '回答', ?, 80, 'good', '{}', '2026-10-02')
+            ''', (geo_data,))
+        conn.commit()
+        conn.close()
+
+        assert self.repo.backfill() == 6
+        assert self.repo.backfill() == 0
+        conn = sqlite3.connect(self.db_path)
+        raw = conn.execute("SELECT geo_data FROM diagnosis_results WHERE execution_id = 'exec_2' ORDER BY id").fetchall()
+        conn.close()
+        assert [row[0] for row in raw] == ['{}', 'not json']
+
+    def test_rank_stats_by_model(self):
+        """按模型聚合排名、情感和提及率"""
+        self.repo.backfill()
+
+        stats = {row['model']: row for row in self.repo.get_rank_stats_by_model(brand='华为')}
+
+        assert stats['deepseek']['result_count'] == 3
+        assert stats['deepseek']['avg_rank'] == pytest.approx(3.0)
+        assert stats['deepseek']['ranked_count'] == 2
+        assert stats['deepseek']['mention_rate'] == pytest.approx(2 / 3)
+        assert stats['qwen']['avg_rank'] == pytest.approx(1.0)
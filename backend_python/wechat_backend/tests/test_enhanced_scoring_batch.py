@@ -0,0 +1,116 @@
+"""
+EnhancedScoringEngine 批量评分与逐品牌评分等价性测试
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from ai_judge_module import ConfidenceLevel, JudgeResult
+from enhanced_scoring_engine import (
+    EnhancedScoringEngine,
+    calculate_enhanced_scores_batch,
+    judge_results_to_array,
+)
+
+
+def _judge(accuracy, completeness, sentiment, purity, consistency):
+    return JudgeResult(
+        accuracy_score=accuracy,
+        completeness_score=completeness,
+        sentiment_score=sentiment,
+        purity_score=purity,
+        consistency_score=consistency,
+        judgement='',
+        confidence_level=ConfidenceLevel.MEDIUM,
+    )
+
+
+def _random_brands(seed, brands=12, max_cells=15):
+    rng = random.Random(seed)
+    brand_results = {}
+    for b in range(brands):
+        cells = rng.randint(1, max_cells)
+        spread = rng.choice([3, 15, 45])
+        center = rng.randint(20, 90)
+        brand_results[f'品牌{b}'] = [
+            _judge(*[max(0, min(100, center + rng.randint(-spread, spread))) for _ in range(5)])
+            for _ in range(cells)
+        ]
+    return brand_results
+
+
+def _cells(brand_results):
+    return [
+        (brand, f'model{i % 3}', i, result)
+        for brand, results in brand_results.items()
+        for i, result in enumerate(results)
+    ]
+
+
+class TestEnhancedScoringBatch:
+    """批量评分等价性测试"""
+
+    def setup_method(self):
+        self.engine = EnhancedScoringEngine()
+
+    @pytest.mark.parametrize('seed', [1, 2, 3])
+    @pytest.mark.parametrize('industry', ['general', 'finance'])
+    def test_matches_per_brand_calculate(self, seed, industry):
+        """批量结果与逐品牌 calculate 完全一致（含偏差、建议与总结）"""
+        brand_results = _random_brands(seed)
+        batch = self.engine.calculate_batch(judge_results_to_array(_cells(brand_results)), industry=industry)
+
+        assert set(batch) == set(brand_results)
+        for brand, results in brand_results.items():
+            expected = self.engine.calculate(results, industry=industry, brand_name=brand)
+            actual = batch[brand]
+            assert actual.geo_score == expected.geo_score
+            assert (actual.grade, actual.label) == (expected.grade, expected.label)
+            for field in ('authority_score', 'visibility_score', 'sentiment_score',
+                          'purity_score', 'consistency_score', 'cognitive_confidence'):
+                assert getattr(actual, field) == pytest.approx(getattr(expected, field))
+            assert actual.bias_indicators == expected.bias_indicators
+            assert actual.recommendations == expected.recommendations
+            assert actual.summary == expected.summary
+
+    def test_bias_flags(self):
+        """一致性偏差与极值偏差标记与逐品牌检测一致"""
+        brand_results = {
+            'stable': [_judge(80, 80, 80, 80, 80)] * 4,
+            'spread': [_judge(10, 50, 50, 50, 50), _judge(95, 50, 50, 50, 50), _judge(30, 50, 50, 50, 50)],
+            'outlier': [_judge(70, 70, 70, 70, 70)] * 10 + [_judge(0, 0, 0, 0, 0), _judge(0, 0, 70, 70, 70)],
+        }
+        scores = self.engine.score_batch(judge_results_to_array(_cells(brand_results)))
+        flags = dict(zip(scores['brands'], zip(scores['consistency_bias'], scores['extreme_bias'])))
+
+        for brand, results in brand_results.items():
+            detected = {bias['type'] for bias in self.engine.bias_detector.detect_bias(results)}
+            assert flags[brand] == ('consistency' in detected, 'extreme_values' in detected)
+        assert flags['spread'][0] and flags['outlier'][1] and not any(flags['stable'])
+
+    def test_missing_purity_and_consistency_use_defaults(self):
+        """缺失的纯净度/一致性按逐品牌路径的默认值补齐"""
+        results = [
+            SimpleNamespace(accuracy_score=80, completeness_score=70, sentiment_score=60),
+            SimpleNamespace(accuracy_score=60, completeness_score=50, sentiment_score=40),
+        ]
+        expected = self.engine.calculate(results, brand_name='legacy')
+        actual = self.engine.calculate_batch(judge_results_to_array(_cells({'legacy': results})))['legacy']
+
+        assert actual.purity_score == pytest.approx(expected.purity_score)
+        assert actual.consistency_score == pytest.approx(expected.consistency_score)
+        assert actual.bias_indicators == expected.bias_indicators
+        assert actual.geo_score == expected.geo_score
+
+    def test_convenience_function_and_empty_input(self):
+        """便捷函数跳过空品牌；空数组报错"""
+        results = calculate_enhanced_scores_batch({'a': [_judge(90, 90, 90, 90, 90)], 'b': []})
+
+        assert list(results) == ['a'] and results['a'].grade == 'A'
+        with pytest.raises(ValueError):
+            self.engine.score_batch(judge_results_to_array([]))
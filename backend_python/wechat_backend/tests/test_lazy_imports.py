@@ -0,0 +1,65 @@
+"""
+重量级模块延迟加载单元测试
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from wechat_backend.lazy_imports import LazyInstance, preload_heavy_modules
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+
+class TestLazyInstance:
+    """延迟实例化代理测试"""
+
+    def test_instantiated_on_first_access(self):
+        """首次访问属性时才实例化，之后复用同一实例"""
+        proxy = LazyInstance('collections', 'Counter', 'aab')
+        assert not proxy.is_loaded
+
+        assert proxy.most_common(1) == [('a', 2)]
+        assert proxy.is_loaded
+        proxy.update('b')
+        assert proxy.most_common(1)[0][1] == 2
+
+    def test_setattr_is_forwarded(self):
+        """属性赋值转发给真实对象"""
+        proxy = LazyInstance('types', 'SimpleNamespace', value=1)
+        proxy.value = 2
+
+        assert proxy.value == 2
+
+
+class TestAnalyticsPackage:
+    """analytics 包按需导入测试"""
+
+    def test_submodule_import_does_not_load_heavy_modules(self):
+        """导入轻量子模块不会连带加载报告生成、资产智能和预测引擎"""
+        code = (
+            "import sys, wechat_backend.analytics as a; "
+            "print(','.join(m for m in ('wechat_backend.analytics.report_generator', "
+            "'wechat_backend.analytics.asset_intelligence_engine', "
+            "'wechat_backend.analytics.prediction_engine') if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, '-c', code], cwd=str(BACKEND_DIR),
+                             capture_output=True, text=True, check=True)
+
+        assert out.stdout.strip() == ''
+
+    def test_unknown_attribute_raises(self):
+        """未导出的名称抛出 AttributeError"""
+        import wechat_backend.analytics as analytics
+
+        with pytest.raises(AttributeError):
+            analytics.NoSuchThing
+
+
+class TestPreload:
+    """预热测试"""
+
+    def test_unknown_subsystem_is_ignored(self):
+        assert preload_heavy_modules(['no-such-subsystem']) == {}
@@ -0,0 +1,103 @@
+"""
+队列日志与重复日志限流单元测试
+"""
+
+import logging
+import queue
+from unittest import mock
+
+import pytest
+
+from unified_logging import unified_logger
+from unified_logging.unified_logger import DeferredQueueHandler, RepetitionFilter, UnifiedLogger
+
+
+class _Counted:
+    """记录被格式化次数的参数"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'counted'
+
+
+@pytest.fixture
+def queued_logger():
+    log_queue = queue.Queue(maxsize=3)
+    handler = DeferredQueueHandler(log_queue)
+    std_logger = logging.getLogger('test.logging_queue')
+    std_logger.handlers = [handler]
+    std_logger.propagate = False
+    std_logger.setLevel(logging.INFO)
+    yield UnifiedLogger('test.logging_queue', log_queue), log_queue, handler
+    std_logger.handlers = []
+
+
+class TestDeferredQueueHandler:
+    """非阻塞入队与惰性格式化测试"""
+
+    def test_lazy_args_and_disabled_level(self, queued_logger):
+        """未启用级别不格式化参数，启用级别入队时合并参数并保留调用位置"""
+        logger, log_queue, _ = queued_logger
+        arg = _Counted()
+
+        logger.debug('skip %s', arg)
+        assert arg.formatted == 0
+
+        logger.info('结果 %s %d', arg, 3)
+        record = log_queue.get_nowait()
+        assert record.msg == '结果 counted 3' and record.args is None
+        assert record.filename == 'test_logging_queue.py'
+
+    def test_exc_info_kept_for_listener(self, queued_logger):
+        """异常堆栈不在调用线程格式化"""
+        logger, log_queue, _ = queued_logger
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logger.error('失败', exc_info=True)
+
+        record = log_queue.get_nowait()
+        assert record.exc_info[0] is ValueError and record.exc_text is None
+
+    def test_full_queue_drops_without_blocking(self, queued_logger):
+        """队列满时丢弃并计数"""
+        logger, log_queue, handler = queued_logger
+        for i in range(5):
+            logger.warning('消息 %d', i)
+
+        assert log_queue.qsize() == 3
+        assert handler.dropped == 2
+
+    def test_std_logger_methods_delegated(self, queued_logger):
+        """setLevel 等标准日志器方法仍可用"""
+        logger, log_queue, _ = queued_logger
+        logger.setLevel(logging.WARNING)
+        logger.info('不输出')
+
+        assert log_queue.empty()
+        assert not logger.isEnabledFor(logging.INFO)
+
+
+class TestRepetitionFilter:
+    """重复日志限流测试"""
+
+    def _record(self, level=logging.INFO, lineno=10):
+        return logging.LogRecord('wechat_backend.api', level, 'engine.py', lineno, 'msg', None, None)
+
+    def test_limit_per_site_and_report_suppressed(self):
+        """同一调用点每窗口最多放行 limit 条，下个窗口首条报告丢弃数；ERROR 不受限"""
+        repetition = RepetitionFilter(limit=2, interval=10, max_level='WARNING')
+        with mock.patch.object(unified_logger.time, 'monotonic', return_value=100.0):
+            allowed = [repetition.filter(self._record()) for _ in range(5)]
+            assert repetition.filter(self._record(lineno=11))
+            assert all(repetition.filter(self._record(level=logging.ERROR)) for _ in range(5))
+
+        assert allowed == [True, True, False, False, False]
+        with mock.patch.object(unified_logger.time, 'monotonic', return_value=111.0):
+            record = self._record()
+            assert repetition.filter(record)
+        assert record.suppressed == 3
+        assert repetition.suppressed_total == 3
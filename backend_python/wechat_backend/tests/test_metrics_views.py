@@ -0,0 +1,63 @@
+"""
+流水线运行指标 API 单元测试
+"""
+
+import pytest
+from flask import Flask
+
+from wechat_backend import cell_event_bus
+from wechat_backend.cell_event_bus import CellEventBus
+from wechat_backend.monitoring import stage_metrics
+from wechat_backend.monitoring.metrics_views import metrics_bp
+from wechat_backend.monitoring.stage_metrics import STAGE_LLM_CALL, StageMetrics
+from wechat_backend.security import rate_limiting
+from wechat_backend.security.rate_limiting import GCRARateLimiter
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    event_bus = CellEventBus(max_queue_size=100)
+    monkeypatch.setattr(cell_event_bus, '_bus', event_bus)
+    yield event_bus
+    for name in event_bus.subscriber_names():
+        event_bus.unsubscribe(name, timeout=1)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limiting, '_rate_limiter', GCRARateLimiter(db_path=str(tmp_path / 'rate_limits.db')))
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp)
+    return app.test_client()
+
+
+class TestPipelineMetricsEndpoint:
+    """/api/monitoring/pipeline 测试"""
+
+    def test_event_bus_stats(self, client, bus):
+        """内网抓取方可读到事件总线各订阅者计数"""
+        bus.subscribe('wal', lambda event: None)
+
+        response = client.get('/api/monitoring/pipeline')
+
+        assert response.status_code == 200
+        stats = response.get_json()['event_bus']
+        assert stats['published'] == 0
+        assert stats['subscribers']['wal']['running'] is True
+
+    def test_stage_summary(self, client, bus, monkeypatch):
+        """返回各阶段（及平台）耗时摘要"""
+        metrics = StageMetrics(sample_rate=1.0)
+        metrics.record(STAGE_LLM_CALL, 1.0, 'exec-1', platform='deepseek')
+        monkeypatch.setattr(stage_metrics, '_stage_metrics', metrics)
+
+        response = client.get('/api/monitoring/pipeline')
+
+        stages = response.get_json()['stages']
+        assert stages[f'{STAGE_LLM_CALL}:deepseek']['count'] == 1
+
+    def test_forwarded_request_requires_admin(self, client, bus):
+        """经反向代理转发的匿名请求被拒绝"""
+        response = client.get('/api/monitoring/pipeline', headers={'X-Forwarded-For': '203.0.113.7'})
+
+        assert response.status_code == 403
@@ -0,0 +1,154 @@
+"""
+流水线式结果聚合器单元测试
+"""
+
+import threading
+import time
+
+from wechat_backend.deadline import current_deadline
+from wechat_backend.pipelined_aggregator import PipelinedResultAggregator
+
+
+def _finalize(outputs):
+    return outputs
+
+
+def _fallback(result, reason):
+    return {'index': result['index'], 'fallback': reason}
+
+
+class TestPipelinedResultAggregator:
+    """流水线聚合测试"""
+
+    def test_outputs_keep_submit_order(self):
+        """输出按提交顺序排列，与评判完成顺序无关"""
+        def evaluate(result):
+            time.sleep(0.05 * (3 - result['index']))
+            return {'index': result['index']}
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback, max_parallel_judges=4)
+        for i in range(4):
+            pipeline.submit({'index': i})
+
+        outputs = pipeline.finalize(timeout=5)
+        assert [o['index'] for o in outputs] == [0, 1, 2, 3]
+        assert pipeline.get_stats()['judged'] == 4
+
+    def test_judges_run_in_parallel(self):
+        """评判在有界线程池中并行执行"""
+        active = []
+        peak = [0]
+        lock = threading.Lock()
+
+        def evaluate(result):
+            with lock:
+                active.append(1)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.1)
+            with lock:
+                active.pop()
+            return result
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback, max_parallel_judges=3)
+        for i in range(6):
+            pipeline.submit({'index': i})
+        pipeline.finalize(timeout=5)
+
+        assert peak[0] == 3
+
+    def test_finalize_waits_only_for_outstanding_judges(self):
+        """结果边到达边评判，最后一条到达后只需再等一次评判"""
+        judge_seconds = 0.2
+
+        def evaluate(result):
+            time.sleep(judge_seconds)
+            return result
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback, max_parallel_judges=2)
+        for i in range(5):
+            pipeline.submit({'index': i})
+            time.sleep(judge_seconds)  # 模拟 LLM 调用间隔
+
+        start = time.monotonic()
+        outputs = pipeline.finalize(timeout=5)
+        elapsed = time.monotonic() - start
+
+        assert len(outputs) == 5
+        assert elapsed < judge_seconds * 2
+
+    def test_judge_error_uses_fallback(self):
+        """评判异常时使用兜底输出"""
+        def evaluate(result):
+            if result['index'] == 1:
+                raise ValueError('judge failed')
+            return {'index': result['index']}
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback)
+        for i in range(3):
+            pipeline.submit({'index': i})
+
+        outputs = pipeline.finalize(timeout=5)
+        assert outputs[1] == {'index': 1, 'fallback': 'judge_error'}
+        assert pipeline.get_stats()['failed'] == 1
+
+    def test_slow_judge_times_out(self):
+        """单次评判超时后放弃等待"""
+        release = threading.Event()
+
+        def evaluate(result):
+            if result['index'] == 0:
+                release.wait(5)
+            return {'index': result['index']}
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback, judge_timeout=0.3)
+        pipeline.submit({'index': 0})
+        pipeline.submit({'index': 1})
+
+        start = time.monotonic()
+        outputs = pipeline.finalize(timeout=5)
+        release.set()
+
+        assert time.monotonic() - start < 2
+        assert outputs[0] == {'index': 0, 'fallback': 'judge_timeout'}
+        assert outputs[1] == {'index': 1}
+
+    def test_overall_timeout_uses_fallback(self):
+        """整体等待超时后未完成的评判使用兜底输出"""
+        release = threading.Event()
+
+        def evaluate(result):
+            release.wait(5)
+            return result
+
+        pipeline = PipelinedResultAggregator(
+            evaluate, _finalize, _fallback, max_parallel_judges=1, judge_timeout=60
+        )
+        for i in range(3):
+            pipeline.submit({'index': i})
+
+        outputs = pipeline.finalize(timeout=0.3)
+        release.set()
+
+        assert all(o['fallback'] == 'aggregation_timeout' for o in outputs)
+
+    def test_abandoned_judge_runs_under_call_deadline(self):
+        """被放弃的评判线程在子截止时间内运行，到期后的输出被丢弃"""
+        release = threading.Event()
+        seen = {}
+
+        def evaluate(result):
+            seen['remaining'] = current_deadline().remaining()
+            release.wait(5)
+            seen['expired_on_return'] = current_deadline().expired()
+            return {'index': result['index']}
+
+        pipeline = PipelinedResultAggregator(evaluate, _finalize, _fallback, judge_timeout=0.3)
+        pipeline.submit({'index': 0})
+        outputs = pipeline.finalize(timeout=5)
+        time.sleep(0.1)
+        release.set()
+        time.sleep(0.1)
+
+        assert seen['remaining'] <= 0.3
+        assert seen['expired_on_return'] is True
+        assert outputs == [{'index': 0, 'fallback': 'judge_timeout'}]
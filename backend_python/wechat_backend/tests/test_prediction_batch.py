@@ -0,0 +1,85 @@
+"""
+PredictionEngine 批量预测单元测试
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sklearn')
+
+from wechat_backend.analytics.prediction_engine import PredictionEngine
+
+
+class TestBatchForecast:
+    """批量预测测试"""
+
+    def setup_method(self):
+        self.engine = PredictionEngine()
+        self.series = [
+            [2, 3, 3, 4, 5, 5, 6, 7, 8, 8, 9, 10],
+            [9, 8, 8, 7, 6],
+            [4],
+            [],
+            [5, 5, 6],
+        ]
+        width = max(len(s) for s in self.series)
+        self.histories = np.full((len(self.series), width), np.nan)
+        for i, s in enumerate(self.series):
+            if s:
+                self.histories[i, width - len(s):] = s
+
+    def test_matches_per_series_forecasts(self):
+        """右对齐的完整序列与逐品牌平滑、回归结果一致"""
+        result = self.engine.batch_forecast(self.histories, forecast_periods=7)
+
+        for i, s in enumerate(self.series):
+            data = [float(v) for v in s]
+            smoothing = self.engine.exponential_smoothing_forecast(data, forecast_periods=7)
+            trend, slope = self.engine.linear_regression_forecast(data, forecast_periods=7)
+            assert np.allclose(result['smoothing_forecast'][i], smoothing)
+            assert np.allclose(result['trend_forecast'][i], trend)
+            assert result['slope'][i] == pytest.approx(slope)
+
+    def test_mask_excludes_missing_days(self):
+        """掩码排除的天不参与拟合"""
+        histories = np.array([[1.0, 2.0, 100.0, 4.0]])
+        mask = np.array([[True, True, False, True]])
+
+        result = self.engine.batch_forecast(histories, mask, forecast_periods=1)
+
+        assert result['slope'][0] == pytest.approx(1.0)
+        assert result['trend_forecast'][0, 0] == pytest.approx(5.0)
+        assert result['observations'][0] == 3
+
+    def test_prediction_interval_widens_with_horizon(self):
+        """预测区间随预测期变宽，观测不足时为 NaN"""
+        result = self.engine.batch_forecast(self.histories, forecast_periods=7)
+
+        width = result['upper'][0] - result['lower'][0]
+        assert np.all(np.diff(width) > 0)
+        assert np.all(np.isnan(result['upper'][2]))
+
+    def test_ranking_trends_match_per_brand(self):
+        """批量排名预测与逐品牌预测一致"""
+        batch = self.engine.predict_ranking_trends_batch(self.histories, days=7)
+
+        for s, result in zip(self.series, batch):
+            expected = self.engine.predict_ranking_trend(s, days=7)
+            assert result['predicted_ranks'] == expected['predicted_ranks']
+            assert result['trend_direction'] == expected['trend_direction']
+
+    def test_weekly_batch_includes_risks(self):
+        """批量周预测包含风险因素"""
+        evidence = [{'negative_fragment': '存在安全隐患', 'associated_url': 'u', 'source_name': 's', 'risk_level': 'High'}]
+        data = {
+            'A': [{'rank': r, 'evidence_chain': evidence} for r in self.series[0]],
+            'B': [{'rank': r} for r in self.series[1]],
+        }
+
+        batch = self.engine.predict_weekly_ranks_batch(data)
+
+        expected = self.engine.predict_weekly_rank_with_risks(data['A'])
+        assert batch['A']['weekly_forecast'][0]['predicted_rank'] == expected['weekly_forecast'][0]['predicted_rank']
+        assert batch['A']['risk_factors'][0]['potential_impact_on_rank'] == pytest.approx(
+            expected['risk_factors'][0]['potential_impact_on_rank'])
+        assert batch['B']['risk_factors'] == []
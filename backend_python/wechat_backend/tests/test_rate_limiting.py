@@ -0,0 +1,177 @@
+"""
+GCRA 限流器单元测试
+"""
+
+from unittest import mock
+
+import pytest
+from flask import Flask
+
+from wechat_backend.security import rate_limiting
+from wechat_backend.security.rate_limiting import (
+    POLLING_RATE_LIMIT,
+    GCRARateLimiter,
+    polling_rate_limit,
+    rate_limit,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'rate_limits.db')
+
+
+class TestGCRARateLimiter:
+    """GCRA 判定与共享状态测试"""
+
+    def test_burst_then_refill(self, db_path):
+        """突发 limit 次后拒绝，经过一个发射间隔恢复一次"""
+        limiter = GCRARateLimiter(db_path=db_path)
+        with mock.patch.object(rate_limiting.time, 'time', return_value=1000.0):
+            decisions = [limiter.check('ip:1.2.3.4', 3, 60) for _ in range(4)]
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+        assert decisions[3].retry_after == pytest.approx(20)
+        assert decisions[3].to_headers()['Retry-After'] == '20'
+
+        with mock.patch.object(rate_limiting.time, 'time', return_value=1020.0):
+            assert limiter.check('ip:1.2.3.4', 3, 60).allowed
+            assert not limiter.check('ip:1.2.3.4', 3, 60).allowed
+
+    def test_limit_shared_across_instances(self, db_path):
+        """同一数据库上的多个限流器（模拟多个 worker）同步后共享同一限额"""
+        workers = [GCRARateLimiter(db_path=db_path) for _ in range(3)]
+
+        assert sum(workers[0].is_allowed('ip:5.6.7.8', 5, 60) for _ in range(4)) == 4
+        workers[0].sync()
+        # 新 worker 首次见到该键时读取共享 TAT，只剩 1 个额度
+        assert [workers[1].is_allowed('ip:5.6.7.8', 5, 60) for _ in range(2)] == [True, False]
+        workers[1].sync()
+        # 旧 worker 最多多放行一个同步周期内的请求，下一次同步后收敛到共享 TAT
+        assert workers[0].is_allowed('ip:5.6.7.8', 5, 60)
+        workers[0].sync()
+        assert not workers[0].is_allowed('ip:5.6.7.8', 5, 60)
+
+    def test_requests_do_not_write_until_sync(self, db_path):
+        """判定不产生写事务，消耗在同步时批量合并"""
+        limiter = GCRARateLimiter(db_path=db_path)
+        for _ in range(3):
+            limiter.check('ip:7', 10, 60)
+        count = lambda: limiter.store._conn.execute('SELECT COUNT(*) FROM rate_limit_tat').fetchone()[0]
+
+        assert count() == 0
+        limiter.sync()
+        assert count() == 1
+        assert limiter.peek('ip:7', 10, 60).remaining == 7
+
+    def test_idle_keys_swept(self, db_path):
+        """TAT 已过期的键被清理，进程内缓存按 LRU 限制大小"""
+        limiter = GCRARateLimiter(db_path=db_path, cache_max_keys=2, sweep_interval=0)
+        with mock.patch.object(rate_limiting.time, 'time', return_value=1000.0):
+            for i in range(5):
+                limiter.check(f'ip:{i}', 10, 60)
+            limiter.sync()
+        assert len(limiter.cache) == 2
+
+        with mock.patch.object(rate_limiting.time, 'time', return_value=2000.0):
+            limiter.check('ip:new', 10, 60)
+            limiter.sync()
+        count = limiter.store._conn.execute('SELECT COUNT(*) FROM rate_limit_tat').fetchone()[0]
+        assert count == 1
+
+    def test_peek_does_not_consume(self, db_path):
+        """peek 只读状态"""
+        limiter = GCRARateLimiter(db_path=db_path)
+        limiter.check('ip:9', 2, 60)
+
+        assert limiter.peek('ip:9', 2, 60).remaining == 1
+        assert limiter.peek('ip:9', 2, 60).remaining == 1
+
+
+class TestRateLimitDecorator:
+    """@rate_limit 装饰器测试"""
+
+    def test_headers_and_429(self, db_path, monkeypatch):
+        """响应头来自同一判定，超限返回 429"""
+        monkeypatch.setattr(rate_limiting, '_rate_limiter', GCRARateLimiter(db_path=db_path))
+        app = Flask(__name__)
+
+        @app.route('/limited')
+        @rate_limit(limit=2, window=60, per='endpoint')
+        def limited():
+            return {'ok': True}
+
+        client = app.test_client()
+        first, second, third = (client.get('/limited') for _ in range(3))
+
+        assert first.status_code == 200
+        assert first.headers['X-RateLimit-Remaining'] == '1'
+        assert second.headers['X-RateLimit-Remaining'] == '0'
+        assert third.status_code == 429
+        assert int(third.headers['Retry-After']) > 0
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _sse_client_intervals(polls):
+    """sseClient.js 的轮询节奏：随进度从 800ms 缩短到 200ms，响应快时最低 150ms"""
+    for i in range(polls):
+        progress = 100 * i // polls
+        base = 800 if progress < 10 else 500 if progress < 30 else 400 if progress < 70 else 300 if progress < 90 else 200
+        yield max(0.15, base * 0.3 / 1000)
+
+
+class TestPollingRateLimit:
+    """轮询端点限额覆盖小程序真实轮询节奏"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(rate_limiting, '_rate_limiter', GCRARateLimiter(backend='memory'))
+        clock = _Clock()
+        monkeypatch.setattr(rate_limiting.time, 'time', clock)
+        app = Flask(__name__)
+
+        @app.route('/test/status/<task_id>')
+        @polling_rate_limit()
+        def status(task_id):
+            return {'task_id': task_id}
+
+        return app.test_client(), clock
+
+    def test_fastest_cadence_never_limited(self, client):
+        """一次完整诊断（8 分钟，按最快节奏轮询）不触发 429"""
+        client, clock = client
+        statuses = set()
+        for interval in _sse_client_intervals(int(8 * 60 / 0.15)):
+            statuses.add(client.get('/test/status/task-1').status_code)
+            clock.now += interval
+
+        assert statuses == {200}
+
+    def test_nat_users_polling_different_tasks(self, client):
+        """同一出口 IP 后的多个用户轮询各自任务，互不占用额度"""
+        client, clock = client
+        statuses = set()
+        for _ in range(int(120 / 0.8)):
+            for user in range(20):
+                statuses.add(client.get(f'/test/status/task-{user}').status_code)
+            clock.now += 0.8
+
+        assert statuses == {200}
+
+    def test_flood_is_limited(self, client):
+        """远超轮询节奏的请求仍被限流"""
+        client, clock = client
+        statuses = []
+        for _ in range(POLLING_RATE_LIMIT + 10):
+            statuses.append(client.get('/test/status/task-1').status_code)
+            clock.now += 0.001
+
+        assert 429 in statuses
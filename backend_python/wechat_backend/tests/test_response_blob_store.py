@@ -0,0 +1,115 @@
+"""
+AI 回答内容寻址存储单元测试
+"""
+
+import sqlite3
+
+import pytest
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories import response_blob_repository
+from wechat_backend.repositories.response_blob_repository import (
+    ResponseBlobStore,
+    attach_response_content,
+    content_hash,
+    externalize_diagnosis_responses,
+)
+
+
+LONG_ANSWER = '华为在人工智能领域的布局包括昇腾芯片、盘古大模型和鸿蒙生态。' * 80
+SHORT_ANSWER = '华为排名第一'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ResponseBlobStore(str(tmp_path / 'blobs.db'))
+    monkeypatch.setattr(response_blob_repository, '_response_blob_store', store)
+    yield store
+    store.close()
+
+
+class TestResponseBlobStore:
+    """去重、压缩与引用计数测试"""
+
+    def test_put_deduplicates_and_compresses(self, store):
+        """相同内容只存一份，引用计数累加"""
+        first = store.put(LONG_ANSWER)
+        second, third = store.put_many([LONG_ANSWER, SHORT_ANSWER])
+
+        assert first == second == content_hash(LONG_ANSWER)
+        assert store.get(first) == LONG_ANSWER
+        assert store.get(third) == SHORT_ANSWER
+
+        stats = store.get_stats()
+        assert stats['blob_count'] == 2
+        assert stats['reference_count'] == 3
+        assert stats['stored_bytes'] < stats['raw_bytes']
+
+    def test_gc_only_removes_unreferenced(self, store):
+        """引用全部释放后才会被回收"""
+        blob_hash = store.put_many([LONG_ANSWER, LONG_ANSWER])[0]
+
+        store.release([blob_hash])
+        assert store.gc()['deleted_count'] == 0
+
+        store.release([blob_hash])
+        assert store.gc(dry_run=True)['deleted_count'] == 1
+        assert store.get(blob_hash) == LONG_ANSWER
+
+        assert store.gc()['deleted_count'] == 1
+        assert store.get(blob_hash) is None
+
+
+class TestDiagnosisResultsExternalization:
+    """diagnosis_results 迁移与读取回填测试"""
+
+    def test_migrate_and_attach_round_trip(self, store, tmp_path, monkeypatch):
+        """超过阈值的回答外置后读取结果不变，重复迁移跳过已处理记录"""
+        db_path = str(tmp_path / 'main.db')
+        monkeypatch.setattr(database_connection_pool, 'DB_PATH', db_path)
+        monkeypatch.setattr(database_connection_pool, '_db_pool', None)
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE diagnosis_results (id INTEGER PRIMARY KEY, response_content TEXT NOT NULL)')
+        conn.executemany('INSERT INTO diagnosis_results (response_content) VALUES (?)',
+                         [(LONG_ANSWER,), (SHORT_ANSWER,), (LONG_ANSWER,)])
+        conn.commit()
+        conn.close()
+
+        assert externalize_diagnosis_responses(store=store) == 2
+        assert externalize_diagnosis_responses(store=store) == 0
+        database_connection_pool.close_db_pool()
+        assert store.get_stats()['reference_count'] == 2
+
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        items = [dict(row) for row in conn.execute('SELECT * FROM diagnosis_results ORDER BY id')]
+        conn.close()
+        assert items[0]['response_content'] == ''
+        assert items[1]['response_blob'] is None
+
+        for item in items:
+            item['response'] = {'content': item['response_content']}
+        attach_response_content(items)
+
+        assert [item['response_content'] for item in items] == [LONG_ANSWER, SHORT_ANSWER, LONG_ANSWER]
+        assert items[2]['response']['content'] == LONG_ANSWER
+
+
+class TestAIResponseLoggerBlobs:
+    """AI 响应日志外置存储测试"""
+
+    def test_log_writes_hash_and_releases_on_cleanup(self, store, tmp_path):
+        """日志只保存哈希，分段被清理时释放引用"""
+        from wechat_backend.utils.ai_response_logger_v3 import AIResponseLogger, resolve_response_text
+
+        logger = AIResponseLogger(log_file=str(tmp_path / 'ai_responses.jsonl'))
+        logger.log_response(question='华为怎么样？', response=LONG_ANSWER,
+                            platform='deepseek', model='deepseek-chat', execution_id='exec_1')
+        logger.flush()
+
+        logged = logger.find_by_execution_id('exec_1')[0]
+        assert 'text' not in logged['response']
+        assert resolve_response_text(logged) == LONG_ANSWER
+
+        assert logger.cleanup_old_logs(retention_days=-1) == 1
+        assert store.gc()['deleted_count'] == 1
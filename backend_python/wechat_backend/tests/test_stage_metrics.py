@@ -0,0 +1,100 @@
+"""
+分阶段耗时指标单元测试
+"""
+
+import random
+
+from wechat_backend.monitoring.stage_metrics import (
+    LatencyHistogram, StageMetrics, execution_context,
+    STAGE_LLM_CALL, STAGE_GEO_PARSE, STAGE_RATE_LIMIT_DELAY
+)
+
+
+class TestLatencyHistogram:
+    """直方图测试"""
+
+    def test_percentiles_within_relative_error(self):
+        """百分位数相对误差在 HDR 精度范围内"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-1.0, 1.0) for _ in range(5000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        ordered = sorted(values)
+        for pct in (50, 95, 99):
+            exact = ordered[int(len(ordered) * pct / 100) - 1]
+            assert abs(histogram.percentile(pct) - exact) / exact < 0.05
+
+    def test_cumulative_counts(self):
+        """累计桶计数单调且总数正确"""
+        histogram = LatencyHistogram()
+        for value in (0.0005, 0.002, 0.02, 0.2, 2.0):
+            histogram.record(value)
+
+        counts = histogram.cumulative_counts((0.001, 0.01, 0.1, 1.0, 10.0))
+        assert counts == [1, 2, 3, 4, 5]
+
+
+class TestStageMetrics:
+    """分阶段指标测试"""
+
+    def test_execution_breakdown(self):
+        """按执行汇总各阶段耗时"""
+        metrics = StageMetrics(sample_rate=1.0)
+        metrics.record(STAGE_LLM_CALL, 1.0, 'exec-1', platform='deepseek')
+        metrics.record(STAGE_LLM_CALL, 3.0, 'exec-1', platform='qwen')
+        metrics.record(STAGE_GEO_PARSE, 0.01, 'exec-1')
+
+        timing = metrics.get_execution_timing('exec-1')
+        assert timing[STAGE_LLM_CALL] == {'count': 2, 'total_ms': 4000.0, 'max_ms': 3000.0}
+        assert timing[STAGE_GEO_PARSE]['count'] == 1
+        assert metrics.get_execution_timing('exec-2') is None
+
+    def test_oldest_executions_are_evicted(self):
+        """超过上限时淘汰最早的执行"""
+        metrics = StageMetrics(sample_rate=1.0, max_executions=2)
+        for execution_id in ('a', 'b', 'c'):
+            metrics.record(STAGE_GEO_PARSE, 0.01, execution_id)
+
+        assert metrics.get_execution_timing('a') is None
+        assert metrics.get_execution_timing('c') is not None
+
+    def test_sampling_is_consistent_per_execution(self):
+        """同一执行的采样结果一致"""
+        metrics = StageMetrics(sample_rate=0.5)
+        sampled = [f'exec-{i}' for i in range(200) if metrics.is_sampled(f'exec-{i}')]
+
+        assert 50 < len(sampled) < 150
+        assert all(metrics.is_sampled(execution_id) for execution_id in sampled)
+
+    def test_unsampled_execution_is_not_timed(self):
+        """采样率为 0 时不记录"""
+        metrics = StageMetrics(sample_rate=0.0)
+        with metrics.time_stage(STAGE_LLM_CALL, 'exec-1'):
+            pass
+
+        assert metrics.get_execution_timing('exec-1') is None
+        assert metrics.get_summary() == {}
+
+    def test_context_attribution(self):
+        """深层调用通过执行上下文归属耗时"""
+        metrics = StageMetrics(sample_rate=1.0)
+        with execution_context('exec-1', 'doubao'):
+            metrics.record(STAGE_RATE_LIMIT_DELAY, 0.5)
+
+        assert metrics.get_execution_timing('exec-1')[STAGE_RATE_LIMIT_DELAY]['count'] == 1
+        assert f'{STAGE_RATE_LIMIT_DELAY}:doubao' in metrics.get_summary()
+
+    def test_prometheus_format(self):
+        """导出 Prometheus 直方图"""
+        metrics = StageMetrics(sample_rate=1.0)
+        metrics.record(STAGE_LLM_CALL, 0.3, 'exec-1', platform='deepseek')
+        metrics.record(STAGE_LLM_CALL, 1.5, 'exec-1', platform='deepseek')
+
+        text = metrics.render_prometheus()
+        assert '# TYPE geo_stage_latency_seconds histogram' in text
+        assert 'geo_stage_latency_seconds_bucket{stage="llm_call",platform="deepseek",le="0.5"} 1' in text
+        assert 'geo_stage_latency_seconds_bucket{stage="llm_call",platform="deepseek",le="+Inf"} 2' in text
+        assert 'geo_stage_latency_seconds_count{stage="llm_call",platform="deepseek"} 2' in text
+        assert 'quantile="0.99"' in text
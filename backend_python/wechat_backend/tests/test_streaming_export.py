@@ -0,0 +1,122 @@
+"""
+诊断结果流式导出单元测试
+"""
+
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+from wechat_backend.services.export_service import ExportService
+from wechat_backend.services.streaming_export_service import (
+    DiagnosisResultExporter,
+    EXPORT_COLUMNS,
+)
+
+
+def _create_db(path, users=('user_a', 'user_b'), results_per_execution=5):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE diagnosis_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execution_id TEXT UNIQUE NOT NULL,
+            user_id TEXT NOT NULL,
+            brand_name TEXT NOT NULL
+        );
+        CREATE TABLE diagnosis_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            execution_id TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            question TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response_content TEXT NOT NULL,
+            response_latency REAL,
+            geo_data TEXT NOT NULL,
+            quality_score REAL NOT NULL,
+            quality_level TEXT NOT NULL,
+            quality_details TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'success',
+            error_message TEXT,
+            created_at TEXT NOT NULL
+        );
+    ''')
+    for i, user_id in enumerate(users):
+        execution_id = f'exec_{i}'
+        report_id = conn.execute(
+            'INSERT INTO diagnosis_reports (execution_id, user_id, brand_name) VALUES (?, ?, ?)',
+            (execution_id, user_id, '华为')
+        ).lastrowid
+        for j in range(results_per_execution):
+            conn.execute('''
+                INSERT INTO diagnosis_results (
+                    report_id, execution_id, brand, question, model, response_content,
+                    response_latency, geo_data, quality_score, quality_level, quality_details, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                report_id, execution_id, '华为', f'问题{j}', 'deepseek', f'回答，包含"引号"{j}',
+                1.5, json.dumps({'rank': j + 1, 'sentiment': 0.5, 'brand_mentioned': True}),
+                80.0, 'good', '{}', '2026-10-01T00:00:00'
+            ))
+    conn.commit()
+    conn.close()
+
+
+class TestDiagnosisResultExporter:
+    """流式读取与格式输出测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path):
+        self.db_path = str(tmp_path / 'export.db')
+        _create_db(self.db_path)
+        self.exporter = DiagnosisResultExporter(db_path=self.db_path, batch_size=3)
+
+    def test_iter_results_reads_all_batches_in_order(self):
+        """分批读取覆盖全部数据，按主键顺序"""
+        records = list(self.exporter.iter_results())
+
+        assert [r['id'] for r in records] == list(range(1, 11))
+        assert records[0]['geo_data']['rank'] == 1
+
+    def test_iter_results_filters(self):
+        """按用户和执行 ID 过滤"""
+        assert {r['execution_id'] for r in self.exporter.iter_results(user_id='user_b')} == {'exec_1'}
+        assert len(list(self.exporter.iter_results(execution_ids=['exec_0']))) == 5
+        assert list(self.exporter.iter_results(user_id='user_a', execution_ids=['exec_1'])) == []
+
+    def test_ndjson_one_record_per_line(self):
+        """NDJSON 每行一条记录"""
+        body = b''.join(self.exporter.stream('ndjson', user_id='user_a')).decode('utf-8')
+        lines = [json.loads(line) for line in body.splitlines()]
+
+        assert len(lines) == 5
+        assert lines[-1]['question'] == '问题4'
+
+    def test_csv_header_and_quoting(self):
+        """CSV 带 BOM 和表头，含引号的内容正确转义"""
+        body = b''.join(self.exporter.stream('csv')).decode('utf-8')
+        assert body.startswith('\ufeff')
+
+        rows = list(csv.reader(io.StringIO(body[1:])))
+        assert rows[0] == [header for _, header in EXPORT_COLUMNS]
+        assert len(rows) == 11
+        assert rows[1][EXPORT_COLUMNS.index(('response_content', '回答内容'))] == '回答，包含"引号"0'
+
+    def test_xlsx_round_trip(self):
+        """XLSX 可被 openpyxl 读回"""
+        openpyxl = pytest.importorskip('openpyxl')
+
+        body = b''.join(self.exporter.stream('xlsx'))
+        sheet = openpyxl.load_workbook(io.BytesIO(body), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+
+        assert len(rows) == 11
+        assert rows[1][EXPORT_COLUMNS.index(('rank', '排名'))] == 1
+
+    def test_unsupported_format(self):
+        """不支持的格式返回错误"""
+        result = ExportService.stream_export('pdf', execution_ids=['exec_0'])
+
+        assert result['success'] is False
@@ -0,0 +1,161 @@
+"""
+同步存储批量增量协议单元测试
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from wechat_backend.sync import sync_storage
+from wechat_backend.sync.sync_storage import SyncStorageManager
+
+
+def _make_result(result_id, score=80, details=None):
+    return {
+        'result_id': result_id,
+        'brand_name': '华为',
+        'ai_models_used': ['deepseek', 'qwen'],
+        'questions_used': ['介绍一下华为'],
+        'overall_score': score,
+        'total_tests': 2,
+        'results_summary': {'score': score},
+        'detailed_results': details if details is not None else [{'model': 'deepseek', 'score': score}],
+        'test_date': '2026-02-26T10:00:00',
+    }
+
+
+class TestSyncStorageBatch:
+    """批量同步测试"""
+
+    def setup_method(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.storage = SyncStorageManager(self.db_path)
+
+    def teardown_method(self):
+        os.remove(self.db_path)
+
+    def test_batch_insert_assigns_increasing_cursor(self):
+        """批量插入分配递增游标"""
+        stats = self.storage.save_results_batch('u1', [_make_result('r1'), _make_result('r2')])
+
+        assert stats['saved'] == 2
+        assert stats['unchanged'] == 0
+        assert stats['cursor'] == 2
+
+        results = self.storage.get_results('u1', since_cursor=0)
+        assert [r['result_id'] for r in results] == ['r1', 'r2']
+        assert [r['sync_seq'] for r in results] == [1, 2]
+
+    def test_unchanged_rows_are_skipped(self):
+        """内容未变化的行不重写、不推进游标"""
+        self.storage.save_results_batch('u1', [_make_result('r1'), _make_result('r2')])
+        stats = self.storage.save_results_batch('u1', [_make_result('r1'), _make_result('r2', score=90)])
+
+        assert stats['saved'] == 1
+        assert stats['unchanged'] == 1
+
+        results = self.storage.get_results('u1', since_cursor=2)
+        assert len(results) == 1
+        assert results[0]['result_id'] == 'r2'
+        assert results[0]['overall_score'] == 90
+        assert results[0]['sync_seq'] == 3
+
+    def test_invalid_results_are_counted(self):
+        """缺少 result_id 的结果计为无效"""
+        stats = self.storage.save_results_batch('u1', [{'brand_name': 'x'}, _make_result('r1')])
+
+        assert stats['invalid'] == 1
+        assert stats['saved'] == 1
+
+    def test_large_details_are_compressed(self):
+        """大字段压缩存储且可透明读取"""
+        details = [{'model': 'qwen', 'content': '华为' * 2000, 'index': i} for i in range(5)]
+        self.storage.save_result('u1', _make_result('big', details=details))
+
+        conn = sqlite3.connect(self.db_path)
+        raw, encoding = conn.execute(
+            "SELECT detailed_results, detailed_results_encoding FROM sync_results WHERE result_id = 'big'"
+        ).fetchone()
+        conn.close()
+
+        assert encoding in (sync_storage.ENCODING_GZIP, sync_storage.ENCODING_ZSTD)
+        assert isinstance(raw, bytes)
+        assert len(raw) < len('华为'.encode('utf-8')) * 2000 * 5
+
+        results = self.storage.get_results('u1')
+        assert results[0]['detailed_results'] == details
+
+    def test_small_details_stay_plain_json(self):
+        """小字段保持 JSON 文本"""
+        self.storage.save_result('u1', _make_result('small'))
+
+        conn = sqlite3.connect(self.db_path)
+        encoding = conn.execute(
+            "SELECT detailed_results_encoding FROM sync_results WHERE result_id = 'small'"
+        ).fetchone()[0]
+        conn.close()
+
+        assert encoding == sync_storage.ENCODING_JSON
+
+    def test_legacy_table_is_migrated(self):
+        """旧表结构自动补充增量同步列"""
+        fd, legacy_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(legacy_path)
+            conn.execute(sync_storage.CREATE_SYNC_RESULTS_TABLE)
+            conn.execute(
+                "INSERT INTO sync_results (result_id, user_id, detailed_results, sync_timestamp) "
+                "VALUES ('old', 'u1', '[]', '2026-01-01T00:00:00')"
+            )
+            conn.execute(
+                "INSERT INTO sync_results (result_id, user_id, detailed_results, sync_timestamp) "
+                "VALUES ('older', 'u1', '[]', '2025-12-01T00:00:00')"
+            )
+            conn.commit()
+            conn.close()
+
+            storage = SyncStorageManager(legacy_path)
+
+            # 不重新保存，游标 0 即可取到迁移前的全部行
+            results = storage.get_results('u1', since_cursor=0)
+            assert [r['result_id'] for r in results] == ['older', 'old']
+            assert [r['sync_seq'] for r in results] == [1, 2]
+
+            stats = storage.save_results_batch('u1', [_make_result('new')])
+            assert stats['cursor'] == 3
+
+            # 再次初始化不重复回填
+            SyncStorageManager(legacy_path)
+            assert [r['sync_seq'] for r in storage.get_results('u1', since_cursor=0)] == [1, 2, 3]
+        finally:
+            os.remove(legacy_path)
+
+    def test_delete_is_delivered_as_tombstone(self):
+        """删除推进游标，增量同步返回删除标记"""
+        self.storage.save_results_batch('u1', [_make_result('r1'), _make_result('r2')])
+
+        assert self.storage.delete_result('u1', 'r1')
+        assert not self.storage.delete_result('u1', 'r1')
+
+        changes = self.storage.get_results('u1', since_cursor=2)
+        assert [(r['result_id'], r['is_deleted'], r['sync_seq']) for r in changes] == [('r1', 1, 3)]
+        assert [r['result_id'] for r in self.storage.get_results('u1')] == ['r2']
+
+    def test_negative_limit_is_clamped(self):
+        """负数 limit 不会变成不限制"""
+        self.storage.save_results_batch('u1', [_make_result(f'r{i}') for i in range(5)])
+
+        assert len(self.storage.get_results('u1', limit=-1, since_cursor=0)) == 1
+        assert len(self.storage.get_results('u1', limit=-1)) == 1
+
+    def test_global_cursor_uses_index(self):
+        """全局最大游标走 sync_seq 索引，不扫描全表"""
+        conn = sqlite3.connect(self.db_path)
+        plan = conn.execute('EXPLAIN QUERY PLAN SELECT MAX(sync_seq) AS seq FROM sync_results').fetchall()
+        conn.close()
+
+        assert any('idx_sync_seq' in row[-1] for row in plan)
@@ -0,0 +1,91 @@
+"""
+TestScheduler 并发调度单元测试
+"""
+
+import threading
+import time
+
+from wechat_backend.test_engine.scheduler import TestScheduler, ExecutionStrategy, TestTask
+
+
+def _make_task(task_id, model='DeepSeek', priority=0):
+    return TestTask(id=task_id, brand_name='华为', ai_model=model, question='介绍一下华为', priority=priority)
+
+
+class _SleepingRunner:
+    """以 sleep 代替 AI 调用，记录执行顺序与各平台峰值并发"""
+
+    def __init__(self, scheduler, seconds=0.2):
+        self.scheduler = scheduler
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.started = []
+        self.active = {}
+        self.peak = {}
+
+    def __call__(self, task):
+        platform = self.scheduler._map_model_to_platform(task.ai_model)
+        with self.lock:
+            self.started.append(task.id)
+            self.active[platform] = self.active.get(platform, 0) + 1
+            self.peak[platform] = max(self.peak.get(platform, 0), self.active[platform])
+        time.sleep(self.seconds)
+        with self.lock:
+            self.active[platform] -= 1
+        return {'task_id': task.id, 'success': True}
+
+
+class TestTestScheduler:
+    """并发调度测试"""
+
+    def setup_method(self):
+        self.scheduler = TestScheduler(max_workers=4, strategy=ExecutionStrategy.CONCURRENT, platform_limits={})
+        self.runner = _SleepingRunner(self.scheduler)
+        self.scheduler._execute_single_task_with_queue = self.runner
+
+    def teardown_method(self):
+        self.scheduler.shutdown()
+
+    def test_coordinator_does_not_spin(self):
+        """任务 sleep 期间协调线程几乎不占用 CPU"""
+        tasks = [_make_task(f't{i}') for i in range(8)]
+
+        cpu_start = time.thread_time()
+        wall_start = time.monotonic()
+        stats = self.scheduler.schedule_tests(tasks)
+        cpu_used = time.thread_time() - cpu_start
+        wall = time.monotonic() - wall_start
+
+        assert stats['completed_tasks'] == 8
+        assert wall >= 0.4
+        assert cpu_used < wall * 0.1
+
+    def test_higher_priority_dispatched_first(self):
+        """高优先级任务先派发"""
+        self.scheduler.max_workers = 1
+        tasks = [_make_task('low', priority=0), _make_task('high', priority=5), _make_task('mid', priority=2)]
+
+        self.scheduler.schedule_tests(tasks)
+
+        assert self.runner.started == ['high', 'mid', 'low']
+
+    def test_platform_cap_is_respected(self):
+        """单平台并发不超过上限，其他平台不受影响"""
+        self.scheduler.platform_limits = {'doubao': 1}
+        tasks = [_make_task(f'd{i}', model='豆包') for i in range(3)] + \
+                [_make_task(f'q{i}', model='通义千问') for i in range(3)]
+
+        stats = self.scheduler.schedule_tests(tasks)
+
+        assert stats['completed_tasks'] == 6
+        assert self.runner.peak['doubao'] == 1
+        assert self.runner.peak['qwen'] == 3
+
+    def test_callback_receives_every_result(self):
+        """每个任务完成后回调一次"""
+        seen = []
+        tasks = [_make_task(f't{i}') for i in range(5)]
+
+        self.scheduler.schedule_tests(tasks, callback=lambda task, result: seen.append(result['task_id']))
+
+        assert sorted(seen) == sorted(t.id for t in tasks)
@@ -0,0 +1,159 @@
+"""
+批量 Span 处理器、JSONL 导出与链路分析单元测试
+"""
+
+import json
+from unittest import mock
+
+import pytest
+
+from unified_logging import tracing
+from unified_logging.trace_analysis import critical_path, flame_summary, load_spans, to_folded
+from unified_logging.tracing import (
+    BatchSpanProcessor,
+    JSONLSpanExporter,
+    SpanExporter,
+    set_span_processor,
+    trace_span,
+    traced,
+)
+
+
+class _MemoryExporter(SpanExporter):
+    """记录每批导出的 Span"""
+
+    def __init__(self):
+        self.batches = []
+
+    def export(self, spans):
+        self.batches.append(list(spans))
+        return True
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    memory = _MemoryExporter()
+    processor = BatchSpanProcessor(memory, max_queue_size=100, max_export_batch_size=50, schedule_delay=60)
+    previous = set_span_processor(processor)
+    yield memory, processor
+    set_span_processor(previous)
+    processor.shutdown(timeout=1)
+
+
+def _exported(memory):
+    return [span for batch in memory.batches for span in batch]
+
+
+class TestBatchSpanProcessor:
+    """批量导出测试"""
+
+    def test_flush_on_shutdown(self, exporter):
+        """未达批量大小的 Span 在关闭时导出"""
+        memory, processor = exporter
+        for i in range(3):
+            with trace_span('op', {'i': i}):
+                pass
+        assert memory.batches == []
+
+        processor.shutdown(timeout=1)
+        assert [span.attributes['i'] for span in _exported(memory)] == [0, 1, 2]
+
+    def test_ring_buffer_drops_oldest(self):
+        """缓冲区满时丢弃最旧的 Span 并计数"""
+        memory = _MemoryExporter()
+        with mock.patch.object(tracing.threading.Thread, 'start'):  # 不启动后台线程，避免与导出竞争
+            processor = BatchSpanProcessor(memory, max_queue_size=3, max_export_batch_size=3, schedule_delay=60)
+        for i in range(5):
+            span = tracing.Span(trace_id='t', name=f'op{i}')
+            span.start()
+            processor.on_end(span)
+
+        assert processor.get_stats()['dropped'] == 2
+        processor.force_flush(timeout=1)
+        assert [span.name for span in _exported(memory)] == ['op2', 'op3', 'op4']
+
+    def test_nested_spans_and_execution_trace_id(self, exporter):
+        """子 Span 继承父 Span；traced 无父 Span 时以 execution_id 作为 trace_id"""
+        memory, processor = exporter
+
+        @traced('repo.save', execution_id_arg='execution_id')
+        def save(execution_id, payload):
+            with trace_span('repo.serialize'):
+                return payload
+
+        assert save('exec-1', payload=1) == 1
+        assert tracing.get_current_span() is None
+        processor.force_flush()
+
+        inner, outer = _exported(memory)
+        assert outer.trace_id == inner.trace_id == 'exec-1'
+        assert inner.parent_span_id == outer.span_id
+        assert outer.attributes['execution_id'] == 'exec-1'
+
+    def test_error_status_recorded(self, exporter):
+        """异常时 Span 标记为 ERROR 并继续抛出"""
+        memory, processor = exporter
+        with pytest.raises(ValueError):
+            with trace_span('geo.parse'):
+                raise ValueError('bad json')
+        processor.force_flush()
+
+        span = _exported(memory)[0]
+        assert span.status == tracing.SpanStatus.ERROR
+        assert span.attributes['error.type'] == 'ValueError'
+
+    def test_disabled_without_processor(self):
+        """未配置处理器时不创建 Span"""
+        previous = set_span_processor(None)
+        try:
+            with trace_span('noop') as span:
+                assert span is None
+        finally:
+            set_span_processor(previous)
+
+
+class TestTraceAnalysis:
+    """JSONL 导出与链路分析测试"""
+
+    def _write(self, path, records):
+        path.write_text(''.join(json.dumps(r) + '\n' for r in records), encoding='utf-8')
+
+    def test_jsonl_round_trip(self, tmp_path):
+        """导出文件可按 execution_id 读回，轮转备份一并读取"""
+        path = tmp_path / 'spans.jsonl'
+        jsonl = JSONLSpanExporter(str(path), max_bytes=1, backup_count=2)
+        span = tracing.Span(trace_id='exec-2', name='nxm.cell')
+        span.start()
+        span.end()
+        jsonl.export([span])
+        other = tracing.Span(trace_id='exec-3', name='nxm.cell')
+        other.start()
+        other.end()
+        jsonl.export([other])
+        jsonl.shutdown()
+
+        assert (tmp_path / 'spans.jsonl.1').exists()
+        spans = load_spans([str(path)], 'exec-2')
+        assert [s['span_id'] for s in spans] == [span.span_id]
+        assert spans[0]['duration_ms'] >= 0 and 'parent_span_id' not in spans[0]
+
+    def test_critical_path_and_self_time(self, tmp_path):
+        """多个根合成虚拟根；关键路径跟随最晚结束的子 Span，自身耗时扣除子 Span"""
+        path = tmp_path / 'spans.jsonl'
+        self._write(path, [
+            {'trace_id': 'e', 'span_id': 'a', 'name': 'nxm.cell', 'start': 0.0, 'duration_ms': 100},
+            {'trace_id': 'e', 'span_id': 'b', 'name': 'nxm.cell', 'start': 0.0, 'duration_ms': 300},
+            {'trace_id': 'e', 'span_id': 'c', 'name': 'ai.send_prompt', 'parent_span_id': 'b',
+             'start': 0.05, 'duration_ms': 200},
+            {'trace_id': 'other', 'span_id': 'x', 'name': 'nxm.cell', 'start': 0.0, 'duration_ms': 999},
+        ])
+        spans = load_spans([str(path)], 'e')
+
+        assert [step['name'] for step in critical_path(spans)] == ['execution', 'nxm.cell', 'ai.send_prompt']
+        summary = flame_summary(spans)
+        assert summary[('execution', 'nxm.cell')]['count'] == 2
+        assert summary[('execution', 'nxm.cell')]['self_ms'] == pytest.approx(200)
+        assert 'execution;nxm.cell;ai.send_prompt 200000' in to_folded(summary)
@@ -0,0 +1,154 @@
+"""
+品牌趋势汇总单元测试
+"""
+
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+from wechat_backend import database_connection_pool
+from wechat_backend.repositories.trend_rollup_repository import (
+    TrendRollupRepository, compute_trend_rollup, decode_record_payload
+)
+
+
+def _detail(brand, model, response, sentiment=None, rank=None):
+    detail = {'brand': brand, 'aiModel': model, 'response': response}
+    if sentiment is not None:
+        detail['sentiment_score'] = sentiment
+    if rank is not None:
+        detail['geo_data'] = {'rank': rank}
+    return detail
+
+
+class TestComputeTrendRollup:
+    """汇总计算测试"""
+
+    def test_metrics(self):
+        """情感均值、GEO 排名、各模型排名、SOV 与负面证据"""
+        details = [
+            _detail('华为', 'deepseek', '华为和小米都不错', sentiment=80, rank=1),
+            _detail('华为', 'qwen', '华为存在续航问题', sentiment=40, rank=3),
+            _detail('小米', 'deepseek', '小米性价比高', sentiment=60),
+        ]
+
+        rollup = compute_trend_rollup('华为', 75.0, details)
+
+        assert rollup['avg_sentiment'] == 60
+        assert rollup['rank'] == 2
+        assert rollup['model_ranks'] == {'deepseek': 1, 'qwen': 3}
+        assert rollup['sov'] == 0.5
+        assert rollup['negative_count'] == 1
+        assert rollup['negative_evidence'] == [{
+            'negative_fragment': '华为存在续航问题', 'associated_url': 'unknown',
+            'source_name': 'qwen', 'risk_level': 'Medium'
+        }]
+        assert rollup['total_results'] == 3
+
+    def test_empty_results(self):
+        rollup = compute_trend_rollup('华为', None, [])
+
+        assert rollup['avg_sentiment'] is None
+        assert rollup['rank'] is None
+        assert rollup['sov'] is None
+
+    def test_rank_without_geo_data(self):
+        """没有 GEO 排名时排名为空，不按出现次数估算"""
+        rollup = compute_trend_rollup('华为', 80.0, [_detail('华为', 'deepseek', '华为')] * 5)
+
+        assert rollup['rank'] is None
+
+    def test_decode_gzip_payload(self):
+        """兼容 gzip + latin-1 存储的详细结果"""
+        raw = gzip.compress(json.dumps([{'brand': '华为'}]).encode()).decode('latin-1')
+
+        assert decode_record_payload(raw, []) == [{'brand': '华为'}]
+        assert decode_record_payload('not json', []) == []
+
+
+class TestTrendRollupRepository:
+    """汇总仓库测试"""
+
+    @pytest.fixture(autouse=True)
+    def pooled_db(self, tmp_path, monkeypatch):
+        """连接池指向临时数据库"""
+        self.db_path = str(tmp_path / 'database.db')
+        monkeypatch.setattr(database_connection_pool, 'DB_PATH', self.db_path)
+        monkeypatch.setattr(database_connection_pool, '_db_pool', None)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE test_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, brand_name TEXT, test_date TEXT,
+                    overall_score REAL, detailed_results TEXT
+                )
+            ''')
+            for day, score, sentiment in ((1, 70, 50), (2, 80, 60), (3, 90, 70)):
+                conn.execute(
+                    'INSERT INTO test_records (brand_name, test_date, overall_score, detailed_results) '
+                    'VALUES (?, ?, ?, ?)',
+                    ('华为', f'2026-03-0{day}T10:00:00', score,
+                     json.dumps([_detail('华为', 'deepseek', '华为', sentiment=sentiment)]))
+                )
+            conn.execute(
+                'INSERT INTO test_records (brand_name, test_date, overall_score, detailed_results) '
+                'VALUES (?, ?, ?, ?)', ('小米', '2026-03-02T10:00:00', 50, None)
+            )
+        self.repo = TrendRollupRepository()
+        yield
+        database_connection_pool.close_db_pool()
+
+    def test_backfill_is_idempotent(self):
+        """回填只处理尚无汇总的记录"""
+        assert self.repo.backfill(batch_size=2) == 4
+        assert self.repo.backfill() == 0
+
+    def test_trend_and_previous(self):
+        """按品牌和时间读取趋势与上一条记录"""
+        self.repo.backfill()
+
+        trend = self.repo.get_trend('华为', '2026-03-02')
+        assert [point['overall_score'] for point in trend] == [80, 90]
+        assert trend[-1]['avg_sentiment'] == 70
+
+        previous = self.repo.get_previous('华为', trend[-1]['test_date'])
+        assert previous['record_id'] == trend[0]['record_id']
+        assert self.repo.get_previous('华为', '2026-03-01') is None
+
+    def test_evidence_round_trip_and_legacy_table(self):
+        """负面证据随汇总读写；旧表结构补充 negative_evidence 列"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('ALTER TABLE brand_trend_rollup RENAME TO rollup_new')
+            conn.execute('''
+                CREATE TABLE brand_trend_rollup (
+                    record_id INTEGER PRIMARY KEY, execution_id TEXT, brand_name TEXT NOT NULL,
+                    test_date TEXT NOT NULL, overall_score REAL, avg_sentiment REAL, rank INTEGER,
+                    model_ranks TEXT, sov REAL, negative_count INTEGER DEFAULT 0,
+                    total_results INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute(
+                'INSERT INTO test_records (brand_name, test_date, overall_score, detailed_results) '
+                'VALUES (?, ?, ?, ?)',
+                ('华为', '2026-03-04T10:00:00', 60,
+                 json.dumps([_detail('华为', 'qwen', '华为售后糟糕', sentiment=20, rank=5)]))
+            )
+        from wechat_backend.repositories import trend_rollup_repository
+        trend_rollup_repository._table_ready.clear()
+
+        self.repo.backfill()
+        rollup = self.repo.get_trend('华为', '2026-03-04')[0]
+
+        assert rollup['rank'] == 5
+        assert [item['negative_fragment'] for item in rollup['negative_evidence']] == ['华为售后糟糕']
+
+    def test_trend_query_uses_index(self):
+        """趋势查询走 (brand_name, test_date) 索引"""
+        with sqlite3.connect(self.db_path) as conn:
+            plan = conn.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM brand_trend_rollup '
+                'WHERE brand_name = ? AND test_date >= ? ORDER BY test_date', ('华为', '2026-03-01')
+            ).fetchall()
+
+        assert any('idx_trend_rollup_brand_date' in row[-1] for row in plan)
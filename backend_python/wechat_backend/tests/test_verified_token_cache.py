@@ -0,0 +1,162 @@
+"""
+已验证令牌缓存单元测试
+"""
+
+import time
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from flask import Flask, g
+
+from wechat_backend.security import auth
+from wechat_backend.security.auth import AuthenticationError, JWTManager, VerifiedTokenCache
+from wechat_backend.security.auth_enhanced import require_strict_auth
+
+
+SECRET = 'test-secret-key-with-enough-length-0123456789'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'rate_limits.db')
+
+
+@pytest.fixture
+def manager(db_path):
+    return JWTManager(secret_key=SECRET, token_cache=VerifiedTokenCache(max_entries=2, db_path=db_path))
+
+
+class TestVerifiedTokenCache:
+    """验签缓存与吊销测试"""
+
+    def test_repeat_decode_skips_verification(self, manager):
+        """同一令牌只验签一次"""
+        token = manager.generate_token('user_1')
+        with mock.patch.object(auth.jwt, 'decode', wraps=auth.jwt.decode) as decode:
+            first = manager.decode_token(token)
+            second = manager.decode_token(token)
+
+        assert decode.call_count == 1
+        assert first == second and first['user_id'] == 'user_1'
+        assert manager.token_cache.get_stats()['hits'] == 1
+
+    def test_other_secret_not_reused(self, manager):
+        """不同密钥的管理器不复用验签结果"""
+        token = manager.generate_token('user_1')
+        manager.decode_token(token)
+
+        other = JWTManager(secret_key='another-secret-key-0123456789-abcdef', token_cache=manager.token_cache)
+        with pytest.raises(AuthenticationError):
+            other.decode_token(token)
+
+    def test_entry_expires_with_token(self, manager):
+        """缓存条目在令牌 exp 时失效"""
+        token = manager.generate_token('user_1', expires_delta=timedelta(seconds=30))
+        manager.decode_token(token)
+
+        with mock.patch.object(auth.time, 'time', return_value=time.time() + 60):
+            assert manager.token_cache.get(manager._key_id, token) is None
+
+    def test_revoke_token_and_user(self, manager):
+        """吊销后即使签名有效也拒绝，并触发回调"""
+        events = []
+        manager.token_cache.add_revocation_hook(lambda kind, value: events.append(kind))
+        first = manager.generate_token('user_1')
+        second = manager.generate_token('user_2', additional_claims={'sid': 'b'})
+        manager.decode_token(first)
+        manager.decode_token(second)
+
+        manager.revoke_token(first)
+        manager.token_cache.revoke_user('user_2')
+
+        for token in (first, second):
+            with pytest.raises(AuthenticationError):
+                manager.decode_token(token)
+        assert events == ['token', 'user']
+
+    def test_token_issued_after_user_revocation_is_valid(self, manager):
+        """吊销用户后同一秒内重新签发的令牌仍然有效，旧令牌保持吊销"""
+        old = manager.generate_token('user_1')
+        manager.token_cache.revoke_user('user_1')
+        new = manager.generate_token('user_1')
+
+        assert manager.decode_token(new)['user_id'] == 'user_1'
+        with pytest.raises(AuthenticationError):
+            manager.decode_token(old)
+
+        manager.token_cache.revoke_user('user_1')
+        with pytest.raises(AuthenticationError):
+            manager.decode_token(new)
+
+    def test_lru_bounded(self, manager):
+        """超过上限时淘汰最久未使用的条目"""
+        for i in range(4):
+            manager.decode_token(manager.generate_token(f'user_{i}'))
+
+        assert manager.token_cache.get_stats()['entries'] == 2
+
+
+class TestSharedRevocation:
+    """吊销状态经共享存储在多个进程（管理器实例）间生效"""
+
+    def _manager(self, db_path, **kwargs):
+        return JWTManager(secret_key=SECRET, token_cache=VerifiedTokenCache(db_path=db_path, **kwargs))
+
+    def test_revocation_shared_between_managers(self, db_path):
+        """一个 worker 吊销后，另一个 worker（或重启后的进程）同样拒绝"""
+        worker_a = self._manager(db_path, refresh_interval=0)
+        worker_b = self._manager(db_path, refresh_interval=0)
+        token = worker_a.generate_token('user_1')
+        old = worker_a.generate_token('user_2')
+        worker_b.decode_token(token)
+        worker_b.decode_token(old)
+
+        worker_a.revoke_token(token)
+        worker_a.token_cache.revoke_user('user_2')
+        new = worker_b.generate_token('user_2')
+
+        for manager in (worker_b, self._manager(db_path)):
+            for revoked in (token, old):
+                with pytest.raises(AuthenticationError):
+                    manager.decode_token(revoked)
+        assert worker_a.decode_token(new)['user_id'] == 'user_2'
+
+    def test_snapshot_refreshes_after_interval(self, db_path):
+        """其他 worker 的吊销在刷新间隔之后生效"""
+        worker_a = self._manager(db_path)
+        worker_b = self._manager(db_path, refresh_interval=60)
+        token = worker_a.generate_token('user_1')
+        worker_b.decode_token(token)
+
+        worker_a.revoke_token(token)
+        assert worker_b.decode_token(token)['user_id'] == 'user_1'
+
+        with mock.patch.object(auth.time, 'monotonic', return_value=time.monotonic() + 61):
+            with pytest.raises(AuthenticationError):
+                worker_b.decode_token(token)
+
+
+class TestRequireStrictAuth:
+    """require_strict_auth 复用进程级 JWT 管理器"""
+
+    def test_poll_uses_cached_claims(self, manager, monkeypatch):
+        """轮询请求不再构造 JWTManager 或重复验签"""
+        monkeypatch.setattr(auth, 'jwt_manager', manager)
+        monkeypatch.setattr('wechat_backend.security.auth_enhanced.log_audit_access', lambda name: None)
+        app = Flask(__name__)
+
+        @app.route('/api/test-progress')
+        @require_strict_auth
+        def progress():
+            return {'user_id': g.user_id}
+
+        token = manager.generate_token('user_1')
+        client = app.test_client()
+        with mock.patch.object(auth.jwt, 'decode', wraps=auth.jwt.decode) as decode, \
+                mock.patch.object(auth, 'JWTManager', side_effect=AssertionError('constructed per request')):
+            responses = [client.get('/api/test-progress', headers={'Authorization': f'Bearer {token}'})
+                         for _ in range(3)]
+
+        assert [r.get_json()['user_id'] for r in responses] == ['user_1'] * 3
+        assert decode.call_count == 1
@@ -1,30 +1,53 @@
 #!/usr/bin/env python3
 """
-AI 响应日志记录模块 V3 - 日志轮转增强版
-用于保存 AI 搜索平台的完整反馈结果，支持日志轮转、备份和自动清理
-
-增强特性：
-- 追加模式写入（不覆盖已有内容）✅
-- 自动日志轮转（当文件达到指定大小）
-- 自动备份（gzip 压缩）
-- 自动清理（保留最近 N 个文件）
-- 线程安全
+AI 响应日志记录模块 V3 - 异步分段存储版
+用于保存 AI 搜索平台的完整反馈结果，是 AI 响应日志的统一后端
+
+特性：
+- 热路径只做无锁入队（deque.append），不做文本统计、序列化和磁盘 IO
+- 后台写线程批量落盘：每批记录压缩为一个 gzip member 追加到当前分段文件
+- 分段按大小轮转，超出保留数量的旧分段自动删除
+- 采样策略：按平台 / 成功失败设置采样率，同一 execution_id 的记录一起保留或丢弃
+- 索引文件：每批一行（分段、偏移、长度、execution_id、平台、时间范围），
+  按 execution_id / 平台 / 时间查询时只读取命中的批次
+- 长回答写入内容存储（response_blob_repository），日志只保存哈希，
+  分段被删除时释放引用
+
+存储布局（默认 data/ai_responses/）：
+    segments/segment_<时间>_<进程号>_<序号>.jsonl.gz   分段文件（多个 gzip member 拼接）
+    segments/index.jsonl                      批次索引（追加与重写均持有 index.lock 排他锁）
+    ai_responses.jsonl / ai_responses_*.jsonl(.gz)  旧版单文件日志（只读兼容）
+
+配置（环境变量）:
+    AI_LOG_BATCH_SIZE: 每批最多写入的记录数，默认 200
+    AI_LOG_FLUSH_INTERVAL: 后台写线程最长等待时间（秒），默认 1.0
+    AI_LOG_QUEUE_MAX: 内存队列上限，超出时丢弃新记录，默认 10000
+    AI_LOG_SAMPLE_RATE: 默认采样率，默认 1.0
+    AI_LOG_PLATFORM_SAMPLE_RATES: 按平台的采样率，如 "doubao:0.2,qwen:0.5"
+    AI_LOG_FAILURE_SAMPLE_RATE: 失败记录的采样率（优先于平台采样率），默认 1.0
 """
 
+import atexit
+import gzip
+import hashlib
+import itertools
 import json
 import os
-import gzip
-import shutil
 import platform
 import socket
-import sys
-import time
-import traceback
 import threading
-from datetime import datetime
-from typing import Dict, Any, Optional, List
-from pathlib import Path
+import time
 import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境：退化为进程内锁
+    fcntl = None
 
 # 默认日志文件路径
 DEFAULT_LOG_DIR = Path(__file__).parent.parent / "data" / "ai_responses"
@@ -32,189 +55,146 @@ DEFAULT_LOG_FILE = DEFAULT_LOG_DIR / "ai_responses.jsonl"
 
 # 日志轮转配置
 LOG_ROTATION_CONFIG = {
-    'max_file_size_mb': 10,      # 单个文件最大 10MB
-    'max_backup_count': 10,      # 最多保留 10 个备份文件
+    'max_file_size_mb': 10,      # 单个分段最大 10MB（压缩后）
+    'max_backup_count': 10,      # 最多保留 10 个历史分段
     'backup_compression': True,  # 启用 gzip 压缩
 }
 
-# 【任务 1】全局文件锁，用于保护 JSONL 文件写入
+AI_LOG_BATCH_SIZE = int(os.getenv('AI_LOG_BATCH_SIZE', '200'))
+AI_LOG_FLUSH_INTERVAL = float(os.getenv('AI_LOG_FLUSH_INTERVAL', '1.0'))
+AI_LOG_QUEUE_MAX = int(os.getenv('AI_LOG_QUEUE_MAX', '10000'))
+AI_LOG_SAMPLE_RATE = float(os.getenv('AI_LOG_SAMPLE_RATE', '1.0'))
+AI_LOG_PLATFORM_SAMPLE_RATES = os.getenv('AI_LOG_PLATFORM_SAMPLE_RATES', '')
+AI_LOG_FAILURE_SAMPLE_RATE = float(os.getenv('AI_LOG_FAILURE_SAMPLE_RATE', '1.0'))
+
+SEGMENT_DIR_NAME = "segments"
+INDEX_FILE_NAME = "index.jsonl"
+INDEX_LOCK_NAME = "index.lock"
+_LEGACY_PATTERNS = ['ai_responses_*.jsonl', 'ai_responses_*.jsonl.gz']
+
+# 旧版单文件日志的写入锁（ai_response_logger_enhanced 仍向 ai_responses.jsonl 追加）
 _file_lock = threading.Lock()
-# 轮转锁（独立于写入锁，避免死锁）
-_rotation_lock = threading.Lock()
+
+# 进程内的分段序号（多个记录器实例共享），与进程号一起保证分段文件名唯一
+_segment_seq = itertools.count(1)
+
+
+class SamplingPolicy:
+    """
+    采样策略
+
+    采样率优先级：失败记录的 failure_rate > 平台采样率 > 默认采样率。
+    采样按 execution_id（没有时按 record_id）做确定性哈希，
+    同一次执行的记录要么全部保留，要么全部丢弃，按执行查询时不会残缺。
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        platform_rates: Optional[Dict[str, float]] = None,
+        failure_rate: Optional[float] = 1.0
+    ):
+        self.default_rate = default_rate
+        self.platform_rates = platform_rates or {}
+        self.failure_rate = failure_rate
+
+    @classmethod
+    def from_env(cls) -> 'SamplingPolicy':
+        platform_rates = {}
+        for item in AI_LOG_PLATFORM_SAMPLE_RATES.split(','):
+            name, _, rate = item.rpartition(':')
+            if name.strip() and rate.strip():
+                platform_rates[name.strip()] = float(rate)
+        return cls(AI_LOG_SAMPLE_RATE, platform_rates, AI_LOG_FAILURE_SAMPLE_RATE)
+
+    def rate_for(self, platform_name: Optional[str], success: bool) -> float:
+        if not success and self.failure_rate is not None:
+            return self.failure_rate
+        return self.platform_rates.get(platform_name, self.default_rate)
+
+    def should_keep(self, key: str, platform_name: Optional[str], success: bool) -> bool:
+        rate = self.rate_for(platform_name, success)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        bucket = int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < rate
 
 
 class AIResponseLogger:
     """
-    AI 响应记录器 - V3 日志轮转增强版
-    记录每次 AI 调用的完整信息，支持日志轮转、备份和自动清理
+    AI 响应记录器 - V3 异步分段存储版
+
+    用法：
+        logger = get_logger()
+        logger.log_response(question=..., response=..., platform=..., model=...)
+        logger.find_by_execution_id('exec_xxx')
     """
 
     def __init__(
-        self, 
+        self,
         log_file: Optional[str] = None,
         max_file_size_mb: int = None,
         max_backup_count: int = None,
-        enable_compression: bool = None
+        enable_compression: bool = None,
+        sampling: Optional[SamplingPolicy] = None,
+        batch_size: int = AI_LOG_BATCH_SIZE,
+        flush_interval: float = AI_LOG_FLUSH_INTERVAL,
+        queue_max: int = AI_LOG_QUEUE_MAX
     ):
         """
         初始化记录器
 
         Args:
-            log_file: 日志文件路径，默认为 data/ai_responses/ai_responses.jsonl
-            max_file_size_mb: 单个文件最大大小 (MB)，默认 10MB
-            max_backup_count: 最多保留备份文件数，默认 10 个
-            enable_compression: 是否启用 gzip 压缩备份，默认 True
+            log_file: 旧版日志文件路径，分段目录位于其同级 segments/ 下
+            max_file_size_mb: 单个分段最大大小 (MB)，默认 10MB
+            max_backup_count: 最多保留历史分段数，默认 10 个
+            enable_compression: 是否 gzip 压缩分段，默认 True
+            sampling: 采样策略，默认从环境变量读取
+            batch_size: 每批最多写入的记录数
+            flush_interval: 后台写线程最长等待时间（秒）
+            queue_max: 内存队列上限
         """
-        if log_file:
-            self.log_file = Path(log_file)
-        else:
-            self.log_file = DEFAULT_LOG_FILE
-
-        # 确保日志目录存在
-        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.log_file = Path(log_file) if log_file else DEFAULT_LOG_FILE
+        self.segment_dir = self.log_file.parent / SEGMENT_DIR_NAME
+        self.index_file = self.segment_dir / INDEX_FILE_NAME
+        self.index_lock_file = self.segment_dir / INDEX_LOCK_NAME
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
 
         # 加载轮转配置
         self.max_file_size = (max_file_size_mb or LOG_ROTATION_CONFIG['max_file_size_mb']) * 1024 * 1024
         self.max_backup_count = max_backup_count or LOG_ROTATION_CONFIG['max_backup_count']
         self.enable_compression = enable_compression if enable_compression is not None else LOG_ROTATION_CONFIG['backup_compression']
 
+        self.sampling = sampling or SamplingPolicy.from_env()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_max = queue_max
+
         # 系统信息（只获取一次）
         self.system_info = self._get_system_info()
-        
-        # 检查并执行日志轮转
-        self._check_and_rotate()
-        
-        print(f"[AIResponseLogger V3] 初始化完成，日志文件：{self.log_file}")
-        print(f"  - 最大文件大小：{self.max_file_size / 1024 / 1024:.1f}MB")
-        print(f"  - 最大备份数量：{self.max_backup_count}")
-        print(f"  - 压缩备份：{'是' if self.enable_compression else '否'}")
-
-    def _get_system_info(self) -> Dict[str, Any]:
-        """获取系统信息"""
-        return {
-            "hostname": socket.gethostname(),
-            "platform": platform.system(),
-            "platform_version": platform.version(),
-            "python_version": platform.python_version(),
-            "machine": platform.machine(),
-            "processor": platform.processor()
-        }
-
-    def _check_and_rotate(self):
-        """检查是否需要日志轮转"""
-        if not self.log_file.exists():
-            return
-        
-        try:
-            file_size = self.log_file.stat().st_size
-            if file_size >= self.max_file_size:
-                self._rotate_log()
-        except Exception as e:
-            print(f"[AIResponseLogger] 检查日志轮转失败：{e}")
 
-    def _rotate_log(self):
-        """执行日志轮转"""
-        with _rotation_lock:  # 确保同一时间只有一个线程在执行轮转
-            try:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                backup_name = f"ai_responses_{timestamp}.jsonl"
-                backup_path = self.log_file.parent / backup_name
-                
-                # 移动当前日志文件到备份
-                shutil.move(str(self.log_file), str(backup_path))
-                print(f"[AIResponseLogger] 日志轮转：{self.log_file.name} → {backup_name}")
-                
-                # 压缩备份（如果启用）
-                if self.enable_compression:
-                    compressed_path = self._compress_backup(backup_path)
-                    if compressed_path:
-                        backup_path = compressed_path
-                
-                # 清理旧备份
-                self._cleanup_old_backups()
-                
-                print(f"[AIResponseLogger] 日志轮转完成")
-                
-            except Exception as e:
-                print(f"[AIResponseLogger] 日志轮转失败：{e}")
-
-    def _compress_backup(self, backup_path: Path) -> Optional[Path]:
-        """压缩备份文件"""
-        try:
-            compressed_path = backup_path.with_suffix('.jsonl.gz')
-            with open(backup_path, 'rb') as f_in:
-                with gzip.open(compressed_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            
-            # 删除未压缩文件
-            backup_path.unlink()
-            
-            # 计算压缩率
-            original_size = backup_path.stat().st_size if backup_path.exists() else 0
-            compressed_size = compressed_path.stat().st_size
-            compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
-            
-            print(f"[AIResponseLogger] 压缩备份：{compressed_path.name} (压缩率：{compression_ratio:.1f}%)")
-            return compressed_path
-            
-        except Exception as e:
-            print(f"[AIResponseLogger] 压缩备份失败：{e}")
-            return None
+        # 热路径只操作 deque（append/popleft 在 CPython 中是原子操作，无需加锁）
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_start_lock = threading.Lock()
+        self._counters = {'enqueued': 0, 'sampled_out': 0, 'dropped': 0, 'written': 0, 'batches': 0}
 
-    def _cleanup_old_backups(self):
-        """清理旧备份文件"""
-        try:
-            # 获取所有备份文件（包括压缩和未压缩的）
-            backup_files = []
-            for pattern in ['ai_responses_*.jsonl', 'ai_responses_*.jsonl.gz']:
-                backup_files.extend(self.log_file.parent.glob(pattern))
-            
-            # 按修改时间排序（最新的在前）
-            backup_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-            
-            # 删除超出数量的旧文件
-            if len(backup_files) > self.max_backup_count:
-                files_to_delete = backup_files[self.max_backup_count:]
-                for file_path in files_to_delete:
-                    file_path.unlink()
-                    print(f"[AIResponseLogger] 清理旧备份：{file_path.name}")
-            
-            # 统计当前备份情况
-            current_count = len(backup_files[:self.max_backup_count])
-            total_size = sum(f.stat().st_size for f in backup_files[:self.max_backup_count])
-            print(f"[AIResponseLogger] 当前备份：{current_count}/{self.max_backup_count} 文件，总计 {total_size / 1024 / 1024:.2f}MB")
-            
-        except Exception as e:
-            print(f"[AIResponseLogger] 清理旧备份失败：{e}")
+        self._segment_path: Optional[Path] = self._latest_segment()
 
-    def _calculate_text_stats(self, text: str) -> Dict[str, Any]:
-        """计算文本统计信息"""
-        if not text:
-            return {"length": 0, "lines": 0, "words": 0, "chars_no_spaces": 0}
-
-        # 中文字符统计
-        chinese_chars = len([c for c in text if '\u4e00' <= c <= '\u9fff'])
-        # 英文单词统计（简单分词）
-        english_words = len([w for w in text.split() if w.isalpha()])
-
-        return {
-            "length": len(text),
-            "lines": text.count('\n') + 1,
-            "words": len(text.split()),
-            "chars_no_spaces": len(text.replace(' ', '').replace('\n', '')),
-            "chinese_chars": chinese_chars,
-            "english_words": english_words,
-            "has_code_blocks": '```' in text,
-            "has_markdown": any(md in text for md in ['**', '*', '#', '[', ']'])
-        }
+    # ==================== 写入 ====================
 
     def log_response(
         self,
         # 核心字段
         question: str,
         response: str,
-        platform_name: str,
-        model: str,
+        platform_name: Optional[str] = None,
+        model: Optional[str] = None,
 
         # 业务字段
         brand: Optional[str] = None,
@@ -256,27 +236,103 @@ class AIResponseLogger:
         raw_response: Optional[Dict] = None,
 
         # 扩展字段
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+
+        # 兼容调用方使用的 platform 参数名
+        platform: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        记录一次 AI 响应 - V3 完整版
-        所有参数都是可选的，但建议尽可能填写以获得最完整的数据
+        记录一次 AI 响应（只入队，由后台线程写入）
+
+        Returns:
+            {'record_id', 'timestamp', 'queued'}；queued 为 False 表示被采样丢弃或队列已满
         """
-        # 生成唯一记录 ID
+        fields = dict(locals())
+        del fields['self']
+        fields['platform_name'] = platform_name or platform
+        del fields['platform']
+
         record_id = str(uuid.uuid4())
+        now = time.time()
+        receipt = {"record_id": record_id, "timestamp": datetime.fromtimestamp(now).isoformat(), "queued": False}
+
+        if not self.sampling.should_keep(execution_id or record_id, fields['platform_name'], success):
+            self._counters['sampled_out'] += 1
+            return receipt
+        if len(self._queue) >= self.queue_max:
+            self._counters['dropped'] += 1
+            return receipt
+
+        self._queue.append((record_id, now, fields))
+        self._counters['enqueued'] += 1
+        receipt["queued"] = True
+
+        self._ensure_writer()
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return receipt
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_start_lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._writer_loop, name='ai-response-logger', daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # 写入失败不应影响主流程，也不应终止写线程
+                print(f"[AIResponseLogger] 警告：写入日志失败：{e}")
 
-        # 构建完整记录
+    def flush(self) -> int:
+        """
+        把队列中的记录全部写入磁盘（可在任意线程调用）
+
+        Returns:
+            本次写入的记录数
+        """
+        written = 0
+        with self._write_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                self._write_batch([self._build_record(*item) for item in batch])
+                written += len(batch)
+        return written
+
+    def close(self):
+        """停止后台写线程并写完剩余记录"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.flush()
+
+    def _build_record(self, record_id: str, unix_time: float, f: Dict[str, Any]) -> Dict[str, Any]:
+        """在写线程中构建完整记录（文本统计、质量评估等耗时操作不占用调用方）"""
+        metadata = f['metadata']
+        tokens_used, latency_ms = f['tokens_used'], f['latency_ms']
+        response = f['response']
         record = {
             # 基础标识
             "record_id": record_id,
-            "timestamp": datetime.now().isoformat(),
-            "unix_timestamp": time.time(),
+            "timestamp": datetime.fromtimestamp(unix_time).isoformat(),
+            "unix_timestamp": unix_time,
             "version": "3.0",  # V3 版本标识
 
             # 核心内容
             "question": {
-                "text": question,
-                "stats": self._calculate_text_stats(question)
+                "text": f['question'],
+                "stats": self._calculate_text_stats(f['question'])
             },
             "response": {
                 "text": response,
@@ -285,17 +341,17 @@ class AIResponseLogger:
 
             # 平台信息
             "platform": {
-                "name": platform_name,
-                "model": model,
-                "api_version": metadata.get("api_version") if metadata else None
+                "name": f['platform_name'],
+                "model": f['model'],
+                "api_version": metadata.get("api_version") if isinstance(metadata, dict) else None
             },
 
             # 业务信息
             "business": {
-                "brand": brand,
-                "competitor": competitor,
-                "industry": industry,
-                "question_category": question_category
+                "brand": f['brand'],
+                "competitor": f['competitor'],
+                "industry": f['industry'],
+                "question_category": f['question_category']
             },
 
             # 性能指标
@@ -303,40 +359,40 @@ class AIResponseLogger:
                 "latency_ms": latency_ms,
                 "tokens": {
                     "total": tokens_used,
-                    "prompt": prompt_tokens,
-                    "completion": completion_tokens
+                    "prompt": f['prompt_tokens'],
+                    "completion": f['completion_tokens']
                 },
                 "throughput": round(tokens_used * 1000 / latency_ms, 2) if tokens_used and latency_ms else None
             },
 
             # 执行状态
             "status": {
-                "success": success,
-                "error_message": error_message,
-                "error_type": error_type,
-                "http_status_code": http_status_code
+                "success": f['success'],
+                "error_message": f['error_message'],
+                "error_type": f['error_type'],
+                "http_status_code": f['http_status_code']
             },
 
             # 可靠性指标
             "reliability": {
-                "retry_count": retry_count or 0,
-                "circuit_breaker_open": circuit_breaker_open or False
+                "retry_count": f['retry_count'] or 0,
+                "circuit_breaker_open": f['circuit_breaker_open'] or False
             },
 
             # 请求配置
             "request_config": {
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "timeout_seconds": timeout_seconds
+                "temperature": f['temperature'],
+                "max_tokens": f['max_tokens'],
+                "timeout_seconds": f['timeout_seconds']
             },
 
             # 上下文信息
             "context": {
-                "execution_id": execution_id,
-                "session_id": session_id,
-                "user_id": user_id,
-                "question_index": question_index,
-                "total_questions": total_questions
+                "execution_id": f['execution_id'],
+                "session_id": f['session_id'],
+                "user_id": f['user_id'],
+                "question_index": f['question_index'],
+                "total_questions": f['total_questions']
             },
 
             # 系统信息
@@ -344,39 +400,415 @@ class AIResponseLogger:
 
             # 质量评估
             "quality": {
-                "score": response_quality_score,
+                "score": f['response_quality_score'],
                 "has_structured_data": self._has_structured_data(response),
                 "completeness": self._assess_completeness(response)
             },
 
             # 原始数据（调试用，可选）
             "raw": {
-                "request": raw_request,
-                "response": raw_response
-            } if raw_request or raw_response else None,
+                "request": f['raw_request'],
+                "response": f['raw_response']
+            } if f['raw_request'] or f['raw_response'] else None,
 
             # 扩展元数据
             "metadata": metadata or {}
         }
+        return self._externalize_response(self._clean_none_values(record))
+
+    def _write_batch(self, records: List[Dict[str, Any]]):
+        """一批记录写为一个 gzip member，并追加一行索引"""
+        if not records:
+            return
+
+        payload = ''.join(json.dumps(r, ensure_ascii=False, default=str) + '\n' for r in records).encode('utf-8')
+        if self.enable_compression:
+            payload = gzip.compress(payload, compresslevel=6)
+
+        segment = self._current_segment()
+        with open(segment, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            # 追加模式下按写入后的位置反推偏移，多进程同时追加时也正确
+            offset = f.tell() - len(payload)
+
+        entry = {
+            "segment": segment.name,
+            "offset": offset,
+            "length": len(payload),
+            "count": len(records),
+            "first_ts": records[0].get("timestamp"),
+            "last_ts": records[-1].get("timestamp"),
+            "execution_ids": sorted({r.get("context", {}).get("execution_id") for r in records} - {None}),
+            "platforms": sorted({r.get("platform", {}).get("name") for r in records} - {None}),
+        }
+        with self._index_lock():
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        self._counters['written'] += len(records)
+        self._counters['batches'] += 1
+
+        if offset + len(payload) >= self.max_file_size:
+            self._segment_path = None
+            self._cleanup_old_segments()
+
+    # ==================== 分段管理 ====================
+
+    def _segments(self) -> List[Path]:
+        """全部分段，按创建顺序（旧 → 新）"""
+        return sorted(self.segment_dir.glob('segment_*.jsonl*'))
+
+    def _latest_segment(self) -> Optional[Path]:
+        segments = self._segments()
+        if segments and segments[-1].stat().st_size < self.max_file_size \
+                and segments[-1].name.endswith('.gz') == self.enable_compression:
+            return segments[-1]
+        return None
+
+    def _current_segment(self) -> Path:
+        if self._segment_path is None:
+            suffix = '.jsonl.gz' if self.enable_compression else '.jsonl'
+            # 进程号区分多个 worker 在同一秒内创建的分段
+            name = f"segment_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(_segment_seq):04d}{suffix}"
+            self._segment_path = self.segment_dir / name
+        return self._segment_path
+
+    def _cleanup_old_segments(self):
+        """保留当前分段和最近 max_backup_count 个历史分段"""
+        segments = [s for s in self._segments() if s != self._segment_path]
+        if len(segments) > self.max_backup_count:
+            self._delete_segments(segments[:len(segments) - self.max_backup_count])
+
+    def _delete_segments(self, segments: List[Path]):
+        """删除分段：释放其中引用的回答内容，并从索引中移除对应批次"""
+        if not segments:
+            return
+        names = {s.name for s in segments}
+        for segment in segments:
+            self._release_segment_blobs(segment)
+            segment.unlink()
+            print(f"[AIResponseLogger] 清理旧分段：{segment.name}")
+
+        # 读取与替换在同一把排他锁内，其他进程此间追加的索引行不会丢失
+        with self._index_lock():
+            entries = [e for e in self._read_index() if e.get("segment") not in names]
+            tmp_path = self.index_file.with_name(f"{INDEX_FILE_NAME}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.index_file)
+
+    @contextmanager
+    def _index_lock(self):
+        """索引文件的跨进程排他锁（锁文件独立于索引，索引被替换后锁仍有效）"""
+        with open(self.index_lock_file, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def cleanup_old_logs(self, retention_days: int = 30) -> int:
+        """
+        删除最后一条记录早于保留期的分段（以及旧版备份文件）
+
+        没有索引行的分段（如索引写入前进程退出）按文件修改时间判断。
+
+        Returns:
+            删除的文件数
+        """
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        with self._write_lock:
+            last_ts = {}
+            for entry in self._read_index():
+                last_ts[entry["segment"]] = max(last_ts.get(entry["segment"], ''), entry.get("last_ts") or '')
+            expired = [
+                s for s in self._segments()
+                if (last_ts.get(s.name) or datetime.fromtimestamp(s.stat().st_mtime).isoformat()) < cutoff
+            ]
+            if self._segment_path in expired:
+                self._segment_path = None
+            self._delete_segments(expired)
+
+        legacy_cutoff = time.time() - retention_days * 86400
+        legacy = [p for p in self._legacy_files() if p != self.log_file and p.stat().st_mtime < legacy_cutoff]
+        for path in legacy:
+            self._release_segment_blobs(path)
+            path.unlink()
+        return len(expired) + len(legacy)
+
+    # ==================== 读取 ====================
+
+    def _read_index(self) -> List[Dict[str, Any]]:
+        if not self.index_file.exists():
+            return []
+        entries = []
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def _read_batch(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """按索引读取一批记录（只读取该批次的字节范围）"""
+        path = self.segment_dir / entry["segment"]
+        with open(path, 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        if path.name.endswith('.gz'):
+            data = gzip.decompress(data)
+        return [json.loads(line) for line in data.decode('utf-8').splitlines() if line.strip()]
+
+    def _legacy_files(self) -> List[Path]:
+        files = [self.log_file] if self.log_file.exists() else []
+        for pattern in _LEGACY_PATTERNS:
+            files.extend(self.log_file.parent.glob(pattern))
+        return files
+
+    def _iter_legacy(self) -> Iterator[Dict[str, Any]]:
+        """旧版单文件日志（新 → 旧，无索引，需要全量扫描）"""
+        for path in sorted(self._legacy_files(), key=lambda p: p.stat().st_mtime, reverse=True):
+            opener = gzip.open if path.suffix == '.gz' else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+            yield from reversed(records)
+
+    def iter_records(
+        self,
+        execution_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        include_legacy: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按时间倒序遍历记录
+
+        先用索引过滤批次，只读取可能命中的批次；旧版日志没有索引，
+        按 execution_id 查询时不扫描旧版日志。
+        """
+        self.flush()
+        for entry in reversed(self._read_index()):
+            if execution_id and execution_id not in entry.get("execution_ids", []):
+                continue
+            if platform and platform not in entry.get("platforms", []):
+                continue
+            if start_time and (entry.get("last_ts") or '') < start_time:
+                continue
+            if end_time and (entry.get("first_ts") or '') > end_time:
+                continue
+            try:
+                records = self._read_batch(entry)
+            except (OSError, ValueError) as e:
+                print(f"[AIResponseLogger] 读取批次失败：{entry.get('segment')}@{entry.get('offset')}, {e}")
+                continue
+            yield from reversed(records)
+
+        if include_legacy and not execution_id:
+            yield from self._iter_legacy()
+
+    def find_by_execution_id(self, execution_id: str) -> List[Dict[str, Any]]:
+        """按执行 ID 查找记录（按时间正序）"""
+        records = [
+            r for r in self.iter_records(execution_id=execution_id)
+            if r.get("context", {}).get("execution_id") == execution_id
+        ]
+        records.reverse()
+        return records
+
+    def get_recent_responses(
+        self,
+        limit: int = 100,
+        platform: Optional[str] = None,
+        brand: Optional[str] = None,
+        success_only: bool = False,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> List[Dict]:
+        """获取最近的响应记录（新 → 旧）"""
+        responses = []
+        for record in self.iter_records(platform=platform, start_time=start_time, end_time=end_time):
+            if platform and record.get('platform', {}).get('name') != platform:
+                continue
+            if brand and record.get('business', {}).get('brand') != brand:
+                continue
+            if success_only and not record.get('status', {}).get('success', True):
+                continue
+            if start_time and record.get('timestamp', '') < start_time:
+                continue
+            if end_time and record.get('timestamp', '') > end_time:
+                continue
+            responses.append(record)
+            if len(responses) >= limit:
+                break
+        return responses
+
+    def get_statistics(self, days: int = 7) -> Dict[str, Any]:
+        """统计最近几天的记录（平台、模型、品牌、错误、性能）"""
+        cutoff_time = (datetime.now() - timedelta(days=days)).isoformat()
+        stats = {
+            "period_days": days,
+            "total_records": 0,
+            "successful_records": 0,
+            "failed_records": 0,
+            "platforms": {},
+            "brands": set(),
+            "models": set(),
+            "performance": {"avg_latency_ms": 0, "total_tokens": 0},
+            "errors": {},
+            "question_categories": {}
+        }
+        latency_total, latency_count = 0, 0
+
+        for record in self.iter_records(start_time=cutoff_time):
+            if record.get('timestamp', '') < cutoff_time:
+                continue
+            stats["total_records"] += 1
+
+            status = record.get("status", {})
+            if status.get("success", True):
+                stats["successful_records"] += 1
+            else:
+                stats["failed_records"] += 1
+                error_type = status.get("error_type", "unknown")
+                stats["errors"][error_type] = stats["errors"].get(error_type, 0) + 1
+
+            platform_info = record.get("platform", {})
+            if platform_info.get("name"):
+                stats["platforms"][platform_info["name"]] = stats["platforms"].get(platform_info["name"], 0) + 1
+            if platform_info.get("model"):
+                stats["models"].add(platform_info["model"])
+
+            business = record.get("business", {})
+            if business.get("brand"):
+                stats["brands"].add(business["brand"])
+            if business.get("question_category"):
+                category = business["question_category"]
+                stats["question_categories"][category] = stats["question_categories"].get(category, 0) + 1
+
+            performance = record.get("performance", {})
+            if performance.get("latency_ms"):
+                latency_total += performance["latency_ms"]
+                latency_count += 1
+            stats["performance"]["total_tokens"] += performance.get("tokens", {}).get("total") or 0
+
+        if latency_count:
+            stats["performance"]["avg_latency_ms"] = round(latency_total / latency_count, 2)
+        stats["models"] = list(stats["models"])
+        stats["brands"] = list(stats["brands"])
+        stats["log_file"] = str(self.segment_dir)
+        return stats
 
-        # 清理 None 值
-        record = self._clean_none_values(record)
+    def get_stats(self) -> Dict[str, Any]:
+        """获取日志存储和写线程统计信息"""
+        segments = self._segments()
+        legacy = self._legacy_files()
+        segment_size = sum(s.stat().st_size for s in segments)
+        legacy_size = sum(p.stat().st_size for p in legacy)
+        return {
+            "segment_dir": str(self.segment_dir),
+            "segment_count": len(segments),
+            "segment_size_mb": round(segment_size / 1024 / 1024, 2),
+            "legacy_file_count": len(legacy),
+            "legacy_size_mb": round(legacy_size / 1024 / 1024, 2),
+            "total_size_mb": round((segment_size + legacy_size) / 1024 / 1024, 2),
+            "max_file_size_mb": round(self.max_file_size / 1024 / 1024, 2),
+            "max_backup_count": self.max_backup_count,
+            "queue_depth": len(self._queue),
+            **self._counters
+        }
+
+    # ==================== 内容存储 ====================
+
+    def _externalize_response(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        长回答写入内容存储，返回写入日志的记录（response.text 替换为 response.blob）
+
+        内容存储不可用时原样返回，日志仍保存完整文本。
+        """
+        text = record.get("response", {}).get("text")
+        try:
+            from wechat_backend.repositories.response_blob_repository import externalize_response
+        except ImportError:
+            return record
+
+        _, blob_hash = externalize_response(text)
+        if not blob_hash:
+            return record
 
-        # 检查并执行日志轮转（写入前检查）
-        self._check_and_rotate()
+        response = {k: v for k, v in record["response"].items() if k != "text"}
+        response["blob"] = blob_hash
+        return {**record, "response": response}
 
-        # 线程安全的文件写入 - 使用追加模式（不覆盖已有内容）
+    def _release_segment_blobs(self, file_path: Path):
+        """释放即将删除的日志文件中引用的回答内容"""
         try:
-            with _file_lock:  # 线程安全锁
-                with open(self.log_file, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
-                    f.flush()  # 确保立即写入磁盘
-                    os.fsync(f.fileno())  # 强制同步到磁盘
+            from wechat_backend.repositories.response_blob_repository import get_response_blob_store
+        except ImportError:
+            return
+
+        opener = gzip.open if file_path.suffix == '.gz' else open
+        hashes = []
+        try:
+            with opener(file_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if '"blob"' not in line:
+                        continue
+                    try:
+                        blob_hash = json.loads(line).get("response", {}).get("blob")
+                    except ValueError:
+                        continue
+                    if blob_hash:
+                        hashes.append(blob_hash)
+            if hashes:
+                get_response_blob_store().release(hashes)
         except Exception as e:
-            # 记录失败不应影响主流程
-            print(f"[AIResponseLogger] 警告：写入日志失败：{e}")
+            print(f"[AIResponseLogger] 释放回答内容引用失败：{file_path.name}, {e}")
+
+    # ==================== 记录内容辅助 ====================
+
+    def _get_system_info(self) -> Dict[str, Any]:
+        """获取系统信息"""
+        return {
+            "hostname": socket.gethostname(),
+            "platform": platform.system(),
+            "platform_version": platform.version(),
+            "python_version": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor()
+        }
 
-        return record
+    def _calculate_text_stats(self, text: str) -> Dict[str, Any]:
+        """计算文本统计信息"""
+        if not text:
+            return {"length": 0, "lines": 0, "words": 0, "chars_no_spaces": 0}
+
+        # 中文字符统计
+        chinese_chars = len([c for c in text if '\u4e00' <= c <= '\u9fff'])
+        # 英文单词统计（简单分词）
+        english_words = len([w for w in text.split() if w.isalpha()])
+
+        return {
+            "length": len(text),
+            "lines": text.count('\n') + 1,
+            "words": len(text.split()),
+            "chars_no_spaces": len(text.replace(' ', '').replace('\n', '')),
+            "chinese_chars": chinese_chars,
+            "english_words": english_words,
+            "has_code_blocks": '```' in text,
+            "has_markdown": any(md in text for md in ['**', '*', '#', '[', ']'])
+        }
 
     def _has_structured_data(self, text: str) -> bool:
         """检测响应是否包含结构化数据"""
@@ -414,56 +846,28 @@ class AIResponseLogger:
         if isinstance(obj, dict):
             return {k: self._clean_none_values(v) for k, v in obj.items() if v is not None}
         elif isinstance(obj, list):
-            return [self._clean_none_values(item) for item in item in obj if item is not None]
+            return [self._clean_none_values(item) for item in obj if item is not None]
         elif hasattr(obj, 'value'):
             return obj.value
         elif hasattr(obj, 'isoformat'):
             return obj.isoformat()
         return obj
 
-    def get_stats(self) -> Dict[str, Any]:
-        """获取日志统计信息"""
-        try:
-            if not self.log_file.exists():
-                return {"error": "日志文件不存在"}
-
-            # 统计当前文件
-            current_size = self.log_file.stat().st_size
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                line_count = sum(1 for _ in f)
-
-            # 统计备份文件
-            backup_files = []
-            for pattern in ['ai_responses_*.jsonl', 'ai_responses_*.jsonl.gz']:
-                backup_files.extend(self.log_file.parent.glob(pattern))
-            
-            total_backup_size = sum(f.stat().st_size for f in backup_files)
-            total_backup_count = len(backup_files)
-
-            return {
-                "current_file": str(self.log_file),
-                "current_size_mb": round(current_size / 1024 / 1024, 2),
-                "current_records": line_count,
-                "backup_count": total_backup_count,
-                "backup_size_mb": round(total_backup_size / 1024 / 1024, 2),
-                "total_size_mb": round((current_size + total_backup_size) / 1024 / 1024, 2),
-                "max_file_size_mb": round(self.max_file_size / 1024 / 1024, 2),
-                "max_backup_count": self.max_backup_count
-            }
-
-        except Exception as e:
-            return {"error": f"统计失败：{e}"}
-
 
 # 全局 logger 实例
 _default_logger: Optional[AIResponseLogger] = None
+_default_logger_lock = threading.Lock()
 
 
 def get_logger(log_file: Optional[str] = None) -> AIResponseLogger:
     """获取全局 logger 实例"""
     global _default_logger
     if _default_logger is None:
-        _default_logger = AIResponseLogger(log_file)
+        with _default_logger_lock:
+            if _default_logger is None:
+                _default_logger = AIResponseLogger(log_file)
+                # 进程退出前写完队列中的记录
+                atexit.register(_default_logger.close)
     return _default_logger
 
 
@@ -479,33 +883,38 @@ def get_log_stats() -> Dict[str, Any]:
     return logger.get_stats()
 
 
+def resolve_response_text(record: Dict[str, Any]) -> Optional[str]:
+    """读取日志记录中的回答文本（外置存储的内容从内容存储中读取）"""
+    response = record.get("response") or {}
+    if "text" in response or not response.get("blob"):
+        return response.get("text")
+    from wechat_backend.repositories.response_blob_repository import get_response_blob_store
+    return get_response_blob_store().get(response["blob"])
+
+
 # 演示用法
 if __name__ == "__main__":
     print("=" * 60)
-    print("AI Response Logger V3 - 日志轮转增强版演示")
+    print("AI Response Logger V3 - 异步分段存储版演示")
     print("=" * 60)
-    
-    # 创建 logger（使用小文件限制来演示轮转）
-    logger = AIResponseLogger(
-        max_file_size_mb=1,  # 1MB 触发轮转（演示用）
-        max_backup_count=5
-    )
-    
-    # 记录一条测试日志
-    record = logger.log_response(
+
+    logger = AIResponseLogger(max_file_size_mb=1, max_backup_count=5)
+
+    receipt = logger.log_response(
         question="什么是人工智能？",
         response="人工智能（AI）是计算机科学的一个分支...",
-        platform_name="deepseek",
+        platform="deepseek",
         model="deepseek-chat",
         brand="测试品牌",
         latency_ms=1500,
+        execution_id="demo_exec",
         success=True
     )
-    
-    print(f"\n✅ 记录成功：{record['record_id'][:8]}...")
-    
-    # 显示统计信息
-    stats = logger.get_stats()
+    logger.close()
+
+    print(f"\n✅ 记录成功：{receipt['record_id'][:8]}...")
+    print(f"  按执行 ID 查询：{len(logger.find_by_execution_id('demo_exec'))} 条")
+
     print(f"\n📊 日志统计:")
-    for key, value in stats.items():
+    for key, value in logger.get_stats().items():
         print(f"  {key}: {value}")
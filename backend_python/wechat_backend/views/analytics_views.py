@@ -35,14 +35,13 @@ from wechat_backend.nxm_execution_engine import execute_nxm_test, verify_nxm_exe
 from wechat_backend.question_system import QuestionManager, TestCaseGenerator
 from wechat_backend.test_engine import TestExecutor, ExecutionStrategy
 from scoring_engine import ScoringEngine
-from enhanced_scoring_engine import EnhancedScoringEngine, calculate_enhanced_scores
 from ai_judge_module import AIJudgeClient, JudgeResult, ConfidenceLevel
 from wechat_backend.analytics.interception_analyst import InterceptionAnalyst
 from wechat_backend.analytics.monetization_service import MonetizationService, UserLevel
-from wechat_backend.analytics.source_intelligence_processor import SourceIntelligenceProcessor, process_brand_source_intelligence
 from wechat_backend.recommendation_generator import RecommendationGenerator, RecommendationPriority, RecommendationType
 from wechat_backend.cruise_controller import CruiseController
 from wechat_backend.market_intelligence_service import MarketIntelligenceService
+from wechat_backend.lazy_imports import LazyInstance
 
 # SSE Service imports
 from wechat_backend.services.sse_service import (
@@ -504,9 +503,8 @@ def get_prediction_forecast():
 from wechat_backend.analytics.workflow_manager import WorkflowManager
 workflow_manager = WorkflowManager()
 
-# 初始化资产智能引擎
-from wechat_backend.analytics.asset_intelligence_engine import AssetIntelligenceEngine
-asset_intelligence_engine = AssetIntelligenceEngine()
+# 初始化资产智能引擎（jieba/sklearn 较重，首次使用时才加载）
+asset_intelligence_engine = LazyInstance('wechat_backend.analytics.asset_intelligence_engine', 'AssetIntelligenceEngine')
 
 
 
@@ -586,9 +584,8 @@ def optimize_assets():
         return jsonify({'error': 'Failed to optimize assets', 'details': str(e)}), 500
 
 
-# 初始化报告生成器
-from wechat_backend.analytics.report_generator import ReportGenerator
-report_generator = ReportGenerator()
+# 初始化报告生成器（reportlab 较重，首次使用时才加载）
+report_generator = LazyInstance('wechat_backend.analytics.report_generator', 'ReportGenerator')
 
 
 
@@ -634,3 +631,30 @@ def get_hub_summary():
         api_logger.error(f"Error generating hub summary: {e}")
         return jsonify({'error': 'Failed to generate hub summary', 'details': str(e)}), 500
 
+
+
+@wechat_bp.route('/geo/model-ranks', methods=['GET'])
+@require_auth_optional
+@rate_limit(limit=20, window=60, per='endpoint')
+@monitored_endpoint('/geo/model-ranks', require_auth=False, validate_inputs=True)
+def get_geo_model_ranks():
+    """按模型统计品牌的平均排名、情感和提及率（基于 diagnosis_results 类型化 GEO 列）"""
+    brand_name = request.args.get('brand_name', '')
+    execution_ids = [e.strip() for e in request.args.get('execution_ids', '').split(',') if e.strip()]
+
+    if not brand_name and not execution_ids:
+        return jsonify({'error': 'brand_name or execution_ids is required'}), 400
+    if brand_name and not sql_protector.validate_input(brand_name):
+        return jsonify({'error': 'Invalid brand_name'}), 400
+
+    try:
+        from wechat_backend.repositories.diagnosis_geo_repository import get_diagnosis_geo_repository
+
+        stats = get_diagnosis_geo_repository().get_rank_stats_by_model(
+            brand=brand_name or None, execution_ids=execution_ids or None
+        )
+        return jsonify({'status': 'success', 'stats': stats})
+
+    except Exception as e:
+        api_logger.error(f"Error querying GEO model ranks: {e}")
+        return jsonify({'error': 'Failed to query GEO model ranks', 'details': str(e)}), 500
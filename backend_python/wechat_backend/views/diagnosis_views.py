@@ -43,14 +43,15 @@ from wechat_backend.error_handler import handle_api_exceptions
 from wechat_backend.security.auth_enhanced import require_strict_auth, log_audit_access
 from wechat_backend.ai_adapters.factory import AIAdapterFactory
 from wechat_backend.nxm_execution_engine import execute_nxm_test, verify_nxm_execution
+from wechat_backend.nxm_streaming_aggregator import StreamingResultAggregator
+from wechat_backend.pipelined_aggregator import PipelinedResultAggregator, DEFAULT_MAX_PARALLEL_JUDGES
+from wechat_backend.deadline import Deadline, deadline_scope
 from wechat_backend.question_system import QuestionManager, TestCaseGenerator
 from wechat_backend.test_engine import TestExecutor, ExecutionStrategy
 from scoring_engine import ScoringEngine
-from enhanced_scoring_engine import EnhancedScoringEngine, calculate_enhanced_scores
 from ai_judge_module import AIJudgeClient, JudgeResult, ConfidenceLevel
 from wechat_backend.analytics.interception_analyst import InterceptionAnalyst
 from wechat_backend.analytics.monetization_service import MonetizationService, UserLevel
-from wechat_backend.analytics.source_intelligence_processor import SourceIntelligenceProcessor, process_brand_source_intelligence
 from wechat_backend.recommendation_generator import RecommendationGenerator, RecommendationPriority, RecommendationType
 from wechat_backend.cruise_controller import CruiseController
 from wechat_backend.market_intelligence_service import MarketIntelligenceService
@@ -71,7 +72,7 @@ from wechat_backend.services.sse_service import (
 from wechat_backend.security.auth import require_auth, require_auth_optional, get_current_user_id
 from wechat_backend.security.input_validation import validate_and_sanitize_request, InputValidator, InputSanitizer, validate_safe_text
 from wechat_backend.security.sql_protection import sql_protector
-from wechat_backend.security.rate_limiting import rate_limit, CombinedRateLimiter
+from wechat_backend.security.rate_limiting import rate_limit, polling_rate_limit, CombinedRateLimiter
 
 # Monitoring imports
 from wechat_backend.monitoring.monitoring_decorator import monitored_endpoint
@@ -626,8 +627,8 @@ def perform_brand_test():
 
     return jsonify({'status': 'success', 'execution_id': execution_id, 'message': 'Test started successfully'})
 
-import signal
-
+# 评判聚合整体等待上限（秒），超时后未完成的评判使用兜底结果
+AGGREGATION_TIMEOUT_SECONDS = 120
 
 
 @wechat_bp.route('/api/mvp/deepseek-test', methods=['POST'])
@@ -1439,396 +1440,359 @@ def mvp_brand_test():
 
 
 
-def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_brand, judge_platform=None, judge_model=None, judge_api_key=None):
+def _extract_judge_input(result):
     """
-    结果聚合引擎 (CompetitorDataAggregator)
+    从原始结果中提取评判输入
+
+    Returns:
+        (brand, question, ai_response_content)；结果不是成功的 dict 时返回 None
     """
-    # Initialize old_handler to None to prevent UnboundLocalError
-    old_handler = None
-    try:
-        # Set a timeout to prevent hanging in AI platform calls
-        old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(120)  # 2-minute timeout for the entire function
-        # Only create AIJudgeClient if judge parameters are provided
-        ai_judge = None
-        if judge_platform and judge_model and judge_api_key:
-            ai_judge = AIJudgeClient(judge_platform=judge_platform, judge_model=judge_model, api_key=judge_api_key)
-        else:
-            # Check if any judge parameters are provided (even partially)
-            if judge_platform or judge_model or judge_api_key:
-                # If any parameter is provided but not all, try to fill in missing ones
-                ai_judge = AIJudgeClient(judge_platform=judge_platform, judge_model=judge_model, api_key=judge_api_key)
-            else:
-                # No judge parameters provided, skip AI judging
-                api_logger.info("No judge parameters provided, skipping AI evaluation")
+    if not isinstance(result, dict) or not result.get('success', False):
+        return None
 
-        # 导入误解分析器
-        try:
-            from .intelligence_services.misunderstanding_analyzer import MisunderstandingAnalyzer
-            misunderstanding_analyzer = MisunderstandingAnalyzer()
-            api_logger.info("Misunderstanding analyzer loaded successfully")
-        except ImportError:
-            api_logger.warning("Misunderstanding analyzer not available")
-            misunderstanding_analyzer = None
+    current_brand = result.get('brand_name', result.get('brand', 'unknown'))
 
-        scoring_engine = ScoringEngine()
-        enhanced_scoring_engine = EnhancedScoringEngine()
-        interception_analyst = InterceptionAnalyst(all_brands, main_brand)
+    # 根据不同数据格式获取响应内容
+    ai_response_content = ""
+    if 'result' in result and isinstance(result['result'], dict):
+        ai_response_content = result['result'].get('content', '')
+    elif 'response' in result:
+        ai_response_content = result['response']
+    elif 'content' in result:
+        ai_response_content = result['content']
 
-        detailed_results = []
-        brand_results_map = defaultdict(list)
-        platform_results_map = defaultdict(list)
+    # 数据清洗：如果响应内容为空，填充默认值
+    if not ai_response_content:
+        ai_response_content = "暂无分析结论"
 
-        # 检查raw_results的结构，如果是executor返回的完整结果，则提取实际的测试结果
-        actual_results = []
-        if isinstance(raw_results, dict) and 'tasks_results' in raw_results:
-            # 如果raw_results包含tasks_results键，则使用它
-            actual_results = raw_results.get('tasks_results', [])
-        elif isinstance(raw_results, dict) and 'results' in raw_results:
-            # 如果raw_results包含results键，则使用它
-            actual_results = raw_results.get('results', [])
-        elif isinstance(raw_results, list):
-            # 如果raw_results本身就是列表，则直接使用
-            actual_results = raw_results
-        else:
-            # 默认行为：假设raw_results有results键
-            actual_results = raw_results.get('results', [])
+    question = result.get('question', result.get('original_question', ''))
+    return current_brand, question, ai_response_content
 
-        for result in actual_results:
-            try:
-                # 检查result的结构，确保兼容不同的数据格式
-                if isinstance(result, dict):
-                    # 如果result已经是处理过的格式
-                    current_brand = result.get('brand_name', result.get('brand', 'unknown'))
-
-                    # 检查是否成功获取了AI响应
-                    if result.get('success', False):
-                        # 根据不同数据格式获取响应内容
-                        ai_response_content = ""
-                        if 'result' in result and isinstance(result['result'], dict):
-                            ai_response_content = result['result'].get('content', '')
-                        elif 'response' in result:
-                            ai_response_content = result['response']
-                        elif 'content' in result:
-                            ai_response_content = result['content']
-
-                        # 数据清洗：如果响应内容为空，填充默认值
-                        if not ai_response_content:
-                            ai_response_content = "暂无分析结论"
-
-                        question = result.get('question', result.get('original_question', ''))
-
-                        # Only evaluate with AI judge if it's available
-                        if ai_judge:
-                            # Add timeout protection for individual AI judge calls
+
+def _judge_and_score_result(result, ai_judge, scoring_engine, misunderstanding_analyzer):
+    """
+    评判并评分单条原始结果（流水线评判阶段）
+
+    Returns:
+        (detailed_result, brand_judge_result)；brand_judge_result 不为空时计入品牌评分，
+        结果格式无法识别时返回 None
+    """
+    brand_judge_result = None
+    try:
+        # 检查result的结构，确保兼容不同的数据格式
+        if isinstance(result, dict):
+            # 如果result已经是处理过的格式
+            current_brand = result.get('brand_name', result.get('brand', 'unknown'))
+
+            # 检查是否成功获取了AI响应
+            if result.get('success', False):
+                current_brand, question, ai_response_content = _extract_judge_input(result)
+
+                # Only evaluate with AI judge if it's available
+                if ai_judge:
+                    # 评判在流水线线程池中执行：AIJudgeClient 按流水线设置的子截止时间取 HTTP 超时；
+                    # 超时被放弃后本线程成为孤儿线程，运行至调用返回，输出被丢弃。
+                    # 已通过 evaluate_batch 预取的结果直接命中评判缓存
+                    try:
+                        judge_result = ai_judge.evaluate_response(current_brand, question, ai_response_content)
+                    except Exception as e:
+                        api_logger.error(f"AI judge evaluation failed for brand {current_brand}: {str(e)}")
+                        judge_result = None
+
+                    if judge_result:
+                        # 使用基础评分引擎计算基础分数
+                        basic_score = scoring_engine.calculate([judge_result])
+
+                        # 使用增强评分引擎计算增强分数（用于内部分析）
+                        from enhanced_scoring_engine import calculate_enhanced_scores
+                        enhanced_result = calculate_enhanced_scores([judge_result], brand_name=current_brand)
+
+                        # 【任务 A：集成自动评分引擎】
+                        # 在 AI 生成回复后立即调用 evaluator.py 计算质量指标
+                        try:
+                            from gco_validator.scoring import ResponseEvaluator
+                            evaluator = ResponseEvaluator()
+                            scoring_result = evaluator.evaluate_response(ai_response_content, question, current_brand)
+
+                            # 记录评分日志
+                            api_logger.info(f"[Evaluator] {current_brand} 评分：{scoring_result.overall_score}分 (准确度:{scoring_result.accuracy}, 完整度:{scoring_result.completeness})")
+                        except Exception as eval_error:
+                            api_logger.error(f"Evaluation failed for {current_brand}: {str(eval_error)}")
+                            # 如果评分失败，使用默认值
+                            scoring_result = None
+
+                        # 使用误解分析器进行分析
+                        misunderstanding_result = None
+                        if misunderstanding_analyzer:
                             try:
-                                # Temporarily disable the global alarm for this call
-                                signal.alarm(0)
-
-                                # Set a shorter timeout for individual evaluations
-                                old_handler_eval = signal.signal(signal.SIGALRM, timeout_handler)
-                                signal.alarm(30)  # 30-second timeout for individual evaluation
-
-                                judge_result = ai_judge.evaluate_response(current_brand, question, ai_response_content)
-
-                                # Reset the alarm to the original timeout
-                                signal.alarm(0)
-                                signal.signal(signal.SIGALRM, old_handler)
-                                signal.alarm(120)  # Resume the 2-minute timeout for the whole function
-                            except TimeoutError:
-                                # Reset the alarm to the original timeout
-                                signal.alarm(0)
-                                signal.signal(signal.SIGALRM, old_handler)
-                                signal.alarm(120)  # Resume the 2-minute timeout for the whole function
-
-                                api_logger.error(f"AI judge evaluation timed out for brand {current_brand}")
-                                judge_result = None
+                                misunderstanding_result = misunderstanding_analyzer.analyze(
+                                    brand_name=current_brand,
+                                    question_text=question,
+                                    ai_answer=ai_response_content,
+                                    judge_result=judge_result
+                                )
+                                api_logger.info(f"Misunderstanding analysis completed for {current_brand}: {misunderstanding_result.has_issue}")
                             except Exception as e:
-                                # Reset the alarm to the original timeout
-                                signal.alarm(0)
-                                signal.signal(signal.SIGALRM, old_handler)
-                                signal.alarm(120)  # Resume the 2-minute timeout for the whole function
-
-                                api_logger.error(f"AI judge evaluation failed for brand {current_brand}: {str(e)}")
-                                judge_result = None
-
-                            if judge_result:
-                                # 使用基础评分引擎计算基础分数
-                                basic_score = scoring_engine.calculate([judge_result])
-
-                                # 使用增强评分引擎计算增强分数（用于内部分析）
-                                enhanced_result = calculate_enhanced_scores([judge_result], brand_name=current_brand)
-
-                                # 【任务 A：集成自动评分引擎】
-                                # 在 AI 生成回复后立即调用 evaluator.py 计算质量指标
-                                try:
-                                    from gco_validator.scoring import ResponseEvaluator
-                                    evaluator = ResponseEvaluator()
-                                    scoring_result = evaluator.evaluate_response(ai_response_content, question, current_brand)
-
-                                    # 记录评分日志
-                                    api_logger.info(f"[Evaluator] {current_brand} 评分：{scoring_result.overall_score}分 (准确度:{scoring_result.accuracy}, 完整度:{scoring_result.completeness})")
-                                except Exception as eval_error:
-                                    api_logger.error(f"Evaluation failed for {current_brand}: {str(eval_error)}")
-                                    # 如果评分失败，使用默认值
-                                    scoring_result = None
-
-                                # 使用误解分析器进行分析
+                                api_logger.error(f"Error in misunderstanding analysis: {e}")
+                                # 如果分析失败，创建默认结果
                                 misunderstanding_result = None
-                                if misunderstanding_analyzer:
-                                    try:
-                                        misunderstanding_result = misunderstanding_analyzer.analyze(
-                                            brand_name=current_brand,
-                                            question_text=question,
-                                            ai_answer=ai_response_content,
-                                            judge_result=judge_result
-                                        )
-                                        api_logger.info(f"Misunderstanding analysis completed for {current_brand}: {misunderstanding_result.has_issue}")
-                                    except Exception as e:
-                                        api_logger.error(f"Error in misunderstanding analysis: {e}")
-                                        # 如果分析失败，创建默认结果
-                                        misunderstanding_result = None
-
-                                # 数据清洗：确保分数字段存在且为数字
-                                authority_score = getattr(judge_result, 'accuracy_score', 0)
-                                if not isinstance(authority_score, (int, float)):
-                                    authority_score = 0
-
-                                visibility_score = getattr(judge_result, 'completeness_score', 0)
-                                if not isinstance(visibility_score, (int, float)):
-                                    visibility_score = 0
-
-                                sentiment_score = getattr(judge_result, 'sentiment_score', 0)
-                                if not isinstance(sentiment_score, (int, float)):
-                                    sentiment_score = 0
-
-                                purity_score = getattr(judge_result, 'purity_score', 0)
-                                if not isinstance(purity_score, (int, float)):
-                                    purity_score = 0
-
-                                consistency_score = getattr(judge_result, 'consistency_score', 0)
-                                if not isinstance(consistency_score, (int, float)):
-                                    consistency_score = 0
-
-                                score = getattr(basic_score, 'geo_score', 0)
-                                if not isinstance(score, (int, float)):
-                                    score = 0
-
-                                detailed_result = {
-                                    'success': True,
-                                    'brand': current_brand,
-                                    'aiModel': result.get('model', result.get('ai_model', 'unknown')),
-                                    'question': question,
-                                    'response': ai_response_content,
-                                    'authority_score': authority_score,
-                                    'visibility_score': visibility_score,
-                                    'sentiment_score': sentiment_score,
-                                    'purity_score': purity_score,
-                                    'consistency_score': consistency_score,
-                                    'score': score,  # 保持原有分数以确保兼容性
-                                    # 【任务 A：数据入库】将 ScoringResult 结构化存入对应 TestCase 的结果对象中
-                                    'quality_metrics': {
-                                        'accuracy_score': scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0,
-                                        'completeness_score': scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0,
-                                        'relevance_score': scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 0,
-                                        'coherence_score': scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0,
-                                        'overall_quality_score': scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0,
-                                        'detailed_feedback': scoring_result.detailed_feedback if scoring_result else {}
-                                    } if scoring_result else None,
-                                    'enhanced_scores': {
-                                        'geo_score': getattr(enhanced_result, 'geo_score', 0),
-                                        'cognitive_confidence': getattr(enhanced_result, 'cognitive_confidence', 0.0),
-                                        'bias_indicators': getattr(enhanced_result, 'bias_indicators', []),
-                                        'detailed_analysis': getattr(enhanced_result, 'detailed_analysis', {}),
-                                        'recommendations': getattr(enhanced_result, 'recommendations', [])
-                                    },
-                                    'misunderstanding_analysis': {
-                                        'has_issue': getattr(misunderstanding_result, 'has_issue', False),
-                                        'issue_types': getattr(misunderstanding_result, 'issue_types', []),
-                                        'risk_level': getattr(misunderstanding_result, 'risk_level', 'low'),
-                                        'issue_summary': getattr(misunderstanding_result, 'issue_summary', 'Analysis not available'),
-                                        'improvement_hint': getattr(misunderstanding_result, 'improvement_hint', 'No suggestions')
-                                    } if misunderstanding_result else None,
-                                    'category': '国内' if result.get('model', result.get('ai_model', '')) in ['通义千问', '文心一言', '豆包', 'Kimi', '元宝', 'DeepSeek', '讯飞星火'] else '海外'
-                                }
-                                brand_results_map[current_brand].append(judge_result)
-                                platform_results_map[detailed_result['aiModel']].append(detailed_result)
-                            else:
-                                detailed_result = {
-                                    'success': False,
-                                    'brand': current_brand,
-                                    'aiModel': result.get('model', result.get('ai_model', 'unknown')),
-                                    'question': question,
-                                    'response': "Evaluation Failed by AI Judge",
-                                    'score': 0,
-                                    'error_type': 'EvaluationFailed'
-                                }
-                        else:
-                            # Skip AI evaluation, use basic result structure
-                            # 【任务 A：集成自动评分引擎】即使没有AI judge，也要进行基本评分
-                            try:
-                                from gco_validator.scoring import ResponseEvaluator
-                                evaluator = ResponseEvaluator()
-                                scoring_result = evaluator.evaluate_response(ai_response_content, question, current_brand)
-
-                                # 记录评分日志
-                                api_logger.info(f"[Evaluator] {current_brand} 评分：{scoring_result.overall_score}分 (准确度:{scoring_result.accuracy}, 完整度:{scoring_result.completeness})")
-                            except Exception as eval_error:
-                                api_logger.error(f"Evaluation failed for {current_brand}: {str(eval_error)}")
-                                # 如果评分失败，使用默认值
-                                scoring_result = None
-
-                            # P0-2 修复：即使没有 AI judge，也要使用 ResponseEvaluator 的评分结果
-                            authority_score = scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0
-                            visibility_score = scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0
-                            # 将 relevance 映射为 sentiment (好感度)
-                            sentiment_score = scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 50
-                            # 使用 coherence 作为 purity 和 consistency 的参考
-                            purity_score = scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0
-                            consistency_score = scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0
-                            score = scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0
-
-                            detailed_result = {
-                                'success': True,
-                                'brand': current_brand,
-                                'aiModel': result.get('model', result.get('ai_model', 'unknown')),
-                                'question': question,
-                                'response': ai_response_content,
-                                'authority_score': authority_score,  # P0-2 修复：使用 evaluator 的评分
-                                'visibility_score': visibility_score,
-                                'sentiment_score': sentiment_score,
-                                'purity_score': purity_score,
-                                'consistency_score': consistency_score,
-                                'score': score,  # P0-2 修复：使用 evaluator 的总分
-                                # 【任务 A：数据入库】将 ScoringResult 结构化存入对应 TestCase 的结果对象中
-                                'quality_metrics': {
-                                    'accuracy_score': scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0,
-                                    'completeness_score': scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0,
-                                    'relevance_score': scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 0,
-                                    'coherence_score': scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0,
-                                    'overall_quality_score': scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0,
-                                    'detailed_feedback': scoring_result.detailed_feedback if scoring_result else {}
-                                } if scoring_result else None,
-                                'enhanced_scores': {
-                                    'geo_score': score,
-                                    'cognitive_confidence': 0.5,
-                                    'bias_indicators': [],
-                                    'detailed_analysis': {},
-                                    'recommendations': []
-                                },
-                                'misunderstanding_analysis': None,  # No analysis when AI judge is not available
-                                'category': '国内' if result.get('model', result.get('ai_model', '')) in ['通义千问', '文心一言', '豆包', 'Kimi', '元宝', 'DeepSeek', '讯飞星火'] else '海外'
-                            }
-                            # Add a basic judge result with scores from evaluator for scoring calculations
-                            basic_judge_result = JudgeResult(
-                                accuracy_score=authority_score,
-                                completeness_score=visibility_score,
-                                sentiment_score=sentiment_score,
-                                purity_score=purity_score,
-                                consistency_score=consistency_score,
-                                judgement="Auto-evaluated by ResponseEvaluator",
-                                confidence_level=ConfidenceLevel.MEDIUM
-                            )
-                            brand_results_map[current_brand].append(basic_judge_result)
-                            platform_results_map[detailed_result['aiModel']].append(detailed_result)
+
+                        # 数据清洗：确保分数字段存在且为数字
+                        authority_score = getattr(judge_result, 'accuracy_score', 0)
+                        if not isinstance(authority_score, (int, float)):
+                            authority_score = 0
+
+                        visibility_score = getattr(judge_result, 'completeness_score', 0)
+                        if not isinstance(visibility_score, (int, float)):
+                            visibility_score = 0
+
+                        sentiment_score = getattr(judge_result, 'sentiment_score', 0)
+                        if not isinstance(sentiment_score, (int, float)):
+                            sentiment_score = 0
+
+                        purity_score = getattr(judge_result, 'purity_score', 0)
+                        if not isinstance(purity_score, (int, float)):
+                            purity_score = 0
+
+                        consistency_score = getattr(judge_result, 'consistency_score', 0)
+                        if not isinstance(consistency_score, (int, float)):
+                            consistency_score = 0
+
+                        score = getattr(basic_score, 'geo_score', 0)
+                        if not isinstance(score, (int, float)):
+                            score = 0
+
+                        detailed_result = {
+                            'success': True,
+                            'brand': current_brand,
+                            'aiModel': result.get('model', result.get('ai_model', 'unknown')),
+                            'question': question,
+                            'response': ai_response_content,
+                            'authority_score': authority_score,
+                            'visibility_score': visibility_score,
+                            'sentiment_score': sentiment_score,
+                            'purity_score': purity_score,
+                            'consistency_score': consistency_score,
+                            'score': score,  # 保持原有分数以确保兼容性
+                            # 【任务 A：数据入库】将 ScoringResult 结构化存入对应 TestCase 的结果对象中
+                            'quality_metrics': {
+                                'accuracy_score': scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0,
+                                'completeness_score': scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0,
+                                'relevance_score': scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 0,
+                                'coherence_score': scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0,
+                                'overall_quality_score': scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0,
+                                'detailed_feedback': scoring_result.detailed_feedback if scoring_result else {}
+                            } if scoring_result else None,
+                            'enhanced_scores': {
+                                'geo_score': getattr(enhanced_result, 'geo_score', 0),
+                                'cognitive_confidence': getattr(enhanced_result, 'cognitive_confidence', 0.0),
+                                'bias_indicators': getattr(enhanced_result, 'bias_indicators', []),
+                                'detailed_analysis': getattr(enhanced_result, 'detailed_analysis', {}),
+                                'recommendations': getattr(enhanced_result, 'recommendations', [])
+                            },
+                            'misunderstanding_analysis': {
+                                'has_issue': getattr(misunderstanding_result, 'has_issue', False),
+                                'issue_types': getattr(misunderstanding_result, 'issue_types', []),
+                                'risk_level': getattr(misunderstanding_result, 'risk_level', 'low'),
+                                'issue_summary': getattr(misunderstanding_result, 'issue_summary', 'Analysis not available'),
+                                'improvement_hint': getattr(misunderstanding_result, 'improvement_hint', 'No suggestions')
+                            } if misunderstanding_result else None,
+                            'category': '国内' if result.get('model', result.get('ai_model', '')) in ['通义千问', '文心一言', '豆包', 'Kimi', '元宝', 'DeepSeek', '讯飞星火'] else '海外'
+                        }
+                        brand_judge_result = judge_result
                     else:
-                        # 处理失败的结果
                         detailed_result = {
                             'success': False,
                             'brand': current_brand,
                             'aiModel': result.get('model', result.get('ai_model', 'unknown')),
-                            'question': result.get('question', result.get('original_question', '')),
-                            'response': f"Error: {result.get('error', result.get('error_message', 'Unknown error'))}",
+                            'question': question,
+                            'response': "Evaluation Failed by AI Judge",
                             'score': 0,
-                            'error_message': result.get('error', result.get('error_message', 'Unknown error')),
-                            'error_type': result.get('error_type', 'GeneralError')
+                            'error_type': 'EvaluationFailed'
                         }
-
-                    detailed_results.append(detailed_result)
                 else:
-                    # 如果result不是字典格式，跳过
-                    api_logger.warning(f"Unexpected result format: {result}")
-                    continue
-            except (TypeError, KeyError) as e:
-                # 捕获TypeError或KeyError，确保即使部分模型调用失败，剩余模型的数据也能正常聚合
-                api_logger.error(f"Error processing result due to TypeError/KeyError: {e}, result: {result}")
-                # 创建一个默认的成功结果，确保任务能继续推进
-                default_result = {
-                    'success': True,
-                    'brand': result.get('brand_name', result.get('brand', 'unknown')) if isinstance(result, dict) else 'unknown',
-                    'aiModel': result.get('model', result.get('ai_model', 'unknown')) if isinstance(result, dict) else 'unknown',
-                    'question': result.get('question', result.get('original_question', '')) if isinstance(result, dict) else 'unknown',
-                    'response': "暂无分析结论",
-                    'score': 0,
-                    'error_message': f"Processing error: {str(e)}",
-                    'error_type': 'ProcessingError'
-                }
-                detailed_results.append(default_result)
-                continue  # 继续处理下一个结果
-            except Exception as e:
-                # 捕获其他类型的异常
-                api_logger.error(f"Unexpected error processing result: {e}, result: {result}")
-                # 创建一个默认的成功结果，确保任务能继续推进
-                default_result = {
-                    'success': True,
-                    'brand': result.get('brand_name', result.get('brand', 'unknown')) if isinstance(result, dict) else 'unknown',
-                    'aiModel': result.get('model', result.get('ai_model', 'unknown')) if isinstance(result, dict) else 'unknown',
-                    'question': result.get('question', result.get('original_question', '')) if isinstance(result, dict) else 'unknown',
-                    'response': "暂无分析结论",
-                    'score': 0,
-                    'error_message': f"Unexpected error: {str(e)}",
-                    'error_type': 'UnexpectedError'
-                }
-                detailed_results.append(default_result)
-                continue  # 继续处理下一个结果
-
-        brand_scores = {}
-        for brand, judge_results in brand_results_map.items():
-            if judge_results and len(judge_results) > 0:  # 确保列表非空
-                try:
-                    # 使用基础评分引擎计算基础分数
-                    basic_score = scoring_engine.calculate(judge_results)
-
-                    # 使用增强评分引擎计算增强分数
-                    enhanced_result = calculate_enhanced_scores(judge_results, brand_name=brand)
-
-                    brand_scores[brand] = {
-                        'overallScore': basic_score.geo_score,  # 保持原有分数以确保兼容性
-                        'overallAuthority': basic_score.authority_score,
-                        'overallVisibility': basic_score.visibility_score,
-                        'overallSentiment': basic_score.sentiment_score,
-                        'overallPurity': basic_score.purity_score,
-                        'overallConsistency': basic_score.consistency_score,
-                        'overallGrade': basic_score.grade,
-                        'overallSummary': basic_score.summary,
-                        # 增加增强版数据
-                        'enhanced_data': {
-                            'cognitive_confidence': enhanced_result.cognitive_confidence,
-                            'bias_indicators': enhanced_result.bias_indicators,
-                            'detailed_analysis': enhanced_result.detailed_analysis,
-                            'recommendations': enhanced_result.recommendations
-                        }
-                    }
-                except Exception as e:
-                    # 如果计算失败，使用默认值
-                    api_logger.error(f"Scoring calculation failed for brand {brand}: {str(e)}")
-                    brand_scores[brand] = {
-                        'overallScore': 0,
-                        'overallGrade': 'D',
-                        'overallAuthority': 0,
-                        'overallVisibility': 0,
-                        'overallSentiment': 0,
-                        'overallPurity': 0,
-                        'overallConsistency': 0,
-                        'overallSummary': 'Calculation error occurred',
-                        'enhanced_data': {
-                            'cognitive_confidence': 0.0,
+                    # Skip AI evaluation, use basic result structure
+                    # 【任务 A：集成自动评分引擎】即使没有AI judge，也要进行基本评分
+                    try:
+                        from gco_validator.scoring import ResponseEvaluator
+                        evaluator = ResponseEvaluator()
+                        scoring_result = evaluator.evaluate_response(ai_response_content, question, current_brand)
+
+                        # 记录评分日志
+                        api_logger.info(f"[Evaluator] {current_brand} 评分：{scoring_result.overall_score}分 (准确度:{scoring_result.accuracy}, 完整度:{scoring_result.completeness})")
+                    except Exception as eval_error:
+                        api_logger.error(f"Evaluation failed for {current_brand}: {str(eval_error)}")
+                        # 如果评分失败，使用默认值
+                        scoring_result = None
+
+                    # P0-2 修复：即使没有 AI judge，也要使用 ResponseEvaluator 的评分结果
+                    authority_score = scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0
+                    visibility_score = scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0
+                    # 将 relevance 映射为 sentiment (好感度)
+                    sentiment_score = scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 50
+                    # 使用 coherence 作为 purity 和 consistency 的参考
+                    purity_score = scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0
+                    consistency_score = scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0
+                    score = scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0
+
+                    detailed_result = {
+                        'success': True,
+                        'brand': current_brand,
+                        'aiModel': result.get('model', result.get('ai_model', 'unknown')),
+                        'question': question,
+                        'response': ai_response_content,
+                        'authority_score': authority_score,  # P0-2 修复：使用 evaluator 的评分
+                        'visibility_score': visibility_score,
+                        'sentiment_score': sentiment_score,
+                        'purity_score': purity_score,
+                        'consistency_score': consistency_score,
+                        'score': score,  # P0-2 修复：使用 evaluator 的总分
+                        # 【任务 A：数据入库】将 ScoringResult 结构化存入对应 TestCase 的结果对象中
+                        'quality_metrics': {
+                            'accuracy_score': scoring_result.accuracy if scoring_result and isinstance(scoring_result.accuracy, (int, float)) else 0,
+                            'completeness_score': scoring_result.completeness if scoring_result and isinstance(scoring_result.completeness, (int, float)) else 0,
+                            'relevance_score': scoring_result.relevance if scoring_result and isinstance(scoring_result.relevance, (int, float)) else 0,
+                            'coherence_score': scoring_result.coherence if scoring_result and isinstance(scoring_result.coherence, (int, float)) else 0,
+                            'overall_quality_score': scoring_result.overall_score if scoring_result and isinstance(scoring_result.overall_score, (int, float)) else 0,
+                            'detailed_feedback': scoring_result.detailed_feedback if scoring_result else {}
+                        } if scoring_result else None,
+                        'enhanced_scores': {
+                            'geo_score': score,
+                            'cognitive_confidence': 0.5,
                             'bias_indicators': [],
                             'detailed_analysis': {},
                             'recommendations': []
-                        }
+                        },
+                        'misunderstanding_analysis': None,  # No analysis when AI judge is not available
+                        'category': '国内' if result.get('model', result.get('ai_model', '')) in ['通义千问', '文心一言', '豆包', 'Kimi', '元宝', 'DeepSeek', '讯飞星火'] else '海外'
                     }
+                    # Add a basic judge result with scores from evaluator for scoring calculations
+                    basic_judge_result = JudgeResult(
+                        accuracy_score=authority_score,
+                        completeness_score=visibility_score,
+                        sentiment_score=sentiment_score,
+                        purity_score=purity_score,
+                        consistency_score=consistency_score,
+                        judgement="Auto-evaluated by ResponseEvaluator",
+                        confidence_level=ConfidenceLevel.MEDIUM
+                    )
+                    brand_judge_result = basic_judge_result
             else:
+                # 处理失败的结果
+                detailed_result = {
+                    'success': False,
+                    'brand': current_brand,
+                    'aiModel': result.get('model', result.get('ai_model', 'unknown')),
+                    'question': result.get('question', result.get('original_question', '')),
+                    'response': f"Error: {result.get('error', result.get('error_message', 'Unknown error'))}",
+                    'score': 0,
+                    'error_message': result.get('error', result.get('error_message', 'Unknown error')),
+                    'error_type': result.get('error_type', 'GeneralError')
+                }
+
+            return detailed_result, brand_judge_result
+        else:
+            # 如果result不是字典格式，跳过
+            api_logger.warning(f"Unexpected result format: {result}")
+            return None
+    except (TypeError, KeyError) as e:
+        # 捕获TypeError或KeyError，确保即使部分模型调用失败，剩余模型的数据也能正常聚合
+        api_logger.error(f"Error processing result due to TypeError/KeyError: {e}, result: {result}")
+        # 创建一个默认的成功结果，确保任务能继续推进
+        default_result = {
+            'success': True,
+            'brand': result.get('brand_name', result.get('brand', 'unknown')) if isinstance(result, dict) else 'unknown',
+            'aiModel': result.get('model', result.get('ai_model', 'unknown')) if isinstance(result, dict) else 'unknown',
+            'question': result.get('question', result.get('original_question', '')) if isinstance(result, dict) else 'unknown',
+            'response': "暂无分析结论",
+            'score': 0,
+            'error_message': f"Processing error: {str(e)}",
+            'error_type': 'ProcessingError'
+        }
+        return default_result, None
+    except Exception as e:
+        # 捕获其他类型的异常
+        api_logger.error(f"Unexpected error processing result: {e}, result: {result}")
+        # 创建一个默认的成功结果，确保任务能继续推进
+        default_result = {
+            'success': True,
+            'brand': result.get('brand_name', result.get('brand', 'unknown')) if isinstance(result, dict) else 'unknown',
+            'aiModel': result.get('model', result.get('ai_model', 'unknown')) if isinstance(result, dict) else 'unknown',
+            'question': result.get('question', result.get('original_question', '')) if isinstance(result, dict) else 'unknown',
+            'response': "暂无分析结论",
+            'score': 0,
+            'error_message': f"Unexpected error: {str(e)}",
+            'error_type': 'UnexpectedError'
+        }
+        return default_result, None
+
+
+def _build_aggregate_result(entries, all_brands, main_brand, scoring_engine, interception_analyst):
+    """
+    汇总单条评估输出为最终报告（流水线汇总阶段）
+
+    Args:
+        entries: 按结果到达顺序排列的 _judge_and_score_result 输出
+    """
+    detailed_results = []
+    brand_results_map = defaultdict(list)
+    platform_results_map = defaultdict(list)
+
+    # 语义偏移、优化建议与负面信源由后续情报阶段生成，聚合阶段显式置空
+    semantic_drift_data = None
+    semantic_contrast_data = None
+    recommendation_data = None
+    negative_sources = None
+
+    for entry in entries:
+        if entry is None:
+            continue
+        detailed_result, brand_judge_result = entry
+        detailed_results.append(detailed_result)
+        if brand_judge_result is not None:
+            brand_results_map[detailed_result['brand']].append(brand_judge_result)
+            platform_results_map[detailed_result['aiModel']].append(detailed_result)
+
+    # 所有品牌的增强评分一次向量化计算；失败时逐品牌计算
+    # 增强评分引擎依赖 numpy/scipy，按需导入以免拖慢应用启动
+    from enhanced_scoring_engine import calculate_enhanced_scores, calculate_enhanced_scores_batch
+    try:
+        enhanced_results = calculate_enhanced_scores_batch(brand_results_map)
+    except Exception as e:
+        api_logger.error(f"Batch enhanced scoring failed, falling back to per-brand: {str(e)}")
+        enhanced_results = {}
+
+    brand_scores = {}
+    for brand, judge_results in brand_results_map.items():
+        if judge_results and len(judge_results) > 0:  # 确保列表非空
+            try:
+                # 使用基础评分引擎计算基础分数
+                basic_score = scoring_engine.calculate(judge_results)
+
+                # 使用增强评分引擎计算增强分数
+                enhanced_result = enhanced_results.get(brand) or \
+                    calculate_enhanced_scores(judge_results, brand_name=brand)
+
+                brand_scores[brand] = {
+                    'overallScore': basic_score.geo_score,  # 保持原有分数以确保兼容性
+                    'overallAuthority': basic_score.authority_score,
+                    'overallVisibility': basic_score.visibility_score,
+                    'overallSentiment': basic_score.sentiment_score,
+                    'overallPurity': basic_score.purity_score,
+                    'overallConsistency': basic_score.consistency_score,
+                    'overallGrade': basic_score.grade,
+                    'overallSummary': basic_score.summary,
+                    # 增加增强版数据
+                    'enhanced_data': {
+                        'cognitive_confidence': enhanced_result.cognitive_confidence,
+                        'bias_indicators': enhanced_result.bias_indicators,
+                        'detailed_analysis': enhanced_result.detailed_analysis,
+                        'recommendations': enhanced_result.recommendations
+                    }
+                }
+            except Exception as e:
+                # 如果计算失败，使用默认值
+                api_logger.error(f"Scoring calculation failed for brand {brand}: {str(e)}")
                 brand_scores[brand] = {
                     'overallScore': 0,
                     'overallGrade': 'D',
@@ -1837,7 +1801,7 @@ def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_br
                     'overallSentiment': 0,
                     'overallPurity': 0,
                     'overallConsistency': 0,
-                    'overallSummary': 'No data available',
+                    'overallSummary': 'Calculation error occurred',
                     'enhanced_data': {
                         'cognitive_confidence': 0.0,
                         'bias_indicators': [],
@@ -1845,23 +1809,8 @@ def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_br
                         'recommendations': []
                     }
                 }
-
-        first_mention_by_platform = {platform: interception_analyst.calculate_first_mention_rate(results) for platform, results in platform_results_map.items()}
-
-        main_brand_source = generate_mock_source_intelligence_map(main_brand)
-        competitor_sources = {brand: generate_mock_source_intelligence_map(brand) for brand in all_brands if brand != main_brand}
-        interception_risks = interception_analyst.analyze_interception_risk(main_brand_source, competitor_sources)
-
-        competitive_analysis = {
-            'brandScores': brand_scores,
-            'firstMentionByPlatform': first_mention_by_platform,
-            'interceptionRisks': interception_risks
-        }
-
-        # 【关键修复】构建 final_result 对象
-        final_result = {
-            'detailed_results': detailed_results,
-            'main_brand': brand_scores.get(main_brand, {
+        else:
+            brand_scores[brand] = {
                 'overallScore': 0,
                 'overallGrade': 'D',
                 'overallAuthority': 0,
@@ -1876,119 +1825,172 @@ def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_br
                     'detailed_analysis': {},
                     'recommendations': []
                 }
-            }),
-            'competitiveAnalysis': competitive_analysis,
-            'summary': {
-                'total_tests': len(detailed_results),
-                'brands_tested': len(all_brands)
-            },
-            # 【新增】传递语义偏移和优化建议数据
-            'semantic_drift_data': semantic_drift_data if 'semantic_drift_data' in dir() else None,
-            'semantic_contrast_data': semantic_contrast_data if 'semantic_contrast_data' in dir() else None,
-            'recommendation_data': recommendation_data if 'recommendation_data' in dir() else None,
-            'negative_sources': negative_sources if 'negative_sources' in dir() else None
-        }
+            }
 
-        # Cancel the alarm before returning
-        signal.alarm(0)
-        if old_handler:
-            signal.signal(signal.SIGALRM, old_handler)  # Restore the old handler
-        return final_result
-    except TimeoutError as te:
-        # Handle timeout specifically
-        api_logger.error(f"Timeout in process_and_aggregate_results_with_ai_judge: {str(te)}")
-
-        # Cancel the alarm before returning
-        signal.alarm(0)
-        if old_handler:
-            signal.signal(signal.SIGALRM, old_handler)  # Restore the old handler
-
-        # Return default results to prevent deadlock
-        default_results = []
-        for brand in all_brands:
-            default_results.append({
-                'success': True,
-                'brand': brand,
-                'aiModel': 'default',
-                'question': 'default question',
-                'response': 'AI评估服务超时，使用默认数据',
-                'authority_score': 0,
-                'visibility_score': 0,
-                'sentiment_score': 0,
-                'purity_score': 0,
-                'consistency_score': 0,
-                'score': 0,
-                'quality_metrics': {
-                    'accuracy_score': 0,
-                    'completeness_score': 0,
-                    'relevance_score': 0,
-                    'coherence_score': 0,
-                    'overall_quality_score': 0,
-                    'detailed_feedback': {}
-                },
-                'enhanced_scores': {
-                    'geo_score': 0,
-                    'cognitive_confidence': 0.0,
-                    'bias_indicators': [],
-                    'detailed_analysis': {},
-                    'recommendations': []
-                },
-                'misunderstanding_analysis': None,
-                'category': 'default'
-            })
+    first_mention_by_platform = {platform: interception_analyst.calculate_first_mention_rate(results) for platform, results in platform_results_map.items()}
 
-        default_brand_scores = {}
-        for brand in all_brands:
-            default_brand_scores[brand] = {
-                'overallScore': 0,
-                'overallGrade': 'D',
-                'overallAuthority': 0,
-                'overallVisibility': 0,
-                'overallSentiment': 0,
-                'overallPurity': 0,
-                'overallConsistency': 0,
-                'overallSummary': 'AI评估服务超时，使用默认数据',
-                'enhanced_data': {
-                    'cognitive_confidence': 0.0,
-                    'bias_indicators': [],
-                    'detailed_analysis': {},
-                    'recommendations': []
-                }
+    main_brand_source = generate_mock_source_intelligence_map(main_brand)
+    competitor_sources = {brand: generate_mock_source_intelligence_map(brand) for brand in all_brands if brand != main_brand}
+    interception_risks = interception_analyst.analyze_interception_risk(main_brand_source, competitor_sources)
+
+    competitive_analysis = {
+        'brandScores': brand_scores,
+        'firstMentionByPlatform': first_mention_by_platform,
+        'interceptionRisks': interception_risks
+    }
+
+    # 【关键修复】构建 final_result 对象
+    final_result = {
+        'detailed_results': detailed_results,
+        'main_brand': brand_scores.get(main_brand, {
+            'overallScore': 0,
+            'overallGrade': 'D',
+            'overallAuthority': 0,
+            'overallVisibility': 0,
+            'overallSentiment': 0,
+            'overallPurity': 0,
+            'overallConsistency': 0,
+            'overallSummary': 'No data available',
+            'enhanced_data': {
+                'cognitive_confidence': 0.0,
+                'bias_indicators': [],
+                'detailed_analysis': {},
+                'recommendations': []
             }
+        }),
+        'competitiveAnalysis': competitive_analysis,
+        'summary': {
+            'total_tests': len(detailed_results),
+            'brands_tested': len(all_brands)
+        },
+        # 【新增】传递语义偏移和优化建议数据
+        'semantic_drift_data': semantic_drift_data,
+        'semantic_contrast_data': semantic_contrast_data,
+        'recommendation_data': recommendation_data,
+        'negative_sources': negative_sources
+    }
 
-        # Prepare the timeout result
-        timeout_result = {
-            'detailed_results': default_results,
-            'main_brand': default_brand_scores.get(main_brand, {
-                'overallScore': 0,
-                'overallGrade': 'D',
-                'enhanced_data': {
-                    'cognitive_confidence': 0.0,
-                    'bias_indicators': [],
-                    'detailed_analysis': {},
-                    'recommendations': []
-                }
-            }),
-            'competitiveAnalysis': {
-                'brandScores': default_brand_scores,
-                'firstMentionByPlatform': {},
-                'interceptionRisks': {}
-            },
-            'summary': {'total_tests': 0, 'brands_tested': len(all_brands)}
-        }
+    return final_result
+
+
+def _judge_fallback_result(result, reason):
+    """评判超时或异常时的兜底输出，格式与评判失败时一致"""
+    if not isinstance(result, dict):
+        return None
+    return {
+        'success': False,
+        'brand': result.get('brand_name', result.get('brand', 'unknown')),
+        'aiModel': result.get('model', result.get('ai_model', 'unknown')),
+        'question': result.get('question', result.get('original_question', '')),
+        'response': "Evaluation Failed by AI Judge",
+        'score': 0,
+        'error_type': 'EvaluationTimeout' if reason.endswith('timeout') else 'EvaluationFailed'
+    }, None
+
+
+def _create_ai_judge(judge_platform=None, judge_model=None, judge_api_key=None):
+    """Only create AIJudgeClient if judge parameters are provided"""
+    if judge_platform or judge_model or judge_api_key:
+        # If any parameter is provided but not all, AIJudgeClient fills in missing ones
+        return AIJudgeClient(judge_platform=judge_platform, judge_model=judge_model, api_key=judge_api_key)
+    # No judge parameters provided, skip AI judging
+    api_logger.info("No judge parameters provided, skipping AI evaluation")
+    return None
+
+
+def create_judge_pipeline(all_brands, main_brand, judge_platform=None, judge_model=None, judge_api_key=None,
+                          execution_id=None, max_parallel_judges=None, send_sse=False, ai_judge=None,
+                          deadline=None):
+    """
+    创建评判聚合流水线
+
+    结果到达时调用 pipeline.submit(result)，全部结果提交后调用 pipeline.finalize()
+    获取与 process_and_aggregate_results_with_ai_judge 相同格式的最终结果。
+    已创建的 ai_judge 可直接传入（如先用 evaluate_batch 预取评判结果）。
+    deadline 为整体截止时间，各评判调用按剩余时间分配超时，到期后返回部分结果。
+    """
+    if ai_judge is None:
+        ai_judge = _create_ai_judge(judge_platform, judge_model, judge_api_key)
+
+    # 导入误解分析器
+    try:
+        from .intelligence_services.misunderstanding_analyzer import MisunderstandingAnalyzer
+        misunderstanding_analyzer = MisunderstandingAnalyzer()
+        api_logger.info("Misunderstanding analyzer loaded successfully")
+    except ImportError:
+        api_logger.warning("Misunderstanding analyzer not available")
+        misunderstanding_analyzer = None
+
+    scoring_engine = ScoringEngine()
+    interception_analyst = InterceptionAnalyst(all_brands, main_brand)
+
+    streaming_aggregator = None
+    if execution_id:
+        streaming_aggregator = StreamingResultAggregator(execution_id)
+
+    return PipelinedResultAggregator(
+        evaluate_fn=lambda result: _judge_and_score_result(
+            result, ai_judge, scoring_engine, misunderstanding_analyzer
+        ),
+        finalize_fn=lambda entries: _build_aggregate_result(
+            entries, all_brands, main_brand, scoring_engine, interception_analyst
+        ),
+        fallback_fn=_judge_fallback_result,
+        max_parallel_judges=max_parallel_judges or DEFAULT_MAX_PARALLEL_JUDGES,
+        streaming_aggregator=streaming_aggregator,
+        send_sse=send_sse,
+        name=f'judge-pipeline-{execution_id}' if execution_id else 'judge-pipeline',
+        deadline=deadline
+    )
+
+
+def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_brand, judge_platform=None, judge_model=None, judge_api_key=None):
+    """
+    结果聚合引擎 (CompetitorDataAggregator)
+
+    对已全部就绪的原始结果执行评判与聚合；评判在有界线程池中并行进行。
+    需要边执行边聚合时使用 create_judge_pipeline。
+
+    整体耗时受 AGGREGATION_TIMEOUT_SECONDS 截止时间约束（线程安全，可在任意工作线程中调用），
+    到期后未完成的评判使用兜底结果。
+    """
+    try:
+        # 检查raw_results的结构，如果是executor返回的完整结果，则提取实际的测试结果
+        actual_results = []
+        if isinstance(raw_results, dict) and 'tasks_results' in raw_results:
+            # 如果raw_results包含tasks_results键，则使用它
+            actual_results = raw_results.get('tasks_results', [])
+        elif isinstance(raw_results, dict) and 'results' in raw_results:
+            # 如果raw_results包含results键，则使用它
+            actual_results = raw_results.get('results', [])
+        elif isinstance(raw_results, list):
+            # 如果raw_results本身就是列表，则直接使用
+            actual_results = raw_results
+        else:
+            # 默认行为：假设raw_results有results键
+            actual_results = raw_results.get('results', [])
 
-        # Print JSON sample for verification
-        import json
-        print("=== BACKEND FINAL JSON SAMPLE (TIMEOUT) ===")
-        print(json.dumps(timeout_result, indent=2, ensure_ascii=False))
-        print("===============================")
+        deadline = Deadline.after(AGGREGATION_TIMEOUT_SECONDS)
+        ai_judge = _create_ai_judge(judge_platform, judge_model, judge_api_key)
 
-        return timeout_result
+        # 结果已全部就绪：先批量评判（多条回答合并为一次裁判调用并写入评判缓存），
+        # 流水线中逐条评判时直接命中缓存，批量中缺失的项仍按单条评判兜底
+        if ai_judge:
+            judge_inputs = [item for item in map(_extract_judge_input, actual_results) if item]
+            if judge_inputs:
+                try:
+                    with deadline_scope(deadline):
+                        ai_judge.evaluate_batch(judge_inputs)
+                except Exception as e:
+                    api_logger.warning(f"AI judge batch prefetch failed, falling back to per-result evaluation: {e}")
+
+        pipeline = create_judge_pipeline(all_brands, main_brand, judge_platform, judge_model, judge_api_key,
+                                         ai_judge=ai_judge, deadline=deadline)
+        for result in actual_results:
+            pipeline.submit(result)
+
+        return pipeline.finalize()
     except Exception as e:
-        # Cancel the alarm before returning
-        signal.alarm(0)
-        if old_handler:
-            signal.signal(signal.SIGALRM, old_handler)  # Restore the old handler
 
         # 如果整个处理过程失败，返回默认的评估数据对象
         api_logger.error(f"Critical failure in process_and_aggregate_results_with_ai_judge: {str(e)}")
@@ -2067,12 +2069,6 @@ def process_and_aggregate_results_with_ai_judge(raw_results, all_brands, main_br
             'summary': {'total_tests': 0, 'brands_tested': len(all_brands)}
         }
 
-        # Print JSON sample for verification
-        import json
-        print("=== BACKEND FINAL JSON SAMPLE (DEFAULT) ===")
-        print(json.dumps(default_result, indent=2, ensure_ascii=False))
-        print("===============================")
-
         return default_result
 
 
@@ -2626,6 +2622,9 @@ def submit_brand_test():
             executor = TestExecutor(max_workers=1, strategy=ExecutionStrategy.SEQUENTIAL)
             api_logger.info(f"[ExecutionStrategy] Using forced SEQUENTIAL execution with max_workers=1 for stability")
 
+            # 评判聚合流水线：每条结果到达即开始评判，与后续 AI 调用重叠执行
+            judge_pipeline = create_judge_pipeline(brand_list, brand_list[0], execution_id=task_id)
+
             def progress_callback(exec_id, progress):
                 # 计算进度百分比
                 calculated_progress = int((progress.completed_tests / progress.total_tests) * 100) if progress.total_tests > 0 else 0
@@ -2640,19 +2639,25 @@ def submit_brand_test():
                     f"正在处理测试案例 ({progress.completed_tests}/{progress.total_tests})"
                 )
 
-            results = executor.execute_tests(all_test_cases, '', lambda eid, p: progress_callback(task_id, p), timeout=600)
+            results = executor.execute_tests(
+                all_test_cases, '', lambda eid, p: progress_callback(task_id, p), timeout=600,
+                on_task_result=lambda task, result: judge_pipeline.submit(result)
+            )
             executor.shutdown()
 
             # 更新到排名分析阶段
             update_task_stage(task_id, TaskStage.RANKING_ANALYSIS, 75, "正在进行排名分析...")
 
-            processed_results = process_and_aggregate_results_with_ai_judge(results, brand_list, brand_list[0], None, None, None)
+            # 评判已随结果到达并行进行，此处只需等待尚未完成的评判
+            processed_results = judge_pipeline.finalize(timeout=AGGREGATION_TIMEOUT_SECONDS)
 
             # 更新到信源追踪阶段
             update_task_stage(task_id, TaskStage.SOURCE_TRACING, 90, "正在进行信源追踪分析...")
 
-            # 使用真实的信源情报处理器
+            # 使用真实的信源情报处理器（依赖 snownlp，按需导入）
             try:
+                from wechat_backend.analytics.source_intelligence_processor import process_brand_source_intelligence
+
                 def run_async_processing():
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
@@ -2806,7 +2811,7 @@ def submit_brand_test():
 
 
 @wechat_bp.route('/test/status/<task_id>', methods=['GET'])
-@rate_limit(limit=20, window=60, per='endpoint')
+@polling_rate_limit()
 @monitored_endpoint('/test/status', require_auth=False, validate_inputs=False)
 def get_task_status_api(task_id):
     """
@@ -35,11 +35,9 @@ from wechat_backend.nxm_execution_engine import execute_nxm_test, verify_nxm_exe
 from wechat_backend.question_system import QuestionManager, TestCaseGenerator
 from wechat_backend.test_engine import TestExecutor, ExecutionStrategy
 from scoring_engine import ScoringEngine
-from enhanced_scoring_engine import EnhancedScoringEngine, calculate_enhanced_scores
 from ai_judge_module import AIJudgeClient, JudgeResult, ConfidenceLevel
 from wechat_backend.analytics.interception_analyst import InterceptionAnalyst
 from wechat_backend.analytics.monetization_service import MonetizationService, UserLevel
-from wechat_backend.analytics.source_intelligence_processor import SourceIntelligenceProcessor, process_brand_source_intelligence
 from wechat_backend.recommendation_generator import RecommendationGenerator, RecommendationPriority, RecommendationType
 from wechat_backend.cruise_controller import CruiseController
 from wechat_backend.market_intelligence_service import MarketIntelligenceService
@@ -31,11 +31,9 @@ from wechat_backend.nxm_execution_engine import execute_nxm_test, verify_nxm_exe
 from wechat_backend.question_system import QuestionManager, TestCaseGenerator
 from wechat_backend.test_engine import TestExecutor, ExecutionStrategy
 from scoring_engine import ScoringEngine
-from enhanced_scoring_engine import EnhancedScoringEngine, calculate_enhanced_scores
 from ai_judge_module import AIJudgeClient, JudgeResult, ConfidenceLevel
 from wechat_backend.analytics.interception_analyst import InterceptionAnalyst
 from wechat_backend.analytics.monetization_service import MonetizationService, UserLevel
-from wechat_backend.analytics.source_intelligence_processor import SourceIntelligenceProcessor, process_brand_source_intelligence
 from wechat_backend.recommendation_generator import RecommendationGenerator, RecommendationPriority, RecommendationType
 from wechat_backend.cruise_controller import CruiseController
 from wechat_backend.market_intelligence_service import MarketIntelligenceService
@@ -468,11 +466,19 @@ def logout():
     if refresh_token_str:
         from wechat_backend.database import revoke_refresh_token
         revoke_refresh_token(refresh_token_str)
+
+    # 当前访问令牌立即失效（已验证令牌缓存不再放行）
+    from wechat_backend.security.auth import jwt_manager
+    auth_header = request.headers.get('Authorization', '')
+    if jwt_manager and auth_header.startswith('Bearer '):
+        jwt_manager.revoke_token(auth_header.split(' ')[1])
     
     # Option 2: Logout from all devices (if requested)
     if data.get('all_devices', False) and user_id:
         from wechat_backend.database import revoke_all_user_tokens
         revoke_all_user_tokens(user_id)
+        if jwt_manager:
+            jwt_manager.token_cache.revoke_user(user_id)
         api_logger.info(f"All tokens revoked for user {user_id}")
     else:
         api_logger.info(f"Token revoked for user {user_id or 'anonymous'}")
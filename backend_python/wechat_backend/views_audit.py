@@ -15,6 +15,7 @@ from wechat_backend.audit_logs import (
     get_suspicious_activities,
     export_audit_logs
 )
+from wechat_backend.audit_log_writer import get_all_writer_stats
 
 # 创建审计日志蓝图
 audit_bp = Blueprint('audit', __name__, url_prefix='/audit')
@@ -273,6 +274,22 @@ def get_admin_statistics():
         return jsonify({'error': 'Failed to get admin statistics'}), 500
 
 
+@audit_bp.route('/writer-stats', methods=['GET'])
+@require_auth
+@require_admin
+@rate_limit(limit=30, window=60, per='ip')
+def get_writer_stats():
+    """
+    获取异步审计写入器状态
+    
+    返回每个写入器的 queued/enqueued/written/dropped/spilled/replayed 计数器
+    """
+    return jsonify({
+        'status': 'success',
+        'data': get_all_writer_stats()
+    })
+
+
 def init_audit_routes(app):
     """初始化审计日志路由"""
     app.register_blueprint(audit_bp)
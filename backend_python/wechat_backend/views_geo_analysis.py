@@ -21,7 +21,6 @@ from wechat_backend.logging_config import api_logger
 from wechat_backend.database import DB_PATH
 from wechat_backend.security.sql_protection import SafeDatabaseQuery
 from wechat_backend.security.input_validator import validate_execution_id
-from wechat_backend.analytics.report_generator import ReportGenerator
 from wechat_backend.analytics.impact_calculator import ImpactCalculator
 from wechat_backend.models import get_deep_intelligence_result
 
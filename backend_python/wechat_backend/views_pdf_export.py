@@ -14,6 +14,7 @@ import gzip
 import json
 from flask import Blueprint, request, Response, jsonify
 from datetime import datetime
+from typing import Any, Dict
 from wechat_backend.logging_config import api_logger
 from wechat_backend.security.rate_limiting import rate_limit
 from wechat_backend.security.auth import require_auth_optional, get_current_user_id
@@ -56,97 +57,97 @@ def export_pdf_report():
     try:
         # 获取诊断报告数据
         from wechat_backend.models import get_deep_intelligence_result
-        from wechat_backend.database import get_connection
+        from wechat_backend.database import get_connection, return_connection
 
         # 尝试从 deep_intelligence_results 获取
         deep_result = get_deep_intelligence_result(execution_id)
 
         if not deep_result:
             # 修复：从 test_records 表获取（实际存在的表）
-            with get_connection() as conn:
+            # 连接池连接的 with 语句只提交事务、不归还连接，需显式归还
+            conn = get_connection()
+            try:
                 cursor = conn.cursor()
+                # test_records 存在新旧两种表结构（user_openid/user_id、有无压缩列），按实际列读取
                 cursor.execute("""
-                    SELECT id, user_id, brand_name, test_date, ai_models_used, questions_used,
-                           overall_score, total_tests, results_summary, detailed_results,
-                           is_summary_compressed, is_detailed_compressed
-                    FROM test_records
+                    SELECT * FROM test_records
                     ORDER BY created_at DESC
                     LIMIT 10
                 """)
+                columns = [description[0] for description in cursor.description]
                 rows = cursor.fetchall()
-
-                # 查找匹配 execution_id 的记录
-                for row in rows:
-                    columns = ['id', 'user_id', 'brand_name', 'test_date', 'ai_models_used', 
-                               'questions_used', 'overall_score', 'total_tests', 'results_summary', 
-                               'detailed_results', 'is_summary_compressed', 'is_detailed_compressed']
-                    record_data = dict(zip(columns, row))
-                    
-                    # 解析 results_summary（可能需要解压）
-                    results_summary_raw = record_data.get('results_summary')
-                    is_compressed = record_data.get('is_summary_compressed', 0)
+            finally:
+                return_connection(conn)
+
+            # 查找匹配 execution_id 的记录
+            for row in rows:
+                record_data = dict(zip(columns, row))
+                
+                # 解析 results_summary（可能需要解压）
+                results_summary_raw = record_data.get('results_summary')
+                is_compressed = record_data.get('is_summary_compressed', 0)
+                
+                try:
+                    if is_compressed and results_summary_raw:
+                        results_summary_bytes = gzip.decompress(results_summary_raw)
+                        results_summary = json.loads(results_summary_bytes.decode('utf-8'))
+                    elif results_summary_raw:
+                        results_summary = json.loads(results_summary_raw)
+                    else:
+                        results_summary = {}
+                except (json.JSONDecodeError, TypeError, gzip.BadGzipFile):
+                    results_summary = {}
+                
+                # 检查是否匹配 execution_id
+                summary_exec_id = results_summary.get('execution_id', '')
+                if summary_exec_id == execution_id:
+                    # 解析 detailed_results
+                    detailed_results_raw = record_data.get('detailed_results')
+                    is_detailed_compressed = record_data.get('is_detailed_compressed', 0)
                     
                     try:
-                        if is_compressed and results_summary_raw:
-                            results_summary_bytes = gzip.decompress(results_summary_raw)
-                            results_summary = json.loads(results_summary_bytes.decode('utf-8'))
-                        elif results_summary_raw:
-                            results_summary = json.loads(results_summary_raw)
+                        if is_detailed_compressed and detailed_results_raw:
+                            detailed_results_bytes = gzip.decompress(detailed_results_raw)
+                            detailed_results = json.loads(detailed_results_bytes.decode('utf-8'))
+                        elif detailed_results_raw:
+                            detailed_results = json.loads(detailed_results_raw)
                         else:
-                            results_summary = {}
-                    except (json.JSONDecodeError, TypeError, gzip.BadGzipFile):
-                        results_summary = {}
-                    
-                    # 检查是否匹配 execution_id
-                    summary_exec_id = results_summary.get('execution_id', '')
-                    if summary_exec_id == execution_id:
-                        # 解析 detailed_results
-                        detailed_results_raw = record_data.get('detailed_results')
-                        is_detailed_compressed = record_data.get('is_detailed_compressed', 0)
-                        
-                        try:
-                            if is_detailed_compressed and detailed_results_raw:
-                                detailed_results_bytes = gzip.decompress(detailed_results_raw)
-                                detailed_results = json.loads(detailed_results_bytes.decode('utf-8'))
-                            elif detailed_results_raw:
-                                detailed_results = json.loads(detailed_results_raw)
-                            else:
-                                detailed_results = []
-                        except (json.JSONDecodeError, TypeError, gzip.BadGzipFile):
                             detailed_results = []
+                    except (json.JSONDecodeError, TypeError, gzip.BadGzipFile):
+                        detailed_results = []
 
-                        # 解析其他 JSON 字段
-                        try:
-                            ai_models_used = json.loads(record_data.get('ai_models_used', '[]'))
-                            questions_used = json.loads(record_data.get('questions_used', '[]'))
-                        except Exception as e:
-
-                            pass  # TODO: 添加适当的错误处理
-                            ai_models_used = []
-                            questions_used = []
-
-                        # 构建 deep_result
-                        deep_result = {
-                            'execution_id': summary_exec_id,
-                            'result_id': record_data.get('id'),
-                            'brand_name': record_data.get('brand_name', '未知品牌'),
-                            'test_date': record_data.get('test_date', ''),
-                            'ai_models_used': ai_models_used,
-                            'questions_used': questions_used,
-                            'overall_score': record_data.get('overall_score', 0) or 0,
-                            'total_tests': record_data.get('total_tests', 0) or 0,
-                            'results_summary': results_summary,
-                            'detailed_results': detailed_results,
-                            'platform_scores': [],
-                            'dimension_scores': {}
-                        }
-                        
-                        # 从 results_summary 中提取更多信息
-                        if results_summary:
-                            deep_result['competitor_brands'] = results_summary.get('competitor_brands', [])
-                            deep_result['formula'] = results_summary.get('formula', '')
-                        
-                        break
+                    # 解析其他 JSON 字段
+                    try:
+                        ai_models_used = json.loads(record_data.get('ai_models_used', '[]'))
+                        questions_used = json.loads(record_data.get('questions_used', '[]'))
+                    except Exception as e:
+
+                        pass  # TODO: 添加适当的错误处理
+                        ai_models_used = []
+                        questions_used = []
+
+                    # 构建 deep_result
+                    deep_result = {
+                        'execution_id': summary_exec_id,
+                        'result_id': record_data.get('id'),
+                        'brand_name': record_data.get('brand_name', '未知品牌'),
+                        'test_date': record_data.get('test_date', ''),
+                        'ai_models_used': ai_models_used,
+                        'questions_used': questions_used,
+                        'overall_score': record_data.get('overall_score', 0) or 0,
+                        'total_tests': record_data.get('total_tests', 0) or 0,
+                        'results_summary': results_summary,
+                        'detailed_results': detailed_results,
+                        'platform_scores': [],
+                        'dimension_scores': {}
+                    }
+                    
+                    # 从 results_summary 中提取更多信息
+                    if results_summary:
+                        deep_result['competitor_brands'] = results_summary.get('competitor_brands', [])
+                        deep_result['formula'] = results_summary.get('formula', '')
+                    
+                    break
 
         if not deep_result:
             return jsonify({'error': 'Test result not found', 'code': 'RESULT_NOT_FOUND'}), 404
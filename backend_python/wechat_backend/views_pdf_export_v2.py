@@ -7,12 +7,14 @@ PDF 报告导出 API 端点
 日期：2026-02-21
 """
 
-from flask import Blueprint, request, Response, jsonify, send_file
+from flask import Blueprint, request, Response, jsonify, send_file, stream_with_context
 from datetime import datetime
 import os
+from typing import Dict
 from wechat_backend.logging_config import api_logger
 from wechat_backend.security.rate_limiting import rate_limit
-from wechat_backend.security.auth import require_auth_optional, get_current_user_id
+from wechat_backend.security.auth import require_auth_optional, get_current_user_id, is_authenticated
+from wechat_backend.monitoring.stage_metrics import time_stage, STAGE_PDF_RENDER
 
 # 创建 Blueprint
 pdf_export_v2_bp = Blueprint('pdf_export_v2', __name__)
@@ -100,6 +102,53 @@ def get_full_report_data():
         }), 500
 
 
+@pdf_export_v2_bp.route('/api/export/results-stream', methods=['GET'])
+@require_auth_optional
+@rate_limit(limit=5, window=60, per='endpoint')
+def stream_diagnosis_results():
+    """
+    流式导出诊断结果明细（适合大批量历史数据）
+
+    Query Parameters:
+    - format: 导出格式 (ndjson, csv, xlsx) default: ndjson
+    - executionIds: 执行 ID 列表 (comma-separated)
+    - brandName: 品牌名称
+
+    已登录用户只导出自己的数据；未登录时必须指定 executionIds。
+
+    Returns:
+    - 分块传输的文件下载
+    """
+    from wechat_backend.services.export_service import ExportService
+
+    format_type = request.args.get('format', 'ndjson').lower()
+    execution_ids = [e.strip() for e in request.args.get('executionIds', '').split(',') if e.strip()]
+    brand_name = request.args.get('brandName') or None
+    user_id = get_current_user_id() if is_authenticated() else None
+
+    if not user_id and not execution_ids:
+        return jsonify({'error': 'executionIds is required', 'code': 'MISSING_EXECUTION_ID'}), 400
+
+    result = ExportService.stream_export(
+        format_type, execution_ids=execution_ids or None, user_id=user_id, brand_name=brand_name
+    )
+    if not result['success']:
+        return jsonify({'error': result['error'], 'code': 'UNSUPPORTED_FORMAT'}), 400
+
+    api_logger.info(
+        f"流式导出开始：format={format_type}, user={user_id}, executions={len(execution_ids)}"
+    )
+    return Response(
+        stream_with_context(result['stream']),
+        mimetype=result['mimetype'],
+        headers={
+            'Content-Disposition': f'attachment; filename="{result["filename"]}"',
+            'Access-Control-Expose-Headers': 'Content-Disposition',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @pdf_export_v2_bp.route('/api/export/pdf', methods=['GET'])
 @require_auth_optional
 @rate_limit(limit=5, window=60, per='endpoint')
@@ -145,7 +194,8 @@ def export_pdf_report():
             report_data = report_service.generate_full_report(execution_id)
             
             pdf_service = PDFExportService()
-            pdf_data = pdf_service.generate_enhanced_report(report_data, level, sections)
+            with time_stage(STAGE_PDF_RENDER, execution_id):
+                pdf_data = pdf_service.generate_enhanced_report(report_data, level, sections)
             
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"report_{execution_id}_{timestamp}.pdf"
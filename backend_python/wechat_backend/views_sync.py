@@ -9,6 +9,7 @@
 3. 结果上传 (Result Upload)
 4. 结果删除 (Result Delete)
 5. SQLite 持久化存储 (Persistent Storage)
+6. 批量增量同步 (Batch Delta Sync)
 """
 
 import json
@@ -58,15 +59,11 @@ def sync_data():
         # 获取持久化存储
         storage = get_sync_storage()
         
-        # 处理上传的结果
+        # 处理上传的结果（单事务批量 UPSERT）
         uploaded_count = 0
         if local_results:
-            for result in local_results:
-                result_id = result.get('result_id')
-                if result_id:
-                    # 保存到 SQLite
-                    storage.save_result(user_id, result)
-                    uploaded_count += 1
+            batch_stats = storage.save_results_batch(user_id, local_results)
+            uploaded_count = batch_stats['saved'] + batch_stats['unchanged']
         
         # 获取需要同步的云端结果（增量获取）
         cloud_results = storage.get_results(user_id, last_sync_timestamp, limit=50)
@@ -147,6 +144,93 @@ def download_data():
         }), 500
 
 
+@sync_bp.route('/api/sync/batch', methods=['POST'])
+@require_auth_optional
+@rate_limit(limit=10, window=60, per='endpoint')
+def sync_batch():
+    """
+    批量增量同步（基于同步游标）
+    
+    客户端只需上传本地变更的结果，服务端按内容哈希跳过未变化的行，
+    并返回游标之后的云端变更。
+    
+    Request Body:
+        - results: 本地变更的结果列表（可选）
+        - cursor: 上次同步游标（可选，缺省为 0 即全量）
+        - limit: 下载数量限制（可选）
+    
+    Response:
+        - status: 状态
+        - saved_count: 写入数量
+        - unchanged_count: 内容未变化而跳过的数量
+        - invalid_count: 无效（缺少 result_id 或超出批量上限）的数量
+        - cloud_results: 游标之后的云端结果（按 sync_seq 升序）
+        - deleted_ids: 游标之后在云端删除的结果 ID
+        - cursor: 新的同步游标
+        - has_more: 是否有更多数据
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = get_current_user_id() or 'anonymous'
+        
+        local_results = data.get('results') or []
+        if not isinstance(local_results, list):
+            return jsonify({
+                'status': 'error',
+                'error': 'results must be a list',
+                'code': 'INVALID_RESULTS'
+            }), 400
+        
+        try:
+            since_cursor = int(data.get('cursor') or 0)
+            limit = max(1, min(int(data.get('limit', 50)), 200))
+        except (TypeError, ValueError):
+            return jsonify({
+                'status': 'error',
+                'error': 'cursor and limit must be integers',
+                'code': 'INVALID_CURSOR'
+            }), 400
+        
+        storage = get_sync_storage()
+        batch_stats = storage.save_results_batch(user_id, local_results)
+        if 'error' in batch_stats:
+            return jsonify({
+                'status': 'error',
+                'error': 'Failed to save results',
+                'code': 'SAVE_ERROR'
+            }), 500
+        
+        changes = storage.get_results(user_id, limit=limit, since_cursor=since_cursor)
+        next_cursor = changes[-1]['sync_seq'] if changes else since_cursor
+        cloud_results = [r for r in changes if not r.get('is_deleted')]
+        deleted_ids = [r['result_id'] for r in changes if r.get('is_deleted')]
+        
+        api_logger.info(
+            f'批量同步完成：user_id={user_id}, saved={batch_stats["saved"]}, '
+            f'unchanged={batch_stats["unchanged"]}, downloaded={len(cloud_results)}, '
+            f'deleted={len(deleted_ids)}'
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'saved_count': batch_stats['saved'],
+            'unchanged_count': batch_stats['unchanged'],
+            'invalid_count': batch_stats['invalid'],
+            'cloud_results': cloud_results,
+            'deleted_ids': deleted_ids,
+            'cursor': next_cursor,
+            'has_more': len(changes) >= limit
+        })
+        
+    except Exception as e:
+        api_logger.error(f'批量同步失败：{e}', exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'code': 'SYNC_ERROR'
+        }), 500
+
+
 @sync_bp.route('/api/sync/upload-result', methods=['POST'])
 @require_auth_optional
 @rate_limit(limit=30, window=60, per='endpoint')